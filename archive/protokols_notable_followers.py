@@ -25,10 +25,16 @@ import argparse
 import requests
 import csv
 import urllib.parse
+import sys
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, List, Optional, Union, Any
 import logging
 
+# Permite importar src/ al ejecutar el script desde archive/
+sys.path.append(str(Path(__file__).parent.parent))
+from src.utils.rate_scheduler import BACKGROUND, get_rate_scheduler
+
 # Configuración de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -64,6 +70,8 @@ class ProtokolsNotableFollowersExtractor:
         
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        # Cubo compartido con el servidor de webhooks y el bot: las exportaciones van en segundo plano
+        self.rate_scheduler = get_rate_scheduler()
         
         # Cargar cookies
         if cookies_dict:
@@ -110,6 +118,21 @@ class ProtokolsNotableFollowersExtractor:
                 if 'name' in cookie and 'value' in cookie:
                     self.session.cookies.set(cookie['name'], cookie['value'])
     
+    def _get(self, url: str) -> requests.Response:
+        """
+        GET a Protokols con prioridad de segundo plano en el planificador de tasa.
+        
+        Args:
+            url: URL de la petición
+            
+        Returns:
+            requests.Response: Respuesta recibida
+        """
+        self.rate_scheduler.acquire(BACKGROUND)
+        response = self.session.get(url)
+        self.rate_scheduler.observe(response)
+        return response
+    
     def verify_session(self) -> bool:
         """
         Verifica si la sesión actual es válida.
@@ -119,7 +142,7 @@ class ProtokolsNotableFollowersExtractor:
         """
         try:
             # Intentar hacer una solicitud simple para verificar la sesión
-            response = self.session.get("https://api.protokols.io/api/trpc/auth.getProfileAndUser?batch=1&input=%7B%220%22%3A%7B%22json%22%3A%7B%7D%7D%7D")
+            response = self._get("https://api.protokols.io/api/trpc/auth.getProfileAndUser?batch=1&input=%7B%220%22%3A%7B%22json%22%3A%7B%7D%7D%7D")
             
             # Verificar si la respuesta es exitosa
             if response.status_code == 200:
@@ -162,7 +185,7 @@ class ProtokolsNotableFollowersExtractor:
         for attempt in range(max_retries):
             try:
                 logger.info(f"Extrayendo notable followers para @{username} (intento {attempt+1}/{max_retries})")
-                response = self.session.get(url)
+                response = self._get(url)
                 
                 # Verificar si la respuesta fue exitosa
                 if response.status_code == 200:
@@ -257,7 +280,7 @@ class ProtokolsNotableFollowersExtractor:
             }
     
     def process_multiple_users(self, usernames: List[str], output_file: Optional[str] = None, 
-                              output_format: str = "json", delay: int = 1) -> Dict:
+                              output_format: str = "json", delay: float = 0) -> Dict:
         """
         Procesa múltiples usuarios y opcionalmente guarda los resultados en un archivo.
         
@@ -265,7 +288,8 @@ class ProtokolsNotableFollowersExtractor:
             usernames: Lista de nombres de usuario de Twitter
             output_file: Ruta al archivo donde guardar los resultados (opcional)
             output_format: Formato de salida (json, csv, texto)
-            delay: Tiempo de espera entre solicitudes (en segundos)
+            delay: Pausa adicional entre usuarios (en segundos); el ritmo lo marca el
+                   planificador de tasa compartido
             
         Returns:
             Dict: Resultados para todos los usuarios procesados
@@ -288,7 +312,7 @@ class ProtokolsNotableFollowersExtractor:
                 notable_count = results[username].get("notable_followers_count", 0)
                 print(f"✅ @{username}: {notable_count:,} notable followers")
             
-            # Esperar un poco entre solicitudes para evitar límites de tasa
+            # El planificador ya espacia las peticiones; esta pausa es opcional
             if delay > 0 and username != usernames[-1]:  # No esperar después del último usuario
                 time.sleep(delay)
         
@@ -402,8 +426,8 @@ def main():
                        help="Archivo de salida para guardar los resultados")
     parser.add_argument("--format", "-f", choices=["json", "csv", "texto"], default="json",
                        help="Formato de salida")
-    parser.add_argument("--delay", "-d", type=int, default=1,
-                       help="Tiempo de espera entre solicitudes (en segundos)")
+    parser.add_argument("--delay", "-d", type=float, default=0,
+                       help="Pausa adicional entre usuarios (en segundos); el ritmo lo marca PROTOKOLS_RATE")
     
     args = parser.parse_args()
     
@@ -44,6 +44,13 @@ try:
     # Importar el script de monitoreo de tokens
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
     import token_monitor_with_notable_check as token_monitor
+    from src.services.webhook_subscription import WebhookSubscriptionManager
+    from src.utils.config import config
+    from src.utils.deadline import Deadline
+    from src.utils.handoff import HandoffStore
+    from src.utils.log_stream import LogStreamSource
+    from src.utils.prefilter import PreFilter
+    from src.utils.sharding import create_ingestion_queue
     logger.info("Módulo token_monitor_with_notable_check importado correctamente")
 except Exception as e:
     logger.error(f"Error al importar token_monitor_with_notable_check: {e}")
@@ -191,15 +198,25 @@ def index():
 def webhook_handler():
     """Manejador de webhook para recibir notificaciones de Helius."""
     try:
-        notification = request.json
-        logger.info(f"Notificación recibida: {json.dumps(notification)[:100]}...")
+        # El presupuesto de tiempo de cada token empieza al recibir el webhook
+        deadline = Deadline()
+        if not ingestion_queue.accepting:
+            return jsonify({"status": "error", "message": "Servidor no acepta notificaciones"}), 503
+        body = request.get_data()
+        transactions = prefilter.filter_body(body)
+        if not transactions:
+            return jsonify({"status": "success", "message": "Notificación descartada por el filtro previo"}), 200
+        logger.info(f"Notificación recibida: {body[:100].decode('utf-8', errors='replace')}...")
         
         # Actualizar estadísticas
         update_stats('notifications_received', increment=True)
         update_stats('last_notification_time', time.time())
         
-        # Procesar la notificación en un hilo separado
-        threading.Thread(target=process_notification, args=(notification,)).start()
+        # Encolar la notificación para el pool de workers
+        rejected = enqueue_transactions(transactions, deadline)
+        if rejected:
+            logger.warning(f"Cola de ingestión llena, {len(rejected)} transacción(es) rechazada(s)")
+            return jsonify({"status": "error", "message": "Cola llena, reintentar más tarde"}), 429, {"Retry-After": str(config.INGESTION_RETRY_AFTER)}
         
         return jsonify({"status": "success", "message": "Notificación recibida y en procesamiento"}), 200
     except Exception as e:
@@ -208,26 +225,108 @@ def webhook_handler():
         update_stats('last_error', str(e))
         return jsonify({"status": "error", "message": str(e)}), 500
 
-def process_notification(notification):
-    """Procesa una notificación de webhook."""
-    try:
-        result = token_monitor.process_webhook_notification(notification)
-        
-        update_stats('tokens_processed', increment=True)
+def enqueue_transactions(transactions, deadline):
+    """
+    Encola transacciones ya aceptadas por el filtro previo. Las que no caben se olvidan
+    en el filtro para que su reintento vuelva a aceptarse; se retornan.
+    """
+    rejected = [tx for tx in transactions if not ingestion_queue.submit((tx, deadline))]
+    for tx in rejected:
+        prefilter.forget(tx.get('signature'))
+    return rejected
+
+def ingest_stream_transactions(transactions, deadline):
+    """Ingiere las transacciones detectadas por la fuente en streaming, como un webhook más."""
+    accepted = prefilter.filter_parsed(transactions)
+    if not accepted:
+        return
+    update_stats('notifications_received', increment=True)
+    update_stats('last_notification_time', time.time())
+    rejected = enqueue_transactions(accepted, deadline)
+    if rejected:
+        logger.warning(f"Cola de ingestión llena, {len(rejected)} transacción(es) del streaming descartada(s)")
+
+def record_result(result):
+    """
+    Registra en las estadísticas el resultado de una notificación procesada.
+    Se ejecuta en este proceso aunque la notificación se procese en un proceso worker.
+    """
+    update_stats('tokens_processed', increment=True)
+    
+    if result:
+        update_stats('last_processed_token', result['token_address'])
         
-        if result:
-            update_stats('last_processed_token', result['token_address'])
-            
-            if result['approved']:
-                update_stats('tokens_approved', increment=True)
-                logger.info(f"Token aprobado: {result['token_address']} (Usuario: {result['twitter_username']}, Notable followers: {result['notable_followers_count']})")
-            else:
-                update_stats('tokens_rejected', increment=True)
-                logger.info(f"Token rechazado: {result['token_address']} (Usuario: {result['twitter_username']}, Notable followers: {result['notable_followers_count']})")
-    except Exception as e:
-        logger.error(f"Error al procesar notificación: {e}")
-        update_stats('errors', increment=True)
-        update_stats('last_error', str(e))
+        if result['approved']:
+            update_stats('tokens_approved', increment=True)
+            logger.info(f"Token aprobado: {result['token_address']} (Usuario: {result['twitter_username']}, Notable followers: {result['notable_followers_count']})")
+        else:
+            update_stats('tokens_rejected', increment=True)
+            logger.info(f"Token rechazado: {result['token_address']} (Usuario: {result['twitter_username']}, Notable followers: {result['notable_followers_count']})")
+
+def record_error(error):
+    """Registra en las estadísticas el error de una notificación fallida."""
+    logger.error(f"Error al procesar notificación: {error}")
+    update_stats('errors', increment=True)
+    update_stats('last_error', str(error))
+
+# Los tokens recuperados por un reintento de metadatos también cuentan en las estadísticas
+token_monitor.retry_result_handler = record_result
+
+def record_shed(item):
+    """
+    Registra una notificación ya confirmada que la cola desalojó por una de mayor
+    prioridad y la olvida en el filtro previo para poder volver a ingerirla.
+    """
+    notification_data, _ = item
+    signature = notification_data.get('signature')
+    prefilter.forget(signature)
+    logger.warning(f"Notificación desalojada sin procesar: firma {signature}, "
+                   f"token {token_monitor.notification_shard_key(item)}")
+
+# Cola compartida para procesar las notificaciones (junto con su deadline): pool de
+# hilos con prioridad por launchpad o, con INGESTION_PROCESSES > 1, procesos worker
+# repartidos por mint
+ingestion_queue = create_ingestion_queue(
+    token_monitor.process_queued_notification,
+    token_monitor.notification_shard_key,
+    name="deploy",
+    on_result=record_result,
+    on_error=record_error,
+    classify=token_monitor.notification_launchpad,
+    on_shed=record_shed
+)
+
+# Filtro previo: descarta transacciones irrelevantes antes de parsear y registrar
+prefilter = PreFilter()
+
+# Notificaciones pendientes que un proceso deja al siguiente al redesplegar
+handoff_store = HandoffStore()
+
+# Fuente en streaming por websocket (ver start_stream_source), si está activada
+stream_source = None
+
+def resume_handoff():
+    """Vuelve a encolar las notificaciones que dejó pendientes el proceso anterior."""
+    items = token_monitor.resume_items(handoff_store.claim())
+    rejected = [item for item in items if not ingestion_queue.submit(item)]
+    if rejected:
+        logger.warning(f"Cola llena al reanudar, {len(rejected)} notificación(es) devueltas al traspaso")
+        handoff_store.save(token_monitor.checkpoint_items(rejected))
+    if items:
+        logger.info(f"Reanudadas {len(items) - len(rejected)} notificación(es) del proceso anterior")
+
+def drain_and_handoff(grace=None):
+    """
+    Deja de aceptar notificaciones, espera a que se procese la cola durante el periodo
+    de gracia y guarda en disco lo que quede pendiente para el siguiente proceso.
+    """
+    grace = config.DRAIN_GRACE_PERIOD if grace is None else grace
+    if stream_source:
+        stream_source.stop(timeout=1)
+    logger.info(f"Drenando la cola de ingestión (periodo de gracia {grace}s)...")
+    pending = ingestion_queue.drain(grace)
+    handoff_store.save(token_monitor.checkpoint_items(pending))
+    return len(pending)
 
 @app.route('/status', methods=['GET'])
 def status():
@@ -238,7 +337,13 @@ def status():
     return jsonify({
         "status": "online",
         "uptime": uptime_str,
-        "stats": stats
+        "stats": stats,
+        "ingestion_queue": ingestion_queue.metrics(),
+        "deadline": token_monitor.deadline_metrics.metrics(),
+        "prefilter": prefilter.metrics(),
+        "stream": stream_source.metrics() if stream_source else None,
+        "http": token_monitor.http_client.metrics(),
+        "protokols_rate": token_monitor.get_rate_scheduler().metrics()
     })
 
 @app.route('/dashboard', methods=['GET'])
@@ -288,11 +393,32 @@ def dashboard():
     return render_template_string(html, stats=stats, uptime=uptime_str, last_notification=last_notification)
 
 def signal_handler(sig, frame):
-    """Manejador de señales para salida limpia."""
+    """Manejador de señales para salida limpia: drena la cola y traspasa lo pendiente."""
     logger.info("Deteniendo el servidor...")
+    try:
+        drain_and_handoff()
+    except Exception as e:
+        logger.error(f"Error al drenar la cola de ingestión: {e}")
     save_stats()
     sys.exit(0)
 
+def start_stream_source():
+    """Arranca la suscripción por websocket a los logs de las wallets de launchpad."""
+    global stream_source
+    try:
+        stream_source = LogStreamSource(ingest_stream_transactions, seen=prefilter.seen)
+        stream_source.start()
+    except Exception as e:
+        stream_source = None
+        logger.error(f"Error al iniciar la fuente en streaming: {e}")
+
+def sync_webhook_subscription():
+    """Sincroniza el webhook de Helius con las wallets y tipos configurados (filtrado en origen)."""
+    try:
+        WebhookSubscriptionManager(config.HELIUS_WEBHOOK_URL).sync()
+    except Exception as e:
+        logger.error(f"Error al sincronizar el webhook de Helius: {e}")
+
 def main():
     parser = argparse.ArgumentParser(description="Servidor de webhook para monitoreo de tokens.")
     parser.add_argument("--port", type=int, default=PORT, help="Puerto para el servidor webhook")
@@ -308,6 +434,17 @@ def main():
     # Cargar estadísticas previas
     load_stats()
     
+    # Reanudar el trabajo pendiente del proceso anterior (redespliegue)
+    resume_handoff()
+    
+    # Mantener la suscripción del webhook de Helius alineada con KNOWN_WALLETS
+    if config.HELIUS_WEBHOOK_SYNC:
+        sync_webhook_subscription()
+    
+    # Fuente en streaming de baja latencia; deduplica contra los webhooks con el filtro previo
+    if config.STREAM_ENABLED:
+        start_stream_source()
+    
     # Verificar que el módulo token_monitor funcione correctamente
     try:
         cookies = token_monitor.load_cookies_from_file()
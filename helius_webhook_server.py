@@ -10,14 +10,18 @@ Este servidor:
 """
 
 from flask import Flask, request, jsonify
-import json
 import os
-import threading
 import time
 from pathlib import Path
 import logging
 import argparse
 import sys
+import threading
+
+from src.utils.config import config
+from src.utils import fast_json
+from src.utils.journal import Journal
+from src.utils.work_queue import WorkQueue
 
 # Importamos el procesador de tokens
 try:
@@ -42,108 +46,102 @@ logger = logging.getLogger("helius_webhook")
 NOTIFICATIONS_DIR = Path("notifications")
 NOTIFICATIONS_DIR.mkdir(exist_ok=True)
 
+# Journal append-only donde se guardan todas las notificaciones aceptadas; se abre con
+# la primera notificación para que importar el módulo no cree el directorio ni el hilo
+notification_journal = None
+_journal_lock = threading.Lock()
+
+def get_notification_journal():
+    """
+    Retorna el journal de notificaciones del proceso, abriéndolo la primera vez.
+    """
+    global notification_journal
+    with _journal_lock:
+        if notification_journal is None:
+            notification_journal = Journal(config.JOURNAL_DIR)
+    return notification_journal
+
 # Crear la aplicación Flask
 app = Flask(__name__)
 
-# Cola de notificaciones para procesamiento asíncrono
-notification_queue = []
-processing_thread = None
-processing_active = False
-
-def save_notification(data, notification_id=None):
+def save_notification(body):
     """
-    Guarda una notificación en un archivo JSON.
+    Añade una notificación al journal de ingestión y espera a que esté en disco.
+    El cuerpo se guarda tal como llegó, sin volver a serializarlo.
     
     Args:
-        data (dict): Datos de la notificación
-        notification_id (str, optional): ID único para la notificación
+        body (bytes): Cuerpo JSON de la notificación
     
     Returns:
-        str: Ruta del archivo donde se guardó la notificación
+        int: Offset de la notificación en el journal
     """
-    if notification_id is None:
-        notification_id = str(int(time.time()))
-    
-    filename = NOTIFICATIONS_DIR / f"notification_{notification_id}.json"
-    
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=2)
-    
-    logger.info(f"Notificación guardada en {filename}")
-    return str(filename)
+    record = b'{"received_at":%.6f,"payload":%s}' % (time.time(), body)
+    offset = get_notification_journal().append_raw(record, sync=True)
+    logger.info(f"Notificación guardada en el journal (offset {offset})")
+    return offset
 
-def process_notification_queue():
-    """
-    Procesa las notificaciones en la cola de forma asíncrona.
+def process_notification(notification_data):
     """
-    global processing_active
+    Procesa una notificación extraída de la cola de ingestión.
     
-    logger.info("Iniciando procesamiento de cola de notificaciones")
-    processing_active = True
+    Args:
+        notification_data (dict): Datos de la notificación
+    """
+    # Procesar la notificación si el procesador está disponible
+    if not TOKEN_PROCESSOR_AVAILABLE:
+        logger.warning("Procesador de tokens no disponible, notificación guardada pero no procesada")
+        return
     
-    while processing_active and notification_queue:
-        try:
-            # Obtener la siguiente notificación de la cola
-            notification_data = notification_queue.pop(0)
-            
-            logger.info(f"Procesando notificación {len(notification_queue) + 1} restantes en cola")
-            
-            # Procesar la notificación si el procesador está disponible
-            if TOKEN_PROCESSOR_AVAILABLE:
-                try:
-                    result = process_webhook_notification(notification_data)
-                    
-                    if result:
-                        logger.info(f"Notificación procesada exitosamente: {result.get('token_address')}")
-                        
-                        # Aquí se podría implementar la verificación de notable followers
-                        # y la exportación al Maestro Bot si cumple los criterios
-                    else:
-                        logger.warning("No se pudo procesar la notificación correctamente")
-                except Exception as e:
-                    logger.error(f"Error al procesar notificación: {str(e)}")
-            else:
-                logger.warning("Procesador de tokens no disponible, notificación guardada pero no procesada")
+    try:
+        result = process_webhook_notification(notification_data)
+        
+        if result:
+            logger.info(f"Notificación procesada exitosamente: {result.get('token_address')}")
             
-            # Pequeña pausa para no sobrecargar el sistema
-            time.sleep(1)
-        except Exception as e:
-            logger.error(f"Error en el hilo de procesamiento: {str(e)}")
-    
-    logger.info("Procesamiento de cola finalizado")
-    processing_active = False
+            # Aquí se podría implementar la verificación de notable followers
+            # y la exportación al Maestro Bot si cumple los criterios
+        else:
+            logger.warning("No se pudo procesar la notificación correctamente")
+    except Exception as e:
+        logger.error(f"Error al procesar notificación: {str(e)}")
+
+# Cola de notificaciones atendida por un pool fijo de workers
+notification_queue = WorkQueue(process_notification, name="helius_webhook")
 
 @app.route('/webhook', methods=['POST'])
 def webhook_handler():
     """
     Manejador principal para las notificaciones del webhook.
     """
-    global processing_thread
-    
     try:
-        # Obtener los datos de la solicitud
-        data = request.json
+        # Parsear el cuerpo una sola vez; el journal guarda los bytes originales
+        body = request.get_data()
+        try:
+            data = fast_json.loads(body) if body else None
+        except ValueError:
+            data = None
         
         if not data:
             logger.warning("Solicitud recibida sin datos JSON")
             return jsonify({"status": "error", "message": "No se recibieron datos JSON"}), 400
         
-        # Generar un ID único para esta notificación
-        notification_id = str(int(time.time()))
-        
-        # Guardar la notificación
-        save_notification(data, notification_id)
+        if not notification_queue.accepting:
+            return jsonify({"status": "error", "message": "Servidor no acepta notificaciones"}), 503
         
-        # Agregar a la cola de procesamiento
-        notification_queue.append(data)
+        # Guardar la notificación antes de encolarla: si el journal falla se responde 500
+        # sin haber procesado nada. Su offset en el journal es su ID único
+        notification_id = str(save_notification(body))
         
-        # Iniciar hilo de procesamiento si no está activo
-        if processing_thread is None or not processing_thread.is_alive():
-            processing_thread = threading.Thread(target=process_notification_queue)
-            processing_thread.daemon = True
-            processing_thread.start()
+        # Agregar a la cola de procesamiento; si está llena, aplicar backpressure. El
+        # registro ya guardado se queda en el journal, como cualquier reentrega de Helius
+        if not notification_queue.submit(data):
+            logger.warning(f"Cola de notificaciones llena, notificación rechazada (ID: {notification_id})")
+            return jsonify({
+                "status": "error",
+                "message": "Cola llena, reintentar más tarde"
+            }), 429, {"Retry-After": str(config.INGESTION_RETRY_AFTER)}
         
-        logger.info(f"Notificación recibida y agregada a la cola (ID: {notification_id})")
+        logger.info(f"Notificación recibida y agregada a la cola (ID: {notification_id}): {body[:100].decode('utf-8', errors='replace')}...")
         
         # Responder con éxito
         return jsonify({
@@ -175,13 +173,15 @@ def status():
     """
     Endpoint para verificar el estado del servidor.
     """
+    queue_metrics = notification_queue.metrics()
     return jsonify({
         "status": "online",
-        "queue_size": len(notification_queue),
-        "processing_active": processing_active,
+        "queue_size": queue_metrics['depth'],
+        "processing_active": queue_metrics['busy_workers'] > 0,
+        "ingestion_queue": queue_metrics,
         "token_processor_available": TOKEN_PROCESSOR_AVAILABLE,
         "notifications_dir": str(NOTIFICATIONS_DIR),
-        "saved_notifications": len(list(NOTIFICATIONS_DIR.glob("*.json")))
+        "journal": get_notification_journal().metrics()
     })
 
 def main():
@@ -196,6 +196,8 @@ def main():
     
     logger.info(f"Iniciando servidor en el puerto {args.port}")
     logger.info(f"Directorio de notificaciones: {NOTIFICATIONS_DIR}")
+    journal = get_notification_journal()
+    logger.info(f"Journal de notificaciones: {journal.directory} (offset {journal.end_offset})")
     logger.info(f"Procesador de tokens disponible: {TOKEN_PROCESSOR_AVAILABLE}")
     
     # Iniciar el servidor Flask
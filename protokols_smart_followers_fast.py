@@ -9,7 +9,6 @@ Uso:
 Requiere cookies válidas en 'protokols_cookies.json'.
 """
 
-import requests
 import json
 import urllib.parse
 import sys
@@ -19,6 +18,12 @@ from concurrent.futures import ThreadPoolExecutor
 import time
 import argparse
 
+from src.utils import http_client
+from src.utils.config import config
+from src.utils.cookie_store import get_cookie_store
+from src.utils.rate_scheduler import BACKGROUND, INTERACTIVE, LIVE, get_rate_scheduler
+from src.utils.single_flight import SingleFlight
+
 # Configuración de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -26,11 +31,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger("SmartFollowersFast")
 
-COOKIES_FILE = "protokols_cookies.json"
+COOKIES_FILE = config.PROTOKOLS_COOKIES_FILE
 SMART_FOLLOWERS_URL = "https://api.protokols.io/api/trpc/smartFollowers.getPaginatedSmartFollowers"
 MAX_WORKERS = 5  # Número máximo de hilos para peticiones concurrentes
 REQUEST_TIMEOUT = 10  # Timeout en segundos para las peticiones
 
+# Consultas de notables en curso: las concurrentes para el mismo usuario y prioridad comparten una petición
+notables_flights = SingleFlight("protokols_notables")
+
 def load_cookies(cookies_file: str) -> Dict:
     try:
         with open(cookies_file, "r", encoding="utf-8") as f:
@@ -46,32 +54,26 @@ def load_cookies(cookies_file: str) -> Dict:
         logger.error(f"No se pudieron cargar las cookies: {e}")
         return {}
 
+def protokols_get(url: str, username: str, cookies: Dict, timeout: float = REQUEST_TIMEOUT,
+                  priority: str = LIVE):
+    """
+    GET a Protokols pasando por el planificador de tasa compartido.
+
+    La espera en la cola cuenta dentro del timeout, y un 429/503 con Retry-After
+    pausa al resto de peticiones a Protokols de todos los procesos.
+    """
+    scheduler = get_rate_scheduler()
+    waited = scheduler.acquire(priority, timeout)
+    response = http_client.get(url, headers=build_headers(username), cookies=cookies,
+                               timeout=max(0.1, timeout - waited))
+    scheduler.observe(response)
+    return response
+
 def fetch_page(username: str, cookies: Dict, cursor: int, limit: int = 50) -> List[Dict]:
     """Obtiene una página de notable followers"""
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
-        "Accept": "application/json, text/plain, */*",
-        "Origin": "https://www.protokols.io",
-        "Referer": f"https://www.protokols.io/twitter/{username}"
-    }
-    session = requests.Session()
-    session.headers.update(headers)
-    for name, value in cookies.items():
-        session.cookies.set(name, value)
-
-    params = {
-        "limit": limit,
-        "followerType": "all",
-        "username": username,
-        "sortBy": "followersCount",
-        "sortOrder": "desc",
-        "cursor": cursor
-    }
-    input_json = json.dumps({"json": params})
-    encoded_input = urllib.parse.quote(input_json)
-    url = f"{SMART_FOLLOWERS_URL}?input={encoded_input}"
+    url = build_smart_followers_url(username, limit, cursor)
     try:
-        response = session.get(url, timeout=REQUEST_TIMEOUT)
+        response = protokols_get(url, username, cookies, priority=BACKGROUND)
         if response.status_code != 200:
             logger.error(f"Error en la solicitud: {response.status_code}")
             return []
@@ -82,69 +84,77 @@ def fetch_page(username: str, cookies: Dict, cursor: int, limit: int = 50) -> Li
         logger.error(f"Error al obtener página {cursor}: {str(e)}")
         return []
 
-def get_smart_followers_ultrafast(username: str, cookies: Dict, top_n: int = 5) -> Dict:
-    headers = {
+def build_headers(username: str) -> Dict:
+    """Cabeceras que espera la API de Protokols para consultas sobre un usuario"""
+    return {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
         "Accept": "application/json, text/plain, */*",
         "Origin": "https://www.protokols.io",
         "Referer": f"https://www.protokols.io/twitter/{username}"
     }
-    session = requests.Session()
-    session.headers.update(headers)
-    for name, value in cookies.items():
-        session.cookies.set(name, value)
 
+def build_smart_followers_url(username: str, limit: int, cursor: int = 0) -> str:
+    """Construye la URL tRPC de smartFollowers.getPaginatedSmartFollowers"""
     params = {
-        "limit": top_n,
+        "limit": limit,
         "followerType": "all",
         "username": username,
         "sortBy": "followersCount",
         "sortOrder": "desc",
-        "cursor": 0
+        "cursor": cursor
     }
     input_json = json.dumps({"json": params})
     encoded_input = urllib.parse.quote(input_json)
-    url = f"{SMART_FOLLOWERS_URL}?input={encoded_input}"
+    return f"{SMART_FOLLOWERS_URL}?input={encoded_input}"
+
+def parse_smart_followers(data: Dict, top_n: int) -> Dict:
+    """Extrae el total y el top N de notables de la respuesta de la API"""
+    json_data = data.get("result", {}).get("data", {}).get("json", {}).get("data", {})
+    items = json_data.get("items", [])
+    total = json_data.get("overallCount", None)
+    top_followers = []
+    for follower in items[:top_n]:
+        profile = follower.get("twitterProfile", {})
+        top_followers.append({
+            "username": profile.get("username", ""),
+            "displayName": profile.get("displayName", ""),
+            "followersCount": profile.get("followersCount", 0)
+        })
+    return {"total": total, "top": top_followers}
+
+def get_smart_followers_ultrafast(username: str, cookies: Dict, top_n: int = 5,
+                                  timeout: float = REQUEST_TIMEOUT, priority: str = LIVE) -> Dict:
+    """Total y top N de notables; las llamadas concurrentes para el mismo usuario y la misma
+    prioridad se agrupan en una (una alerta en vivo no espera a una consulta en segundo plano)"""
+    try:
+        return notables_flights.do((username.lower(), top_n, priority), fetch_smart_followers, username, cookies,
+                                   top_n, timeout, priority, wait_timeout=timeout)
+    except TimeoutError as e:
+        logger.error(f"Error fetching notables: {str(e)}")
+        return {"error": str(e)}
+
+def fetch_smart_followers(username: str, cookies: Dict, top_n: int, timeout: float, priority: str) -> Dict:
+    """Pide a Protokols el total y el top N de notables (sin agrupar)"""
+    url = build_smart_followers_url(username, top_n)
     try:
-        response = session.get(url, timeout=REQUEST_TIMEOUT)
+        response = protokols_get(url, username, cookies, timeout, priority)
         if response.status_code != 200:
             logger.error(f"Error in request: {response.status_code}")
             return {"error": f"HTTP {response.status_code}"}
-        data = response.json()
-        json_data = data.get("result", {}).get("data", {}).get("json", {}).get("data", {})
-        items = json_data.get("items", [])
-        total = json_data.get("overallCount", None)
-        top_followers = []
-        for follower in items[:top_n]:
-            profile = follower.get("twitterProfile", {})
-            top_followers.append({
-                "username": profile.get("username", ""),
-                "displayName": profile.get("displayName", ""),
-                "followersCount": profile.get("followersCount", 0)
-            })
-        return {"total": total, "top": top_followers}
+        return parse_smart_followers(response.json(), top_n)
     except Exception as e:
         logger.error(f"Error fetching notables: {str(e)}")
         return {"error": str(e)}
 
-def get_user_metrics(username: str, cookies: Dict) -> dict:
+def get_user_metrics(username: str, cookies: Dict, timeout: float = REQUEST_TIMEOUT,
+                     priority: str = LIVE) -> dict:
     """Obtiene followersCount y kolScore del usuario objetivo usando influencers.getFullTwitterKolInitial"""
     API_URL = "https://api.protokols.io/api/trpc/influencers.getFullTwitterKolInitial"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
-        "Accept": "application/json, text/plain, */*",
-        "Origin": "https://www.protokols.io",
-        "Referer": f"https://www.protokols.io/twitter/{username}"
-    }
-    session = requests.Session()
-    session.headers.update(headers)
-    for name, value in cookies.items():
-        session.cookies.set(name, value)
     params = {"username": username}
     input_json = json.dumps({"json": params})
     encoded_input = urllib.parse.quote(input_json)
     url = f"{API_URL}?input={encoded_input}"
-    response = session.get(url)
+    response = protokols_get(url, username, cookies, timeout, priority)
     if response.status_code != 200:
         return {"followersCount": None, "kolScore": None}
     data = response.json()
@@ -166,43 +176,23 @@ def format_compact_number(n):
         return str(n)
 
 def print_raw_api_response(username: str, cookies: Dict, limit: int = 5):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
-        "Accept": "application/json, text/plain, */*",
-        "Origin": "https://www.protokols.io",
-        "Referer": f"https://www.protokols.io/twitter/{username}"
-    }
-    session = requests.Session()
-    session.headers.update(headers)
-    for name, value in cookies.items():
-        session.cookies.set(name, value)
-
-    params = {
-        "limit": limit,
-        "followerType": "all",
-        "username": username,
-        "sortBy": "followersCount",
-        "sortOrder": "desc",
-        "cursor": 0
-    }
-    input_json = json.dumps({"json": params})
-    encoded_input = urllib.parse.quote(input_json)
-    url = f"{SMART_FOLLOWERS_URL}?input={encoded_input}"
-    response = session.get(url, timeout=REQUEST_TIMEOUT)
+    url = build_smart_followers_url(username, limit)
+    response = protokols_get(url, username, cookies, priority=INTERACTIVE)
     print("\n--- RAW API RESPONSE ---\n")
     print(json.dumps(response.json(), indent=2))
     print("\n--- END RAW API RESPONSE ---\n")
 
-def get_notables(username, top_n=5):
+def get_notables(username, top_n=5, timeout=REQUEST_TIMEOUT, priority=LIVE):
     """
     Get the total number of notable followers and the top N notables for a given Twitter username.
+    priority is the rate scheduler class: "live", "interactive" or "background".
     Returns a dict: {"total": int, "top": list of dicts}
     Raises Exception on error.
     """
-    cookies = load_cookies(COOKIES_FILE)
+    cookies = get_cookie_store(COOKIES_FILE).get()
     if not cookies:
         raise Exception("Could not load cookies.")
-    result = get_smart_followers_ultrafast(username, cookies, top_n)
+    result = get_smart_followers_ultrafast(username, cookies, top_n, timeout, priority)
     if "error" in result:
         raise Exception(result["error"])
     return result
@@ -215,7 +205,7 @@ if __name__ == "__main__":
 
     print(f"\nAnalyzing notables for @{args.username}...")
     try:
-        result = get_notables(args.username, args.top)
+        result = get_notables(args.username, args.top, priority=INTERACTIVE)
     except Exception as e:
         print(f"Error: {e}")
         exit(1)
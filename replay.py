@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Reprocesado (backfill/replay) de notificaciones guardadas a través del pipeline real.
+
+Recorre payloads de Helius guardados (ficheros JSON sueltos, directorios como
+notifications/, el journal de ingestión) y resultados archivados
+(archive/resultados_*.json), y los pasa por el mismo pipeline que
+webhook_server.py con concurrencia y ritmo configurables. El progreso se guarda
+en un checkpoint para poder interrumpir y reanudar, y al final (y cada cierto
+tiempo) se informa del throughput.
+
+Uso:
+    python replay.py notifications/ webhook_test.json archive/ --concurrency 8 --rate 20 --dry-run
+    python replay.py notifications/journal --min-notables 10 --output rescore.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import webhook_server
+from src.utils.config import config
+from src.utils.deadline import Deadline
+from src.utils.journal import list_segments, read_journal
+from src.utils.logger import get_logger
+
+logger = get_logger("replay")
+
+DEFAULT_CHECKPOINT = "notifications/replay_checkpoint.json"
+ARCHIVE_WALLET_IDENTIFIER = "Archivo"  # Identificador de launchpad para resultados archivados
+
+def archived_item(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convierte un resultado archivado (resultados_*.json) en un elemento del pipeline,
+    con la URI ya conocida para no volver a pedirla a Helius.
+    """
+    content = ((record.get('metadata') or {}).get('result') or {}).get('content') or {}
+    metadata = content.get('metadata') or {}
+    uri = record.get('ipfs_uri') or content.get('json_uri')
+    return {
+        'signature': None,
+        'fee_payer': None,
+        'wallet_identifier': ARCHIVE_WALLET_IDENTIFIER,
+        'mint': record['token_address'],
+        'self_minted': False,
+        'onchain_metadata': {
+            'name': metadata.get('name', ''),
+            'symbol': metadata.get('symbol', ''),
+            'uri': uri
+        } if uri else None
+    }
+
+def classify_payload(data: Any) -> Optional[Dict[str, Any]]:
+    """
+    Identifica el tipo de un payload guardado.
+
+    Returns:
+        Dict con 'transactions' (webhook de Helius) o 'items' (resultado archivado),
+        o None si el contenido no es reprocesable
+    """
+    if isinstance(data, list):
+        transactions = [tx for tx in data if isinstance(tx, dict) and ('signature' in tx or 'tokenTransfers' in tx)]
+        return {'transactions': transactions} if transactions else None
+    if isinstance(data, dict):
+        if 'payload' in data:
+            return classify_payload(data['payload'])
+        if 'token_address' in data:
+            return {'items': [archived_item(data)]}
+        if 'signature' in data or 'tokenTransfers' in data:
+            return {'transactions': [data]}
+    return None
+
+def iter_payloads(sources: List[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Recorre los payloads de las fuentes indicadas en orden estable.
+
+    Args:
+        sources: Ficheros JSON, directorios con ficheros JSON o directorios de journal
+
+    Yields:
+        Tuple[str, Dict[str, Any]]: Clave única del payload (para el checkpoint) y payload clasificado
+    """
+    for source in sources:
+        path = Path(source)
+        if path.is_dir() and list_segments(str(path)):
+            for offset, record in read_journal(str(path)):
+                payload = classify_payload(record)
+                if payload:
+                    yield f"{path}@{offset}", payload
+            continue
+        files = sorted(path.glob("*.json")) if path.is_dir() else [path]
+        for file_path in files:
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Fichero omitido {file_path}: {str(e)}")
+                continue
+            payload = classify_payload(data)
+            if payload:
+                yield str(file_path), payload
+            else:
+                logger.debug(f"Fichero sin payloads reprocesables: {file_path}")
+
+class Checkpoint:
+    """
+    Conjunto de claves ya reprocesadas, guardado de forma atómica en un fichero JSON.
+    """
+
+    def __init__(self, path: Optional[str], restart: bool = False):
+        self.path = Path(path) if path else None
+        self.done: Set[str] = set()
+        self._lock = threading.Lock()
+        if self.path and self.path.exists() and not restart:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.done = set(json.load(f).get('done', []))
+            logger.info(f"Checkpoint cargado: {len(self.done)} payload(s) ya reprocesados")
+
+    def mark(self, key: str) -> None:
+        with self._lock:
+            self.done.add(key)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            done = sorted(self.done)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'updated_at': time.time(), 'done': done}, f)
+        os.replace(tmp_path, self.path)
+
+class RateLimiter:
+    """
+    Limita el ritmo de arranque de payloads a rate por segundo (sin límite si rate es 0).
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+class ReplayStats:
+    """
+    Contadores del reprocesado y throughput.
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.payloads = 0
+        self.skipped = 0
+        self.failed = 0
+        self.items = 0
+        self.statuses: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, results: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self.payloads += 1
+            self.items += len(results)
+            for result in results:
+                status = result['status'] if not result.get('reason') else f"{result['status']}:{result['reason']}"
+                self.statuses[status] += 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failed += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = time.monotonic() - self.started_at
+            return {
+                'elapsed_s': round(elapsed, 2),
+                'payloads': self.payloads,
+                'skipped': self.skipped,
+                'failed': self.failed,
+                'tokens': self.items,
+                'payloads_per_s': round(self.payloads / elapsed, 2) if elapsed else 0.0,
+                'tokens_per_s': round(self.items / elapsed, 2) if elapsed else 0.0,
+                'statuses': dict(self.statuses)
+            }
+
+def replay_payload(payload: Dict[str, Any], budget: float, dry_run: bool) -> List[Dict[str, Any]]:
+    """
+    Pasa un payload por el pipeline de webhook_server sin consultar el índice de idempotencia.
+    Si no es dry_run, envía a Telegram los elementos listos.
+
+    Args:
+        payload: Payload clasificado por classify_payload
+        budget: Presupuesto de tiempo en segundos para el payload
+        dry_run: Si es True, no se envía nada a Telegram
+
+    Returns:
+        List[Dict[str, Any]]: Resultado de cada elemento
+    """
+    deadline = Deadline(budget)
+    if 'items' in payload:
+        results = webhook_server.process_items(payload['items'], deadline, dedupe=False, retry=False)
+    else:
+        results = webhook_server.process_webhook(payload['transactions'], deadline, dedupe=False, retry=False)
+    if not dry_run:
+        for result in results:
+            if result.get('telegram_message') and result['status'] == 'ready':
+                webhook_server.send_ready_item(result, deadline)
+    return results
+
+def run_replay(sources: List[str], concurrency: int = 4, rate: float = 0.0, dry_run: bool = True,
+               checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT, restart: bool = False,
+               budget: Optional[float] = None, output: Optional[str] = None,
+               checkpoint_every: int = 50, report_every: float = 10.0) -> Dict[str, Any]:
+    """
+    Reprocesa los payloads de las fuentes con un pool de hilos.
+
+    Args:
+        sources: Ficheros o directorios a reprocesar
+        concurrency: Payloads procesados en paralelo
+        rate: Máximo de payloads iniciados por segundo (0 = sin límite)
+        dry_run: Si es True, no se envía nada a Telegram
+        checkpoint_path: Fichero de checkpoint (None para no guardarlo)
+        restart: Si es True, ignora el checkpoint existente
+        budget: Presupuesto de tiempo por payload (por defecto TOKEN_DEADLINE)
+        output: Fichero JSONL donde escribir el resultado de cada token
+        checkpoint_every: Payloads completados entre guardados del checkpoint
+        report_every: Segundos entre informes de progreso
+
+    Returns:
+        Dict[str, Any]: Resumen con contadores y throughput
+    """
+    budget = config.TOKEN_DEADLINE if budget is None else budget
+    checkpoint = Checkpoint(checkpoint_path, restart)
+    limiter = RateLimiter(rate)
+    stats = ReplayStats()
+    slots = threading.BoundedSemaphore(concurrency * 2)
+    output_lock = threading.Lock()
+    output_file = open(output, 'a', encoding='utf-8') if output else None
+    last_report = [time.monotonic()]
+
+    def handle(key: str, payload: Dict[str, Any]) -> None:
+        try:
+            results = replay_payload(payload, budget, dry_run)
+        except Exception as e:
+            logger.error(f"Error reprocesando {key}: {str(e)}")
+            stats.record_failure()
+            return
+        finally:
+            slots.release()
+        stats.record(results)
+        if output_file:
+            with output_lock:
+                for result in results:
+                    output_file.write(json.dumps({
+                        'source': key,
+                        'mint': result['mint'],
+                        'signature': result['signature'],
+                        'status': result['status'],
+                        'reason': result['reason'],
+                        'notables': (result.get('notable_data') or {}).get('total')
+                    }) + "\n")
+        checkpoint.mark(key)
+        if stats.payloads % checkpoint_every == 0:
+            checkpoint.save()
+        if time.monotonic() - last_report[0] >= report_every:
+            last_report[0] = time.monotonic()
+            logger.info(f"Progreso: {json.dumps(stats.summary())}")
+
+    logger.info(f"Reprocesando {', '.join(sources)} (concurrencia {concurrency}, "
+                f"ritmo {rate or 'sin límite'}/s, {'dry-run' if dry_run else 'enviando a Telegram'})")
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="replay") as executor:
+            for key, payload in iter_payloads(sources):
+                if key in checkpoint.done:
+                    stats.skipped += 1
+                    continue
+                slots.acquire()
+                limiter.acquire()
+                executor.submit(handle, key, payload)
+    except KeyboardInterrupt:
+        logger.warning("Reprocesado interrumpido, guardando checkpoint")
+    finally:
+        checkpoint.save()
+        if output_file:
+            output_file.close()
+
+    summary = stats.summary()
+    logger.info(f"Reprocesado terminado: {json.dumps(summary)}")
+    return summary
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Reprocesa notificaciones guardadas a través del pipeline real.")
+    parser.add_argument("sources", nargs="+", help="Ficheros JSON, directorios o directorios de journal")
+    parser.add_argument("--concurrency", type=int, default=4, help="Payloads procesados en paralelo (default: 4)")
+    parser.add_argument("--rate", type=float, default=0.0, help="Máximo de payloads por segundo (default: sin límite)")
+    parser.add_argument("--send", action="store_true", help="Enviar a Telegram los tokens aprobados (por defecto, dry-run)")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help=f"Fichero de checkpoint (default: {DEFAULT_CHECKPOINT})")
+    parser.add_argument("--restart", action="store_true", help="Ignorar el checkpoint y reprocesar todo")
+    parser.add_argument("--budget", type=float, default=None, help="Presupuesto en segundos por payload (default: TOKEN_DEADLINE)")
+    parser.add_argument("--min-notables", type=int, default=None, help="Umbral de notables a aplicar (default: MIN_NOTABLES)")
+    parser.add_argument("--output", default=None, help="Fichero JSONL con el resultado de cada token")
+    args = parser.parse_args()
+
+    if args.min_notables is not None:
+        config.MIN_NOTABLES = args.min_notables
+
+    summary = run_replay(
+        args.sources,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        dry_run=not args.send,
+        checkpoint_path=args.checkpoint,
+        restart=args.restart,
+        budget=args.budget,
+        output=args.output
+    )
+    print(json.dumps(summary, indent=2))
+    return 1 if summary['failed'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
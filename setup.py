@@ -8,6 +8,9 @@ setup(
         "requests>=2.31.0",
         "python-dotenv>=1.0.0",
         "flask>=2.0.0",
+        "quart>=0.19.0",
+        "httpx>=0.25.0",
+        "hypercorn>=0.15.0",
         "python-telegram-bot>=20.0",
         "gunicorn>=21.0.0",
         "pytest>=7.0.0",
@@ -5,6 +5,9 @@ Modelos para manejar los datos de webhooks.
 from dataclasses import dataclass
 from typing import List, Dict, Any, Optional
 
+# Mint de Wrapped SOL, presente en casi todas las transacciones de creación
+WRAPPED_SOL_MINT = "So11111111111111111111111111111111111111112"
+
 @dataclass
 class TokenTransfer:
     """
@@ -46,6 +49,8 @@ class Transaction:
     Contiene la información básica de la transacción y sus transferencias.
     """
     token_transfers: List[TokenTransfer]
+    signature: Optional[str] = None
+    fee_payer: Optional[str] = None
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Transaction':
@@ -59,7 +64,9 @@ class Transaction:
             Transaction: Instancia creada
         """
         return cls(
-            token_transfers=[TokenTransfer.from_dict(transfer) for transfer in data.get('tokenTransfers', [])]
+            token_transfers=[TokenTransfer.from_dict(transfer) for transfer in data.get('tokenTransfers', [])],
+            signature=data.get('signature'),
+            fee_payer=data.get('feePayer')
         )
     
     def to_dict(self) -> Dict[str, Any]:
@@ -70,8 +77,24 @@ class Transaction:
             Dict[str, Any]: Diccionario con los datos de la transacción
         """
         return {
-            'tokenTransfers': [transfer.to_dict() for transfer in self.token_transfers]
+            'tokenTransfers': [transfer.to_dict() for transfer in self.token_transfers],
+            'signature': self.signature,
+            'feePayer': self.fee_payer
         }
+    
+    def get_mints(self) -> List[str]:
+        """
+        Obtiene los mints distintos transferidos en la transacción, en orden de aparición.
+        Ignora Wrapped SOL, que acompaña a las creaciones pero no es un token nuevo.
+        
+        Returns:
+            List[str]: Lista de mints sin duplicados
+        """
+        mints = []
+        for transfer in self.token_transfers:
+            if transfer.mint and transfer.mint != WRAPPED_SOL_MINT and transfer.mint not in mints:
+                mints.append(transfer.mint)
+        return mints
 
 @dataclass
 class WebhookData:
@@ -105,6 +128,21 @@ class WebhookData:
         """
         return [tx.to_dict() for tx in self.transactions]
     
+    def get_mints(self) -> List[str]:
+        """
+        Obtiene todos los mints distintos de todas las transacciones del webhook.
+        Helius puede agrupar varias creaciones de token en un mismo POST.
+        
+        Returns:
+            List[str]: Lista de mints sin duplicados, en orden de aparición
+        """
+        mints = []
+        for tx in self.transactions:
+            for mint in tx.get_mints():
+                if mint not in mints:
+                    mints.append(mint)
+        return mints
+    
     def get_first_mint(self) -> Optional[str]:
         """
         Obtiene el mint del primer token transferido en el webhook.
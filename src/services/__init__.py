@@ -5,9 +5,11 @@ Servicios y lógica de negocio del proyecto.
 from .helius_service import HeliusService
 from .telegram_service import TelegramService
 from .protokols_service import ProtokolsService
+from .webhook_subscription import WebhookSubscriptionManager
 
 __all__ = [
     'HeliusService',
     'TelegramService',
-    'ProtokolsService'
+    'ProtokolsService',
+    'WebhookSubscriptionManager'
 ] 
\ No newline at end of file
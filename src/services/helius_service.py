@@ -2,9 +2,12 @@
 Servicio para interactuar con la API de Helius.
 """
 
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, List
+from ..utils import http_client
 from ..utils.config import config
+from ..utils.helius_batcher import HeliusBatcher
 from ..utils.logger import get_logger
 from ..models.token import TokenMetadata
 
@@ -16,6 +19,11 @@ class HeliusService:
     Maneja la obtención de metadatos de tokens y otras operaciones relacionadas.
     """
     
+    # Máximo de mints por petición a token-metadata
+    MAX_BATCH_SIZE = 100
+    # Máximo de descargas de IPFS simultáneas por lote
+    MAX_IPFS_WORKERS = 8
+    
     def __init__(self):
         """Inicializa el servicio con la configuración necesaria."""
         self.api_key = config.HELIUS_API_KEY
@@ -24,6 +32,9 @@ class HeliusService:
         
         if not self.api_key:
             raise ValueError("HELIUS_API_KEY no está configurada")
+        
+        # Las consultas concurrentes de todas las instancias se agrupan en peticiones en bloque
+        self.batcher = get_helius_batcher()
     
     def get_token_metadata(self, mint_address: str) -> Optional[TokenMetadata]:
         """
@@ -35,41 +46,96 @@ class HeliusService:
         Returns:
             Optional[TokenMetadata]: Metadatos del token o None si hay error
         """
-        try:
-            url = f"{self.base_url}/token-metadata"
-            headers = {"Content-Type": "application/json"}
-            payload = {"mintAccounts": [mint_address]}
-            
-            logger.info(f"Obteniendo metadatos del token {mint_address} desde Helius")
-            response = requests.post(
-                url,
-                headers=headers,
-                json=payload,
-                params={"api-key": self.api_key},
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            
-            token_data = response.json()[0]
+        return self.get_tokens_metadata([mint_address]).get(mint_address)
+    
+    def get_tokens_metadata(self, mint_addresses: List[str]) -> Dict[str, Optional[TokenMetadata]]:
+        """
+        Obtiene los metadatos de varios tokens con una sola llamada a Helius por lote
+        (compartida con las consultas simultáneas de otros hilos) y descarga sus
+        metadatos de IPFS en paralelo.
+        
+        Args:
+            mint_addresses: Direcciones de los tokens
             
-            # Extraer la URI de IPFS desde la ubicación correcta
-            if 'onChainMetadata' in token_data and 'metadata' in token_data['onChainMetadata']:
-                metadata = token_data['onChainMetadata']['metadata']
-                if 'data' in metadata and 'uri' in metadata['data']:
-                    ipfs_url = metadata['data']['uri']
-                    logger.info(f"URI de IPFS encontrada: {ipfs_url}")
-                    
-                    # Obtener metadatos desde IPFS
-                    ipfs_metadata = self._get_ipfs_metadata(ipfs_url, mint_address)
-                    if ipfs_metadata:
-                        return ipfs_metadata
+        Returns:
+            Dict[str, Optional[TokenMetadata]]: Metadatos por dirección (None si hay error)
+        """
+        results: Dict[str, Optional[TokenMetadata]] = {mint: None for mint in mint_addresses}
+        ipfs_urls: Dict[str, str] = {}
+        
+        futures = {mint_address: self.batcher.submit(mint_address) for mint_address in results}
+        for mint_address, future in futures.items():
+            try:
+                ipfs_url = future.result()
+            except Exception as e:
+                logger.error(f"Error al obtener metadatos del token {mint_address}: {str(e)}")
+                continue
+            if ipfs_url:
+                logger.info(f"URI de IPFS encontrada: {ipfs_url}")
+                ipfs_urls[mint_address] = ipfs_url
+            else:
+                logger.error(f"No se encontraron metadatos en la respuesta de Helius para el token {mint_address}")
+        
+        if not ipfs_urls:
+            return results
+        
+        # Obtener metadatos desde IPFS en paralelo
+        with ThreadPoolExecutor(max_workers=min(len(ipfs_urls), self.MAX_IPFS_WORKERS)) as executor:
+            futures = {
+                mint_address: executor.submit(self._get_ipfs_metadata, ipfs_url, mint_address)
+                for mint_address, ipfs_url in ipfs_urls.items()
+            }
+            for mint_address, future in futures.items():
+                results[mint_address] = future.result()
+        
+        return results
+    
+    @staticmethod
+    def _request_uris(mint_addresses: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Pide a Helius, en una sola petición, las URIs de IPFS de un lote de tokens.
+        
+        Args:
+            mint_addresses: Direcciones de los tokens (como máximo MAX_BATCH_SIZE)
             
-            logger.error(f"No se encontraron metadatos en la respuesta de Helius para el token {mint_address}")
-            return None
+        Returns:
+            Dict[str, Optional[str]]: URI de IPFS por dirección (None si no está presente)
+        """
+        url = f"{config.HELIUS_API_URL}/token-metadata"
+        headers = {"Content-Type": "application/json"}
+        payload = {"mintAccounts": mint_addresses}
+        
+        logger.info(f"Obteniendo metadatos de {len(mint_addresses)} token(s) desde Helius")
+        response = http_client.post(
+            url,
+            headers=headers,
+            json=payload,
+            params={"api-key": config.HELIUS_API_KEY},
+            timeout=config.REQUEST_TIMEOUT
+        )
+        response.raise_for_status()
+        
+        # Helius responde en el mismo orden que mintAccounts
+        return {
+            token_data.get('account') or mint_addresses[position]: HeliusService._extract_uri(token_data)
+            for position, token_data in enumerate(response.json())
+        }
+    
+    @staticmethod
+    def _extract_uri(token_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Extrae la URI de IPFS de la respuesta de Helius para un token.
+        
+        Args:
+            token_data: Elemento de la respuesta de token-metadata
             
-        except Exception as e:
-            logger.error(f"Error al obtener metadatos del token {mint_address}: {str(e)}")
-            return None
+        Returns:
+            Optional[str]: URI de IPFS o None si no está presente
+        """
+        on_chain = token_data.get('onChainMetadata') or {}
+        metadata = on_chain.get('metadata') or {}
+        data = metadata.get('data') or {}
+        return data.get('uri') or None
     
     def _get_ipfs_metadata(self, ipfs_url: str, mint_address: str) -> Optional[TokenMetadata]:
         """
@@ -84,7 +150,7 @@ class HeliusService:
         """
         try:
             logger.info(f"Descargando metadatos desde IPFS: {ipfs_url}")
-            response = requests.get(ipfs_url, timeout=self.timeout)
+            response = http_client.get(ipfs_url, timeout=self.timeout)
             response.raise_for_status()
             data = response.json()
             
@@ -113,4 +179,22 @@ class HeliusService:
             
         except Exception as e:
             logger.error(f"Error al extraer metadatos de IPFS: {str(e)}")
-            return None 
\ No newline at end of file
+            return None 
+
+_shared_batcher: Optional[HeliusBatcher] = None
+_shared_batcher_lock = threading.Lock()
+
+def get_helius_batcher() -> HeliusBatcher:
+    """
+    Retorna el agrupador de token-metadata compartido por todas las instancias de
+    HeliusService del proceso, creándolo la primera vez.
+    
+    Returns:
+        HeliusBatcher: Agrupador compartido
+    """
+    global _shared_batcher
+    with _shared_batcher_lock:
+        if _shared_batcher is None:
+            _shared_batcher = HeliusBatcher(HeliusService._request_uris, max_batch_size=HeliusService.MAX_BATCH_SIZE,
+                                            name="helius_service")
+        return _shared_batcher
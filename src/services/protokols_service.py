@@ -2,12 +2,13 @@
 Servicio para interactuar con la API de Protokols.
 """
 
-import json
-import requests
 from typing import Dict, Any, Optional
 from pathlib import Path
+from ..utils import http_client
 from ..utils.config import config
+from ..utils.cookie_store import get_cookie_store
 from ..utils.logger import get_logger
+from ..utils.rate_scheduler import LIVE, get_rate_scheduler
 from ..models.notable import NotableData, NotableUser
 
 logger = get_logger(__name__)
@@ -22,8 +23,15 @@ class ProtokolsService:
         """Inicializa el servicio con la configuración necesaria."""
         self.cookies_file = Path(config.PROTOKOLS_COOKIES_FILE)
         self.timeout = config.REQUEST_TIMEOUT
+        self.cookie_store = get_cookie_store(str(self.cookies_file))
+        self.rate_scheduler = get_rate_scheduler()
         self._load_cookies()
     
+    @property
+    def cookies(self) -> Dict[str, str]:
+        """Cookies vigentes (se recargan si el fichero cambia)."""
+        return self.cookie_store.get()
+    
     def _load_cookies(self) -> None:
         """
         Carga las cookies desde el archivo de configuración.
@@ -32,23 +40,20 @@ class ProtokolsService:
             if not self.cookies_file.exists():
                 raise FileNotFoundError(f"Archivo de cookies no encontrado: {self.cookies_file}")
             
-            with open(self.cookies_file, 'r') as f:
-                cookies_data = json.load(f)
-            
-            # Convertir la lista de cookies a un diccionario para requests
-            self.cookies = {cookie['name']: cookie['value'] for cookie in cookies_data}
+            self.cookie_store.reload()
             logger.info("Cookies de Protokols cargadas correctamente")
             
         except Exception as e:
             logger.error(f"Error al cargar cookies de Protokols: {str(e)}")
             raise
     
-    def get_notables(self, username: str) -> Optional[NotableData]:
+    def get_notables(self, username: str, priority: str = LIVE) -> Optional[NotableData]:
         """
         Obtiene los datos de usuarios notables para un usuario de Twitter.
         
         Args:
             username: Nombre de usuario de Twitter
+            priority: Clase en el planificador de tasa ('live', 'interactive' o 'background')
             
         Returns:
             Optional[NotableData]: Datos de usuarios notables o None si hay error
@@ -95,13 +100,15 @@ class ProtokolsService:
             }
             
             logger.info(f"Obteniendo notables para @{username}")
-            response = requests.post(
+            waited = self.rate_scheduler.acquire(priority, self.timeout)
+            response = http_client.post(
                 url,
                 headers=headers,
                 json=payload,
                 cookies=self.cookies,
-                timeout=self.timeout
+                timeout=max(0.1, self.timeout - waited)
             )
+            self.rate_scheduler.observe(response)
             response.raise_for_status()
             
             data = response.json()
@@ -2,8 +2,8 @@
 Servicio para interactuar con la API de Telegram.
 """
 
-import requests
 from typing import Optional
+from ..utils import http_client
 from ..utils.config import config
 from ..utils.logger import get_logger
 from ..models.token import TokenMetadata
@@ -128,7 +128,7 @@ class TelegramService:
         
         try:
             logger.info(f"Enviando mensaje a Telegram...")
-            response = requests.post(url, data=payload, timeout=self.timeout)
+            response = http_client.post(url, data=payload, timeout=self.timeout)
             response.raise_for_status()
             logger.info("Mensaje enviado a Telegram correctamente.")
             
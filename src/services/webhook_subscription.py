@@ -0,0 +1,201 @@
+"""
+Gestión de la suscripción del webhook de Helius.
+
+El filtrado por feePayer y tipo de transacción se hace en Helius: el webhook se
+suscribe solo a las wallets de KNOWN_WALLETS y a los tipos del filtro previo, de
+modo que el tráfico irrelevante no llega a nuestros servidores. El gestor lee los
+webhooks existentes, calcula la diferencia con la configuración y aplica solo los
+cambios necesarios (crear, actualizar o eliminar duplicados de la misma URL).
+
+Uso:
+    python -m src.services.webhook_subscription --url https://mi-app/webhook [--apply]
+"""
+
+import argparse
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+from ..utils import http_client
+from ..utils.config import config
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+@dataclass
+class SubscriptionPlan:
+    """
+    Cambios necesarios para que Helius coincida con la configuración.
+    """
+    action: str  # 'create', 'update' o 'noop'
+    desired: Dict[str, Any]
+    webhook_id: Optional[str] = None
+    added_accounts: List[str] = field(default_factory=list)
+    removed_accounts: List[str] = field(default_factory=list)
+    added_types: List[str] = field(default_factory=list)
+    removed_types: List[str] = field(default_factory=list)
+    duplicates: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        """Si hay algo que aplicar."""
+        return self.action != 'noop' or bool(self.duplicates)
+
+    def describe(self) -> str:
+        """
+        Resume el plan en una línea para los logs.
+
+        Returns:
+            str: Descripción del plan
+        """
+        if not self.changed:
+            return "Suscripción del webhook al día"
+        parts = [self.action if self.action != 'noop' else 'sin cambios']
+        if self.webhook_id:
+            parts.append(f"webhook {self.webhook_id}")
+        for label, values in (('+cuentas', self.added_accounts), ('-cuentas', self.removed_accounts),
+                              ('+tipos', self.added_types), ('-tipos', self.removed_types),
+                              ('duplicados a eliminar', self.duplicates)):
+            if values:
+                parts.append(f"{label}: {', '.join(values)}")
+        return "; ".join(parts)
+
+class WebhookSubscriptionManager:
+    """
+    Sincroniza el webhook de Helius con las wallets y tipos de transacción configurados.
+    """
+
+    def __init__(self, webhook_url: str, accounts: Optional[List[str]] = None,
+                 transaction_types: Optional[List[str]] = None, auth_header: Optional[str] = None,
+                 base_url: Optional[str] = None, api_key: Optional[str] = None):
+        """
+        Inicializa el gestor.
+
+        Args:
+            webhook_url: URL pública de nuestro endpoint /webhook
+            accounts: Cuentas a vigilar (por defecto las wallets de KNOWN_WALLETS)
+            transaction_types: Tipos de transacción (por defecto PREFILTER_TRANSACTION_TYPES)
+            auth_header: Cabecera Authorization que Helius enviará en cada POST (opcional)
+            base_url: URL base de la API de Helius (por defecto HELIUS_API_URL)
+            api_key: API key de Helius (por defecto HELIUS_API_KEY)
+        """
+        self.webhook_url = webhook_url
+        self.accounts = sorted(accounts if accounts is not None else config.KNOWN_WALLETS)
+        self.transaction_types = sorted(transaction_types or config.PREFILTER_TRANSACTION_TYPES)
+        self.auth_header = auth_header if auth_header is not None else config.HELIUS_WEBHOOK_AUTH_HEADER
+        self.base_url = (base_url or config.HELIUS_API_URL).rstrip('/')
+        self.api_key = api_key or config.HELIUS_API_KEY
+        self.timeout = config.REQUEST_TIMEOUT
+
+        if not self.api_key:
+            raise ValueError("HELIUS_API_KEY no está configurada")
+        if not self.accounts:
+            raise ValueError("No hay wallets configuradas para el webhook")
+
+    def desired(self) -> Dict[str, Any]:
+        """
+        Definición del webhook según la configuración.
+
+        Returns:
+            Dict[str, Any]: Cuerpo para crear o editar el webhook en Helius
+        """
+        definition = {
+            "webhookURL": self.webhook_url,
+            "transactionTypes": self.transaction_types,
+            "accountAddresses": self.accounts,
+            "webhookType": "enhanced"
+        }
+        if self.auth_header:
+            definition["authHeader"] = self.auth_header
+        return definition
+
+    def _request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Any:
+        """Llama a la API de webhooks de Helius y retorna el JSON de la respuesta."""
+        response = http_client.request(method, f"{self.base_url}/webhooks{path}", params={"api-key": self.api_key},
+                                       json=body, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json() if response.content else None
+
+    def list_webhooks(self) -> List[Dict[str, Any]]:
+        """
+        Lista los webhooks registrados en la cuenta de Helius.
+
+        Returns:
+            List[Dict[str, Any]]: Webhooks tal como los devuelve Helius
+        """
+        return self._request("GET", "") or []
+
+    def plan(self, webhooks: List[Dict[str, Any]]) -> SubscriptionPlan:
+        """
+        Calcula los cambios necesarios a partir de los webhooks existentes.
+
+        Args:
+            webhooks: Webhooks registrados (ver list_webhooks)
+
+        Returns:
+            SubscriptionPlan: Acción a aplicar y diferencias encontradas
+        """
+        desired = self.desired()
+        ours = [webhook for webhook in webhooks if webhook.get("webhookURL") == self.webhook_url]
+        if not ours:
+            return SubscriptionPlan('create', desired, added_accounts=self.accounts, added_types=self.transaction_types)
+
+        current, duplicates = ours[0], [webhook["webhookID"] for webhook in ours[1:]]
+        current_accounts = set(current.get("accountAddresses") or [])
+        current_types = set(current.get("transactionTypes") or [])
+        plan = SubscriptionPlan(
+            'noop', desired, webhook_id=current["webhookID"],
+            added_accounts=sorted(set(self.accounts) - current_accounts),
+            removed_accounts=sorted(current_accounts - set(self.accounts)),
+            added_types=sorted(set(self.transaction_types) - current_types),
+            removed_types=sorted(current_types - set(self.transaction_types)),
+            duplicates=duplicates
+        )
+        if (plan.added_accounts or plan.removed_accounts or plan.added_types or plan.removed_types
+                or current.get("webhookType") != desired["webhookType"]
+                or (self.auth_header and current.get("authHeader") != self.auth_header)):
+            plan.action = 'update'
+        return plan
+
+    def sync(self, apply: bool = True) -> SubscriptionPlan:
+        """
+        Compara Helius con la configuración y, si apply es True, aplica los cambios.
+
+        Args:
+            apply: Si es False solo calcula y registra el plan
+
+        Returns:
+            SubscriptionPlan: Plan calculado (con webhook_id del webhook creado si aplica)
+        """
+        plan = self.plan(self.list_webhooks())
+        logger.info(plan.describe())
+        if not apply or not plan.changed:
+            return plan
+
+        if plan.action == 'create':
+            created = self._request("POST", "", plan.desired)
+            plan.webhook_id = (created or {}).get("webhookID")
+            logger.info(f"Webhook de Helius creado: {plan.webhook_id}")
+        elif plan.action == 'update':
+            self._request("PUT", f"/{plan.webhook_id}", plan.desired)
+            logger.info(f"Webhook de Helius {plan.webhook_id} actualizado")
+        for webhook_id in plan.duplicates:
+            self._request("DELETE", f"/{webhook_id}")
+            logger.info(f"Webhook duplicado de Helius {webhook_id} eliminado")
+        return plan
+
+def main() -> int:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Sincroniza el webhook de Helius con KNOWN_WALLETS.")
+    parser.add_argument("--url", default=config.HELIUS_WEBHOOK_URL, help="URL pública del endpoint /webhook")
+    parser.add_argument("--apply", action="store_true", help="Aplicar los cambios (por defecto solo se muestran)")
+    args = parser.parse_args()
+
+    if not args.url:
+        parser.error("Indica --url o define HELIUS_WEBHOOK_URL")
+    plan = WebhookSubscriptionManager(args.url).sync(apply=args.apply)
+    print(plan.describe())
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,5 +4,31 @@ Utilidades comunes para el proyecto.
 
 from .config import config
 from .logger import logger, get_logger
+from .work_queue import WorkQueue
+from .priority_queue import PriorityWorkQueue
+from .journal import Journal, read_journal
+from .prefilter import PreFilter
+from .idempotency import IdempotencyIndex
+from .metaplex import decode_transaction_metadata
+from .stage_graph import StageGraph
+from .deadline import Deadline, DeadlineExceeded, DeadlineMetrics
+from .shared_cache import SharedCache
+from .handoff import HandoffStore
+from .sharding import ShardedProcessPool, create_ingestion_queue, report_result
+from .helius_batcher import HeliusBatcher
+from .log_stream import LogStreamSource
+from .retry_scheduler import RetryScheduler
+from .http_client import HttpClient
+from .cookie_store import CookieStore, get_cookie_store
+from .ipfs_fetcher import HedgedIPFSFetcher
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .rate_scheduler import RateScheduler, RateLimitTimeout, get_rate_scheduler
+from .single_flight import SingleFlight
 
-__all__ = ['config', 'logger', 'get_logger'] 
\ No newline at end of file
+__all__ = ['config', 'logger', 'get_logger', 'WorkQueue', 'PriorityWorkQueue', 'Journal', 'read_journal', 'PreFilter', 'IdempotencyIndex',
+           'decode_transaction_metadata', 'StageGraph',
+           'Deadline', 'DeadlineExceeded', 'DeadlineMetrics', 'SharedCache',
+           'ShardedProcessPool', 'create_ingestion_queue', 'report_result', 'HandoffStore', 'HeliusBatcher', 'LogStreamSource', 'RetryScheduler',
+           'HttpClient', 'CookieStore', 'get_cookie_store', 'HedgedIPFSFetcher',
+           'CircuitBreaker', 'CircuitOpenError', 'RateScheduler', 'RateLimitTimeout', 'get_rate_scheduler',
+           'SingleFlight'] 
\ No newline at end of file
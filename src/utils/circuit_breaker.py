@@ -0,0 +1,179 @@
+"""
+Cortacircuitos por upstream con timeouts adaptativos.
+
+Cuando Protokols, Helius, Telegram o un gateway de IPFS se degradan, cada token
+esperaría el timeout completo antes de fallar. CircuitBreaker cuenta los fallos
+seguidos de un host: al llegar al umbral se abre y durante un tiempo rechaza las
+peticiones al instante (CircuitOpenError) para que el llamador pase a su
+alternativa. Pasado ese tiempo queda semiabierto y deja pasar unas pocas
+peticiones de prueba: si salen bien se cierra y, si no, vuelve a abrirse. Mientras
+está cerrado, el timeout de cada petición se deriva del p99 de las latencias
+observadas en el host, sin superar nunca el que pide el llamador.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+import requests
+
+from .config import config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Latencias recientes que se guardan para calcular el p99
+LATENCY_SAMPLES = 200
+
+class CircuitOpenError(requests.RequestException):
+    """
+    Petición rechazada sin enviarse porque el circuito del upstream está abierto.
+    """
+
+class CircuitBreaker:
+    """
+    Cortacircuitos de un host con estados cerrado, abierto y semiabierto.
+    """
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None,
+                 half_open_probes: Optional[int] = None, timeout_factor: Optional[float] = None,
+                 min_timeout: Optional[float] = None, min_samples: Optional[int] = None):
+        """
+        Inicializa el cortacircuitos cerrado.
+
+        Args:
+            name: Host al que protege (se usa en los logs y en las métricas)
+            failure_threshold: Fallos seguidos que abren el circuito (por defecto HTTP_BREAKER_FAILURES)
+            reset_timeout: Segundos abierto antes de pasar a semiabierto (por defecto HTTP_BREAKER_RESET)
+            half_open_probes: Peticiones de prueba simultáneas en semiabierto (por defecto HTTP_BREAKER_HALF_OPEN_PROBES)
+            timeout_factor: Múltiplo del p99 usado como timeout (por defecto HTTP_BREAKER_TIMEOUT_FACTOR)
+            min_timeout: Timeout adaptativo mínimo en segundos (por defecto HTTP_BREAKER_MIN_TIMEOUT)
+            min_samples: Latencias necesarias antes de adaptar el timeout (por defecto HTTP_BREAKER_MIN_SAMPLES)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold or config.HTTP_BREAKER_FAILURES
+        self.reset_timeout = config.HTTP_BREAKER_RESET if reset_timeout is None else reset_timeout
+        self.half_open_probes = half_open_probes or config.HTTP_BREAKER_HALF_OPEN_PROBES
+        self.timeout_factor = timeout_factor or config.HTTP_BREAKER_TIMEOUT_FACTOR
+        self.min_timeout = config.HTTP_BREAKER_MIN_TIMEOUT if min_timeout is None else min_timeout
+        self.min_samples = config.HTTP_BREAKER_MIN_SAMPLES if min_samples is None else min_samples
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._stats = {'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    @property
+    def state(self) -> str:
+        """Estado actual ('closed', 'open' o 'half_open')."""
+        with self._lock:
+            return self._current_state_locked(time.monotonic())
+
+    def _current_state_locked(self, now: float) -> str:
+        """Estado teniendo en cuenta si ya venció el tiempo abierto. Requiere el lock."""
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return self._state
+
+    def before_request(self) -> None:
+        """
+        Reserva el paso de una petición.
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto o ya hay bastantes pruebas en curso
+        """
+        with self._lock:
+            state = self._current_state_locked(time.monotonic())
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and self._probes < self.half_open_probes:
+                if self._state == OPEN:
+                    self._state = HALF_OPEN
+                    logger.info(f"Circuito de {self.name} semiabierto: enviando petición de prueba")
+                self._probes += 1
+                return
+            self._stats['rejected'] += 1
+        raise CircuitOpenError(f"Circuito abierto para {self.name}")
+
+    def timeout(self, requested: float) -> float:
+        """
+        Timeout de la petición derivado del p99 observado.
+
+        Args:
+            requested: Timeout que pide el llamador
+
+        Returns:
+            float: Timeout a usar (nunca mayor que el pedido)
+        """
+        p99 = self.p99()
+        if p99 is None:
+            return requested
+        return min(requested, max(self.min_timeout, p99 * self.timeout_factor))
+
+    def p99(self) -> Optional[float]:
+        """
+        Percentil 99 de las latencias recientes.
+
+        Returns:
+            Optional[float]: Latencia en segundos, o None si aún hay pocas muestras
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+
+    def record_success(self, latency: float) -> None:
+        """
+        Registra una respuesta correcta y cierra el circuito si estaba a prueba.
+
+        Args:
+            latency: Segundos hasta recibir la respuesta
+        """
+        with self._lock:
+            self._stats['successes'] += 1
+            self._latencies.append(latency)
+            self._failures = 0
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                self._state = CLOSED
+                logger.info(f"Circuito de {self.name} cerrado de nuevo")
+
+    def record_failure(self) -> None:
+        """Registra un fallo y abre el circuito al llegar al umbral o si falla una prueba."""
+        with self._lock:
+            self._stats['failures'] += 1
+            self._failures += 1
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+            elif self._state != CLOSED or self._failures < self.failure_threshold:
+                return
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+            self._stats['opened'] += 1
+        logger.warning(f"Circuito de {self.name} abierto durante {self.reset_timeout}s tras fallos seguidos")
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Retorna las métricas del cortacircuitos.
+
+        Returns:
+            Dict[str, Any]: Estado, fallos seguidos, p99 y timeout adaptativo, y contadores
+        """
+        p99 = self.p99()
+        with self._lock:
+            return dict(
+                self._stats,
+                state=self._current_state_locked(time.monotonic()),
+                consecutive_failures=self._failures,
+                p99_ms=round(p99 * 1000, 1) if p99 is not None else None,
+                adaptive_timeout=round(max(self.min_timeout, p99 * self.timeout_factor), 3) if p99 is not None else None
+            )
@@ -4,18 +4,72 @@ Maneja la carga de variables de entorno y configuración por defecto.
 """
 
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
 load_dotenv()
 
+def parse_mapping(value: str) -> Dict[str, float]:
+    """
+    Convierte una lista 'clave:valor,clave:valor' en un diccionario de floats.
+
+    Args:
+        value: Texto a convertir (p. ej. 'Believe:4,other:1')
+
+    Returns:
+        Dict[str, float]: Valor por clave
+    """
+    mapping = {}
+    for entry in value.split(','):
+        if ':' in entry:
+            key, number = entry.rsplit(':', 1)
+            mapping[key.strip()] = float(number)
+    return mapping
+
+def parse_schedules(value: str) -> Dict[str, List[float]]:
+    """
+    Convierte una lista 'etapa:espera/espera,etapa:espera' en listas de esperas por etapa.
+
+    Args:
+        value: Texto a convertir (p. ej. 'metadata:2/5/10,notables:5/15')
+
+    Returns:
+        Dict[str, List[float]]: Esperas en segundos por etapa
+    """
+    schedules = {}
+    for entry in value.split(','):
+        if ':' in entry:
+            stage, delays = entry.split(':', 1)
+            schedules[stage.strip()] = [float(delay) for delay in delays.split('/') if delay.strip()]
+    return schedules
+
 class Config:
     """Clase base para la configuración del proyecto."""
     
     # Configuración de Helius
     HELIUS_API_KEY: str = os.getenv('HELIUS_API_KEY', '')
     HELIUS_API_URL: str = "https://api.helius.xyz/v0"
+    # Agrupación de consultas a token-metadata: ventana en segundos, mints por petición
+    # y peticiones en bloque simultáneas
+    HELIUS_BATCH_WINDOW: float = float(os.getenv('HELIUS_BATCH_WINDOW', '0.005'))
+    HELIUS_BATCH_MAX_SIZE: int = int(os.getenv('HELIUS_BATCH_MAX_SIZE', '100'))
+    HELIUS_BATCH_CONCURRENCY: int = int(os.getenv('HELIUS_BATCH_CONCURRENCY', '4'))
+    # API DAS (getAsset/getAssetBatch): metadatos off-chain cacheados por Helius en una sola
+    # llamada, en carrera con el camino token-metadata + gateway de IPFS
+    HELIUS_DAS_ENABLED: bool = os.getenv('HELIUS_DAS_ENABLED', 'false').lower() == 'true'
+    HELIUS_RPC_URL: str = os.getenv('HELIUS_RPC_URL', 'https://mainnet.helius-rpc.com/')
+    # Suscripción del webhook: URL pública de /webhook, cabecera Authorization opcional
+    # y si se sincroniza con KNOWN_WALLETS al arrancar el servidor
+    HELIUS_WEBHOOK_URL: str = os.getenv('HELIUS_WEBHOOK_URL', '')
+    HELIUS_WEBHOOK_AUTH_HEADER: str = os.getenv('HELIUS_WEBHOOK_AUTH_HEADER', '')
+    HELIUS_WEBHOOK_SYNC: bool = os.getenv('HELIUS_WEBHOOK_SYNC', 'false').lower() == 'true'
+    
+    # Wallets de launchpad conocidas (feePayer de las creaciones) y su identificador
+    KNOWN_WALLETS: Dict[str, str] = {
+        "5qWya6UjwWnGVhdSBL3hyZ7B45jbk6Byt1hwd7ohEGXE": "Believe",
+        "5JzRjmLSy5YR4ReFRpCK9k3WuToUpc7vkBhWPyy89kQ4": "Launch On Pump"
+    }
     
     # Configuración de Telegram
     TELEGRAM_BOT_TOKEN: str = os.getenv('TELEGRAM_BOT_TOKEN', '')
@@ -23,6 +77,25 @@ class Config:
     
     # Configuración de timeouts
     REQUEST_TIMEOUT: int = int(os.getenv('REQUEST_TIMEOUT', '10'))
+
+    # Pools de conexiones keep-alive del cliente HTTP compartido: hosts por adaptador,
+    # conexiones por host, tamaño por upstream y si se espera al agotarse el pool
+    HTTP_POOL_CONNECTIONS: int = int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))
+    HTTP_POOL_MAXSIZE: int = int(os.getenv('HTTP_POOL_MAXSIZE', '10'))
+    HTTP_POOL_SIZES: Dict[str, float] = parse_mapping(
+        os.getenv('HTTP_POOL_SIZES', 'helius:8,helius_rpc:8,ipfs:16,protokols:16,telegram:4')
+    )
+    HTTP_POOL_BLOCK: bool = os.getenv('HTTP_POOL_BLOCK', 'false').lower() == 'true'
+    # Cortacircuitos por host: fallos seguidos que lo abren, segundos abierto antes de probar,
+    # pruebas simultáneas en semiabierto y timeout adaptativo (múltiplo del p99 observado,
+    # con un mínimo, a partir de cierto número de muestras)
+    HTTP_BREAKER_ENABLED: bool = os.getenv('HTTP_BREAKER_ENABLED', 'true').lower() == 'true'
+    HTTP_BREAKER_FAILURES: int = int(os.getenv('HTTP_BREAKER_FAILURES', '5'))
+    HTTP_BREAKER_RESET: float = float(os.getenv('HTTP_BREAKER_RESET', '15'))
+    HTTP_BREAKER_HALF_OPEN_PROBES: int = int(os.getenv('HTTP_BREAKER_HALF_OPEN_PROBES', '1'))
+    HTTP_BREAKER_TIMEOUT_FACTOR: float = float(os.getenv('HTTP_BREAKER_TIMEOUT_FACTOR', '2.0'))
+    HTTP_BREAKER_MIN_TIMEOUT: float = float(os.getenv('HTTP_BREAKER_MIN_TIMEOUT', '2.0'))
+    HTTP_BREAKER_MIN_SAMPLES: int = int(os.getenv('HTTP_BREAKER_MIN_SAMPLES', '20'))
     
     # Configuración de logging
     LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
@@ -31,6 +104,109 @@ class Config:
     
     # Configuración de Protokols
     PROTOKOLS_COOKIES_FILE: str = os.getenv('PROTOKOLS_COOKIES_FILE', 'protokols_cookies.json')
+    # Segundos entre comprobaciones del fichero de cookies para recargarlo si cambió
+    PROTOKOLS_COOKIES_CHECK_INTERVAL: float = float(os.getenv('PROTOKOLS_COOKIES_CHECK_INTERVAL', '1.0'))
+    # Cubo de fichas compartido entre procesos para las peticiones a Protokols
+    PROTOKOLS_RATE: float = float(os.getenv('PROTOKOLS_RATE', '2'))
+    PROTOKOLS_RATE_BURST: float = float(os.getenv('PROTOKOLS_RATE_BURST', '10'))
+    # Fichas que cada clase deja en el cubo ('live' no reserva ninguna)
+    PROTOKOLS_RATE_RESERVES: Dict[str, float] = parse_mapping(
+        os.getenv('PROTOKOLS_RATE_RESERVES', 'interactive:2,background:6')
+    )
+    # Pausa ante un 429 sin Retry-After y máximo aceptado de un Retry-After
+    PROTOKOLS_RATE_BACKOFF: float = float(os.getenv('PROTOKOLS_RATE_BACKOFF', '5'))
+    PROTOKOLS_RATE_MAX_BACKOFF: float = float(os.getenv('PROTOKOLS_RATE_MAX_BACKOFF', '300'))
+    RATE_LIMIT_DB: str = os.getenv('RATE_LIMIT_DB', 'notifications/ratelimit.db')
+    # Mínimo de notable followers del creador para enviar la alerta
+    MIN_NOTABLES: int = int(os.getenv('MIN_NOTABLES', '5'))
+    
+    # Configuración de la cola de ingestión
+    INGESTION_WORKERS: int = int(os.getenv('INGESTION_WORKERS', '4'))
+    INGESTION_QUEUE_SIZE: int = int(os.getenv('INGESTION_QUEUE_SIZE', '1000'))
+    INGESTION_RETRY_AFTER: int = int(os.getenv('INGESTION_RETRY_AFTER', '1'))
+    # Procesos worker repartidos por mint (1 = un solo proceso con hilos)
+    INGESTION_PROCESSES: int = int(os.getenv('INGESTION_PROCESSES', '1'))
+    INGESTION_START_METHOD: str = os.getenv('INGESTION_START_METHOD', 'spawn')
+    # Prioridad por launchpad (clase 'other' para el resto): peso, fracción máxima
+    # de workers y fracción de la capacidad a partir de la cual se descarta lo no prioritario
+    PRIORITY_SCHEDULING: bool = os.getenv('PRIORITY_SCHEDULING', 'true').lower() == 'true'
+    PRIORITY_WEIGHTS: Dict[str, float] = parse_mapping(
+        os.getenv('PRIORITY_WEIGHTS', 'Believe:4,Launch On Pump:2,other:1')
+    )
+    PRIORITY_SHARES: Dict[str, float] = parse_mapping(
+        os.getenv('PRIORITY_SHARES', 'Believe:1.0,Launch On Pump:0.75,other:0.5')
+    )
+    PRIORITY_SHED_WATERMARK: float = float(os.getenv('PRIORITY_SHED_WATERMARK', '0.8'))
+    # Parada ordenada: periodo de gracia para drenar la cola y fichero de traspaso
+    DRAIN_GRACE_PERIOD: float = float(os.getenv('DRAIN_GRACE_PERIOD', '20'))
+    HANDOFF_FILE: str = os.getenv('HANDOFF_FILE', 'notifications/handoff.json')
+    
+    # Configuración del filtro previo de transacciones
+    PREFILTER_TRANSACTION_TYPES: List[str] = [
+        t.strip() for t in os.getenv('PREFILTER_TRANSACTION_TYPES', 'TOKEN_MINT,CREATE').split(',') if t.strip()
+    ]
+    PREFILTER_SEEN_CAPACITY: int = int(os.getenv('PREFILTER_SEEN_CAPACITY', '10000'))
+    # Encolar solo los campos que usa el pipeline en lugar de la transacción completa
+    PREFILTER_COMPACT: bool = os.getenv('PREFILTER_COMPACT', 'true').lower() == 'true'
+    
+    # Fuente en streaming (logsSubscribe por websocket) además de los webhooks
+    STREAM_ENABLED: bool = os.getenv('STREAM_ENABLED', 'false').lower() == 'true'
+    STREAM_WS_URL: str = os.getenv('STREAM_WS_URL', 'wss://mainnet.helius-rpc.com/')
+    STREAM_COMMITMENT: str = os.getenv('STREAM_COMMITMENT', 'confirmed')
+    STREAM_RECONNECT_MAX: float = float(os.getenv('STREAM_RECONNECT_MAX', '30'))
+    
+    # Descarga de metadatos de IPFS con coberturas entre gateways: orden inicial, percentil de
+    # latencia tras el que se lanza la cobertura (con su retardo inicial y límites), coberturas
+    # simultáneas, peso de las medias EWMA y peticiones simultáneas en total
+    IPFS_GATEWAYS: List[str] = [
+        g.strip() for g in os.getenv(
+            'IPFS_GATEWAYS', 'https://ipfs.io/ipfs/,https://gateway.pinata.cloud/ipfs/,https://dweb.link/ipfs/'
+        ).split(',') if g.strip()
+    ]
+    IPFS_HEDGE_PERCENTILE: float = float(os.getenv('IPFS_HEDGE_PERCENTILE', '0.9'))
+    IPFS_HEDGE_DELAY: float = float(os.getenv('IPFS_HEDGE_DELAY', '0.5'))
+    IPFS_HEDGE_MIN_DELAY: float = float(os.getenv('IPFS_HEDGE_MIN_DELAY', '0.1'))
+    IPFS_HEDGE_MAX_DELAY: float = float(os.getenv('IPFS_HEDGE_MAX_DELAY', '2.0'))
+    IPFS_HEDGE_MAX: int = int(os.getenv('IPFS_HEDGE_MAX', '2'))
+    IPFS_EWMA_ALPHA: float = float(os.getenv('IPFS_EWMA_ALPHA', '0.2'))
+    IPFS_HEDGE_WORKERS: int = int(os.getenv('IPFS_HEDGE_WORKERS', '16'))
+    
+    # Configuración del journal de ingestión
+    JOURNAL_DIR: str = os.getenv('JOURNAL_DIR', 'notifications/journal')
+    JOURNAL_SEGMENT_BYTES: int = int(os.getenv('JOURNAL_SEGMENT_BYTES', str(64 * 1024 * 1024)))
+    JOURNAL_MAX_SEGMENTS: int = int(os.getenv('JOURNAL_MAX_SEGMENTS', '20'))
+    JOURNAL_FSYNC_INTERVAL: float = float(os.getenv('JOURNAL_FSYNC_INTERVAL', '0.01'))
+    
+    # Configuración del índice de idempotencia (firmas y mints ya procesados)
+    IDEMPOTENCY_DB: str = os.getenv('IDEMPOTENCY_DB', 'notifications/idempotency.db')
+    IDEMPOTENCY_MAX_AGE: float = float(os.getenv('IDEMPOTENCY_MAX_AGE', str(7 * 24 * 3600)))
+    IDEMPOTENCY_BUCKET_SECONDS: float = float(os.getenv('IDEMPOTENCY_BUCKET_SECONDS', '3600'))
+    IDEMPOTENCY_BLOOM_BITS: int = int(os.getenv('IDEMPOTENCY_BLOOM_BITS', str(1 << 18)))
+    
+    # Caché compartida entre procesos (metadatos de Helius, contenido IPFS, notables)
+    SHARED_CACHE_DB: str = os.getenv('SHARED_CACHE_DB', 'notifications/cache.db')
+    SHARED_CACHE_TTL: float = float(os.getenv('SHARED_CACHE_TTL', '3600'))
+    SHARED_CACHE_PRUNE_EVERY: int = int(os.getenv('SHARED_CACHE_PRUNE_EVERY', '500'))
+    
+    # Configuración del grafo de enriquecimiento
+    ENRICHMENT_WORKERS: int = int(os.getenv('ENRICHMENT_WORKERS', '16'))
+    ENRICHMENT_HEDGE_DELAY: float = float(os.getenv('ENRICHMENT_HEDGE_DELAY', '0.5'))
+    
+    # Presupuesto de tiempo por token desde la recepción del webhook
+    TOKEN_DEADLINE: float = float(os.getenv('TOKEN_DEADLINE', '20'))
+    # Tiempo mínimo restante para enviar la alerta con imagen (si no, se envía solo texto)
+    TELEGRAM_PHOTO_MIN_BUDGET: float = float(os.getenv('TELEGRAM_PHOTO_MIN_BUDGET', '3'))
+    
+    # Reintentos diferidos de tokens sin metadatos todavía (404 en IPFS o Helius) o sin
+    # notables porque Protokols no respondió:
+    # esperas por nivel para cada etapa, edad máxima y resolución de la rueda
+    RETRY_ENABLED: bool = os.getenv('RETRY_ENABLED', 'true').lower() == 'true'
+    RETRY_SCHEDULES: Dict[str, List[float]] = parse_schedules(
+        os.getenv('RETRY_SCHEDULES', 'metadata:2/4/8/16/30,notables:16/32')
+    )
+    RETRY_MAX_AGE: float = float(os.getenv('RETRY_MAX_AGE', '90'))
+    RETRY_TICK: float = float(os.getenv('RETRY_TICK', '0.25'))
+    RETRY_WORKERS: int = int(os.getenv('RETRY_WORKERS', '4'))
     
     @classmethod
     def validate(cls) -> bool:
@@ -0,0 +1,156 @@
+"""
+Cookies de Protokols compartidas por todo el proceso, recargadas al cambiar el fichero.
+
+Leer y parsear protokols_cookies.json en cada consulta a Protokols cuesta E/S de
+disco y JSON por token, y obliga a reiniciar para rotar las cookies. CookieStore
+carga el fichero una vez y, como mucho cada PROTOKOLS_COOKIES_CHECK_INTERVAL
+segundos, compara su mtime y tamaño con los de la última carga: si han cambiado lo
+vuelve a leer y sustituye el diccionario completo de una vez, de modo que un
+lector nunca ve una mezcla de cookies viejas y nuevas. Si la recarga falla (por
+ejemplo, el fichero se está escribiendo) se conservan las cookies anteriores.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .config import config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+def parse_cookies(data: Any) -> Dict[str, str]:
+    """
+    Convierte el contenido del fichero de cookies en un diccionario nombre -> valor.
+
+    Args:
+        data: Lista de cookies exportadas del navegador ({'name', 'value', ...}) o diccionario
+
+    Returns:
+        Dict[str, str]: Cookies para pasar a requests
+    """
+    if isinstance(data, list):
+        return {cookie['name']: cookie['value'] for cookie in data
+                if isinstance(cookie, dict) and 'name' in cookie and 'value' in cookie}
+    if isinstance(data, dict):
+        return dict(data)
+    return {}
+
+class CookieStore:
+    """
+    Cookies cargadas de un fichero y recargadas cuando el fichero cambia.
+    """
+
+    def __init__(self, path: str, check_interval: Optional[float] = None):
+        """
+        Inicializa el almacén; el fichero se lee en la primera consulta.
+
+        Args:
+            path: Ruta del fichero de cookies
+            check_interval: Segundos mínimos entre comprobaciones del fichero
+                            (por defecto PROTOKOLS_COOKIES_CHECK_INTERVAL)
+        """
+        self.path = path
+        self.check_interval = config.PROTOKOLS_COOKIES_CHECK_INTERVAL if check_interval is None else check_interval
+
+        self._lock = threading.Lock()
+        self._cookies: Dict[str, str] = {}
+        self._signature: Optional[Tuple[int, int]] = None
+        self._loaded = False
+        self._next_check = 0.0
+        self._loaded_at: Optional[float] = None
+        self._stats = {'loads': 0, 'checks': 0, 'errors': 0}
+
+    def get(self) -> Dict[str, str]:
+        """
+        Retorna las cookies vigentes, recargándolas si el fichero cambió.
+
+        Returns:
+            Dict[str, str]: Cookies (no modificar; se sustituyen enteras en cada recarga)
+        """
+        now = time.monotonic()
+        if self._loaded and now < self._next_check:
+            return self._cookies
+        with self._lock:
+            if self._loaded and now < self._next_check:
+                return self._cookies
+            self._next_check = now + self.check_interval
+            self._stats['checks'] += 1
+            signature = self._stat()
+            if not self._loaded or signature != self._signature:
+                self._reload_locked(signature, strict=False)
+            return self._cookies
+
+    def reload(self) -> Dict[str, str]:
+        """
+        Vuelve a leer el fichero sin esperar a que cambie.
+
+        Returns:
+            Dict[str, str]: Cookies cargadas
+
+        Raises:
+            OSError: Si el fichero no se puede leer
+            ValueError: Si el fichero no es JSON válido
+        """
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval
+            return self._reload_locked(self._stat(), strict=True)
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        """Firma del fichero (mtime en ns y tamaño), o None si no existe."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _reload_locked(self, signature: Optional[Tuple[int, int]], strict: bool) -> Dict[str, str]:
+        """Lee el fichero y sustituye las cookies. Requiere el lock."""
+        self._loaded = True
+        self._signature = signature
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                cookies = parse_cookies(json.load(f))
+        except Exception as e:
+            self._stats['errors'] += 1
+            if strict:
+                raise
+            logger.error(f"No se pudieron cargar las cookies de {self.path}; se mantienen las anteriores: {str(e)}")
+            return self._cookies
+        self._cookies = cookies
+        self._loaded_at = time.time()
+        self._stats['loads'] += 1
+        logger.info(f"Cookies cargadas desde {self.path}: {len(cookies)}")
+        return cookies
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Retorna las métricas del almacén.
+
+        Returns:
+            Dict[str, Any]: Cookies vigentes, cargas, comprobaciones del fichero y errores
+        """
+        with self._lock:
+            return dict(self._stats, path=self.path, cookies=len(self._cookies), loaded_at=self._loaded_at)
+
+_stores: Dict[str, CookieStore] = {}
+_stores_lock = threading.Lock()
+
+def get_cookie_store(path: Optional[str] = None) -> CookieStore:
+    """
+    Retorna el almacén compartido del proceso para un fichero de cookies.
+
+    Args:
+        path: Ruta del fichero (por defecto PROTOKOLS_COOKIES_FILE)
+
+    Returns:
+        CookieStore: Almacén único por ruta
+    """
+    key = os.path.abspath(path or config.PROTOKOLS_COOKIES_FILE)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = CookieStore(path or config.PROTOKOLS_COOKIES_FILE)
+        return store
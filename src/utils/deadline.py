@@ -0,0 +1,119 @@
+"""
+Presupuesto de tiempo de extremo a extremo por token.
+
+Cada token lleva un Deadline creado al recibir el webhook. Las etapas del pipeline
+usan el tiempo restante como timeout de sus llamadas (acotado por el timeout propio
+de cada servicio) en lugar de un valor fijo, y los tokens que agotan el presupuesto
+se descartan o se degradan, contabilizándolo en DeadlineMetrics.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from .config import config
+
+class DeadlineExceeded(Exception):
+    """El token agotó su presupuesto de tiempo."""
+
+class Deadline:
+    """
+    Instante límite para terminar de procesar un token, medido con reloj monotónico.
+    """
+
+    def __init__(self, budget: Optional[float] = None, started_at: Optional[float] = None):
+        """
+        Inicializa el deadline.
+
+        Args:
+            budget: Segundos disponibles desde started_at (por defecto TOKEN_DEADLINE)
+            started_at: Instante de recepción según time.monotonic() (por defecto, ahora)
+        """
+        self.budget = config.TOKEN_DEADLINE if budget is None else budget
+        self.started_at = time.monotonic() if started_at is None else started_at
+        self.expires_at = self.started_at + self.budget
+
+    def remaining(self) -> float:
+        """Segundos restantes (negativo si ya venció)."""
+        return self.expires_at - time.monotonic()
+
+    def elapsed(self) -> float:
+        """Segundos transcurridos desde la recepción."""
+        return time.monotonic() - self.started_at
+
+    @property
+    def expired(self) -> bool:
+        """Indica si el presupuesto se ha agotado."""
+        return self.remaining() <= 0
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """
+        Timeout a usar en la siguiente llamada: el tiempo restante, acotado por cap.
+
+        Args:
+            cap: Timeout máximo propio de la llamada
+
+        Returns:
+            float: Segundos de timeout
+
+        Raises:
+            DeadlineExceeded: Si el presupuesto ya se ha agotado
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Presupuesto de {self.budget:.1f}s agotado")
+        return remaining if cap is None else min(cap, remaining)
+
+def remaining_timeout(deadline: Optional[Deadline], cap: float) -> float:
+    """
+    Timeout para una llamada con deadline opcional: sin deadline se usa el timeout propio.
+
+    Args:
+        deadline: Deadline del token, si lo hay
+        cap: Timeout propio de la llamada
+
+    Returns:
+        float: Segundos de timeout
+
+    Raises:
+        DeadlineExceeded: Si el presupuesto ya se ha agotado
+    """
+    return cap if deadline is None else deadline.timeout(cap)
+
+class DeadlineMetrics:
+    """
+    Contadores de tokens terminados a tiempo, degradados o descartados por deadline.
+    """
+
+    OUTCOMES = ('on_time', 'degraded', 'dropped')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {outcome: 0 for outcome in self.OUTCOMES}
+        self._max_elapsed = 0.0
+
+    def record(self, outcome: str, deadline: Optional[Deadline] = None) -> None:
+        """
+        Registra el resultado de un token.
+
+        Args:
+            outcome: 'on_time', 'degraded' o 'dropped'
+            deadline: Deadline del token, para registrar su latencia
+        """
+        with self._lock:
+            self._counters[outcome] += 1
+            if deadline is not None:
+                self._max_elapsed = max(self._max_elapsed, deadline.elapsed())
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Retorna los contadores por resultado y la mayor latencia observada.
+
+        Returns:
+            Dict[str, float]: Contadores y max_elapsed_ms
+        """
+        with self._lock:
+            metrics: Dict[str, float] = dict(self._counters)
+            metrics['budget_s'] = config.TOKEN_DEADLINE
+            metrics['max_elapsed_ms'] = round(self._max_elapsed * 1000, 2)
+            return metrics
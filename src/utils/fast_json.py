@@ -0,0 +1,66 @@
+"""
+Codificación y decodificación JSON rápidas para la ruta de ingestión.
+
+Usa orjson si está instalado (parsea directamente desde bytes y serializa a bytes
+UTF-8 compactos) y, si no, el módulo json de la biblioteca estándar con el mismo
+contrato, de modo que el resto del código no depende de cuál esté disponible.
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    """
+    Decodifica un documento JSON desde bytes o texto.
+
+    Args:
+        data: Documento JSON
+
+    Returns:
+        Any: Objeto decodificado
+
+    Raises:
+        ValueError: Si el documento no es JSON válido
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serializa un objeto a JSON compacto en UTF-8.
+
+    Args:
+        obj: Objeto serializable
+
+    Returns:
+        bytes: Documento JSON sin espacios
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # orjson no admite claves no str ni enteros de más de 64 bits
+            pass
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def as_json_line(raw: bytes) -> bytes:
+    """
+    Prepara un documento JSON ya serializado para escribirlo como una sola línea.
+    En JSON válido los saltos de línea solo pueden ser espacio entre tokens (dentro
+    de las cadenas van escapados), así que se sustituyen por espacios sin reserializar.
+
+    Args:
+        raw: Documento JSON tal como llegó
+
+    Returns:
+        bytes: Documento en una sola línea, sin salto final
+    """
+    return raw.strip().replace(b"\r", b" ").replace(b"\n", b" ")
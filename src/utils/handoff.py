@@ -0,0 +1,82 @@
+"""
+Traspaso de trabajo pendiente entre procesos al redesplegar.
+
+Al recibir SIGTERM el servidor drena su cola de ingestión durante un periodo de
+gracia y guarda en disco lo que no llegó a procesarse. El siguiente proceso
+reclama ese fichero al arrancar y vuelve a encolar su contenido. La escritura es
+atómica (fichero temporal + rename) y la reclamación también (rename a un nombre
+propio del proceso), de modo que dos procesos no reanudan el mismo trabajo.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+
+from .config import config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+class HandoffStore:
+    """
+    Fichero JSON con los elementos pendientes que un proceso deja al siguiente.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Inicializa el almacén.
+
+        Args:
+            path: Ruta del fichero de traspaso (por defecto HANDOFF_FILE)
+        """
+        self.path = Path(path or config.HANDOFF_FILE)
+
+    def save(self, items: List[Any]) -> None:
+        """
+        Guarda los elementos pendientes, conservando los de un traspaso aún no reclamado.
+
+        Args:
+            items: Elementos serializables en JSON
+        """
+        if not items:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        pending = self._read(self.path) + list(items)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"saved_at": time.time(), "items": pending}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        logger.info(f"Traspaso guardado con {len(pending)} elemento(s) en {self.path}")
+
+    def claim(self) -> List[Any]:
+        """
+        Reclama los elementos pendientes y elimina el fichero de traspaso.
+
+        Returns:
+            List[Any]: Elementos guardados por el proceso anterior (vacía si no hay)
+        """
+        claimed_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.claimed")
+        try:
+            os.replace(self.path, claimed_path)
+        except FileNotFoundError:
+            return []
+        items = self._read(claimed_path)
+        claimed_path.unlink()
+        logger.info(f"Traspaso reclamado con {len(items)} elemento(s) desde {self.path}")
+        return items
+
+    @staticmethod
+    def _read(path: Path) -> List[Any]:
+        """Lee los elementos de un fichero de traspaso (vacía si no existe o está dañado)."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("items", [])
+        except FileNotFoundError:
+            return []
+        except (json.JSONDecodeError, AttributeError) as e:
+            logger.error(f"Fichero de traspaso dañado {path}: {str(e)}")
+            return []
@@ -0,0 +1,195 @@
+"""
+Agrupación de consultas concurrentes a token-metadata de Helius.
+
+El endpoint acepta una lista de mints, pero cada token se procesa por separado y
+pediría el suyo en una petición propia. HeliusBatcher acumula durante una ventana
+de pocos milisegundos las consultas que llegan desde distintos hilos (hasta el
+tamaño máximo de lote), hace una sola petición en bloque y entrega a cada hilo en
+espera su resultado. Un mint pedido dos veces en la misma ventana se consulta una
+sola vez.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+class HeliusBatcher:
+    """
+    Agrupa consultas individuales por mint en peticiones en bloque.
+    """
+
+    def __init__(self, fetch: Callable[[List[str]], Dict[str, Any]], window: Optional[float] = None,
+                 max_batch_size: Optional[int] = None, max_concurrent: Optional[int] = None,
+                 name: str = "helius"):
+        """
+        Inicializa el agrupador; el hilo que despacha los lotes arranca con la primera consulta.
+
+        Args:
+            fetch: Función que consulta un lote de mints y retorna el resultado por mint
+                   (los mints ausentes se resuelven a None)
+            window: Segundos que se espera desde la primera consulta antes de enviar el lote
+                    (por defecto HELIUS_BATCH_WINDOW)
+            max_batch_size: Máximo de mints por petición (por defecto HELIUS_BATCH_MAX_SIZE)
+            max_concurrent: Máximo de peticiones en bloque simultáneas (por defecto HELIUS_BATCH_CONCURRENCY)
+            name: Nombre usado en los logs y en los hilos
+        """
+        self.fetch = fetch
+        self.window = config.HELIUS_BATCH_WINDOW if window is None else window
+        self.max_batch_size = max_batch_size or config.HELIUS_BATCH_MAX_SIZE
+        self.max_concurrent = max_concurrent or config.HELIUS_BATCH_CONCURRENCY
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._pending_changed = threading.Condition(self._lock)
+        self._pending: Dict[str, Future] = {}
+        self._first_pending_at: Optional[float] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._closed = False
+        self._stats = {'lookups': 0, 'coalesced': 0, 'batches': 0, 'batched_mints': 0, 'errors': 0}
+
+    def submit(self, mint: str) -> Future:
+        """
+        Añade un mint al lote en curso.
+
+        Args:
+            mint: Dirección del token
+
+        Returns:
+            Future: Se resuelve con el resultado del mint, o con la excepción de la petición
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"El agrupador '{self.name}' está cerrado")
+            self._stats['lookups'] += 1
+            future = self._pending.get(mint)
+            if future is not None:
+                self._stats['coalesced'] += 1
+                return future
+            if self._dispatcher is None:
+                self._start_locked()
+            future = Future()
+            if not self._pending:
+                self._first_pending_at = time.monotonic()
+            self._pending[mint] = future
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch_size:
+                self._pending_changed.notify()
+            return future
+
+    def get(self, mint: str, timeout: Optional[float] = None) -> Any:
+        """
+        Consulta un mint esperando a que se resuelva su lote.
+
+        Args:
+            mint: Dirección del token
+            timeout: Segundos máximos de espera (None = sin límite)
+
+        Returns:
+            Any: Resultado del mint (None si Helius no lo devolvió)
+
+        Raises:
+            TimeoutError: Si el lote no se resuelve a tiempo
+        """
+        return self.get_many([mint], timeout).get(mint)
+
+    def get_many(self, mints: List[str], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Consulta varios mints; se agrupan con las consultas de otros hilos.
+
+        Args:
+            mints: Direcciones de los tokens
+            timeout: Segundos máximos de espera para el conjunto (None = sin límite)
+
+        Returns:
+            Dict[str, Any]: Resultado por mint
+
+        Raises:
+            TimeoutError: Si algún lote no se resuelve a tiempo
+        """
+        futures = {mint: self.submit(mint) for mint in dict.fromkeys(mints)}
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        results = {}
+        for mint, future in futures.items():
+            remaining = None if expires_at is None else max(0.0, expires_at - time.monotonic())
+            try:
+                results[mint] = future.result(remaining)
+            except FutureTimeoutError:
+                raise TimeoutError(f"Sin respuesta de '{self.name}' para {mint} en {timeout:.2f}s")
+        return results
+
+    def _start_locked(self) -> None:
+        """Arranca el hilo despachador y el pool de peticiones. Requiere el lock."""
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent,
+                                            thread_name_prefix=f"{self.name}-batch")
+        self._dispatcher = threading.Thread(target=self._dispatch_loop,
+                                            name=f"{self.name}-batcher", daemon=True)
+        self._dispatcher.start()
+
+    def _dispatch_loop(self) -> None:
+        """Cierra cada lote al vencer la ventana o al llenarse y lo envía al pool."""
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._pending_changed.wait()
+                if not self._pending:
+                    return
+                while not self._closed and len(self._pending) < self.max_batch_size:
+                    remaining = self._first_pending_at + self.window - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._pending_changed.wait(remaining)
+                mints = list(self._pending)[:self.max_batch_size]
+                batch = {mint: self._pending.pop(mint) for mint in mints}
+                self._first_pending_at = time.monotonic() if self._pending else None
+                self._stats['batches'] += 1
+                self._stats['batched_mints'] += len(batch)
+            self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: Dict[str, Future]) -> None:
+        """Hace la petición en bloque y entrega el resultado a cada consulta."""
+        try:
+            results = self.fetch(list(batch))
+        except Exception as e:
+            logger.error(f"Error en la petición en bloque de '{self.name}' ({len(batch)} mint(s)): {str(e)}")
+            with self._lock:
+                self._stats['errors'] += 1
+            for future in batch.values():
+                future.set_exception(e)
+            return
+        for mint, future in batch.items():
+            future.set_result(results.get(mint))
+
+    def close(self) -> None:
+        """Envía lo pendiente, espera a las peticiones en curso y detiene el despachador."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._pending_changed.notify_all()
+            dispatcher, executor = self._dispatcher, self._executor
+        if dispatcher:
+            dispatcher.join()
+            executor.shutdown(wait=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Retorna las métricas del agrupador.
+
+        Returns:
+            Dict[str, Any]: Consultas, lotes enviados, tamaño medio de lote y errores
+        """
+        with self._lock:
+            batches = self._stats['batches']
+            return dict(
+                self._stats,
+                name=self.name,
+                pending=len(self._pending),
+                avg_batch_size=round(self._stats['batched_mints'] / batches, 2) if batches else 0.0
+            )
@@ -0,0 +1,296 @@
+"""
+Cliente HTTP compartido con conexiones persistentes por upstream.
+
+Crear una sesión de requests por llamada, o usar requests.get/post directamente,
+abre una conexión TCP+TLS nueva en cada petición a Helius, IPFS, Protokols o
+Telegram. Este módulo mantiene una única sesión por proceso con un pool de
+conexiones keep-alive por host: cada upstream conocido tiene su propio adaptador
+con tamaño de pool configurable y sus cabeceras por defecto. La sesión no guarda
+cookies de las respuestas (las cookies se pasan en cada petición), así que
+compartirla entre hilos y upstreams no mezcla estado. Cada host tiene además su
+cortacircuitos (ver circuit_breaker), que rechaza al instante las peticiones a un
+host caído y acorta el timeout según el p99 observado. Se exponen métricas de uso
+de los pools (conexiones abiertas, peticiones servidas, conexiones libres) y el
+estado de los cortacircuitos.
+"""
+
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .circuit_breaker import CLOSED, CircuitBreaker, CircuitOpenError
+from .config import config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# Cabeceras de navegador que espera la API de Protokols
+BROWSER_USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                      "(KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36")
+
+def default_upstreams() -> Dict[str, Dict[str, Any]]:
+    """
+    Upstreams conocidos: prefijos de URL que atienden y cabeceras por defecto.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Definición de cada upstream por nombre
+    """
+    return {
+        'helius': {'prefixes': [config.HELIUS_API_URL.split('/v0')[0] + '/'],
+                   'headers': {'Content-Type': 'application/json'}},
+        'helius_rpc': {'prefixes': [config.HELIUS_RPC_URL],
+                       'headers': {'Content-Type': 'application/json'}},
+        'ipfs': {'prefixes': ['https://ipfs.io/', 'https://cloudflare-ipfs.com/', 'https://gateway.pinata.cloud/',
+                              'https://ipfs.pump.fun/', 'https://dweb.link/', 'https://arweave.net/'],
+                 'headers': {'Accept': 'application/json'}},
+        'protokols': {'prefixes': ['https://api.protokols.io/'],
+                      'headers': {'User-Agent': BROWSER_USER_AGENT, 'Accept': 'application/json, text/plain, */*',
+                                  'Origin': 'https://www.protokols.io'}},
+        'telegram': {'prefixes': ['https://api.telegram.org/'], 'headers': {}},
+    }
+
+class HttpClient:
+    """
+    Sesión HTTP compartida con un pool de conexiones por upstream.
+    """
+
+    def __init__(self, upstreams: Optional[Dict[str, Dict[str, Any]]] = None,
+                 pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None,
+                 pool_sizes: Optional[Dict[str, int]] = None, pool_block: Optional[bool] = None,
+                 breakers: Optional[bool] = None, name: str = "http"):
+        """
+        Inicializa la sesión y monta un adaptador por upstream.
+
+        Args:
+            upstreams: Prefijos y cabeceras por defecto de cada upstream (por defecto default_upstreams())
+            pool_connections: Hosts distintos cuyo pool se conserva por adaptador (por defecto HTTP_POOL_CONNECTIONS)
+            pool_maxsize: Conexiones keep-alive por host (por defecto HTTP_POOL_MAXSIZE)
+            pool_sizes: Tamaño de pool por upstream que sustituye a pool_maxsize (por defecto HTTP_POOL_SIZES)
+            pool_block: Si al agotar el pool se espera una conexión libre en lugar de abrir
+                        una desechable (por defecto HTTP_POOL_BLOCK)
+            breakers: Si se usa un cortacircuitos por host (por defecto HTTP_BREAKER_ENABLED)
+            name: Nombre usado en los logs y en las métricas
+        """
+        self.upstreams = upstreams if upstreams is not None else default_upstreams()
+        self.pool_connections = pool_connections or config.HTTP_POOL_CONNECTIONS
+        self.pool_maxsize = pool_maxsize or config.HTTP_POOL_MAXSIZE
+        self.pool_sizes = dict(config.HTTP_POOL_SIZES if pool_sizes is None else pool_sizes)
+        self.pool_block = config.HTTP_POOL_BLOCK if pool_block is None else pool_block
+        self.breakers_enabled = config.HTTP_BREAKER_ENABLED if breakers is None else breakers
+        self.name = name
+
+        self.session = requests.Session()
+        # Las respuestas no dejan cookies en la sesión compartida
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self._default_adapter = self._mount(['https://', 'http://'], self.pool_maxsize)
+        self._adapters: Dict[str, HTTPAdapter] = {}
+        # Prefijos de más largo a más corto, como los resuelve requests al elegir adaptador
+        self._routes: List[tuple] = []
+        for upstream, definition in self.upstreams.items():
+            prefixes = [prefix for prefix in definition.get('prefixes', []) if prefix]
+            size = int(self.pool_sizes.get(upstream, self.pool_maxsize))
+            self._adapters[upstream] = self._mount(prefixes, size)
+            self._routes.extend((prefix, upstream) for prefix in prefixes)
+        self._routes.sort(key=lambda route: len(route[0]), reverse=True)
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def _mount(self, prefixes: List[str], size: int) -> HTTPAdapter:
+        """Crea un adaptador con su pool y lo monta en la sesión para cada prefijo."""
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=size, pool_block=self.pool_block)
+        for prefix in prefixes:
+            self.session.mount(prefix, adapter)
+        return adapter
+
+    def upstream_for(self, url: str) -> Optional[str]:
+        """
+        Indica qué upstream atiende una URL.
+
+        Args:
+            url: URL de la petición
+
+        Returns:
+            Optional[str]: Nombre del upstream o None si no es uno conocido
+        """
+        lowered = url.lower()
+        for prefix, upstream in self._routes:
+            if lowered.startswith(prefix.lower()):
+                return upstream
+        return None
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs: Any) -> requests.Response:
+        """
+        Hace una petición reutilizando las conexiones del pool de su upstream.
+
+        Args:
+            method: Método HTTP
+            url: URL de la petición
+            headers: Cabeceras que se añaden (o sustituyen) a las del upstream
+            **kwargs: Argumentos de requests (params, json, data, cookies, timeout...)
+
+        Returns:
+            requests.Response: Respuesta recibida
+
+        Raises:
+            CircuitOpenError: Si el circuito del host está abierto (sin enviar la petición)
+            requests.RequestException: Si la petición falla
+        """
+        upstream = self.upstream_for(url)
+        merged = dict(self.upstreams[upstream].get('headers') or {}) if upstream else {}
+        if headers:
+            merged.update(headers)
+        key = upstream or urlsplit(url).netloc
+        breaker = self.breaker_for(url) if self.breakers_enabled else None
+        if breaker is not None:
+            try:
+                breaker.before_request()
+            except CircuitOpenError:
+                self._count(key, 'rejected')
+                raise
+            if isinstance(kwargs.get('timeout'), (int, float)):
+                kwargs['timeout'] = breaker.timeout(kwargs['timeout'])
+        started = time.monotonic()
+        try:
+            response = self.session.request(method, url, headers=merged, **kwargs)
+        except Exception:
+            self._count(key, 'errors')
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        self._count(key, 'requests')
+        if breaker is not None:
+            # 5xx y 429 indican un upstream degradado; el resto de respuestas, uno que contesta
+            if response.status_code >= 500 or response.status_code == 429:
+                breaker.record_failure()
+            else:
+                breaker.record_success(time.monotonic() - started)
+        return response
+
+    def breaker_for(self, url: str) -> CircuitBreaker:
+        """
+        Retorna el cortacircuitos del host de una URL, creándolo la primera vez.
+
+        Args:
+            url: URL de la petición
+
+        Returns:
+            CircuitBreaker: Cortacircuitos del host
+        """
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}".lower()
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(host)
+            return breaker
+
+    def breaker_state(self, url: str) -> str:
+        """
+        Estado del cortacircuitos del host de una URL.
+
+        Args:
+            url: URL de la petición
+
+        Returns:
+            str: 'closed', 'open' o 'half_open' ('closed' si los cortacircuitos están desactivados)
+        """
+        return self.breaker_for(url).state if self.breakers_enabled else CLOSED
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """Petición GET (ver request)."""
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        """Petición POST (ver request)."""
+        return self.request('POST', url, **kwargs)
+
+    def _count(self, key: str, field: str) -> None:
+        """Suma una petición o un error al contador del upstream."""
+        with self._lock:
+            stats = self._stats.setdefault(key, {'requests': 0, 'errors': 0, 'rejected': 0})
+            stats[field] += 1
+
+    def close(self) -> None:
+        """Cierra la sesión y todas las conexiones de los pools."""
+        self.session.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Retorna el uso de los pools de conexiones.
+
+        Returns:
+            Dict[str, Any]: Por upstream, peticiones, errores y rechazos; por host, conexiones abiertas,
+            peticiones servidas, conexiones libres, tamaño del pool y fracción de reutilización;
+            y el estado del cortacircuitos de cada host
+        """
+        with self._lock:
+            counters = {key: dict(stats) for key, stats in self._stats.items()}
+            breakers = dict(self._breakers)
+        upstreams = {}
+        adapters = list(self._adapters.items()) + [('other', self._default_adapter)]
+        for upstream, adapter in adapters:
+            hosts = {}
+            for pool_key in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(pool_key)
+                if pool is None:
+                    continue
+                queue = getattr(pool.pool, 'queue', None) or []
+                opened, served = pool.num_connections, pool.num_requests
+                hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                    'connections_opened': opened,
+                    'requests': served,
+                    'idle': sum(1 for connection in list(queue) if connection is not None),
+                    'maxsize': pool.pool.maxsize if pool.pool is not None else 0,
+                    'reuse_ratio': round(1 - opened / served, 3) if served else 0.0
+                }
+            entry = dict(counters.pop(upstream, {'requests': 0, 'errors': 0, 'rejected': 0}), hosts=hosts)
+            upstreams[upstream] = entry
+        # Hosts sin upstream conocido (atendidos por el adaptador por defecto)
+        for key, stats in counters.items():
+            upstreams['other'].setdefault('by_host', {})[key] = stats
+        return {'name': self.name, 'pool_block': self.pool_block, 'upstreams': upstreams,
+                'breakers': {host: breaker.metrics() for host, breaker in breakers.items()}}
+
+_default_client: Optional[HttpClient] = None
+_default_lock = threading.Lock()
+
+def get_client() -> HttpClient:
+    """
+    Retorna el cliente compartido del proceso, creándolo la primera vez.
+
+    Returns:
+        HttpClient: Cliente compartido
+    """
+    global _default_client
+    if _default_client is None:
+        with _default_lock:
+            if _default_client is None:
+                _default_client = HttpClient()
+    return _default_client
+
+def request(method: str, url: str, **kwargs: Any) -> requests.Response:
+    """Petición con el cliente compartido (ver HttpClient.request)."""
+    return get_client().request(method, url, **kwargs)
+
+def get(url: str, **kwargs: Any) -> requests.Response:
+    """Petición GET con el cliente compartido."""
+    return get_client().get(url, **kwargs)
+
+def post(url: str, **kwargs: Any) -> requests.Response:
+    """Petición POST con el cliente compartido."""
+    return get_client().post(url, **kwargs)
+
+def breaker_state(url: str) -> str:
+    """Estado del cortacircuitos del host de una URL en el cliente compartido."""
+    return get_client().breaker_state(url)
+
+def metrics() -> Dict[str, Any]:
+    """Métricas de los pools y cortacircuitos del cliente compartido."""
+    return get_client().metrics()
@@ -0,0 +1,254 @@
+"""
+Índice de idempotencia por firma de transacción y mint.
+
+Helius reintenta los webhooks y puede haber varias réplicas recibiendo las mismas
+entregas. El índice combina un filtro de Bloom por franjas de tiempo en memoria,
+que responde en O(1) si una clave es seguro nueva, con un conjunto exacto en disco
+(SQLite) que sobrevive a reinicios y se comparte entre procesos. Al arrancar, el
+filtro de Bloom se reconstruye desde el disco.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+class TimeBucketedBloomFilter:
+    """
+    Filtro de Bloom dividido en franjas de tiempo.
+    Las franjas más antiguas que la ventana se descartan enteras, de modo que
+    el filtro no se satura con claves caducadas.
+    """
+
+    def __init__(self, bucket_seconds: float, buckets: int, bits_per_bucket: int, hashes: int = 4):
+        """
+        Inicializa el filtro vacío.
+
+        Args:
+            bucket_seconds: Duración de cada franja
+            buckets: Número de franjas conservadas
+            bits_per_bucket: Tamaño en bits de cada franja
+            hashes: Número de funciones hash por clave
+        """
+        self.bucket_seconds = bucket_seconds
+        self.buckets = buckets
+        self.bits = bits_per_bucket
+        self.hashes = hashes
+        self._bitsets: Dict[int, bytearray] = {}
+
+    def _positions(self, key: str) -> List[int]:
+        """Posiciones de bits de una clave (double hashing sobre un único digest)."""
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def _bucket_id(self, timestamp: float) -> int:
+        """Identificador de la franja que contiene un instante."""
+        return int(timestamp // self.bucket_seconds)
+
+    def _expire(self, now: float) -> None:
+        """Descarta las franjas que han salido de la ventana."""
+        oldest = self._bucket_id(now) - self.buckets + 1
+        for bucket_id in [b for b in self._bitsets if b < oldest]:
+            del self._bitsets[bucket_id]
+
+    def add(self, key: str, timestamp: Optional[float] = None) -> None:
+        """
+        Añade una clave a la franja correspondiente a su instante.
+
+        Args:
+            key: Clave a añadir
+            timestamp: Instante de la clave (por defecto, ahora)
+        """
+        now = time.time()
+        timestamp = now if timestamp is None else timestamp
+        self._expire(now)
+        bucket_id = self._bucket_id(timestamp)
+        if bucket_id < self._bucket_id(now) - self.buckets + 1:
+            return
+        bitset = self._bitsets.get(bucket_id)
+        if bitset is None:
+            bitset = self._bitsets[bucket_id] = bytearray((self.bits + 7) // 8)
+        for position in self._positions(key):
+            bitset[position >> 3] |= 1 << (position & 7)
+
+    def might_contain(self, key: str) -> bool:
+        """
+        Indica si la clave puede haberse añadido. False significa que seguro no.
+
+        Args:
+            key: Clave a comprobar
+
+        Returns:
+            bool: True si la clave posiblemente está en el filtro
+        """
+        self._expire(time.time())
+        positions = self._positions(key)
+        for bitset in self._bitsets.values():
+            if all(bitset[p >> 3] & (1 << (p & 7)) for p in positions):
+                return True
+        return False
+
+class IdempotencyIndex:
+    """
+    Índice de entregas ya procesadas, con filtro de Bloom en memoria y conjunto exacto en SQLite.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_age: Optional[float] = None,
+                 bucket_seconds: Optional[float] = None, bits_per_bucket: Optional[int] = None):
+        """
+        Abre (o crea) el índice y reconstruye el filtro de Bloom desde el disco.
+
+        Args:
+            path: Ruta de la base de datos SQLite (por defecto IDEMPOTENCY_DB)
+            max_age: Segundos que se recuerda cada clave (por defecto IDEMPOTENCY_MAX_AGE)
+            bucket_seconds: Duración de cada franja del filtro de Bloom
+            bits_per_bucket: Tamaño en bits de cada franja del filtro de Bloom
+        """
+        self.path = Path(path or config.IDEMPOTENCY_DB)
+        self.max_age = max_age or config.IDEMPOTENCY_MAX_AGE
+        bucket_seconds = bucket_seconds or config.IDEMPOTENCY_BUCKET_SECONDS
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY, created_at REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS seen_created_at ON seen (created_at)")
+
+        self._bloom = TimeBucketedBloomFilter(
+            bucket_seconds=bucket_seconds,
+            buckets=max(1, int(-(-self.max_age // bucket_seconds))),
+            bits_per_bucket=bits_per_bucket or config.IDEMPOTENCY_BLOOM_BITS
+        )
+        self._stats = {'checked': 0, 'new': 0, 'duplicates': 0, 'bloom_negatives': 0}
+        self._last_prune = 0.0
+        self._load()
+
+    @staticmethod
+    def _keys(signature: Optional[str], mint: Optional[str]) -> List[str]:
+        """
+        Claves bajo las que se registra una entrega. La primera decide si es duplicada:
+        el mint si se conoce (una transacción puede crear varios mints), si no la firma.
+        """
+        keys = []
+        if mint:
+            keys.append(f"mint:{mint}")
+        if signature:
+            keys.append(f"sig:{signature}")
+        return keys
+
+    def _load(self) -> None:
+        """Elimina las claves caducadas y carga las vigentes en el filtro de Bloom."""
+        with self._lock:
+            self._prune_locked(time.time())
+            rows = self._conn.execute("SELECT key, created_at FROM seen").fetchall()
+            for key, created_at in rows:
+                self._bloom.add(key, created_at)
+        logger.info(f"Índice de idempotencia cargado con {len(rows)} claves desde {self.path}")
+
+    def _prune_locked(self, now: float) -> None:
+        """Elimina del disco las claves más antiguas que max_age. Requiere el lock."""
+        self._conn.execute("DELETE FROM seen WHERE created_at < ?", (now - self.max_age,))
+        self._last_prune = now
+
+    def check_and_add(self, signature: Optional[str] = None, mint: Optional[str] = None) -> bool:
+        """
+        Registra una entrega y comprueba si ya se había visto su mint (o su firma si no hay mint).
+
+        Args:
+            signature: Firma de la transacción
+            mint: Dirección del token
+
+        Returns:
+            bool: True si la entrega es nueva, False si es un duplicado
+        """
+        keys = self._keys(signature, mint)
+        if not keys:
+            return True
+        now = time.time()
+        with self._lock:
+            self._stats['checked'] += 1
+            if now - self._last_prune > self._bloom.bucket_seconds:
+                self._prune_locked(now)
+
+            primary = keys[0]
+            if not self._bloom.might_contain(primary):
+                self._stats['bloom_negatives'] += 1
+            elif self._conn.execute("SELECT 1 FROM seen WHERE key = ?", (primary,)).fetchone():
+                self._stats['duplicates'] += 1
+                return False
+
+            # INSERT OR IGNORE es atómico: si otra réplica insertó la clave antes, es un duplicado
+            inserted = 0
+            for key in keys:
+                cursor = self._conn.execute("INSERT OR IGNORE INTO seen (key, created_at) VALUES (?, ?)", (key, now))
+                if key == primary:
+                    inserted = cursor.rowcount
+                self._bloom.add(key, now)
+            if not inserted:
+                self._stats['duplicates'] += 1
+                return False
+            self._stats['new'] += 1
+            return True
+
+    def seen(self, signature: Optional[str] = None, mint: Optional[str] = None) -> bool:
+        """
+        Comprueba sin registrar si ya se vio una firma o un mint.
+
+        Args:
+            signature: Firma de la transacción
+            mint: Dirección del token
+
+        Returns:
+            bool: True si alguna de las claves ya está registrada
+        """
+        keys = self._keys(signature, mint)
+        with self._lock:
+            candidates = [key for key in keys if self._bloom.might_contain(key)]
+            if not candidates:
+                return False
+            placeholders = ','.join('?' * len(candidates))
+            return self._conn.execute(
+                f"SELECT 1 FROM seen WHERE key IN ({placeholders}) LIMIT 1", candidates
+            ).fetchone() is not None
+
+    def discard(self, signature: Optional[str] = None, mint: Optional[str] = None) -> None:
+        """
+        Olvida una entrega para que pueda volver a procesarse (p. ej. al traspasarla a otro proceso).
+        El filtro de Bloom no admite borrados: la clave seguirá dando un falso positivo
+        que resuelve la consulta exacta en disco.
+
+        Args:
+            signature: Firma de la transacción
+            mint: Dirección del token
+        """
+        keys = self._keys(signature, mint)
+        if not keys:
+            return
+        placeholders = ','.join('?' * len(keys))
+        with self._lock:
+            self._conn.execute(f"DELETE FROM seen WHERE key IN ({placeholders})", keys)
+
+    def close(self) -> None:
+        """Cierra la conexión con la base de datos."""
+        with self._lock:
+            self._conn.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Retorna los contadores del índice.
+
+        Returns:
+            Dict[str, Any]: Comprobaciones, nuevas entregas, duplicados y negativos del filtro
+        """
+        with self._lock:
+            return dict(self._stats)
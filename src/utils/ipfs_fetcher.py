@@ -0,0 +1,323 @@
+"""
+Descarga de JSON de IPFS con peticiones de cobertura (hedging) entre gateways.
+
+Un mismo CID se puede servir desde cualquier gateway, pero su latencia varía mucho
+y a veces uno se queda colgado. HedgedIPFSFetcher pide el contenido al gateway
+mejor clasificado y, si no ha respondido cuando vence el percentil configurado de
+sus latencias recientes, lanza la misma petición al siguiente (y así hasta el
+máximo de coberturas). Un fallo lanza la siguiente de inmediato. Se queda con el
+primer JSON válido y cancela el resto: las que aún no empezaron no se envían y las
+que están en curso se cierran sin leer el cuerpo. Los gateways se ordenan por su
+latencia media móvil exponencial (EWMA) penalizada por su tasa de errores, también
+EWMA, así que el orden se adapta solo.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from . import http_client
+from .circuit_breaker import OPEN, CircuitOpenError
+from .config import config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# ipfs://CID/ruta o https://gateway/ipfs/CID/ruta
+IPFS_PATH_PATTERN = re.compile(r"^(?:ipfs://(?:ipfs/)?|(https?://[^?#]*?/ipfs/))([A-Za-z0-9]+(?:/[^?#]*)?)")
+# Latencias recientes que se guardan por gateway para calcular el percentil
+LATENCY_SAMPLES = 100
+# Muestras mínimas antes de usar el percentil en lugar del retardo inicial
+MIN_SAMPLES = 5
+# Gateways de URIs originales (no configurados) que se clasifican a la vez; al pasar
+# de este número se olvida el usado hace más tiempo
+MAX_ORIGIN_GATEWAYS = 16
+
+def split_ipfs_uri(uri: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Separa una URI de IPFS en el gateway que la sirve y la ruta del contenido.
+
+    Args:
+        uri: URI ipfs:// o URL de un gateway (https://host/ipfs/CID/...)
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: Gateway ('https://host/ipfs/', None para ipfs://)
+        y ruta 'CID/...'; (None, None) si no es contenido de IPFS
+    """
+    match = IPFS_PATH_PATTERN.match(uri or '')
+    if not match:
+        return None, None
+    return match.group(1), match.group(2)
+
+class GatewayStats:
+    """
+    Latencia y tasa de errores de un gateway.
+    """
+
+    __slots__ = ('latency', 'error_rate', 'samples', 'requests', 'errors', 'wins', 'cancelled')
+
+    def __init__(self, initial_latency: float):
+        self.latency = initial_latency
+        self.error_rate = 0.0
+        self.samples: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.requests = 0
+        self.errors = 0
+        self.wins = 0
+        self.cancelled = 0
+
+    def score(self) -> float:
+        """Coste esperado de pedirle el contenido: latencia EWMA penalizada por la tasa de errores."""
+        return self.latency / max(1.0 - self.error_rate, 0.05)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentil q (0-1) de las latencias recientes, o None si hay pocas muestras."""
+        if len(self.samples) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class HedgedIPFSFetcher:
+    """
+    Descarga contenido JSON de IPFS desde varios gateways con peticiones de cobertura.
+    """
+
+    def __init__(self, gateways: Optional[List[str]] = None, hedge_percentile: Optional[float] = None,
+                 hedge_delay: Optional[float] = None, min_hedge_delay: Optional[float] = None,
+                 max_hedge_delay: Optional[float] = None, max_hedges: Optional[int] = None,
+                 alpha: Optional[float] = None, workers: Optional[int] = None, name: str = "ipfs"):
+        """
+        Inicializa el descargador; el pool de peticiones se crea con la primera descarga.
+
+        Args:
+            gateways: Gateways en orden de preferencia inicial, acabados en '/ipfs/' (por defecto IPFS_GATEWAYS)
+            hedge_percentile: Percentil de latencia del gateway en curso tras el que se lanza
+                              la cobertura (por defecto IPFS_HEDGE_PERCENTILE)
+            hedge_delay: Retardo de cobertura mientras un gateway tiene pocas muestras
+                         (por defecto IPFS_HEDGE_DELAY)
+            min_hedge_delay: Retardo mínimo de cobertura (por defecto IPFS_HEDGE_MIN_DELAY)
+            max_hedge_delay: Retardo máximo de cobertura (por defecto IPFS_HEDGE_MAX_DELAY)
+            max_hedges: Coberturas simultáneas como máximo por descarga (por defecto IPFS_HEDGE_MAX)
+            alpha: Peso de la última medida en las medias EWMA (por defecto IPFS_EWMA_ALPHA)
+            workers: Peticiones simultáneas entre todas las descargas (por defecto IPFS_HEDGE_WORKERS)
+            name: Nombre usado en los logs y en los hilos
+        """
+        self.gateways = list(gateways or config.IPFS_GATEWAYS)
+        self.hedge_percentile = config.IPFS_HEDGE_PERCENTILE if hedge_percentile is None else hedge_percentile
+        self.hedge_delay = config.IPFS_HEDGE_DELAY if hedge_delay is None else hedge_delay
+        self.min_hedge_delay = config.IPFS_HEDGE_MIN_DELAY if min_hedge_delay is None else min_hedge_delay
+        self.max_hedge_delay = config.IPFS_HEDGE_MAX_DELAY if max_hedge_delay is None else max_hedge_delay
+        self.max_hedges = config.IPFS_HEDGE_MAX if max_hedges is None else max_hedges
+        self.alpha = alpha or config.IPFS_EWMA_ALPHA
+        self.workers = workers or config.IPFS_HEDGE_WORKERS
+        self.name = name
+
+        self._lock = threading.Lock()
+        # Los gateways sin medidas parten de la latencia del retardo inicial; a igualdad
+        # de puntuación se respeta el orden configurado
+        self._stats: Dict[str, GatewayStats] = {gateway: GatewayStats(self.hedge_delay) for gateway in self.gateways}
+        # Gateways de URIs originales en orden de último uso (acotados a MAX_ORIGIN_GATEWAYS)
+        self._origins: "OrderedDict[str, None]" = OrderedDict()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._counters = {'fetches': 0, 'hedges': 0, 'failures': 0}
+
+    def rank(self, extra: Optional[str] = None) -> List[str]:
+        """
+        Ordena los gateways de mejor a peor según su puntuación.
+
+        Args:
+            extra: Gateway de la URI original, que se añade a la clasificación si no estaba
+
+        Returns:
+            List[str]: Gateways ordenados
+        """
+        with self._lock:
+            if extra and extra not in self.gateways:
+                self._track_origin(extra)
+            # A igualdad de puntuación va primero el gateway original (suele tener el contenido fijado)
+            order = {gateway: position for position, gateway in enumerate(self._stats)}
+            if extra:
+                order[extra] = -1
+            return sorted(self._stats, key=lambda gateway: (self._stats[gateway].score(), order[gateway]))
+
+    def _track_origin(self, gateway: str) -> None:
+        """Añade o refresca un gateway no configurado, olvidando el más antiguo si sobran (con el lock tomado)."""
+        if gateway in self._origins:
+            self._origins.move_to_end(gateway)
+            return
+        self._origins[gateway] = None
+        self._stats[gateway] = GatewayStats(self.hedge_delay)
+        while len(self._origins) > MAX_ORIGIN_GATEWAYS:
+            oldest, _ = self._origins.popitem(last=False)
+            del self._stats[oldest]
+
+    def _delay_for(self, gateway: str) -> float:
+        """Espera antes de cubrir una petición en curso a un gateway."""
+        with self._lock:
+            stats = self._stats.get(gateway)
+            observed = stats.percentile(self.hedge_percentile) if stats else None
+        delay = self.hedge_delay if observed is None else observed
+        return min(self.max_hedge_delay, max(self.min_hedge_delay, delay))
+
+    def fetch_json(self, uri: str, timeout: float) -> Optional[Any]:
+        """
+        Descarga un documento JSON de IPFS desde el gateway que antes responda.
+
+        Las URIs que no son de IPFS (p. ej. arweave) se piden tal cual, sin cobertura.
+
+        Args:
+            uri: URI ipfs:// o URL de un gateway
+            timeout: Segundos máximos para toda la descarga
+
+        Returns:
+            Optional[Any]: Primer documento JSON válido, o None si ningún gateway lo sirvió a tiempo
+        """
+        origin, path = split_ipfs_uri(uri)
+        if path is None:
+            pending = [(None, uri)]
+        else:
+            pending = [(gateway, f"{gateway}{path}") for gateway in self.rank(origin)]
+            # Los gateways con el circuito abierto fallarían al instante: se dejan para el final
+            pending.sort(key=lambda candidate: http_client.breaker_state(candidate[1]) == OPEN)
+        with self._lock:
+            self._counters['fetches'] += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{self.name}-fetch")
+            executor = self._executor
+
+        expires_at = time.monotonic() + timeout
+        cancelled = threading.Event()
+        running: Dict[Future, Optional[str]] = {}
+        next_hedge_at = 0.0
+        result = None
+        try:
+            while running or pending:
+                now = time.monotonic()
+                if now >= expires_at:
+                    break
+                # Nueva petición si no hay ninguna en curso, si venció el retardo de cobertura
+                # o si falló la anterior, sin pasar de max_hedges coberturas simultáneas
+                if pending and (not running or (now >= next_hedge_at and len(running) <= self.max_hedges)):
+                    gateway, url = pending.pop(0)
+                    if running:
+                        with self._lock:
+                            self._counters['hedges'] += 1
+                        logger.info(f"Cobertura de IPFS: {url}")
+                    running[executor.submit(self._attempt, gateway, url, expires_at, cancelled)] = gateway
+                    next_hedge_at = now + self._delay_for(gateway) if gateway else expires_at
+                    continue
+                wait_for = expires_at - now
+                if pending and len(running) <= self.max_hedges:
+                    wait_for = min(wait_for, max(0.0, next_hedge_at - now))
+                done, _ = wait(list(running), timeout=wait_for, return_when=FIRST_COMPLETED)
+                for future in done:
+                    gateway = running.pop(future)
+                    data = future.result()
+                    if data is None:
+                        next_hedge_at = time.monotonic()
+                    elif result is None:
+                        result = data
+                        if gateway:
+                            with self._lock:
+                                stats = self._stats.get(gateway)
+                                if stats:
+                                    stats.wins += 1
+                if result is not None:
+                    break
+        finally:
+            cancelled.set()
+            for future in running:
+                future.cancel()
+        if result is None:
+            with self._lock:
+                self._counters['failures'] += 1
+            logger.warning(f"Ningún gateway sirvió {uri} a tiempo")
+        return result
+
+    def _attempt(self, gateway: Optional[str], url: str, expires_at: float,
+                 cancelled: threading.Event) -> Optional[Any]:
+        """Pide el documento a un gateway y actualiza sus estadísticas."""
+        started = time.monotonic()
+        try:
+            response = http_client.get(url, timeout=max(0.001, expires_at - started), stream=True)
+        except CircuitOpenError:
+            # Rechazada sin enviarse: el cortacircuitos ya refleja el estado del gateway
+            return None
+        except Exception as e:
+            if not cancelled.is_set():
+                logger.warning(f"Error al descargar {url}: {str(e)}")
+            self._record(gateway, None, cancelled.is_set())
+            return None
+        try:
+            if cancelled.is_set():
+                # Otro gateway ya respondió: no se lee el cuerpo
+                self._record(gateway, None, True)
+                return None
+            response.raise_for_status()
+            data = response.json()
+            if not isinstance(data, dict):
+                raise ValueError("el documento no es un objeto JSON")
+        except Exception as e:
+            logger.warning(f"Respuesta no válida de {url}: {str(e)}")
+            self._record(gateway, None, cancelled.is_set())
+            return None
+        finally:
+            response.close()
+        self._record(gateway, time.monotonic() - started, False)
+        return data
+
+    def _record(self, gateway: Optional[str], latency: Optional[float], cancelled: bool) -> None:
+        """Actualiza las medias EWMA de un gateway con el resultado de una petición."""
+        if not gateway:
+            return
+        with self._lock:
+            stats = self._stats.get(gateway)
+            if stats is None:
+                # Gateway original olvidado mientras la petición estaba en curso
+                return
+            if cancelled:
+                # Abortada porque otro gateway ganó: no dice nada del gateway
+                stats.cancelled += 1
+                return
+            stats.requests += 1
+            if latency is None:
+                stats.errors += 1
+                stats.error_rate += self.alpha * (1.0 - stats.error_rate)
+                return
+            stats.error_rate -= self.alpha * stats.error_rate
+            stats.latency += self.alpha * (latency - stats.latency)
+            stats.samples.append(latency)
+
+    def close(self) -> None:
+        """Espera a las peticiones en curso y detiene el pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Retorna las métricas del descargador.
+
+        Returns:
+            Dict[str, Any]: Descargas, coberturas y fallos, y por gateway (en orden de
+            clasificación) latencia EWMA, tasa de errores, percentil de cobertura y victorias
+        """
+        ranking = self.rank()
+        with self._lock:
+            return dict(self._counters, name=self.name, gateways=[
+                {
+                    'gateway': gateway,
+                    'latency_ms': round(self._stats[gateway].latency * 1000, 1),
+                    'error_rate': round(self._stats[gateway].error_rate, 3),
+                    'hedge_after_ms': round((self._stats[gateway].percentile(self.hedge_percentile)
+                                             or self.hedge_delay) * 1000, 1),
+                    'requests': self._stats[gateway].requests,
+                    'errors': self._stats[gateway].errors,
+                    'wins': self._stats[gateway].wins,
+                    'cancelled': self._stats[gateway].cancelled
+                }
+                for gateway in ranking if gateway in self._stats
+            ])
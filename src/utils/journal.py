@@ -0,0 +1,317 @@
+"""
+Journal de ingestión segmentado y de solo escritura al final (append-only).
+
+Cada registro se guarda como una línea JSON en el segmento activo. Los segmentos
+se nombran con el offset global (en bytes) de su primer registro, de modo que
+cualquier registro se identifica por un único offset y un lector puede reanudar
+la lectura desde él. Las escrituras se confirman en disco por grupos: un hilo
+hace un solo fsync por todas las escrituras acumuladas en el intervalo, sin
+bloquear a los que siguen escribiendo mientras tanto.
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import fast_json
+from .config import config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+SEGMENT_SUFFIX = ".jsonl"
+
+def list_segments(directory: str) -> List[int]:
+    """
+    Lista los offsets base de los segmentos de un journal, en orden.
+
+    Args:
+        directory: Directorio del journal
+
+    Returns:
+        List[int]: Offsets base de los segmentos
+    """
+    return sorted(
+        int(path.name[:-len(SEGMENT_SUFFIX)])
+        for path in Path(directory).glob(f"*{SEGMENT_SUFFIX}")
+        if path.name[:-len(SEGMENT_SUFFIX)].isdigit()
+    )
+
+def read_journal(directory: str, offset: int = 0, limit: Optional[int] = None) -> Iterator[Tuple[int, Any]]:
+    """
+    Recorre los registros de un journal a partir de un offset sin abrirlo para escritura,
+    por lo que puede usarse mientras otro proceso sigue escribiendo.
+    Si el offset pertenece a un segmento ya eliminado, empieza por el más antiguo.
+
+    Args:
+        directory: Directorio del journal
+        offset: Offset desde el que leer
+        limit: Offset a partir del cual dejar de leer (por defecto, hasta el final)
+
+    Yields:
+        Tuple[int, Any]: Offset y contenido de cada registro
+    """
+    for base in list_segments(directory):
+        path = Path(directory) / f"{base:020d}{SEGMENT_SUFFIX}"
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            continue
+        if base + size <= offset:
+            continue
+        with open(path, "rb") as f:
+            position = max(offset - base, 0)
+            f.seek(position)
+            for line in f:
+                record_offset = base + position
+                # Una línea sin salto final es una escritura todavía en curso
+                if (limit is not None and record_offset >= limit) or not line.endswith(b"\n"):
+                    return
+                position += len(line)
+                yield record_offset, fast_json.loads(line)
+
+class Journal:
+    """
+    Journal append-only con rotación de segmentos, retención y fsync agrupado.
+    """
+
+    def __init__(self, directory: Optional[str] = None, segment_max_bytes: Optional[int] = None,
+                 max_segments: Optional[int] = None, fsync_interval: Optional[float] = None):
+        """
+        Abre (o crea) el journal y recupera el segmento activo.
+
+        Args:
+            directory: Directorio de los segmentos (por defecto JOURNAL_DIR)
+            segment_max_bytes: Tamaño a partir del cual se rota el segmento
+            max_segments: Número máximo de segmentos conservados (0 = sin límite)
+            fsync_interval: Segundos entre confirmaciones agrupadas en disco
+        """
+        self.directory = Path(directory or config.JOURNAL_DIR)
+        self.segment_max_bytes = segment_max_bytes or config.JOURNAL_SEGMENT_BYTES
+        self.max_segments = config.JOURNAL_MAX_SEGMENTS if max_segments is None else max_segments
+        self.fsync_interval = config.JOURNAL_FSYNC_INTERVAL if fsync_interval is None else fsync_interval
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._synced = threading.Condition(self._lock)
+        self._closed = False
+        self._appended = 0
+        self._fsyncs = 0
+        # Último fallo al confirmar en disco: se propaga a quien espera su registro
+        self._sync_error: Optional[Exception] = None
+        self._sync_failures = 0
+
+        segments = self.segments()
+        base_offset = segments[-1] if segments else 0
+        self._base_offset = base_offset
+        self._file = open(self._segment_path(base_offset), "ab")
+        self._recover_tail()
+        self._end_offset = self._base_offset + self._file.tell()
+        self._durable_offset = self._end_offset
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="journal-flusher", daemon=True)
+        self._flusher.start()
+
+    def _segment_path(self, base_offset: int) -> Path:
+        """Ruta del segmento que empieza en el offset indicado."""
+        return self.directory / f"{base_offset:020d}{SEGMENT_SUFFIX}"
+
+    def _recover_tail(self) -> None:
+        """Descarta una última línea incompleta (escritura interrumpida por un crash)."""
+        path = self._segment_path(self._base_offset)
+        with open(path, "rb") as f:
+            data = f.read()
+        if data and not data.endswith(b"\n"):
+            valid = data.rfind(b"\n") + 1
+            logger.warning(f"Journal: descartando {len(data) - valid} bytes incompletos en {path.name}")
+            self._file.truncate(valid)
+        self._file.seek(0, os.SEEK_END)
+
+    def segments(self) -> List[int]:
+        """
+        Lista los offsets base de los segmentos existentes, en orden.
+
+        Returns:
+            List[int]: Offsets base de los segmentos
+        """
+        return list_segments(str(self.directory))
+
+    @property
+    def end_offset(self) -> int:
+        """Offset en el que se escribirá el próximo registro."""
+        return self._end_offset
+
+    def append(self, record: Any, sync: bool = False) -> int:
+        """
+        Añade un registro al final del journal.
+
+        Args:
+            record: Objeto serializable a JSON
+            sync: Si es True, espera a que el registro esté confirmado en disco
+
+        Returns:
+            int: Offset del registro
+        """
+        return self._write(fast_json.dumps(record) + b"\n", sync)
+
+    def append_raw(self, line: bytes, sync: bool = False) -> int:
+        """
+        Añade un registro ya serializado, sin volver a codificarlo.
+
+        Args:
+            line: Documento JSON ya serializado; los saltos de línea se sustituyen por espacios
+            sync: Si es True, espera a que el registro esté confirmado en disco
+
+        Returns:
+            int: Offset del registro
+        """
+        return self._write(fast_json.as_json_line(line) + b"\n", sync)
+
+    def _write(self, line: bytes, sync: bool) -> int:
+        """Escribe una línea terminada en salto de línea y retorna su offset."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("El journal está cerrado")
+            if self._file.tell() and self._file.tell() + len(line) > self.segment_max_bytes:
+                self._rotate()
+            offset = self._end_offset
+            self._file.write(line)
+            self._end_offset += len(line)
+            self._appended += 1
+            if sync:
+                failures = self._sync_failures
+                while self._durable_offset < offset + len(line) and not self._closed:
+                    if self._sync_failures != failures:
+                        raise OSError(f"Journal: no se pudo confirmar el registro en disco: "
+                                      f"{self._sync_error}") from self._sync_error
+                    self._synced.notify_all()
+                    self._synced.wait()
+        return offset
+
+    def _rotate(self) -> None:
+        """Cierra el segmento activo, abre uno nuevo y aplica la retención. Requiere el lock."""
+        self._sync_locked()
+        self._file.close()
+        self._base_offset = self._end_offset
+        self._file = open(self._segment_path(self._base_offset), "ab")
+        logger.info(f"Journal: nuevo segmento {self._base_offset:020d}")
+
+        if self.max_segments:
+            segments = self.segments()
+            for base in segments[:max(0, len(segments) - self.max_segments)]:
+                self._segment_path(base).unlink()
+                logger.info(f"Journal: segmento {base:020d} eliminado por retención")
+
+    def _sync_locked(self) -> None:
+        """Vuelca el buffer y hace fsync del segmento activo. Requiere el lock."""
+        if self._durable_offset >= self._end_offset:
+            return
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            self._sync_failed(e)
+            raise
+        self._synced_up_to(self._end_offset)
+
+    def _sync(self) -> None:
+        """
+        Confirma en disco las escrituras pendientes. El fsync se hace sobre una copia del
+        descriptor y fuera del lock, para que las escrituras no esperen a que termine.
+        """
+        with self._lock:
+            if self._closed or self._durable_offset >= self._end_offset:
+                return
+            target = self._end_offset
+            try:
+                self._file.flush()
+                fd = os.dup(self._file.fileno())
+            except OSError as e:
+                self._sync_failed(e)
+                raise
+        try:
+            os.fsync(fd)
+        except OSError as e:
+            with self._lock:
+                self._sync_failed(e)
+            raise
+        finally:
+            os.close(fd)
+        with self._lock:
+            self._synced_up_to(target)
+
+    def _synced_up_to(self, offset: int) -> None:
+        """Marca como confirmado en disco todo lo escrito hasta offset. Requiere el lock."""
+        self._fsyncs += 1
+        self._durable_offset = max(self._durable_offset, offset)
+        self._sync_error = None
+        self._synced.notify_all()
+
+    def _sync_failed(self, error: Exception) -> None:
+        """Registra un fallo de confirmación y despierta a quien espera su registro. Requiere el lock."""
+        self._sync_error = error
+        self._sync_failures += 1
+        self._synced.notify_all()
+
+    def _flush_loop(self) -> None:
+        """Confirma en disco, una vez por intervalo, todas las escrituras pendientes."""
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                self._synced.wait(self.fsync_interval)
+                if self._closed:
+                    return
+            try:
+                self._sync()
+            except Exception as e:
+                logger.error(f"Journal: error al confirmar escrituras en disco: {str(e)}")
+
+    def flush(self) -> None:
+        """Confirma en disco todas las escrituras pendientes."""
+        self._sync()
+
+    def close(self) -> None:
+        """Confirma las escrituras pendientes y cierra el journal."""
+        with self._lock:
+            if self._closed:
+                return
+            self._sync_locked()
+            self._closed = True
+            self._file.close()
+            self._synced.notify_all()
+        self._flusher.join()
+
+    def read(self, offset: int = 0) -> Iterator[Tuple[int, Any]]:
+        """
+        Recorre los registros confirmados en disco a partir de un offset.
+
+        Args:
+            offset: Offset desde el que leer
+
+        Yields:
+            Tuple[int, Any]: Offset y contenido de cada registro
+        """
+        with self._lock:
+            limit = self._durable_offset
+        return read_journal(str(self.directory), offset, limit)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Retorna las métricas actuales del journal.
+
+        Returns:
+            Dict[str, Any]: Segmentos, offsets y contadores de escrituras y fsync
+        """
+        with self._lock:
+            return {
+                'directory': str(self.directory),
+                'segments': len(self.segments()),
+                'active_segment': self._base_offset,
+                'end_offset': self._end_offset,
+                'durable_offset': self._durable_offset,
+                'appended': self._appended,
+                'fsyncs': self._fsyncs,
+                'sync_failures': self._sync_failures
+            }
@@ -0,0 +1,255 @@
+"""
+Fuente de ingestión en streaming por websocket (logsSubscribe).
+
+Como alternativa de baja latencia a la entrega de webhooks, se suscribe por el
+websocket RPC a los logs de las transacciones que mencionan cada wallet de
+launchpad. Cuando los logs indican una creación de token (InitializeMint,
+CreateMetadataAccount, Create) se pide la transacción en formato enhanced a
+Helius (agrupando las firmas con HeliusBatcher) y se entrega al mismo callback de
+ingestión que usan los webhooks. Las firmas ya aceptadas por el filtro previo (por
+ejemplo, llegadas antes por webhook) no se piden. La conexión se reabre sola con
+espera exponencial.
+"""
+
+import asyncio
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from . import http_client
+from .config import config
+from .deadline import Deadline
+from .helius_batcher import HeliusBatcher
+from .logger import get_logger
+
+try:
+    import websockets
+except ImportError:  # pragma: no cover - depende del entorno
+    websockets = None
+
+logger = get_logger(__name__)
+
+# Instrucciones cuyo log indica la creación de un token
+CREATION_INSTRUCTIONS = frozenset({
+    "InitializeMint", "InitializeMint2", "CreateMetadataAccountV3", "CreateMetadataAccountV2", "Create"
+})
+LOG_PREFIX = "Program log: Instruction: "
+# Máximo de firmas por petición a /v0/transactions
+TRANSACTIONS_BATCH_SIZE = 100
+
+def is_creation(logs: List[str]) -> bool:
+    """
+    Indica si los logs de una transacción contienen una instrucción de creación de token.
+
+    Args:
+        logs: Líneas de log de la transacción
+
+    Returns:
+        bool: True si alguna línea es una instrucción de creación
+    """
+    return any(
+        line.startswith(LOG_PREFIX) and line[len(LOG_PREFIX):].strip() in CREATION_INSTRUCTIONS
+        for line in logs or []
+    )
+
+def fetch_enhanced_transactions(signatures: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Pide a Helius las transacciones en formato enhanced (el mismo que entregan los webhooks).
+
+    Args:
+        signatures: Firmas de las transacciones
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Transacción por firma
+    """
+    response = http_client.post(f"{config.HELIUS_API_URL}/transactions", params={"api-key": config.HELIUS_API_KEY},
+                                json={"transactions": signatures}, timeout=config.REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return {tx['signature']: tx for tx in response.json() if isinstance(tx, dict) and tx.get('signature')}
+
+class LogStreamSource:
+    """
+    Suscripción por websocket a los logs de las wallets de launchpad.
+    """
+
+    def __init__(self, ingest: Callable[[List[Dict[str, Any]], Deadline], Any],
+                 seen: Optional[Callable[[str], bool]] = None, url: Optional[str] = None,
+                 accounts: Optional[List[str]] = None, commitment: Optional[str] = None,
+                 fetch: Optional[Callable[[List[str]], Dict[str, Dict[str, Any]]]] = None,
+                 reconnect_delay: float = 1.0, max_reconnect_delay: Optional[float] = None,
+                 name: str = "log_stream"):
+        """
+        Inicializa la fuente sin conectar.
+
+        Args:
+            ingest: Callback que recibe las transacciones enhanced detectadas y su deadline
+            seen: Función que indica si una firma ya se ingirió (p. ej. PreFilter.seen)
+            url: URL del websocket RPC (por defecto STREAM_WS_URL con la API key de Helius)
+            accounts: Wallets a vigilar (por defecto las de KNOWN_WALLETS)
+            commitment: Nivel de confirmación de la suscripción (por defecto STREAM_COMMITMENT)
+            fetch: Función que obtiene transacciones enhanced por firma (por defecto Helius)
+            reconnect_delay: Espera inicial en segundos antes de reconectar
+            max_reconnect_delay: Espera máxima entre reconexiones (por defecto STREAM_RECONNECT_MAX)
+            name: Nombre usado en los logs y en el hilo
+        """
+        self.ingest = ingest
+        self.seen = seen or (lambda signature: False)
+        self.url = url or f"{config.STREAM_WS_URL}?api-key={config.HELIUS_API_KEY}"
+        self.accounts = list(accounts if accounts is not None else config.KNOWN_WALLETS)
+        self.commitment = commitment or config.STREAM_COMMITMENT
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = config.STREAM_RECONNECT_MAX if max_reconnect_delay is None else max_reconnect_delay
+        self.name = name
+        self.batcher = HeliusBatcher(fetch or fetch_enhanced_transactions, max_batch_size=TRANSACTIONS_BATCH_SIZE,
+                                     name=f"{name}_transactions")
+
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Deadline] = {}
+        self._stopping = threading.Event()
+        self._connected = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._websocket = None
+        self._stats = {'connections': 0, 'notifications': 0, 'creations': 0, 'duplicates': 0,
+                       'ingested': 0, 'errors': 0}
+
+    def start(self) -> None:
+        """Arranca el hilo que mantiene la suscripción."""
+        if websockets is None:
+            raise RuntimeError("El paquete websockets no está instalado")
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run_loop, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(f"Fuente '{self.name}': suscribiendo {len(self.accounts)} wallet(s) en {self.url.split('?')[0]}")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Cierra la suscripción y espera a que el hilo termine.
+
+        Args:
+            timeout: Segundos máximos de espera por el hilo
+        """
+        self._stopping.set()
+        loop, websocket = self._loop, self._websocket
+        if loop is not None and websocket is not None:
+            loop.call_soon_threadsafe(lambda: asyncio.ensure_future(websocket.close()))
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.batcher.close()
+
+    def wait_connected(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a que la suscripción esté activa.
+
+        Args:
+            timeout: Segundos máximos de espera
+
+        Returns:
+            bool: True si está conectada
+        """
+        return self._connected.wait(timeout)
+
+    def _run_loop(self) -> None:
+        """Cuerpo del hilo: bucle de eventos propio con reconexión."""
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            self._loop.close()
+
+    async def _run(self) -> None:
+        """Mantiene la conexión abierta, reconectando con espera exponencial."""
+        delay = self.reconnect_delay
+        while not self._stopping.is_set():
+            try:
+                async with websockets.connect(self.url, ping_interval=20, max_size=None) as websocket:
+                    self._websocket = websocket
+                    await self._subscribe(websocket)
+                    self._connected.set()
+                    with self._lock:
+                        self._stats['connections'] += 1
+                    delay = self.reconnect_delay
+                    async for message in websocket:
+                        self._handle_message(message)
+            except Exception as e:
+                if not self._stopping.is_set():
+                    logger.warning(f"Fuente '{self.name}': conexión perdida ({str(e) or type(e).__name__})")
+            finally:
+                self._websocket = None
+                self._connected.clear()
+            if self._stopping.is_set():
+                return
+            logger.info(f"Fuente '{self.name}': reconectando en {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _subscribe(self, websocket: Any) -> None:
+        """Envía un logsSubscribe por wallet (el filtro mentions admite una sola cuenta)."""
+        for request_id, account in enumerate(self.accounts, start=1):
+            await websocket.send(json.dumps({
+                "jsonrpc": "2.0", "id": request_id, "method": "logsSubscribe",
+                "params": [{"mentions": [account]}, {"commitment": self.commitment}]
+            }))
+
+    def _handle_message(self, message: str) -> None:
+        """Procesa un mensaje del websocket: confirmaciones, errores y notificaciones de logs."""
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return
+        if data.get('error'):
+            logger.error(f"Fuente '{self.name}': error de suscripción: {data['error']}")
+            return
+        if data.get('method') != 'logsNotification':
+            return
+        value = ((data.get('params') or {}).get('result') or {}).get('value') or {}
+        signature = value.get('signature')
+        with self._lock:
+            self._stats['notifications'] += 1
+        if not signature or value.get('err') or not is_creation(value.get('logs')):
+            return
+        with self._lock:
+            self._stats['creations'] += 1
+            # La misma transacción llega una vez por cada wallet que menciona
+            duplicate = signature in self._pending or self.seen(signature)
+            if duplicate:
+                self._stats['duplicates'] += 1
+                return
+            self._pending[signature] = Deadline()
+        self.batcher.submit(signature).add_done_callback(lambda future: self._deliver(signature, future))
+
+    def _deliver(self, signature: str, future: Any) -> None:
+        """Entrega al pipeline la transacción enhanced obtenida para una firma."""
+        with self._lock:
+            deadline = self._pending.pop(signature, None) or Deadline()
+        try:
+            transaction = future.result()
+        except Exception as e:
+            logger.error(f"Fuente '{self.name}': no se pudo obtener la transacción {signature}: {str(e)}")
+            with self._lock:
+                self._stats['errors'] += 1
+            return
+        if not transaction or self.seen(signature):
+            with self._lock:
+                self._stats['duplicates' if transaction else 'errors'] += 1
+            return
+        try:
+            self.ingest([transaction], deadline)
+            with self._lock:
+                self._stats['ingested'] += 1
+        except Exception as e:
+            logger.error(f"Fuente '{self.name}': error al ingerir {signature}: {str(e)}")
+            with self._lock:
+                self._stats['errors'] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Retorna las métricas de la fuente.
+
+        Returns:
+            Dict[str, Any]: Estado de la conexión y contadores
+        """
+        with self._lock:
+            return dict(self._stats, name=self.name, connected=self._connected.is_set(),
+                        accounts=len(self.accounts), pending=len(self._pending))
@@ -0,0 +1,187 @@
+"""
+Decodificación local de las instrucciones de creación de metadatos.
+
+Helius entrega en el webhook las instrucciones de la transacción con sus datos
+codificados en base58. Las de creación de metadatos de Metaplex (y las de creación
+de token de los launchpads) contienen ya el nombre, el símbolo y la URI del token,
+de modo que no hace falta consultar token-metadata a Helius para conocerlos.
+"""
+
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+METADATA_PROGRAM_ID = "metaqbxxUerdq28cj1RbAWkYQm3ybzjb6a8bt518x1s"
+
+# Discriminadores de CreateMetadataAccount (v1), CreateMetadataAccountV2 y CreateMetadataAccountV3
+CREATE_METADATA_DISCRIMINATORS = (0, 16, 33)
+
+# Programas de launchpad (Anchor) cuya instrucción de creación empieza por name, symbol y uri,
+# con la posición de la cuenta del mint en la instrucción
+LAUNCHPAD_PROGRAMS: Dict[str, Tuple[bytes, int]] = {
+    # Meteora Dynamic Bonding Curve: initialize_virtual_pool_with_spl_token
+    "dbcij3LWUppWqq96dh6gJWwBifmcGfLSB5D4DuSMaqN": (bytes.fromhex("8c55d7b06636684f"), 3),
+    # Pump.fun: create
+    "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P": (bytes.fromhex("181ec828051c0777"), 0),
+}
+
+# Longitudes máximas de Metaplex: evitan aceptar basura como cadena válida
+MAX_NAME_LENGTH = 32
+MAX_SYMBOL_LENGTH = 10
+MAX_URI_LENGTH = 200
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_BASE58_INDEX = {char: index for index, char in enumerate(BASE58_ALPHABET)}
+
+def b58decode(value: str) -> bytes:
+    """
+    Decodifica una cadena base58 (alfabeto de Bitcoin, el usado por Solana).
+
+    Args:
+        value: Cadena en base58
+
+    Returns:
+        bytes: Datos decodificados
+
+    Raises:
+        ValueError: Si la cadena contiene caracteres fuera del alfabeto
+    """
+    number = 0
+    for char in value:
+        try:
+            number = number * 58 + _BASE58_INDEX[char]
+        except KeyError:
+            raise ValueError(f"Carácter base58 inválido: {char!r}")
+    leading_zeros = len(value) - len(value.lstrip("1"))
+    return b"\x00" * leading_zeros + number.to_bytes((number.bit_length() + 7) // 8, "big")
+
+def _read_string(data: bytes, offset: int, max_length: int) -> Tuple[str, int]:
+    """
+    Lee una cadena Borsh (u32 little-endian de longitud + UTF-8).
+
+    Returns:
+        Tuple[str, int]: Cadena sin el relleno de nulos y offset siguiente
+    """
+    if offset + 4 > len(data):
+        raise ValueError("Datos truncados")
+    (length,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    # Las versiones antiguas de Metaplex rellenan con nulos hasta la longitud máxima
+    if length > max_length * 4 or offset + length > len(data):
+        raise ValueError("Longitud de cadena inválida")
+    value = data[offset:offset + length].decode("utf-8").rstrip("\x00")
+    if len(value) > max_length:
+        raise ValueError("Cadena demasiado larga")
+    return value, offset + length
+
+def _read_name_symbol_uri(data: bytes, offset: int) -> Dict[str, str]:
+    """Lee los campos name, symbol y uri consecutivos a partir de un offset."""
+    name, offset = _read_string(data, offset, MAX_NAME_LENGTH)
+    symbol, offset = _read_string(data, offset, MAX_SYMBOL_LENGTH)
+    uri, offset = _read_string(data, offset, MAX_URI_LENGTH)
+    return {"name": name, "symbol": symbol, "uri": uri}
+
+def decode_create_metadata(data: bytes) -> Optional[Dict[str, str]]:
+    """
+    Decodifica una instrucción CreateMetadataAccount (v1, v2 o v3) de Metaplex.
+
+    Args:
+        data: Datos de la instrucción ya decodificados de base58
+
+    Returns:
+        Optional[Dict[str, str]]: name, symbol y uri, o None si no es una creación válida
+    """
+    if not data or data[0] not in CREATE_METADATA_DISCRIMINATORS:
+        return None
+    try:
+        return _read_name_symbol_uri(data, 1)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+def decode_launchpad_create(data: bytes, discriminator: bytes) -> Optional[Dict[str, str]]:
+    """
+    Decodifica la instrucción de creación de un launchpad Anchor que empieza por name, symbol y uri.
+
+    Args:
+        data: Datos de la instrucción ya decodificados de base58
+        discriminator: Discriminador Anchor (8 bytes) de la instrucción de creación
+
+    Returns:
+        Optional[Dict[str, str]]: name, symbol y uri, o None si no es una creación válida
+    """
+    if not data.startswith(discriminator):
+        return None
+    try:
+        return _read_name_symbol_uri(data, len(discriminator))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+def _iter_instructions(transaction: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Recorre las instrucciones de una transacción y sus instrucciones internas."""
+    for instruction in transaction.get("instructions") or []:
+        yield instruction
+        for inner_instruction in instruction.get("innerInstructions") or []:
+            yield inner_instruction
+
+def creation_instructions(transaction: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Retorna, en una lista plana, solo las instrucciones (externas o internas) de los
+    programas que decode_transaction_metadata sabe decodificar, con los campos que usa.
+
+    Args:
+        transaction: Transacción en formato enhanced de Helius
+
+    Returns:
+        List[Dict[str, Any]]: Instrucciones con programId, accounts y data
+    """
+    return [
+        {"programId": instruction.get("programId"), "accounts": instruction.get("accounts") or [],
+         "data": instruction.get("data")}
+        for instruction in _iter_instructions(transaction)
+        if instruction.get("programId") == METADATA_PROGRAM_ID or instruction.get("programId") in LAUNCHPAD_PROGRAMS
+    ]
+
+def decode_transaction_metadata(transaction: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+    """
+    Extrae de una transacción de Helius los metadatos de cada token creado en ella.
+    Se prefieren las instrucciones de Metaplex; las de launchpad solo completan mints sin ellas.
+
+    Args:
+        transaction: Transacción en formato enhanced de Helius
+
+    Returns:
+        Dict[str, Dict[str, str]]: name, symbol y uri por dirección de mint
+    """
+    metaplex: Dict[str, Dict[str, str]] = {}
+    launchpad: Dict[str, Dict[str, str]] = {}
+    for instruction in _iter_instructions(transaction):
+        program_id = instruction.get("programId")
+        accounts: List[str] = instruction.get("accounts") or []
+        if program_id == METADATA_PROGRAM_ID:
+            target, discriminator, mint_position = metaplex, None, 1
+        elif program_id in LAUNCHPAD_PROGRAMS:
+            discriminator, mint_position = LAUNCHPAD_PROGRAMS[program_id]
+            target = launchpad
+        else:
+            continue
+        if len(accounts) <= mint_position or not instruction.get("data"):
+            continue
+        try:
+            data = b58decode(instruction["data"])
+        except ValueError:
+            continue
+        if discriminator is None:
+            metadata = decode_create_metadata(data)
+        else:
+            metadata = decode_launchpad_create(data, discriminator)
+        if metadata and metadata["uri"]:
+            target.setdefault(accounts[mint_position], metadata)
+
+    for mint, metadata in launchpad.items():
+        metaplex.setdefault(mint, metadata)
+    if metaplex:
+        logger.debug(f"Metadatos decodificados localmente para {list(metaplex)}")
+    return metaplex
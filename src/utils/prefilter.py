@@ -0,0 +1,216 @@
+"""
+Filtro previo de transacciones de webhook.
+
+Se ejecuta antes de parsear, registrar o enriquecer una notificación: descarta
+primero sobre el cuerpo crudo los POST que no mencionan ninguna wallet de
+launchpad, y después, ya parseado, las transacciones con feePayer desconocido,
+tipo distinto de creación de token o firma ya vista. Cada rechazo incrementa
+un contador por motivo.
+
+El cuerpo se parsea una sola vez con el decodificador rápido y cada transacción
+aceptada se proyecta en un registro compacto con solo los campos que usa el
+pipeline, que es lo que se encola (las transacciones enhanced de Helius traen
+accountData, instrucciones de todos los programas, eventos...).
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from . import fast_json
+from .config import config
+from .logger import get_logger
+from .metaplex import creation_instructions
+
+logger = get_logger(__name__)
+
+# Motivos de rechazo expuestos en las métricas
+REJECTION_REASONS = (
+    'no_known_wallet',
+    'invalid_json',
+    'unknown_fee_payer',
+    'not_mint',
+    'duplicate_signature'
+)
+
+# Campos de primer nivel que usa el pipeline
+COMPACT_FIELDS = ('signature', 'feePayer', 'type', 'source', 'timestamp', 'description')
+# Campos de cada transferencia de token que usa el pipeline
+COMPACT_TRANSFER_FIELDS = ('mint', 'toTokenAccount')
+
+def compact_transaction(tx: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Proyecta una transacción enhanced de Helius en un registro con solo los campos que usa
+    el pipeline: firma, feePayer, tipo, descripción, mints transferidos e instrucciones de creación.
+
+    Args:
+        tx: Transacción completa
+
+    Returns:
+        Dict[str, Any]: Registro compacto con la misma forma que la transacción original
+    """
+    record = {field: tx[field] for field in COMPACT_FIELDS if field in tx}
+    record['tokenTransfers'] = [
+        {field: transfer[field] for field in COMPACT_TRANSFER_FIELDS if field in transfer}
+        for transfer in tx.get('tokenTransfers') or []
+    ]
+    record['instructions'] = creation_instructions(tx)
+    return record
+
+class PreFilter:
+    """
+    Filtro barato con conjuntos precompilados y contadores por motivo de rechazo.
+    """
+
+    def __init__(self, known_wallets: Optional[Iterable[str]] = None,
+                 transaction_types: Optional[Iterable[str]] = None,
+                 seen_capacity: Optional[int] = None, compact: Optional[bool] = None):
+        """
+        Inicializa el filtro.
+
+        Args:
+            known_wallets: Wallets de launchpad aceptadas como feePayer (por defecto KNOWN_WALLETS)
+            transaction_types: Tipos de transacción de Helius aceptados (por defecto PREFILTER_TRANSACTION_TYPES)
+            seen_capacity: Número de firmas recientes recordadas para descartar duplicados
+            compact: Si es True, filter_body retorna registros compactos (por defecto PREFILTER_COMPACT)
+        """
+        wallets = config.KNOWN_WALLETS if known_wallets is None else known_wallets
+        types = config.PREFILTER_TRANSACTION_TYPES if transaction_types is None else transaction_types
+        self._wallets = frozenset(wallets)
+        self._wallet_bytes = tuple(wallet.encode('ascii') for wallet in self._wallets)
+        self._types = frozenset(types)
+        self._seen_capacity = seen_capacity or config.PREFILTER_SEEN_CAPACITY
+        self.compact = config.PREFILTER_COMPACT if compact is None else compact
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {reason: 0 for reason in REJECTION_REASONS}
+        self._counters['accepted'] = 0
+
+    def _reject(self, reason: str) -> None:
+        """Incrementa el contador de un motivo de rechazo."""
+        with self._lock:
+            self._counters[reason] += 1
+
+    def check_raw(self, body: bytes) -> bool:
+        """
+        Comprueba sobre el cuerpo crudo si menciona alguna wallet conocida.
+
+        Args:
+            body: Cuerpo del POST sin parsear
+
+        Returns:
+            bool: False si se puede descartar sin parsear
+        """
+        for wallet in self._wallet_bytes:
+            if wallet in body:
+                return True
+        self._reject('no_known_wallet')
+        return False
+
+    def filter_transactions(self, transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Retorna solo las transacciones relevantes y registra sus firmas como vistas.
+
+        Args:
+            transactions: Transacciones del webhook ya parseadas
+
+        Returns:
+            List[Dict[str, Any]]: Transacciones aceptadas
+        """
+        accepted = []
+        for tx in transactions:
+            if not isinstance(tx, dict) or tx.get('feePayer') not in self._wallets:
+                self._reject('unknown_fee_payer')
+                continue
+            tx_type = tx.get('type')
+            if tx_type and tx_type not in self._types:
+                self._reject('not_mint')
+                continue
+            signature = tx.get('signature')
+            with self._lock:
+                if signature:
+                    if signature in self._seen:
+                        self._counters['duplicate_signature'] += 1
+                        continue
+                    self._seen[signature] = None
+                    if len(self._seen) > self._seen_capacity:
+                        self._seen.popitem(last=False)
+                self._counters['accepted'] += 1
+            accepted.append(tx)
+        return accepted
+
+    def filter_body(self, body: bytes) -> List[Dict[str, Any]]:
+        """
+        Aplica el filtro completo a un cuerpo crudo: chequeo de bytes, parseo y filtro por transacción.
+
+        Args:
+            body: Cuerpo del POST sin parsear
+
+        Returns:
+            List[Dict[str, Any]]: Transacciones aceptadas, compactas si compact está activo
+            (vacía si se descarta todo)
+        """
+        if not self.check_raw(body):
+            return []
+        try:
+            data = fast_json.loads(body)
+        except ValueError:
+            self._reject('invalid_json')
+            return []
+        if isinstance(data, dict):
+            data = [data]
+        if not isinstance(data, list):
+            self._reject('invalid_json')
+            return []
+        return self.filter_parsed(data)
+
+    def filter_parsed(self, transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Filtra transacciones ya parseadas (webhook o fuente en streaming) y las proyecta
+        en registros compactos si compact está activo.
+
+        Args:
+            transactions: Transacciones en formato enhanced de Helius
+
+        Returns:
+            List[Dict[str, Any]]: Transacciones aceptadas
+        """
+        accepted = self.filter_transactions(transactions)
+        if self.compact:
+            return [compact_transaction(tx) for tx in accepted]
+        return accepted
+
+    def seen(self, signature: Optional[str]) -> bool:
+        """
+        Indica si una firma ya fue aceptada (por cualquier fuente de ingestión).
+
+        Args:
+            signature: Firma de la transacción
+
+        Returns:
+            bool: True si la firma está entre las recientes ya aceptadas
+        """
+        with self._lock:
+            return signature in self._seen
+
+    def forget(self, signature: Optional[str]) -> None:
+        """
+        Olvida una firma aceptada que no pudo procesarse, para aceptar su reintento.
+
+        Args:
+            signature: Firma de la transacción
+        """
+        if not signature:
+            return
+        with self._lock:
+            self._seen.pop(signature, None)
+
+    def metrics(self) -> Dict[str, int]:
+        """
+        Retorna los contadores de aceptados y de cada motivo de rechazo.
+
+        Returns:
+            Dict[str, int]: Contadores por motivo
+        """
+        with self._lock:
+            return dict(self._counters)
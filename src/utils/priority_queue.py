@@ -0,0 +1,173 @@
+"""
+Cola de ingestión con prioridad por launchpad y descarte de carga.
+
+Cada clase (el launchpad del feePayer, o 'other') tiene su propia cola. Los
+workers eligen la siguiente clase por round-robin ponderado suave según su peso,
+y cada clase tiene una cuota máxima de workers ocupados, de modo que una avalancha
+de un launchpad no acapara el pool. Cuando la profundidad total supera la marca
+de agua se empieza a descartar por la clase menos prioritaria; las intermedias se
+descartan a profundidades mayores y la de mayor prioridad nunca: con la cola llena
+desaloja al elemento más reciente de la clase menos prioritaria. Todo lo
+descartado se contabiliza por clase.
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .config import config
+from .logger import get_logger
+from .work_queue import WorkQueue
+
+logger = get_logger(__name__)
+
+DEFAULT_CLASS = "other"
+
+class PriorityWorkQueue(WorkQueue):
+    """
+    WorkQueue con una cola por clase, pesos, cuotas de concurrencia y descarte por marca de agua.
+    """
+
+    def __init__(self, handler: Callable[[Any], Any], classify: Callable[[Any], Optional[str]],
+                 weights: Optional[Dict[str, float]] = None, shares: Optional[Dict[str, float]] = None,
+                 watermark: Optional[float] = None, workers: Optional[int] = None,
+                 max_size: Optional[int] = None, name: str = "ingestion",
+                 on_shed: Optional[Callable[[Any], Any]] = None):
+        """
+        Inicializa la cola sin arrancar los workers.
+
+        Args:
+            handler: Función que procesa cada elemento encolado
+            classify: Función que retorna la clase de un elemento (None o desconocida: 'other')
+            weights: Peso de cada clase; mayor peso es mayor prioridad (por defecto PRIORITY_WEIGHTS)
+            shares: Fracción máxima de workers por clase (por defecto PRIORITY_SHARES)
+            watermark: Fracción de la capacidad a partir de la cual se descarta (por defecto PRIORITY_SHED_WATERMARK)
+            workers: Número de workers (por defecto INGESTION_WORKERS)
+            max_size: Capacidad máxima total (por defecto INGESTION_QUEUE_SIZE)
+            name: Nombre usado en los logs y en los hilos
+            on_shed: Callback con cada elemento ya encolado que se desaloja
+        """
+        super().__init__(handler, workers=workers, max_size=max_size, name=name)
+        self.classify = classify
+        self.on_shed = on_shed
+        self.weights = dict(weights or config.PRIORITY_WEIGHTS)
+        self.weights.setdefault(DEFAULT_CLASS, 1.0)
+        shares = shares or config.PRIORITY_SHARES
+        watermark = config.PRIORITY_SHED_WATERMARK if watermark is None else watermark
+        self.watermark = max(1, int(self.max_size * watermark))
+
+        # Clases de mayor a menor prioridad
+        self.classes = sorted(self.weights, key=lambda name: -self.weights[name])
+        # Profundidad a partir de la cual se descarta cada clase: la menos prioritaria en
+        # la marca de agua, las intermedias repartidas hasta la capacidad total
+        lowest = len(self.classes) - 1
+        self.shed_levels = {
+            name: self.max_size if rank == 0 else
+            self.watermark + (self.max_size - self.watermark) * (lowest - rank) // lowest
+            for rank, name in enumerate(self.classes)
+        }
+        self.limits = {
+            name: max(1, math.ceil(self.workers * shares.get(name, shares.get(DEFAULT_CLASS, 1.0))))
+            for name in self.classes
+        }
+        self._queues: Dict[str, Deque[Tuple[Any, float]]] = {name: deque() for name in self.classes}
+        self._current: Dict[str, float] = {name: 0.0 for name in self.classes}
+        self._class_busy: Dict[str, int] = {name: 0 for name in self.classes}
+        self._class_of: Dict[int, str] = {}
+        self._class_stats: Dict[str, Dict[str, int]] = {
+            name: {'submitted': 0, 'processed': 0, 'shed': 0} for name in self.classes
+        }
+
+    def _class(self, item: Any) -> str:
+        """Clase de un elemento, 'other' si es desconocida."""
+        name = self.classify(item)
+        return name if name in self._queues else DEFAULT_CLASS
+
+    def _push_locked(self, item: Any, enqueued_at: float) -> bool:
+        """Admite el elemento en la cola de su clase aplicando la marca de agua."""
+        name = self._class(item)
+        depth = self._depth_locked()
+        if depth >= self.shed_levels[name]:
+            # Solo la clase de mayor prioridad llega a la capacidad total, y entra desalojando
+            if name != self.classes[0] or not self._evict_locked(name):
+                self._class_stats[name]['shed'] += 1
+                logger.warning(f"Cola '{self.name}': elemento de {name} descartado (profundidad {depth})")
+                return False
+        self._queues[name].append((item, enqueued_at))
+        self._class_stats[name]['submitted'] += 1
+        return True
+
+    def _evict_locked(self, name: str) -> bool:
+        """Desaloja el elemento más reciente de la clase menos prioritaria que name. Retorna si lo hizo."""
+        for victim in reversed(self.classes):
+            if victim == name:
+                return False
+            if self._queues[victim]:
+                item, _ = self._queues[victim].pop()
+                self._class_stats[victim]['shed'] += 1
+                logger.warning(f"Cola '{self.name}': elemento de {victim} desalojado por uno de {name}")
+                if self.on_shed:
+                    try:
+                        self.on_shed(item)
+                    except Exception as e:
+                        logger.error(f"Error en el callback de descarte de la cola '{self.name}': {str(e)}")
+                return True
+        return False
+
+    def _pop_locked(self) -> Optional[Tuple[Any, float]]:
+        """Round-robin ponderado suave entre las clases con elementos y cuota libre."""
+        eligible = [name for name in self.classes
+                    if self._queues[name] and self._class_busy[name] < self.limits[name]]
+        if not eligible:
+            return None
+        total = sum(self.weights[name] for name in eligible)
+        for name in eligible:
+            self._current[name] += self.weights[name]
+        chosen = max(eligible, key=lambda name: self._current[name])
+        self._current[chosen] -= total
+        entry = self._queues[chosen].popleft()
+        self._class_busy[chosen] += 1
+        self._class_of[threading.get_ident()] = chosen
+        return entry
+
+    def _done_locked(self, item: Any) -> None:
+        """Libera la cuota de la clase del elemento y despierta a los workers en espera."""
+        name = self._class_of.pop(threading.get_ident(), DEFAULT_CLASS)
+        self._class_busy[name] -= 1
+        self._class_stats[name]['processed'] += 1
+        self._not_empty.notify_all()
+
+    def _depth_locked(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _take_all_locked(self) -> List[Any]:
+        """Retira los elementos encolados, primero los de mayor prioridad."""
+        items = []
+        for name in self.classes:
+            items.extend(item for item, _ in self._queues[name])
+            self._queues[name].clear()
+        return items
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Retorna las métricas de la cola, con el detalle por clase.
+
+        Returns:
+            Dict[str, Any]: Métricas de WorkQueue más 'watermark' y 'classes'
+        """
+        metrics = super().metrics()
+        with self._lock:
+            metrics['watermark'] = self.watermark
+            metrics['classes'] = {
+                name: dict(
+                    self._class_stats[name],
+                    weight=self.weights[name],
+                    shed_at_depth=self.shed_levels[name],
+                    max_workers=self.limits[name],
+                    busy_workers=self._class_busy[name],
+                    depth=len(self._queues[name])
+                )
+                for name in self.classes
+            }
+        return metrics
@@ -0,0 +1,306 @@
+"""
+Planificador de tasa con cubo de fichas y clases de prioridad.
+
+A Protokols le llegan peticiones de las alertas en vivo (webhooks), del comando
+/token del bot y de los scripts masivos, cada uno en su proceso. Sin coordinación,
+una exportación masiva puede agotar el límite de la sesión en mitad de un
+lanzamiento. RateScheduler guarda el cubo de fichas en una base SQLite (como
+SharedCache), así que todos los procesos que usan el mismo nombre comparten el
+mismo ritmo. Las prioridades se aplican con reservas: cada clase solo toma una
+ficha si después quedan al menos las que reserva (las alertas en vivo no reservan
+ninguna), de modo que el trabajo en segundo plano nunca vacía el cubo. Dentro de
+un proceso, además, los que esperan se atienden por prioridad. Un Retry-After de
+Protokols bloquea el cubo para todos hasta que vence.
+"""
+
+import itertools
+import sqlite3
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+import requests
+
+from .config import config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+LIVE = 'live'
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+
+# Clases de mayor a menor prioridad
+PRIORITIES = [LIVE, INTERACTIVE, BACKGROUND]
+
+# Esperas recientes por clase que se guardan para las métricas
+WAIT_SAMPLES = 200
+
+class RateLimitTimeout(requests.RequestException):
+    """
+    No se obtuvo una ficha dentro del tiempo disponible.
+    """
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Interpreta una cabecera Retry-After.
+
+    Args:
+        value: Valor de la cabecera (segundos o fecha HTTP)
+        now: Instante actual en segundos desde epoch (por defecto time.time())
+
+    Returns:
+        Optional[float]: Segundos a esperar, o None si la cabecera falta o no es válida
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+    return max(0.0, retry_at - (time.time() if now is None else now))
+
+class RateScheduler:
+    """
+    Cubo de fichas compartido entre procesos con reservas por clase de prioridad.
+    """
+
+    def __init__(self, name: str, rate: Optional[float] = None, burst: Optional[float] = None,
+                 reserves: Optional[Dict[str, float]] = None, path: Optional[str] = None,
+                 default_backoff: Optional[float] = None, max_backoff: Optional[float] = None):
+        """
+        Abre (o crea) el cubo.
+
+        Args:
+            name: Nombre del cubo (los procesos con el mismo nombre y base lo comparten)
+            rate: Fichas por segundo (por defecto PROTOKOLS_RATE)
+            burst: Capacidad del cubo (por defecto PROTOKOLS_RATE_BURST)
+            reserves: Fichas que cada clase deja en el cubo (por defecto PROTOKOLS_RATE_RESERVES)
+            path: Ruta de la base de datos SQLite (por defecto RATE_LIMIT_DB)
+            default_backoff: Segundos de bloqueo ante un 429 sin Retry-After (por defecto PROTOKOLS_RATE_BACKOFF)
+            max_backoff: Bloqueo máximo aceptado de un Retry-After (por defecto PROTOKOLS_RATE_MAX_BACKOFF)
+        """
+        self.name = name
+        self.rate = rate or config.PROTOKOLS_RATE
+        self.burst = burst or config.PROTOKOLS_RATE_BURST
+        reserves = config.PROTOKOLS_RATE_RESERVES if reserves is None else reserves
+        # Una reserva igual o mayor que el cubo dejaría a la clase sin fichas para siempre
+        self.reserves = {priority: min(float(reserves.get(priority, 0)), self.burst - 1) for priority in PRIORITIES}
+        self.default_backoff = config.PROTOKOLS_RATE_BACKOFF if default_backoff is None else default_backoff
+        self.max_backoff = config.PROTOKOLS_RATE_MAX_BACKOFF if max_backoff is None else max_backoff
+        self.path = Path(path or config.RATE_LIMIT_DB)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, "
+            "updated_at REAL NOT NULL, blocked_until REAL NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute(
+            "INSERT OR IGNORE INTO buckets (name, tokens, updated_at, blocked_until) VALUES (?, ?, ?, 0)",
+            (self.name, self.burst, time.time())
+        )
+
+        self._cond = threading.Condition()
+        self._queue: List[tuple] = []
+        self._sequence = itertools.count()
+        self._waits: Dict[str, Deque[float]] = {priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITIES}
+        self._stats = {priority: {'acquired': 0, 'timeouts': 0, 'waiting': 0, 'wait_total': 0.0, 'wait_max': 0.0}
+                       for priority in PRIORITIES}
+        self._throttled = 0
+
+    def acquire(self, priority: str = LIVE, timeout: Optional[float] = None) -> float:
+        """
+        Espera una ficha del cubo respetando la prioridad y los Retry-After recibidos.
+
+        Args:
+            priority: Clase de la petición ('live', 'interactive' o 'background')
+            timeout: Segundos máximos de espera (None espera lo que haga falta)
+
+        Returns:
+            float: Segundos que se esperó en la cola
+
+        Raises:
+            RateLimitTimeout: Si la ficha no llegaría dentro del timeout
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Prioridad desconocida: {priority}")
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        ticket = (PRIORITIES.index(priority), next(self._sequence))
+        with self._cond:
+            self._queue.append(ticket)
+            self._stats[priority]['waiting'] += 1
+        try:
+            with self._cond:
+                while True:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if min(self._queue) != ticket:
+                        # Otra petición de este proceso va antes
+                        if remaining is not None and remaining <= 0:
+                            raise self._timeout(priority, started)
+                        self._cond.wait(remaining)
+                        continue
+                    delay = self._take(priority)
+                    if delay <= 0:
+                        break
+                    if remaining is not None and delay > remaining:
+                        # No merece la pena esperar una ficha que llegaría tarde
+                        raise self._timeout(priority, started)
+                    self._cond.wait(delay)
+        finally:
+            with self._cond:
+                self._queue.remove(ticket)
+                self._stats[priority]['waiting'] -= 1
+                self._cond.notify_all()
+        waited = time.monotonic() - started
+        with self._cond:
+            stats = self._stats[priority]
+            stats['acquired'] += 1
+            stats['wait_total'] += waited
+            stats['wait_max'] = max(stats['wait_max'], waited)
+            self._waits[priority].append(waited)
+        return waited
+
+    def _timeout(self, priority: str, started: float) -> RateLimitTimeout:
+        """Cuenta un timeout de la clase y crea la excepción. Requiere el lock de la condición."""
+        self._stats[priority]['timeouts'] += 1
+        waited = time.monotonic() - started
+        return RateLimitTimeout(f"Sin ficha de {self.name} para {priority} tras {waited:.2f}s")
+
+    def _take(self, priority: str) -> float:
+        """
+        Intenta tomar una ficha del cubo compartido.
+
+        Returns:
+            float: 0 si se tomó la ficha, o segundos hasta que podría haber una para la clase
+        """
+        reserve = self.reserves[priority]
+        with self._db_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                tokens, updated_at, blocked_until = self._conn.execute(
+                    "SELECT tokens, updated_at, blocked_until FROM buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                now = time.time()
+                tokens = min(self.burst, tokens + max(0.0, now - updated_at) * self.rate)
+                if blocked_until > now:
+                    delay = blocked_until - now
+                elif tokens - 1 >= reserve:
+                    tokens -= 1
+                    delay = 0.0
+                else:
+                    delay = (reserve + 1 - tokens) / self.rate
+                self._conn.execute(
+                    "UPDATE buckets SET tokens = ?, updated_at = ? WHERE name = ?", (tokens, now, self.name)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return delay
+
+    def block(self, seconds: float) -> None:
+        """
+        Bloquea el cubo para todas las clases y procesos durante unos segundos.
+
+        Args:
+            seconds: Segundos de bloqueo (se limitan a max_backoff)
+        """
+        seconds = min(seconds, self.max_backoff)
+        with self._db_lock:
+            self._conn.execute(
+                "UPDATE buckets SET blocked_until = MAX(blocked_until, ?), tokens = 0, updated_at = ? WHERE name = ?",
+                (time.time() + seconds, time.time(), self.name)
+            )
+        with self._cond:
+            self._throttled += 1
+        logger.warning(f"{self.name} limitado por el upstream: pausando peticiones {seconds:.1f}s")
+
+    def observe(self, response: requests.Response) -> None:
+        """
+        Aplica el Retry-After de una respuesta 429 o 503.
+
+        Args:
+            response: Respuesta recibida del upstream
+        """
+        if response.status_code not in (429, 503):
+            return
+        seconds = parse_retry_after(response.headers.get('Retry-After'))
+        if seconds is None:
+            if response.status_code != 429:
+                return
+            seconds = self.default_backoff
+        self.block(seconds)
+
+    def close(self) -> None:
+        """Cierra la conexión con la base de datos."""
+        with self._db_lock:
+            self._conn.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Retorna el estado del cubo y la espera en cola de cada clase en este proceso.
+
+        Returns:
+            Dict[str, Any]: Fichas, bloqueo restante, 429 recibidos y, por clase, peticiones servidas,
+            timeouts, en espera y espera media, p95 y máxima en milisegundos
+        """
+        with self._db_lock:
+            tokens, updated_at, blocked_until = self._conn.execute(
+                "SELECT tokens, updated_at, blocked_until FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+        now = time.time()
+        classes = {}
+        with self._cond:
+            for priority in PRIORITIES:
+                stats = self._stats[priority]
+                waits = sorted(self._waits[priority])
+                classes[priority] = {
+                    'acquired': stats['acquired'],
+                    'timeouts': stats['timeouts'],
+                    'waiting': stats['waiting'],
+                    'reserve': self.reserves[priority],
+                    'wait_avg_ms': round(stats['wait_total'] / stats['acquired'] * 1000, 1) if stats['acquired'] else 0.0,
+                    'wait_p95_ms': round(waits[min(len(waits) - 1, int(0.95 * len(waits)))] * 1000, 1) if waits else 0.0,
+                    'wait_max_ms': round(stats['wait_max'] * 1000, 1)
+                }
+            throttled = self._throttled
+        return {
+            'name': self.name,
+            'rate': self.rate,
+            'burst': self.burst,
+            'tokens': round(min(self.burst, tokens + max(0.0, now - updated_at) * self.rate), 2),
+            'blocked_for': round(max(0.0, blocked_until - now), 2),
+            'throttled': throttled,
+            'classes': classes
+        }
+
+_schedulers: Dict[str, RateScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+def get_rate_scheduler(name: str = 'protokols') -> RateScheduler:
+    """
+    Retorna el planificador compartido de un upstream, creándolo la primera vez.
+
+    Args:
+        name: Nombre del cubo
+
+    Returns:
+        RateScheduler: Planificador compartido del proceso
+    """
+    with _schedulers_lock:
+        scheduler = _schedulers.get(name)
+        if scheduler is None:
+            scheduler = _schedulers[name] = RateScheduler(name)
+        return scheduler
@@ -0,0 +1,221 @@
+"""
+Reintentos diferidos para tokens cuyos metadatos aún no están disponibles.
+
+Un token recién creado suele dar 404 en IPFS o en Helius durante unos segundos.
+En lugar de descartarlo, se programa un reintento en una rueda de temporización
+(timer wheel): una lista circular de ranuras que un único hilo recorre a intervalos
+fijos, de modo que programar o disparar un reintento cuesta O(1) y miles de tokens
+en espera no ocupan hilos. Cada etapa tiene su calendario de esperas (un nivel por
+reintento) y una edad máxima a partir de la cual el token se abandona. Se cuentan
+aciertos y fallos por nivel.
+"""
+
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+class _RetryEntry:
+    """Reintento programado en una ranura de la rueda."""
+
+    __slots__ = ('stage', 'key', 'attempt', 'on_success', 'on_give_up', 'tier', 'created_at', 'rounds')
+
+    def __init__(self, stage: str, key: str, attempt: Callable[[], Any], on_success: Callable[[Any], Any],
+                 on_give_up: Optional[Callable[[], Any]], created_at: float):
+        self.stage = stage
+        self.key = key
+        self.attempt = attempt
+        self.on_success = on_success
+        self.on_give_up = on_give_up
+        self.tier = 0
+        self.created_at = created_at
+        self.rounds = 0
+
+class RetryScheduler:
+    """
+    Rueda de temporización con calendarios de reintento por etapa.
+    """
+
+    def __init__(self, schedules: Optional[Dict[str, List[float]]] = None, max_age: Optional[float] = None,
+                 tick: Optional[float] = None, wheel_size: int = 512, workers: Optional[int] = None,
+                 name: str = "retry"):
+        """
+        Inicializa el programador; el hilo de la rueda arranca con el primer reintento.
+
+        Args:
+            schedules: Esperas en segundos de cada nivel, por etapa (por defecto RETRY_SCHEDULES)
+            max_age: Segundos desde el primer fallo tras los que se abandona (por defecto RETRY_MAX_AGE)
+            tick: Resolución de la rueda en segundos (por defecto RETRY_TICK)
+            wheel_size: Número de ranuras de la rueda
+            workers: Hilos que ejecutan los reintentos (por defecto RETRY_WORKERS)
+            name: Nombre usado en los logs y en los hilos
+        """
+        self.schedules = {stage: list(delays) for stage, delays in (schedules or config.RETRY_SCHEDULES).items()}
+        self.max_age = config.RETRY_MAX_AGE if max_age is None else max_age
+        self.tick = tick or config.RETRY_TICK
+        self.wheel_size = wheel_size
+        self.workers = workers or config.RETRY_WORKERS
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._wheel: List[List[_RetryEntry]] = [[] for _ in range(wheel_size)]
+        self._cursor = 0
+        self._pending: Dict[tuple, _RetryEntry] = {}
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats = {
+            stage: {'scheduled': 0, 'rejected': 0, 'recovered': 0, 'gave_up': 0,
+                    'tiers': [{'delay': delay, 'hits': 0, 'misses': 0} for delay in delays]}
+            for stage, delays in self.schedules.items()
+        }
+
+    def schedule(self, stage: str, key: str, attempt: Callable[[], Any], on_success: Callable[[Any], Any],
+                 on_give_up: Optional[Callable[[], Any]] = None) -> bool:
+        """
+        Programa los reintentos de una etapa para un token.
+
+        Args:
+            stage: Etapa que falló (clave de su calendario)
+            key: Identificador del token; solo puede haber un reintento pendiente por etapa y clave
+            attempt: Función que reintenta la etapa; un resultado distinto de None es un acierto
+            on_success: Callback con el resultado del primer acierto
+            on_give_up: Callback si se agotan los niveles o la edad máxima
+
+        Returns:
+            bool: False si la etapa no tiene calendario, el token ya estaba pendiente o está detenido
+        """
+        with self._lock:
+            stats = self._stats.get(stage)
+            if stats is None:
+                return False
+            if (stage, key) in self._pending or (self._thread is not None and not self._running):
+                stats['rejected'] += 1
+                return False
+            if self._thread is None:
+                self._start_locked()
+            entry = _RetryEntry(stage, key, attempt, on_success, on_give_up, time.monotonic())
+            self._pending[(stage, key)] = entry
+            self._insert_locked(entry, self.schedules[stage][0])
+            stats['scheduled'] += 1
+        logger.info(f"Reintento de '{stage}' programado para {key} en {self.schedules[stage][0]}s")
+        return True
+
+    def _start_locked(self) -> None:
+        """Arranca el hilo de la rueda y el pool de reintentos. Requiere el lock."""
+        self._running = True
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{self.name}-worker")
+        self._thread = threading.Thread(target=self._wheel_loop, name=f"{self.name}-wheel", daemon=True)
+        self._thread.start()
+
+    def _insert_locked(self, entry: _RetryEntry, delay: float) -> None:
+        """Coloca un reintento en la ranura que vence tras delay segundos. Requiere el lock."""
+        ticks = max(1, math.ceil(delay / self.tick))
+        entry.rounds = (ticks - 1) // self.wheel_size
+        self._wheel[(self._cursor + ticks) % self.wheel_size].append(entry)
+
+    def _wheel_loop(self) -> None:
+        """Avanza la rueda una ranura por tick y lanza los reintentos vencidos."""
+        next_tick = time.monotonic() + self.tick
+        while True:
+            with self._lock:
+                while self._running and time.monotonic() < next_tick:
+                    self._wakeup.wait(next_tick - time.monotonic())
+                if not self._running:
+                    return
+                due = []
+                # Si el hilo se retrasa, se recuperan todas las ranuras pendientes
+                while next_tick <= time.monotonic():
+                    self._cursor = (self._cursor + 1) % self.wheel_size
+                    slot = self._wheel[self._cursor]
+                    remaining = []
+                    for entry in slot:
+                        if entry.rounds:
+                            entry.rounds -= 1
+                            remaining.append(entry)
+                        else:
+                            due.append(entry)
+                    self._wheel[self._cursor] = remaining
+                    next_tick += self.tick
+            for entry in due:
+                self._executor.submit(self._run_attempt, entry)
+
+    def _run_attempt(self, entry: _RetryEntry) -> None:
+        """Ejecuta un reintento y decide si acierta, pasa al siguiente nivel o se abandona."""
+        try:
+            result = entry.attempt()
+        except Exception as e:
+            logger.warning(f"Reintento de '{entry.stage}' para {entry.key} falló: {str(e)}")
+            result = None
+        delays = self.schedules[entry.stage]
+        with self._lock:
+            stats = self._stats[entry.stage]
+            tier = stats['tiers'][entry.tier]
+            if result is not None:
+                tier['hits'] += 1
+                stats['recovered'] += 1
+                self._pending.pop((entry.stage, entry.key), None)
+            else:
+                tier['misses'] += 1
+                entry.tier += 1
+                age = time.monotonic() - entry.created_at
+                if self._running and entry.tier < len(delays) and age + delays[entry.tier] <= self.max_age:
+                    self._insert_locked(entry, delays[entry.tier])
+                    return
+                stats['gave_up'] += 1
+                self._pending.pop((entry.stage, entry.key), None)
+        if result is not None:
+            logger.info(f"Reintento de '{entry.stage}' para {entry.key} recuperado en el nivel {entry.tier + 1}")
+            callback, args = entry.on_success, (result,)
+        else:
+            logger.warning(f"Reintentos de '{entry.stage}' agotados para {entry.key}; se abandona")
+            callback, args = entry.on_give_up, ()
+        if callback:
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"Error en el callback del reintento de '{entry.stage}' para {entry.key}: {str(e)}")
+
+    def stop(self) -> List[str]:
+        """
+        Detiene la rueda descartando los reintentos pendientes.
+
+        Returns:
+            List[str]: Claves de los reintentos que quedaban pendientes
+        """
+        with self._lock:
+            self._running = False
+            self._wakeup.notify_all()
+            pending = [key for _, key in self._pending]
+            self._pending.clear()
+            self._wheel = [[] for _ in range(self.wheel_size)]
+            thread, executor = self._thread, self._executor
+        if thread:
+            thread.join()
+            executor.shutdown(wait=True)
+        return pending
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Retorna las métricas del programador.
+
+        Returns:
+            Dict[str, Any]: Reintentos pendientes y, por etapa, aciertos y fallos de cada nivel
+        """
+        with self._lock:
+            return {
+                'name': self.name,
+                'pending': len(self._pending),
+                'max_age': self.max_age,
+                'stages': {
+                    stage: dict(stats, tiers=[dict(tier) for tier in stats['tiers']])
+                    for stage, stats in self._stats.items()
+                }
+            }
@@ -0,0 +1,439 @@
+"""
+Procesamiento repartido entre varios procesos por hash del mint.
+
+El despachador (el proceso del servidor web) calcula un shard para cada
+elemento con crc32 de su clave (el mint) módulo el número de procesos y lo
+encola en la cola de ese proceso. Cada proceso worker atiende su cola con
+varios hilos, de modo que el trabajo de CPU (parseo, decodificación, JSON) se
+reparte entre núcleos y un mismo mint siempre se procesa en el mismo proceso.
+El estado compartido (idempotencia y cachés) vive en SQLite, no en memoria.
+
+La interfaz (submit, accepting, start, stop, metrics) es la de WorkQueue, así
+que los servidores pueden usar una u otra según INGESTION_PROCESSES.
+"""
+
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import config
+from .logger import get_logger
+from .priority_queue import PriorityWorkQueue
+from .work_queue import WorkQueue
+
+logger = get_logger(__name__)
+
+# Índices de los contadores compartidos de cada shard
+PROCESSED, FAILED, BUSY = 0, 1, 2
+COUNTERS = 3
+
+# Segundos que esperan los workers ociosos antes de comprobar si deben parar
+POLL_INTERVAL = 0.5
+# Segundos que se esperan al drenar para que los procesos devuelvan lo encolado
+HANDBACK_TIMEOUT = 2.0
+
+def shard_for(key: Optional[str], shards: int) -> int:
+    """
+    Calcula el shard de una clave de forma estable entre procesos y reinicios.
+
+    Args:
+        key: Clave del elemento (el mint); None va al shard 0
+        shards: Número de shards
+
+    Returns:
+        int: Índice del shard
+    """
+    if not key:
+        return 0
+    return zlib.crc32(key.encode('utf-8')) % shards
+
+# Cola de resultados del pool en un proceso worker (None fuera de ellos o si el pool no reporta)
+_worker_results: Any = None
+
+def report_result(result: Any) -> bool:
+    """
+    Envía al despachador un resultado producido fuera del handler en un proceso worker
+    (p. ej. por un reintento diferido), que lo entrega a su on_result.
+
+    Args:
+        result: Resultado serializable con pickle
+
+    Returns:
+        bool: False si este proceso no es un worker de un pool que reporte resultados
+    """
+    if _worker_results is None:
+        return False
+    _worker_results.put(('result', result, None))
+    return True
+
+def _shard_main(shard: int, handler: Callable[[Any], Any], tasks: Any, results: Any,
+                threads: int, counters: Any, report: bool, stopping: Any) -> None:
+    """
+    Punto de entrada de cada proceso worker: atiende la cola del shard con varios hilos.
+
+    Args:
+        shard: Índice del shard
+        handler: Función que procesa cada elemento
+        tasks: Cola de elementos del shard
+        results: Cola donde se devuelven los resultados al despachador
+        threads: Número de hilos del proceso
+        counters: Contadores compartidos (procesados, fallidos, ocupados) de todos los shards
+        report: Si es True, se devuelve el resultado de cada elemento
+        stopping: Evento que indica que los elementos encolados deben devolverse sin procesar
+    """
+    # El despachador coordina la parada (drenado); los workers no deben morir con la señal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    global _worker_results
+    _worker_results = results if report else None
+
+    def counter_add(index: int, delta: int) -> None:
+        with counters.get_lock():
+            counters[shard * COUNTERS + index] += delta
+
+    def worker() -> None:
+        while True:
+            try:
+                task = tasks.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if stopping.is_set():
+                    return
+                continue
+            if task is None:
+                return
+            item, _ = task
+            if stopping.is_set():
+                results.put(('handback', item, None))
+                continue
+            counter_add(BUSY, 1)
+            try:
+                result = handler(item)
+                error = None
+            except Exception as e:
+                logger.error(f"Error procesando elemento en el shard {shard}: {str(e)}")
+                result, error = None, str(e)
+            counter_add(BUSY, -1)
+            counter_add(FAILED if error else PROCESSED, 1)
+            if report:
+                results.put(('result', result, error))
+
+    workers = [threading.Thread(target=worker, name=f"shard-{shard}-worker-{i}", daemon=True) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+class ShardedProcessPool:
+    """
+    Pool de procesos worker con una cola acotada por shard, repartiendo por hash de la clave.
+    """
+
+    def __init__(self, handler: Callable[[Any], Any], key: Callable[[Any], Optional[str]],
+                 processes: Optional[int] = None, threads: Optional[int] = None,
+                 max_size: Optional[int] = None, name: str = "ingestion",
+                 on_result: Optional[Callable[[Any], Any]] = None,
+                 on_error: Optional[Callable[[str], Any]] = None):
+        """
+        Inicializa el pool sin arrancar los procesos.
+
+        Args:
+            handler: Función de nivel de módulo (serializable con pickle) que procesa cada elemento
+            key: Función que obtiene la clave de reparto (el mint) de un elemento
+            processes: Número de procesos worker (por defecto INGESTION_PROCESSES)
+            threads: Hilos por proceso (por defecto INGESTION_WORKERS)
+            max_size: Capacidad total, repartida entre los shards (por defecto INGESTION_QUEUE_SIZE)
+            name: Nombre usado en los logs y en los procesos
+            on_result: Callback en el despachador con el resultado de cada elemento
+            on_error: Callback en el despachador con el error de cada elemento fallido
+        """
+        self.handler = handler
+        self.key = key
+        self.processes = max(1, processes or config.INGESTION_PROCESSES)
+        self.threads = threads or config.INGESTION_WORKERS
+        self.max_size = max_size or config.INGESTION_QUEUE_SIZE
+        self.name = name
+        self.on_result = on_result
+        self.on_error = on_error
+
+        # 'spawn' evita heredar conexiones SQLite e hilos del proceso del servidor
+        self._context = multiprocessing.get_context(config.INGESTION_START_METHOD)
+        self._lock = threading.Lock()
+        self._running = False
+        self._accepting = True
+        self._tasks: List[Any] = []
+        self._processes: List[Any] = []
+        self._results: Any = None
+        self._collector: Optional[threading.Thread] = None
+        self._counters: Any = None
+        self._stopping: Any = None
+        self._handed_back: List[Any] = []
+
+        # Métricas del despachador
+        self._submitted = [0] * self.processes
+        self._rejected = 0
+
+    @property
+    def accepting(self) -> bool:
+        """Indica si el pool acepta nuevos elementos."""
+        return self._accepting
+
+    def start(self) -> None:
+        """Arranca los procesos worker. Es idempotente."""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._accepting = True
+            report = self.on_result is not None or self.on_error is not None
+            self._stopping = self._context.Event()
+            self._handed_back = []
+            per_shard = max(1, self.max_size // self.processes)
+            self._counters = self._context.Array('q', self.processes * COUNTERS)
+            self._results = self._context.Queue()
+            self._tasks = [self._context.Queue(maxsize=per_shard) for _ in range(self.processes)]
+            self._processes = []
+            for shard, tasks in enumerate(self._tasks):
+                process = self._context.Process(
+                    target=_shard_main,
+                    args=(shard, self.handler, tasks, self._results, self.threads, self._counters, report,
+                          self._stopping),
+                    name=f"{self.name}-shard-{shard}",
+                    daemon=True
+                )
+                process.start()
+                self._processes.append(process)
+            self._collector = threading.Thread(target=self._collect, name=f"{self.name}-results", daemon=True)
+            self._collector.start()
+        logger.info(
+            f"Pool '{self.name}' iniciado con {self.processes} procesos x {self.threads} hilos "
+            f"(capacidad {self.max_size})"
+        )
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Deja de aceptar elementos y detiene los procesos una vez vaciadas sus colas.
+
+        Args:
+            timeout: Tiempo máximo de espera por cada proceso
+        """
+        with self._lock:
+            self._accepting = False
+            if not self._running:
+                return
+            self._running = False
+            tasks, processes = self._tasks, self._processes
+        for shard_tasks in tasks:
+            for _ in range(self.threads):
+                try:
+                    shard_tasks.put(None, timeout=timeout)
+                except queue.Full:
+                    break
+        for process in processes:
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning(f"Proceso {process.name} no terminó a tiempo, forzando su salida")
+                process.terminate()
+        if self._collector is not None:
+            self._results.put(None)
+            self._collector.join(timeout)
+            self._collector = None
+        logger.info(f"Pool '{self.name}' detenido")
+
+    def drain(self, timeout: float) -> List[Any]:
+        """
+        Deja de aceptar elementos y espera hasta timeout a que los procesos vacíen sus colas.
+        Al agotar la gracia los procesos devuelven sin procesar lo que quedaba encolado,
+        que se retorna para que el llamador lo guarde. Los elementos en curso en un
+        proceso que no termina a tiempo se pierden (se registran en el log).
+
+        Args:
+            timeout: Periodo de gracia en segundos
+
+        Returns:
+            List[Any]: Elementos encolados sin procesar
+        """
+        with self._lock:
+            self._accepting = False
+            if not self._running:
+                return []
+            self._running = False
+            tasks, processes = self._tasks, self._processes
+        expires_at = time.monotonic() + timeout
+        while time.monotonic() < expires_at and not self._is_idle(tasks):
+            time.sleep(0.05)
+
+        # Los workers ociosos terminan y los que reciban un elemento lo devuelven
+        self._stopping.set()
+        handback_expires_at = time.monotonic() + HANDBACK_TIMEOUT
+        for process in processes:
+            process.join(max(0.0, handback_expires_at - time.monotonic()))
+        lost = 0
+        for shard, process in enumerate(processes):
+            if process.is_alive():
+                lost += self._counters[shard * COUNTERS + BUSY]
+                process.terminate()
+                process.join()
+
+        self._results.put(None)
+        self._collector.join(HANDBACK_TIMEOUT)
+        self._collector = None
+        with self._lock:
+            unfinished, self._handed_back = self._handed_back, []
+
+        if lost:
+            logger.warning(f"Pool '{self.name}': {lost} elemento(s) en curso perdidos al agotar el periodo de gracia")
+        if unfinished:
+            logger.warning(f"Pool '{self.name}' drenado con {len(unfinished)} elemento(s) sin procesar")
+        else:
+            logger.info(f"Pool '{self.name}' drenado por completo")
+        return unfinished
+
+    def _is_idle(self, tasks: List[Any]) -> bool:
+        """Indica si todas las colas están vacías y ningún worker está ocupado."""
+        depths = [self._depth(shard_tasks) for shard_tasks in tasks]
+        if None in depths or sum(depths):
+            return False
+        return not any(self._counters[shard * COUNTERS + BUSY] for shard in range(self.processes))
+
+    def submit(self, item: Any) -> bool:
+        """
+        Encola un elemento en la cola del shard de su clave. Arranca los procesos si es necesario.
+
+        Args:
+            item: Elemento a procesar (serializable con pickle)
+
+        Returns:
+            bool: True si se encoló, False si la cola del shard está llena o no acepta elementos
+        """
+        if not self._running and self._accepting:
+            self.start()
+        if not self._accepting:
+            with self._lock:
+                self._rejected += 1
+            return False
+        shard = shard_for(self.key(item), self.processes)
+        try:
+            self._tasks[shard].put_nowait((item, time.time()))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            return False
+        with self._lock:
+            self._submitted[shard] += 1
+        return True
+
+    def _collect(self) -> None:
+        """Entrega en el despachador los resultados devueltos por los procesos."""
+        while True:
+            message = self._results.get()
+            if message is None:
+                return
+            kind, result, error = message
+            if kind == 'handback':
+                with self._lock:
+                    self._handed_back.append(result)
+                continue
+            try:
+                if error is not None:
+                    if self.on_error:
+                        self.on_error(error)
+                elif self.on_result:
+                    self.on_result(result)
+            except Exception as e:
+                logger.error(f"Error en el callback de resultados del pool '{self.name}': {str(e)}")
+
+    @staticmethod
+    def _depth(tasks: Any) -> Optional[int]:
+        """Profundidad de una cola de shard (None si la plataforma no la soporta)."""
+        try:
+            return tasks.qsize()
+        except NotImplementedError:
+            return None
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Retorna las métricas actuales del pool, totales y por shard.
+
+        Returns:
+            Dict[str, Any]: Profundidad, contadores y estado de cada proceso
+        """
+        with self._lock:
+            submitted = list(self._submitted)
+            rejected = self._rejected
+            counters = list(self._counters) if self._counters is not None else [0] * (self.processes * COUNTERS)
+            tasks, processes = list(self._tasks), list(self._processes)
+
+        shards = []
+        for shard in range(self.processes):
+            base = shard * COUNTERS
+            process = processes[shard] if shard < len(processes) else None
+            shards.append({
+                'shard': shard,
+                'pid': process.pid if process else None,
+                'alive': bool(process and process.is_alive()),
+                'depth': self._depth(tasks[shard]) if shard < len(tasks) else 0,
+                'submitted': submitted[shard],
+                'processed': counters[base + PROCESSED],
+                'failed': counters[base + FAILED],
+                'busy_workers': counters[base + BUSY]
+            })
+        depths = [shard['depth'] for shard in shards]
+        return {
+            'name': self.name,
+            'mode': 'processes',
+            'processes': self.processes,
+            'workers': self.processes * self.threads,
+            'depth': None if None in depths else sum(depths),
+            'capacity': self.max_size,
+            'busy_workers': sum(shard['busy_workers'] for shard in shards),
+            'accepting': self._accepting,
+            'submitted': sum(submitted),
+            'processed': sum(shard['processed'] for shard in shards),
+            'failed': sum(shard['failed'] for shard in shards),
+            'rejected': rejected,
+            'shards': shards
+        }
+
+def create_ingestion_queue(handler: Callable[[Any], Any], key: Callable[[Any], Optional[str]],
+                           name: str = "ingestion", on_result: Optional[Callable[[Any], Any]] = None,
+                           on_error: Optional[Callable[[str], Any]] = None,
+                           classify: Optional[Callable[[Any], Optional[str]]] = None,
+                           on_shed: Optional[Callable[[Any], Any]] = None) -> Any:
+    """
+    Crea la cola de ingestión según la configuración: un pool de procesos repartido
+    por mint si INGESTION_PROCESSES > 1, una PriorityWorkQueue por launchpad si se
+    indica classify y PRIORITY_SCHEDULING está activo, o una WorkQueue FIFO.
+
+    Args:
+        handler: Función de nivel de módulo que procesa cada elemento
+        key: Función que obtiene el mint de un elemento
+        name: Nombre de la cola
+        on_result: Callback con el resultado de cada elemento
+        on_error: Callback con el error de cada elemento fallido
+        classify: Función que obtiene el launchpad de un elemento
+        on_shed: Callback con cada elemento ya encolado que la cola por prioridad desaloja
+
+    Returns:
+        WorkQueue, PriorityWorkQueue o ShardedProcessPool
+    """
+    if config.INGESTION_PROCESSES > 1:
+        return ShardedProcessPool(handler, key, name=name, on_result=on_result, on_error=on_error)
+
+    def handle(item: Any) -> Any:
+        try:
+            result = handler(item)
+        except Exception as e:
+            if on_error is not None:
+                on_error(str(e))
+            raise
+        if on_result is not None:
+            on_result(result)
+        return result
+
+    if classify is not None and config.PRIORITY_SCHEDULING:
+        return PriorityWorkQueue(handle, classify, name=name, on_shed=on_shed)
+    return WorkQueue(handle, name=name)
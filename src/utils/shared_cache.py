@@ -0,0 +1,143 @@
+"""
+Caché clave-valor compartida entre procesos.
+
+Con el modo de procesos de la cola de ingestión cada worker es un proceso
+independiente, así que los diccionarios en memoria dejan de compartirse. Esta
+caché guarda los valores serializados en JSON en una base SQLite en modo WAL,
+que admite lectores concurrentes de varios procesos, con caducidad por entrada.
+Las entradas caducadas se borran cada cierto número de escrituras, para que la
+base no crezca con cada mint o URI visto.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .config import config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+class SharedCache:
+    """
+    Caché con espacio de nombres respaldada por SQLite, segura entre hilos y procesos.
+    """
+
+    def __init__(self, namespace: str, path: Optional[str] = None, ttl: Optional[float] = None,
+                 prune_every: Optional[int] = None):
+        """
+        Abre (o crea) la caché.
+
+        Args:
+            namespace: Espacio de nombres de las claves (una caché lógica por uso)
+            path: Ruta de la base de datos SQLite (por defecto SHARED_CACHE_DB)
+            ttl: Segundos de validez de cada entrada (por defecto SHARED_CACHE_TTL)
+            prune_every: Escrituras entre borrados de entradas caducadas
+                         (por defecto SHARED_CACHE_PRUNE_EVERY, 0 = nunca)
+        """
+        self.namespace = namespace
+        self.path = Path(path or config.SHARED_CACHE_DB)
+        self.ttl = ttl or config.SHARED_CACHE_TTL
+        self.prune_every = config.SHARED_CACHE_PRUNE_EVERY if prune_every is None else prune_every
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (namespace TEXT NOT NULL, key TEXT NOT NULL, "
+            "value TEXT NOT NULL, expires_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'pruned': 0}
+        self._writes_since_prune = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Retorna el valor vigente de una clave.
+
+        Args:
+            key: Clave a consultar
+            default: Valor a retornar si la clave no existe o ha caducado
+
+        Returns:
+            Any: Valor almacenado o default
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (self.namespace, key, time.time())
+            ).fetchone()
+            if row is None:
+                self._stats['misses'] += 1
+                return default
+            self._stats['hits'] += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Guarda un valor serializable en JSON, reemplazando el anterior.
+
+        Args:
+            key: Clave a guardar
+            value: Valor a guardar
+        """
+        try:
+            serialized = json.dumps(value)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Valor no serializable para la caché {self.namespace}: {str(e)}")
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, serialized, time.time() + self.ttl)
+            )
+            self._stats['writes'] += 1
+            self._writes_since_prune += 1
+            if self.prune_every and self._writes_since_prune >= self.prune_every:
+                self._prune_locked()
+
+    def prune(self) -> int:
+        """
+        Elimina las entradas caducadas del espacio de nombres.
+
+        Returns:
+            int: Número de entradas eliminadas
+        """
+        with self._lock:
+            return self._prune_locked()
+
+    def _prune_locked(self) -> int:
+        """Borra las entradas caducadas del espacio de nombres. Requiere el lock."""
+        cursor = self._conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND expires_at <= ?", (self.namespace, time.time())
+        )
+        self._writes_since_prune = 0
+        self._stats['pruned'] += cursor.rowcount
+        return cursor.rowcount
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM cache WHERE namespace = ? AND expires_at > ?", (self.namespace, time.time())
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        """Cierra la conexión con la base de datos."""
+        with self._lock:
+            self._conn.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Retorna los contadores de la caché de este proceso.
+
+        Returns:
+            Dict[str, Any]: Aciertos, fallos, escrituras y entradas caducadas borradas
+        """
+        with self._lock:
+            return dict(self._stats)
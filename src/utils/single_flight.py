@@ -0,0 +1,96 @@
+"""
+Agrupación de llamadas idénticas concurrentes (single-flight).
+
+Cuando lanza un creador popular, o Helius entrega transacciones duplicadas, varios
+hilos piden a la vez los notables del mismo usuario, los metadatos del mismo mint
+o el mismo contenido de IPFS. Las cachés solo ayudan cuando la primera llamada ya
+terminó. SingleFlight deja pasar una sola llamada por clave: los demás llamadores
+que llegan mientras está en curso esperan y reciben su mismo resultado o su misma
+excepción.
+"""
+
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+class SingleFlight:
+    """
+    Ejecuta una sola llamada en curso por clave y comparte su resultado.
+    """
+
+    def __init__(self, name: str):
+        """
+        Inicializa el grupo sin llamadas en curso.
+
+        Args:
+            name: Nombre usado en los logs y en las métricas
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, Future] = {}
+        self._stats = {'calls': 0, 'executions': 0, 'coalesced': 0, 'errors': 0, 'wait_timeouts': 0}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any,
+           wait_timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """
+        Ejecuta fn(*args, **kwargs) o se une a la llamada en curso con la misma clave.
+
+        Args:
+            key: Clave que identifica la llamada (p. ej. el mint o la URI)
+            fn: Función a ejecutar si no hay una llamada en curso
+            *args: Argumentos posicionales de fn
+            wait_timeout: Segundos máximos esperando una llamada ajena (None espera lo que tarde)
+            **kwargs: Argumentos con nombre de fn
+
+        Returns:
+            Any: Resultado de la llamada, propia o compartida
+
+        Raises:
+            TimeoutError: Si la llamada ajena no termina dentro de wait_timeout
+            Exception: La excepción que lanzó la llamada, propia o compartida
+        """
+        with self._lock:
+            self._stats['calls'] += 1
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = self._flights[key] = Future()
+                self._stats['executions'] += 1
+            else:
+                self._stats['coalesced'] += 1
+        if not leader:
+            logger.debug(f"{self.name}: uniéndose a la llamada en curso para {key}")
+            try:
+                return future.result(wait_timeout)
+            except FutureTimeoutError:
+                with self._lock:
+                    self._stats['wait_timeouts'] += 1
+                raise TimeoutError(f"{self.name}: la llamada en curso para {key} no terminó en {wait_timeout}s")
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                self._stats['errors'] += 1
+                self._flights.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._flights.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Retorna los contadores del grupo.
+
+        Returns:
+            Dict[str, Any]: Llamadas, ejecuciones reales, llamadas agrupadas, errores,
+            esperas agotadas y llamadas en curso
+        """
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._flights))
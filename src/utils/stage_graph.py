@@ -0,0 +1,259 @@
+"""
+Ejecutor de enriquecimiento por grafo de etapas.
+
+Cada etapa declara las entradas que necesita (valores iniciales u otras etapas) y
+se lanza en el pool de hilos en cuanto todas están disponibles, de modo que el
+trabajo independiente (imagen, notables, kolScore...) avanza en paralelo. Una
+etapa de carrera tiene varias alternativas: la siguiente solo arranca si las
+anteriores fallan o tardan más que su retardo, y gana el primer resultado no nulo.
+Al terminar se registra el camino crítico, la cadena de etapas que determinó la
+duración total.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+class Stage:
+    """
+    Etapa del grafo: una o varias alternativas que producen un mismo valor.
+    """
+
+    def __init__(self, name: str, alternatives: List[Tuple[Callable[..., Any], Tuple[str, ...], float]],
+                 allow_missing: bool = False):
+        """
+        Inicializa la etapa.
+
+        Args:
+            name: Nombre de la etapa (y clave de su resultado)
+            alternatives: Tuplas (función, entradas, retardo); la función recibe las entradas por nombre
+            allow_missing: Si es True, la etapa se ejecuta aunque alguna entrada sea None
+        """
+        self.name = name
+        self.alternatives = alternatives
+        self.allow_missing = allow_missing
+
+    @property
+    def inputs(self) -> Tuple[str, ...]:
+        """Entradas de todas las alternativas."""
+        names: List[str] = []
+        for _, inputs, _ in self.alternatives:
+            names.extend(name for name in inputs if name not in names)
+        return tuple(names)
+
+class StageGraphResult:
+    """
+    Valores y tiempos de una ejecución del grafo.
+    """
+
+    def __init__(self, values: Dict[str, Any], timings: Dict[str, Tuple[float, float]],
+                 winners: Dict[str, int], errors: Dict[str, str], dependencies: Dict[str, Tuple[str, ...]]):
+        self.values = values
+        self.timings = timings
+        self.winners = winners
+        self.errors = errors
+        self._dependencies = dependencies
+
+    def critical_path(self) -> List[str]:
+        """
+        Retorna la cadena de etapas que determinó la duración total: desde la última
+        en terminar, retrocediendo por la entrada que llegó más tarde.
+
+        Returns:
+            List[str]: Nombres de las etapas, de la primera a la última
+        """
+        if not self.timings:
+            return []
+        path = []
+        current: Optional[str] = max(self.timings, key=lambda name: self.timings[name][1])
+        while current is not None:
+            path.append(current)
+            inputs = [name for name in self._dependencies.get(current, ()) if name in self.timings]
+            current = max(inputs, key=lambda name: self.timings[name][1]) if inputs else None
+        return list(reversed(path))
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Retorna los tiempos de la ejecución en milisegundos.
+
+        Returns:
+            Dict[str, Any]: Duración total, camino crítico y duración de cada etapa
+        """
+        path = self.critical_path()
+        return {
+            'total_ms': round(max((end for _, end in self.timings.values()), default=0.0) * 1000, 2),
+            'critical_path': path,
+            'critical_path_ms': {name: round((self.timings[name][1] - self.timings[name][0]) * 1000, 2) for name in path},
+            'stage_ms': {name: round((end - start) * 1000, 2) for name, (start, end) in self.timings.items()},
+            'winners': dict(self.winners),
+            'errors': dict(self.errors)
+        }
+
+class StageGraph:
+    """
+    Grafo de etapas con dependencias declaradas, ejecutado sobre un pool de hilos.
+    """
+
+    def __init__(self, name: str = "enrichment"):
+        """
+        Inicializa un grafo vacío.
+
+        Args:
+            name: Nombre del grafo para los logs
+        """
+        self.name = name
+        self._stages: Dict[str, Stage] = {}
+
+    def add(self, name: str, func: Callable[..., Any], inputs: Sequence[str] = (),
+            allow_missing: bool = False) -> "StageGraph":
+        """
+        Añade una etapa con una sola implementación.
+
+        Args:
+            name: Nombre de la etapa
+            func: Función que recibe las entradas por nombre y retorna el valor de la etapa
+            inputs: Nombres de las entradas (valores iniciales u otras etapas)
+            allow_missing: Si es True, se ejecuta aunque alguna entrada sea None
+
+        Returns:
+            StageGraph: El propio grafo, para encadenar llamadas
+        """
+        return self.add_race(name, [(func, inputs, 0.0)], allow_missing)
+
+    def add_race(self, name: str, alternatives: Sequence[Tuple[Callable[..., Any], Sequence[str], float]],
+                 allow_missing: bool = False) -> "StageGraph":
+        """
+        Añade una etapa de carrera: gana el primer resultado no nulo. Cada alternativa
+        arranca cuando fallan las anteriores o, si no, tras su retardo (en segundos).
+
+        Args:
+            name: Nombre de la etapa
+            alternatives: Tuplas (función, entradas, retardo) en orden de preferencia
+            allow_missing: Si es True, se ejecuta aunque alguna entrada sea None
+
+        Returns:
+            StageGraph: El propio grafo, para encadenar llamadas
+        """
+        if name in self._stages:
+            raise ValueError(f"La etapa {name} ya existe en el grafo {self.name}")
+        self._stages[name] = Stage(
+            name, [(func, tuple(inputs), delay) for func, inputs, delay in alternatives], allow_missing
+        )
+        return self
+
+    def run(self, initial: Dict[str, Any], executor: Optional[Executor] = None,
+            timeout: Optional[float] = None) -> StageGraphResult:
+        """
+        Ejecuta el grafo. Las etapas con alguna entrada None (y sin allow_missing) se omiten con valor None.
+
+        Args:
+            initial: Valores iniciales disponibles para las etapas
+            executor: Pool de hilos donde ejecutar las etapas (por defecto, uno temporal)
+            timeout: Segundos máximos de ejecución; las etapas pendientes quedan con valor None
+
+        Returns:
+            StageGraphResult: Valores de todas las etapas y sus tiempos
+        """
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(max_workers=max(1, len(self._stages)), thread_name_prefix=self.name)
+        try:
+            return self._run(initial, executor, timeout)
+        finally:
+            if own_executor:
+                executor.shutdown(wait=False)
+
+    def _run(self, initial: Dict[str, Any], executor: Executor, timeout: Optional[float]) -> StageGraphResult:
+        """Bucle de planificación: lanza etapas listas y espera a la siguiente que termine."""
+        origin = time.monotonic()
+        values: Dict[str, Any] = dict(initial)
+        done: set = set(initial)
+        timings: Dict[str, Tuple[float, float]] = {}
+        winners: Dict[str, int] = {}
+        errors: Dict[str, str] = {}
+        dependencies = {name: stage.inputs for name, stage in self._stages.items()}
+
+        # Estado de cada etapa en curso: instante de inicio, alternativas lanzadas y fallidas
+        started: Dict[str, float] = {}
+        launched: Dict[str, List[int]] = {}
+        failed: Dict[str, set] = {}
+        futures: Dict[Future, Tuple[str, int]] = {}
+
+        def finish(name: str, value: Any, winner: Optional[int] = None) -> None:
+            values[name] = value
+            done.add(name)
+            timings[name] = (started.get(name, time.monotonic()) - origin, time.monotonic() - origin)
+            if winner is not None:
+                winners[name] = winner
+
+        while not all(name in done for name in self._stages):
+            now = time.monotonic()
+            next_deadline: Optional[float] = None
+
+            for name, stage in self._stages.items():
+                if name in done:
+                    continue
+                if name not in started:
+                    if not all(dep in done for dep in stage.inputs):
+                        continue
+                    started[name] = now
+                    launched[name] = []
+                    failed[name] = set()
+                    if not stage.allow_missing and any(values.get(dep) is None for dep in stage.inputs):
+                        finish(name, None)
+                        continue
+                # Lanzar las siguientes alternativas si las anteriores fallaron o venció su retardo
+                while len(launched[name]) < len(stage.alternatives):
+                    position = len(launched[name])
+                    func, inputs, delay = stage.alternatives[position]
+                    start_at = started[name] + delay
+                    if len(failed[name]) < position and now < start_at:
+                        next_deadline = start_at if next_deadline is None else min(next_deadline, start_at)
+                        break
+                    kwargs = {dep: values.get(dep) for dep in inputs}
+                    futures[executor.submit(func, **kwargs)] = (name, position)
+                    launched[name].append(position)
+
+            if all(name in done for name in self._stages):
+                break
+            pending = [future for future, (name, _) in futures.items() if name not in done]
+            if not pending:
+                if next_deadline is None:
+                    break
+                time.sleep(max(0.0, next_deadline - time.monotonic()))
+                continue
+
+            wait_for = None if next_deadline is None else max(0.0, next_deadline - time.monotonic())
+            if timeout is not None:
+                remaining = timeout - (time.monotonic() - origin)
+                if remaining <= 0:
+                    logger.warning(f"Grafo {self.name}: tiempo agotado con etapas pendientes")
+                    break
+                wait_for = remaining if wait_for is None else min(wait_for, remaining)
+            finished, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                name, position = futures.pop(future)
+                if name in done:
+                    continue
+                try:
+                    value = future.result()
+                except Exception as e:
+                    logger.error(f"Grafo {self.name}: error en la etapa {name}: {str(e)}")
+                    errors[name] = str(e)
+                    value = None
+                if value is not None:
+                    finish(name, value, position)
+                    continue
+                failed[name].add(position)
+                if len(failed[name]) == len(self._stages[name].alternatives):
+                    finish(name, None)
+
+        # Las etapas sin terminar (tiempo agotado) quedan con valor None
+        return StageGraphResult(
+            {name: values.get(name) for name in self._stages}, timings, winners, errors, dependencies
+        )
@@ -0,0 +1,246 @@
+"""
+Cola de ingestión compartida con un pool fijo de workers.
+
+Sustituye el patrón de un hilo por webhook y el drenado de un elemento por
+segundo: los servidores encolan cada notificación en una deque acotada y un
+número fijo de workers la consume. Cuando la cola está llena, ``submit``
+devuelve False para que el servidor responda 429 y Helius reintente más tarde.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .config import config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+class WorkQueue:
+    """
+    Cola acotada atendida por un pool fijo de workers.
+    Registra profundidad de la cola y tiempos de espera para exponerlos en /status.
+    """
+
+    def __init__(self, handler: Callable[[Any], Any], workers: Optional[int] = None,
+                 max_size: Optional[int] = None, name: str = "ingestion"):
+        """
+        Inicializa la cola sin arrancar los workers.
+
+        Args:
+            handler: Función que procesa cada elemento encolado
+            workers: Número de workers (por defecto INGESTION_WORKERS)
+            max_size: Capacidad máxima de la cola (por defecto INGESTION_QUEUE_SIZE)
+            name: Nombre usado en los logs y en los hilos
+        """
+        self.handler = handler
+        self.workers = workers or config.INGESTION_WORKERS
+        self.max_size = max_size or config.INGESTION_QUEUE_SIZE
+        self.name = name
+
+        self._queue: Deque[Tuple[Any, float]] = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._idle = threading.Condition(self._lock)
+        self._in_flight: Dict[int, Any] = {}
+        self._threads: List[threading.Thread] = []
+        self._running = False
+        self._accepting = True
+
+        # Métricas
+        self._submitted = 0
+        self._processed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._busy = 0
+        self._max_depth = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._last_wait = 0.0
+
+    @property
+    def accepting(self) -> bool:
+        """Indica si la cola acepta nuevos elementos."""
+        return self._accepting
+
+    def start(self) -> None:
+        """Arranca los workers. Es idempotente."""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._accepting = True
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker,
+                    name=f"{self.name}-worker-{i}",
+                    daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+        logger.info(f"Cola '{self.name}' iniciada con {self.workers} workers (capacidad {self.max_size})")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Deja de aceptar elementos y detiene los workers una vez vaciada la cola.
+
+        Args:
+            timeout: Tiempo máximo de espera por cada worker
+        """
+        with self._lock:
+            self._accepting = False
+            self._running = False
+            self._not_empty.notify_all()
+            threads = list(self._threads)
+            self._threads = []
+        for thread in threads:
+            thread.join(timeout)
+        logger.info(f"Cola '{self.name}' detenida")
+
+    def drain(self, timeout: float) -> List[Any]:
+        """
+        Deja de aceptar elementos y espera hasta timeout a que se procese lo pendiente.
+        Los elementos que siguen encolados se retiran de la cola y se retornan para que
+        el llamador los guarde; los workers se detienen. Los elementos en curso no se
+        retornan: su worker sigue procesándolos y podría terminarlos antes de que el
+        proceso salga, así que repetirlos en otro proceso los duplicaría. Los que no
+        terminen a tiempo se pierden (se registran en el log).
+
+        Args:
+            timeout: Periodo de gracia en segundos
+
+        Returns:
+            List[Any]: Elementos encolados sin empezar
+        """
+        expires_at = time.monotonic() + timeout
+        with self._lock:
+            self._accepting = False
+            while self._depth_locked() or self._busy:
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._idle.wait(remaining)
+            in_flight = len(self._in_flight)
+            unfinished = self._take_all_locked()
+            self._running = False
+            self._not_empty.notify_all()
+            self._threads = []
+        if in_flight:
+            logger.warning(f"Cola '{self.name}': {in_flight} elemento(s) siguen en curso al agotar el periodo de gracia")
+        if unfinished:
+            logger.warning(f"Cola '{self.name}' drenada con {len(unfinished)} elemento(s) sin terminar")
+        else:
+            logger.info(f"Cola '{self.name}' drenada por completo")
+        return unfinished
+
+    def submit(self, item: Any) -> bool:
+        """
+        Encola un elemento para su procesamiento. Arranca los workers si es necesario.
+
+        Args:
+            item: Elemento a procesar
+
+        Returns:
+            bool: True si se encoló, False si la cola está llena o no acepta elementos
+        """
+        if not self._running and self._accepting:
+            self.start()
+        with self._lock:
+            if not self._accepting or not self._push_locked(item, time.monotonic()):
+                self._rejected += 1
+                return False
+            self._submitted += 1
+            self._max_depth = max(self._max_depth, self._depth_locked())
+            self._not_empty.notify()
+        return True
+
+    # Operaciones sobre el almacenamiento de la cola (requieren el lock); las
+    # subclases las redefinen para cambiar el orden o la admisión de elementos
+
+    def _push_locked(self, item: Any, enqueued_at: float) -> bool:
+        """Añade un elemento. Retorna False si no cabe."""
+        if len(self._queue) >= self.max_size:
+            return False
+        self._queue.append((item, enqueued_at))
+        return True
+
+    def _pop_locked(self) -> Optional[Tuple[Any, float]]:
+        """Retira el siguiente elemento a procesar, o None si no hay ninguno disponible."""
+        return self._queue.popleft() if self._queue else None
+
+    def _done_locked(self, item: Any) -> None:
+        """Se llama al terminar de procesar un elemento."""
+
+    def _depth_locked(self) -> int:
+        """Número de elementos encolados."""
+        return len(self._queue)
+
+    def _take_all_locked(self) -> List[Any]:
+        """Retira y retorna todos los elementos encolados, en orden."""
+        items = [item for item, _ in self._queue]
+        self._queue.clear()
+        return items
+
+    def _worker(self) -> None:
+        """Bucle de cada worker: espera elementos y los procesa."""
+        while True:
+            with self._lock:
+                while True:
+                    entry = self._pop_locked()
+                    if entry is not None or (not self._running and not self._depth_locked()):
+                        break
+                    self._not_empty.wait()
+                if entry is None:
+                    return
+                item, enqueued_at = entry
+                wait = time.monotonic() - enqueued_at
+                self._total_wait += wait
+                self._last_wait = wait
+                self._max_wait = max(self._max_wait, wait)
+                self._busy += 1
+                self._in_flight[threading.get_ident()] = item
+
+            try:
+                self.handler(item)
+                failed = False
+            except Exception as e:
+                logger.error(f"Error procesando elemento en la cola '{self.name}': {str(e)}")
+                failed = True
+
+            with self._lock:
+                self._busy -= 1
+                self._in_flight.pop(threading.get_ident(), None)
+                self._done_locked(item)
+                self._idle.notify_all()
+                if failed:
+                    self._failed += 1
+                else:
+                    self._processed += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Retorna las métricas actuales de la cola.
+
+        Returns:
+            Dict[str, Any]: Profundidad, contadores y tiempos de espera en milisegundos
+        """
+        with self._lock:
+            dequeued = self._processed + self._failed + self._busy
+            avg_wait = self._total_wait / dequeued if dequeued else 0.0
+            return {
+                'name': self.name,
+                'depth': self._depth_locked(),
+                'max_depth': self._max_depth,
+                'capacity': self.max_size,
+                'workers': self.workers,
+                'busy_workers': self._busy,
+                'accepting': self._accepting,
+                'submitted': self._submitted,
+                'processed': self._processed,
+                'failed': self._failed,
+                'rejected': self._rejected,
+                'avg_wait_ms': round(avg_wait * 1000, 2),
+                'max_wait_ms': round(self._max_wait * 1000, 2),
+                'last_wait_ms': round(self._last_wait * 1000, 2)
+            }
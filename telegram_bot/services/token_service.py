@@ -14,6 +14,7 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 
 # Import the fast notable followers script
 from protokols_smart_followers_fast import get_notables
+from src.utils.rate_scheduler import INTERACTIVE
 
 # Logging configuration
 logger = logging.getLogger(__name__)
@@ -50,7 +51,8 @@ def get_token_info(token_address: str) -> Optional[Dict]:
             return None
         
         # Get notable followers
-        notables_data = get_notables(twitter_username, top_n=5)
+        # /token is user-facing, so it goes ahead of background work
+        notables_data = get_notables(twitter_username, top_n=5, priority=INTERACTIVE)
         if not notables_data:
             return None
         
@@ -0,0 +1,27 @@
+"""
+Configuración común de los tests.
+"""
+
+import sys
+import pytest
+from src.utils import rate_scheduler
+from src.utils.config import config
+
+@pytest.fixture(autouse=True)
+def isolated_idempotency_index(monkeypatch, tmp_path):
+    """Fixture que abre los índices de idempotencia de los servidores en una base temporal."""
+    monkeypatch.setattr(config, 'IDEMPOTENCY_DB', str(tmp_path / "idempotency.db"))
+    for module_name in ('webhook_server', 'token_monitor_with_notable_check'):
+        module = sys.modules.get(module_name)
+        if module is not None:
+            monkeypatch.setattr(module, 'idempotency_index', None)
+
+@pytest.fixture(autouse=True)
+def isolated_rate_scheduler(monkeypatch, tmp_path):
+    """Fixture que crea los planificadores de tasa sobre una base temporal en lugar del cubo de producción."""
+    schedulers = {}
+    monkeypatch.setattr(config, 'RATE_LIMIT_DB', str(tmp_path / "ratelimit.db"))
+    monkeypatch.setattr(rate_scheduler, '_schedulers', schedulers)
+    yield
+    for scheduler in schedulers.values():
+        scheduler.close()
@@ -0,0 +1,96 @@
+"""
+Tests de integración para el reintento diferido de metadatos en webhook_server.
+"""
+
+import threading
+import pytest
+import webhook_server
+from src.utils.retry_scheduler import RetryScheduler
+
+MINT = "BBY9Rwfa8jtJvxJgbK8vqbCRu8Y1QR9ADqXoEESESN3g"
+WALLET = "5qWya6UjwWnGVhdSBL3hyZ7B45jbk6Byt1hwd7ohEGXE"
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Fixture con metadatos que aparecen en la segunda consulta y envío a Telegram registrado."""
+    state = {"lookups": 0, "sent": [], "done": threading.Event()}
+
+    def fake_metadata(mints, uris=None, deadline=None):
+        state["lookups"] += 1
+        if state["lookups"] < 2:
+            return {mint: None for mint in mints}
+        return {mint: {"address": mint, "name": "Token", "symbol": "TKN", "image": None, "twitter": "creator"}
+                for mint in mints}
+
+    def fake_send(item, deadline):
+        state["sent"].append(item["mint"])
+        state["done"].set()
+
+    scheduler = RetryScheduler({"metadata": [0.05, 0.1]}, tick=0.01, workers=1)
+    monkeypatch.setattr(webhook_server, "retry_scheduler", scheduler)
+    monkeypatch.setattr(webhook_server, "extract_tokens_metadata", fake_metadata)
+    monkeypatch.setattr(webhook_server, "fetch_notables_batch",
+                        lambda usernames, deadline=None: {name: {"total": 8, "top": []} for name in usernames})
+    monkeypatch.setattr(webhook_server, "send_ready_item", fake_send)
+    yield state
+    scheduler.stop()
+
+def webhook():
+    """Webhook con un único mint nuevo."""
+    return [{"signature": "sig-retry", "feePayer": WALLET, "tokenTransfers": [{"mint": MINT}]}]
+
+def test_missing_metadata_is_retried_and_sent(pipeline):
+    """Test para verificar que un token sin metadatos se reintenta y se envía al recuperarse."""
+    results = webhook_server.process_webhook(webhook(), dedupe=False)
+
+    assert [(r["status"], r["reason"]) for r in results] == [("retrying", "metadata_unavailable")]
+    assert pipeline["done"].wait(3)
+    assert pipeline["sent"] == [MINT]
+    assert webhook_server.retry_scheduler.metrics()['stages']['metadata']['recovered'] == 1
+
+def test_retry_can_be_disabled(pipeline):
+    """Test para verificar que sin reintentos el token queda en error (como en el replay)."""
+    results = webhook_server.process_webhook(webhook(), dedupe=False, retry=False)
+
+    assert [(r["status"], r["reason"]) for r in results] == [("error", "metadata_unavailable")]
+    assert webhook_server.retry_scheduler.metrics()['pending'] == 0
+
+def test_unavailable_notables_are_retried(pipeline, monkeypatch):
+    """Test para verificar que si Protokols no responde los notables se reintentan en lugar de descartar el token."""
+    scheduler = RetryScheduler({"metadata": [0.05], "notables": [0.05, 0.1]}, tick=0.01, workers=1)
+    monkeypatch.setattr(webhook_server, "retry_scheduler", scheduler)
+    pipeline["lookups"] = 1
+    calls = []
+
+    def flaky_notables(usernames, deadline=None):
+        calls.append(usernames)
+        return {name: ({"total": 8, "top": []} if len(calls) > 1 else None) for name in usernames}
+
+    monkeypatch.setattr(webhook_server, "fetch_notables_batch", flaky_notables)
+    results = webhook_server.process_webhook(webhook(), dedupe=False)
+
+    assert [(r["status"], r["reason"]) for r in results] == [("retrying", "notables_unavailable")]
+    assert pipeline["done"].wait(3)
+    assert pipeline["sent"] == [MINT]
+    assert scheduler.metrics()['stages']['notables']['recovered'] == 1
+    scheduler.stop()
+
+def test_failed_token_can_be_redelivered(pipeline):
+    """Test para verificar que un token que termina en error se desmarca y su reentrega se procesa."""
+    first = webhook_server.process_webhook(webhook(), retry=False)
+    webhook_server.release_failed(first)
+    assert [(r["status"], r["reason"]) for r in first] == [("error", "metadata_unavailable")]
+
+    second = webhook_server.process_webhook(webhook(), retry=False)
+    assert [r["status"] for r in second] == ["ready"]
+    third = webhook_server.process_webhook(webhook(), retry=False)
+    assert [(r["status"], r["reason"]) for r in third] == [("ignored", "duplicate")]
+
+def test_processing_error_releases_claimed_tokens(pipeline, monkeypatch):
+    """Test para verificar que una excepción durante el procesamiento no deja el token marcado como visto."""
+    def broken_metadata(mints, uris=None, deadline=None):
+        raise RuntimeError("fallo inesperado")
+
+    monkeypatch.setattr(webhook_server, "extract_tokens_metadata", broken_metadata)
+    assert webhook_server.process_webhook(webhook()) == []
+    assert not webhook_server.get_idempotency_index().seen("sig-retry", MINT)
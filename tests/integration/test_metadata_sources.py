@@ -0,0 +1,62 @@
+"""
+Tests de integración para la carrera entre la API DAS de Helius e IPFS en webhook_server.
+"""
+
+import time
+import pytest
+import webhook_server
+from src.utils.helius_batcher import HeliusBatcher
+
+MINT = "BBY9Rwfa8jtJvxJgbK8vqbCRu8Y1QR9ADqXoEESESN3g"
+
+def das_asset(twitter=None):
+    """Asset DAS con el contenido off-chain cacheado por Helius."""
+    links = {"image": "https://example.com/image.png"}
+    if twitter:
+        links["twitter"] = twitter
+    return {"id": MINT, "content": {"metadata": {"name": "Test Token", "symbol": "TEST"}, "links": links}}
+
+@pytest.fixture
+def sources(monkeypatch):
+    """Fixture que sustituye las llamadas a Helius e IPFS por versiones locales configurables."""
+    state = {"asset": das_asset("dascreator"), "ipfs_delay": 0.0, "ipfs_calls": []}
+
+    def fake_ipfs(uri, mint, deadline=None):
+        state["ipfs_calls"].append(uri)
+        time.sleep(state["ipfs_delay"])
+        return {"address": mint, "name": "Test Token", "symbol": "TEST", "image": None, "twitter": "ipfscreator"}
+
+    das = HeliusBatcher(lambda mints: {mint: webhook_server.parse_das_asset(state["asset"], mint) for mint in mints},
+                        window=0.01)
+    uris = HeliusBatcher(lambda mints: {mint: f"https://ipfs.io/ipfs/{mint}" for mint in mints}, window=0.01)
+    monkeypatch.setattr(webhook_server.config, "HELIUS_DAS_ENABLED", True)
+    monkeypatch.setattr(webhook_server, "das_batcher", das)
+    monkeypatch.setattr(webhook_server, "helius_batcher", uris)
+    monkeypatch.setattr(webhook_server, "extract_token_metadata_from_ipfs", fake_ipfs)
+    yield state
+    das.close()
+    uris.close()
+
+def test_parse_das_asset_requires_creator():
+    """Test para verificar que un asset DAS sin creador de Twitter no se da por bueno."""
+    assert webhook_server.parse_das_asset(das_asset("https://x.com/dascreator"), MINT)["twitter"] == "dascreator"
+    assert webhook_server.parse_das_asset(das_asset(), MINT) is None
+
+def test_das_wins_when_gateway_is_slow(sources):
+    """Test para verificar que gana DAS si el gateway de IPFS tarda más."""
+    sources["ipfs_delay"] = 1.0
+
+    started = time.monotonic()
+    metadata = webhook_server.extract_tokens_metadata([MINT])[MINT]
+
+    assert metadata["twitter"] == "dascreator"
+    assert time.monotonic() - started < 0.8
+
+def test_ipfs_wins_when_das_has_no_creator(sources):
+    """Test para verificar que se usa IPFS si DAS no trae el creador."""
+    sources["asset"] = das_asset()
+
+    metadata = webhook_server.extract_tokens_metadata([MINT], {MINT: "https://ipfs.io/ipfs/decoded"})[MINT]
+
+    assert metadata["twitter"] == "ipfscreator"
+    assert sources["ipfs_calls"] == ["https://ipfs.io/ipfs/decoded"]
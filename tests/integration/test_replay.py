@@ -0,0 +1,95 @@
+"""
+Tests de integración para el reprocesado de notificaciones guardadas (replay).
+"""
+
+import json
+import pytest
+
+import replay
+import webhook_server
+from src.utils.config import config
+from src.utils.journal import Journal
+
+MINT = "BBY9Rwfa8jtJvxJgbK8vqbCRu8Y1QR9ADqXoEESESN3g"
+ARCHIVED_MINT = "GV74pg6zi1Hy19woBW9msKUqxxvw63A7SQ15tGj5wWJ4"
+
+@pytest.fixture
+def sources(tmp_path):
+    """Fixture que proporciona un directorio con payloads guardados en los distintos formatos."""
+    directory = tmp_path / "stored"
+    directory.mkdir()
+    (directory / "webhook.json").write_text(json.dumps([{
+        "signature": "sig1",
+        "feePayer": "5qWya6UjwWnGVhdSBL3hyZ7B45jbk6Byt1hwd7ohEGXE",
+        "tokenTransfers": [{"mint": MINT, "toTokenAccount": "BKiDH1SW4hdux9E8kJTfpyAkYZaGHHTkYD1AqbSPiZvK"}]
+    }]))
+    (directory / "resultados_archivo.json").write_text(json.dumps({
+        "token_address": ARCHIVED_MINT,
+        "ipfs_uri": "https://ipfs.example/ipfs/archived",
+        "metadata": {"result": {"content": {"metadata": {"name": "Archived", "symbol": "ARC"}}}}
+    }))
+    (directory / "roto.json").write_text("{no es json")
+    (directory / "otro.json").write_text(json.dumps({"unrelated": True}))
+    return directory
+
+@pytest.fixture
+def enrichment(monkeypatch):
+    """Fixture que sustituye las llamadas externas del pipeline por respuestas fijas."""
+    requested = []
+
+    def fake_metadata(mints, uris=None, deadline=None):
+        requested.append((list(mints), dict(uris or {})))
+        return {mint: {"address": mint, "name": "Token", "symbol": "TKN", "image": None, "twitter": "creator"}
+                for mint in mints}
+
+    monkeypatch.setattr(webhook_server, "extract_tokens_metadata", fake_metadata)
+    monkeypatch.setattr(webhook_server, "fetch_notables_batch",
+                        lambda usernames, deadline=None: {name: {"total": 8, "top": []} for name in usernames})
+    monkeypatch.setattr(webhook_server, "send_ready_item",
+                        lambda item, deadline: pytest.fail("dry-run no debe enviar a Telegram"))
+    return requested
+
+def test_iter_payloads_reads_all_formats(sources, tmp_path):
+    """Test para verificar que se leen webhooks, resultados archivados y journals, omitiendo lo demás."""
+    journal_dir = tmp_path / "journal"
+    journal = Journal(str(journal_dir))
+    offset = journal.append({"received_at": 0, "payload": {"signature": "sig9", "tokenTransfers": []}}, sync=True)
+    journal.close()
+
+    payloads = dict(replay.iter_payloads([str(sources), str(journal_dir)]))
+
+    assert set(payloads) == {
+        str(sources / "resultados_archivo.json"),
+        str(sources / "webhook.json"),
+        f"{journal_dir}@{offset}"
+    }
+    archived = payloads[str(sources / "resultados_archivo.json")]['items'][0]
+    assert archived['mint'] == ARCHIVED_MINT
+    assert archived['onchain_metadata']['uri'] == "https://ipfs.example/ipfs/archived"
+    assert payloads[f"{journal_dir}@{offset}"] == {'transactions': [{"signature": "sig9", "tokenTransfers": []}]}
+
+def test_replay_scores_and_checkpoints(sources, enrichment, tmp_path, monkeypatch):
+    """Test para verificar el reprocesado en dry-run, el umbral y la reanudación desde el checkpoint."""
+    monkeypatch.setattr(config, "MIN_NOTABLES", 5)
+    checkpoint = str(tmp_path / "checkpoint.json")
+    output = tmp_path / "results.jsonl"
+
+    summary = replay.run_replay([str(sources)], concurrency=2, checkpoint_path=checkpoint, output=str(output))
+
+    assert summary['payloads'] == 2
+    assert summary['tokens'] == 2
+    assert summary['statuses'] == {'ready': 2}
+    # La URI del resultado archivado no se vuelve a pedir a Helius
+    assert ([ARCHIVED_MINT], {ARCHIVED_MINT: "https://ipfs.example/ipfs/archived"}) in enrichment
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert {line['mint'] for line in lines} == {MINT, ARCHIVED_MINT}
+
+    # Lo ya reprocesado se omite al reanudar
+    summary = replay.run_replay([str(sources)], checkpoint_path=checkpoint)
+    assert summary['payloads'] == 0
+    assert summary['skipped'] == 2
+
+    # Tras cambiar el umbral, un reprocesado completo vuelve a evaluar todo
+    monkeypatch.setattr(config, "MIN_NOTABLES", 10)
+    summary = replay.run_replay([str(sources)], checkpoint_path=checkpoint, restart=True)
+    assert summary['statuses'] == {'ignored:not_enough_notables': 2}
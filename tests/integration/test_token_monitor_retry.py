@@ -0,0 +1,56 @@
+"""
+Tests de integración para el reintento diferido de metadatos en token_monitor_with_notable_check.
+"""
+
+import threading
+import pytest
+import token_monitor_with_notable_check as token_monitor
+from src.utils.retry_scheduler import RetryScheduler
+
+MINT = "BBY9Rwfa8jtJvxJgbK8vqbCRu8Y1QR9ADqXoEESESN3g"
+TOKEN_INFO = {"name": "Token", "symbol": "TKN", "description": "", "image": None, "twitter_username": "creator"}
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Fixture con metadatos que aparecen en la segunda consulta y resultados registrados."""
+    state = {"lookups": 0, "notables": 0, "saved": [], "results": [], "done": threading.Event()}
+
+    def fake_helius(token_address, deadline):
+        state["lookups"] += 1
+        return dict(TOKEN_INFO) if state["lookups"] >= 2 else None
+
+    def fake_notables(token_info, deadline):
+        state["notables"] += 1
+        return {"total": 8, "top": []}
+
+    def record(result):
+        state["results"].append(result["token_address"])
+        state["done"].set()
+
+    scheduler = RetryScheduler({"metadata": [0.05, 0.1]}, tick=0.01, workers=1)
+    monkeypatch.setattr(token_monitor, "retry_scheduler", scheduler)
+    monkeypatch.setattr(token_monitor, "local_token_info", lambda notification, token_address, deadline: None)
+    monkeypatch.setattr(token_monitor, "helius_token_info", fake_helius)
+    monkeypatch.setattr(token_monitor, "fetch_token_notables", fake_notables)
+    monkeypatch.setattr(token_monitor, "fetch_kol_metrics", lambda token_info, deadline: None)
+    monkeypatch.setattr(token_monitor, "prefetch_image", lambda token_info, deadline: None)
+    monkeypatch.setattr(token_monitor, "enrichment_graph", token_monitor.build_enrichment_graph())
+    monkeypatch.setattr(token_monitor, "save_approved_token", lambda result: state["saved"].append(result["token_address"]))
+    monkeypatch.setattr(token_monitor, "retry_result_handler", record)
+    monkeypatch.setattr(token_monitor.config, "RETRY_ENABLED", True)
+    yield state
+    scheduler.stop()
+
+def test_recovered_token_reaches_result_path(pipeline):
+    """Test para verificar que un token recuperado se guarda y llega al destino de resultados."""
+    notification = {"signature": "sig-retry", "tokenTransfers": [{"mint": MINT}]}
+
+    assert token_monitor.process_webhook_notification(notification) is None
+    assert pipeline["done"].wait(3)
+
+    assert pipeline["results"] == [MINT]
+    assert pipeline["saved"] == [MINT]
+    # El reintento solo repite la consulta de metadatos; los notables se piden una vez
+    assert pipeline["lookups"] == 2
+    assert pipeline["notables"] == 1
+    assert token_monitor.retry_scheduler.metrics()['stages']['metadata']['recovered'] == 1
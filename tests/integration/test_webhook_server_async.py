@@ -0,0 +1,131 @@
+"""
+Tests de integración para el webhook server asíncrono.
+"""
+
+import asyncio
+import json
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("quart")
+
+import webhook_server
+import webhook_server_async as server
+from src.utils.deadline import Deadline
+from src.utils.idempotency import IdempotencyIndex
+from src.utils.prefilter import compact_transaction
+
+MINT = "BBY9Rwfa8jtJvxJgbK8vqbCRu8Y1QR9ADqXoEESESN3g"
+
+@pytest.fixture
+def webhook_data():
+    """Fixture que proporciona un webhook con una creación conocida y otra ajena."""
+    return [
+        {
+            "signature": "sig1",
+            "feePayer": "5qWya6UjwWnGVhdSBL3hyZ7B45jbk6Byt1hwd7ohEGXE",
+            "tokenTransfers": [{"mint": MINT, "toTokenAccount": "BKiDH1SW4hdux9E8kJTfpyAkYZaGHHTkYD1AqbSPiZvK"}]
+        },
+        {
+            "signature": "sig2",
+            "feePayer": "UnknownWallet1111111111111111111111111111111",
+            "tokenTransfers": [{"mint": "OtherMint111111111111111111111111111111111111"}]
+        }
+    ]
+
+@pytest.fixture
+def upstream_calls(monkeypatch, tmp_path):
+    """Fixture que sustituye el cliente HTTP compartido por un transporte simulado."""
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.host)
+        if request.url.host == "api.helius.xyz":
+            assert json.loads(request.content) == {"mintAccounts": [MINT]}
+            return httpx.Response(200, json=[{
+                "account": MINT,
+                "onChainMetadata": {"metadata": {"data": {"uri": "https://ipfs.example/ipfs/abc"}}}
+            }])
+        if request.url.host == "ipfs.example":
+            return httpx.Response(200, json={
+                "name": "Test Token",
+                "symbol": "TEST",
+                "image": "https://example.com/image.png",
+                "metadata": {"tweetCreatorUsername": "testuser"}
+            })
+        if request.url.host == "api.protokols.io":
+            return httpx.Response(200, json={"result": {"data": {"json": {"data": {
+                "overallCount": 12,
+                "items": [{"twitterProfile": {"username": "user1", "followersCount": 500000}}]
+            }}}}})
+        if request.url.host == "api.telegram.org":
+            return httpx.Response(200, json={"ok": True})
+        return httpx.Response(404)
+
+    monkeypatch.setenv("HELIUS_API_KEY", "test")
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "token")
+    monkeypatch.setenv("TELEGRAM_CHANNEL_ID", "-1001234")
+    monkeypatch.setattr(server, "load_protokols_cookies", lambda: {"session": "value"})
+    monkeypatch.setattr(server, "http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(webhook_server, "idempotency_index", IdempotencyIndex(str(tmp_path / "idempotency.db")))
+    return calls
+
+def test_process_webhook_enriches_and_sends(webhook_data, upstream_calls):
+    """Test para verificar el flujo completo de enriquecimiento asíncrono."""
+    async def run():
+        server.enrichment_slots = asyncio.Semaphore(10)
+        return await server.process_webhook(webhook_data)
+
+    results = asyncio.run(run())
+
+    assert [r['status'] for r in results] == ['sent', 'ignored']
+    assert results[0]['notable_data']['total'] == 12
+    assert results[1]['reason'] == 'unknown_fee_payer'
+    assert upstream_calls == ["api.helius.xyz", "ipfs.example", "api.protokols.io", "api.telegram.org"]
+
+def test_webhook_acks_before_processing(webhook_data, monkeypatch):
+    """Test para verificar que /webhook filtra y responde sin esperar al enriquecimiento."""
+    scheduled = []
+    monkeypatch.setattr(server, "schedule_processing", lambda data, deadline=None: scheduled.append(data))
+
+    async def run():
+        client = server.app.test_client()
+        response = await client.post('/webhook', json=webhook_data)
+        return response.status_code, await response.get_json()
+
+    status_code, body = asyncio.run(run())
+
+    assert status_code == 200
+    assert body == {"status": "success", "accepted": 1}
+    assert scheduled == [[compact_transaction(webhook_data[0])]]
+
+def test_expired_deadline_drops_tokens(webhook_data, upstream_calls):
+    """Test para verificar que un token sin presupuesto se descarta sin llamar a Protokols ni Telegram."""
+    async def run():
+        server.enrichment_slots = asyncio.Semaphore(10)
+        return await server.process_webhook(webhook_data, Deadline(budget=0))
+
+    results = asyncio.run(run())
+
+    assert results[0]['status'] == 'dropped'
+    assert results[0]['reason'] == 'deadline_exceeded'
+    assert "api.protokols.io" not in upstream_calls
+    assert "api.telegram.org" not in upstream_calls
+
+def test_failed_processing_task_is_logged(webhook_data, monkeypatch):
+    """Test para verificar que una tarea de enriquecimiento que falla se registra y sale de las tareas en vuelo."""
+    async def failing(data, deadline=None):
+        raise RuntimeError("fallo de enriquecimiento")
+
+    monkeypatch.setattr(server, "process_webhook", failing)
+    monkeypatch.setitem(server.stats, 'tasks_failed', 0)
+
+    async def run():
+        task = server.schedule_processing(webhook_data)
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+    assert server.stats['tasks_failed'] == 1
+    assert not server.in_flight
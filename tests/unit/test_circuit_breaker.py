@@ -0,0 +1,108 @@
+"""
+Tests unitarios para el cortacircuitos por upstream y su uso en el cliente HTTP.
+"""
+
+import threading
+import time
+import pytest
+from flask import Flask
+from werkzeug.serving import make_server
+from src.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.utils.config import config
+from src.utils.http_client import HttpClient
+
+def breaker(**kwargs):
+    """Crea un cortacircuitos con umbrales pequeños para los tests."""
+    options = dict(failure_threshold=3, reset_timeout=0.1, half_open_probes=1,
+                   timeout_factor=2.0, min_timeout=0.05, min_samples=5)
+    options.update(kwargs)
+    return CircuitBreaker("http://upstream", **options)
+
+def test_opens_after_consecutive_failures():
+    """Test para verificar que se abre tras los fallos seguidos y rechaza al instante."""
+    cb = breaker()
+    for _ in range(3):
+        cb.before_request()
+        cb.record_failure()
+
+    assert cb.state == 'open'
+    started = time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        cb.before_request()
+    assert time.monotonic() - started < 0.01
+    assert cb.metrics()['rejected'] == 1
+
+def test_success_resets_failure_count():
+    """Test para verificar que un acierto entre fallos mantiene el circuito cerrado."""
+    cb = breaker()
+    for _ in range(5):
+        cb.record_failure()
+        cb.record_failure()
+        cb.record_success(0.01)
+    assert cb.state == 'closed'
+
+def test_half_open_probe_closes_or_reopens():
+    """Test para verificar que tras la espera se deja pasar una prueba que cierra o reabre el circuito."""
+    cb = breaker()
+    for _ in range(3):
+        cb.record_failure()
+    time.sleep(0.12)
+
+    assert cb.state == 'half_open'
+    cb.before_request()
+    with pytest.raises(CircuitOpenError):
+        cb.before_request()
+    cb.record_failure()
+    assert cb.state == 'open'
+
+    time.sleep(0.12)
+    cb.before_request()
+    cb.record_success(0.01)
+    assert cb.state == 'closed'
+    assert cb.metrics()['opened'] == 2
+
+def test_timeout_follows_p99():
+    """Test para verificar que el timeout se deriva del p99 observado sin superar el pedido."""
+    cb = breaker()
+    assert cb.timeout(10) == 10
+    for latency in [0.1] * 9 + [0.2]:
+        cb.record_success(latency)
+
+    assert cb.p99() == 0.2
+    assert cb.timeout(10) == pytest.approx(0.4)
+    assert cb.timeout(0.3) == 0.3
+
+@pytest.fixture
+def failing_upstream():
+    """Fixture con un upstream local que responde 503."""
+    app = Flask(__name__)
+    app.hits = 0
+
+    @app.route('/down')
+    def down():
+        app.hits += 1
+        return "unavailable", 503
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    app.url = f"http://127.0.0.1:{server.server_port}/down"
+    yield app
+    server.shutdown()
+
+def test_client_short_circuits_degraded_host(failing_upstream, monkeypatch):
+    """Test para verificar que el cliente deja de llamar a un host que responde 5xx y lo muestra en las métricas."""
+    monkeypatch.setattr(config, 'HTTP_BREAKER_FAILURES', 2)
+    client = HttpClient(upstreams={})
+    for _ in range(2):
+        assert client.get(failing_upstream.url, timeout=5).status_code == 503
+    with pytest.raises(CircuitOpenError):
+        client.get(failing_upstream.url, timeout=5)
+
+    assert failing_upstream.hits == 2
+    assert client.breaker_state(failing_upstream.url) == 'open'
+    metrics = client.metrics()
+    host = failing_upstream.url.rsplit('/', 1)[0]
+    assert metrics['breakers'][host]['state'] == 'open'
+    assert metrics['upstreams']['other']['by_host'][host.split('//')[1]]['rejected'] == 1
+    client.close()
@@ -0,0 +1,70 @@
+"""
+Tests unitarios para el almacén compartido de cookies de Protokols.
+"""
+
+import json
+import os
+import pytest
+from src.utils.cookie_store import CookieStore, get_cookie_store, parse_cookies
+
+def write_cookies(path, cookies, mtime_offset=0):
+    """Escribe el fichero de cookies en formato de exportación del navegador."""
+    path.write_text(json.dumps([{"name": name, "value": value, "domain": ".protokols.io"}
+                                for name, value in cookies.items()]))
+    if mtime_offset:
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_offset))
+
+def test_parse_cookies_formats():
+    """Test para verificar que se aceptan la lista exportada y el diccionario plano."""
+    assert parse_cookies([{"name": "a", "value": "1"}, {"name": "b"}]) == {"a": "1"}
+    assert parse_cookies({"a": "1"}) == {"a": "1"}
+    assert parse_cookies("otro") == {}
+
+def test_loads_once_until_file_changes(tmp_path):
+    """Test para verificar que el fichero se lee una vez y se recarga solo cuando cambia."""
+    path = tmp_path / "cookies.json"
+    write_cookies(path, {"session": "old"})
+    store = CookieStore(str(path), check_interval=0)
+
+    first = store.get()
+    assert first == {"session": "old"}
+    assert store.get() is first
+    assert store.metrics()['loads'] == 1
+
+    write_cookies(path, {"session": "new", "csrf": "x"}, mtime_offset=1_000_000_000)
+    second = store.get()
+    assert second == {"session": "new", "csrf": "x"}
+    assert first == {"session": "old"}
+    assert store.metrics()['loads'] == 2
+
+def test_check_interval_throttles_stat(tmp_path):
+    """Test para verificar que dentro del intervalo no se vuelve a comprobar el fichero."""
+    path = tmp_path / "cookies.json"
+    write_cookies(path, {"session": "old"})
+    store = CookieStore(str(path), check_interval=60)
+    store.get()
+    write_cookies(path, {"session": "new"}, mtime_offset=1_000_000_000)
+
+    assert store.get() == {"session": "old"}
+    assert store.metrics()['checks'] == 1
+    assert store.reload() == {"session": "new"}
+
+def test_keeps_previous_cookies_on_bad_file(tmp_path):
+    """Test para verificar que un fichero a medio escribir no borra las cookies vigentes."""
+    path = tmp_path / "cookies.json"
+    write_cookies(path, {"session": "old"})
+    store = CookieStore(str(path), check_interval=0)
+    store.get()
+
+    path.write_text("[{\"name\": ")
+    assert store.get() == {"session": "old"}
+    assert store.metrics()['errors'] == 1
+    with pytest.raises(ValueError):
+        store.reload()
+
+def test_shared_store_per_path(tmp_path):
+    """Test para verificar que todos los llamadores comparten el mismo almacén por fichero."""
+    path = str(tmp_path / "cookies.json")
+    assert get_cookie_store(path) is get_cookie_store(path)
+    assert get_cookie_store(path) is not get_cookie_store(str(tmp_path / "otro.json"))
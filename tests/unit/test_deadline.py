@@ -0,0 +1,50 @@
+"""
+Tests unitarios para el presupuesto de tiempo por token.
+"""
+
+import time
+import pytest
+from src.utils.deadline import Deadline, DeadlineExceeded, DeadlineMetrics, remaining_timeout
+
+def test_timeout_is_capped_by_remaining_budget():
+    """Test para verificar que el timeout nunca supera el tiempo restante."""
+    deadline = Deadline(budget=2)
+
+    assert deadline.timeout(10) <= 2
+    assert deadline.timeout(0.5) == 0.5
+    assert not deadline.expired
+
+def test_expired_deadline_raises():
+    """Test para verificar que un deadline vencido no concede más tiempo."""
+    deadline = Deadline(budget=0.01)
+    time.sleep(0.02)
+
+    assert deadline.expired
+    with pytest.raises(DeadlineExceeded):
+        deadline.timeout(5)
+
+def test_deadline_starts_at_receipt():
+    """Test para verificar que el presupuesto se cuenta desde la recepción y no desde la etapa."""
+    received_at = time.monotonic() - 5
+    deadline = Deadline(budget=6, started_at=received_at)
+
+    assert deadline.remaining() <= 1
+    assert deadline.elapsed() >= 5
+
+def test_remaining_timeout_without_deadline():
+    """Test para verificar que sin deadline se usa el timeout propio de la llamada."""
+    assert remaining_timeout(None, 10) == 10
+    assert remaining_timeout(Deadline(budget=1), 10) <= 1
+
+def test_metrics_count_outcomes():
+    """Test para verificar los contadores por resultado."""
+    metrics = DeadlineMetrics()
+    deadline = Deadline(budget=1)
+    metrics.record('on_time', deadline)
+    metrics.record('dropped', deadline)
+    metrics.record('dropped')
+
+    result = metrics.metrics()
+    assert result['on_time'] == 1
+    assert result['dropped'] == 2
+    assert result['degraded'] == 0
@@ -0,0 +1,38 @@
+"""
+Tests unitarios para la codificación JSON rápida.
+"""
+
+import json
+from src.utils import fast_json
+
+def test_loads_accepts_bytes_and_text():
+    """Test para verificar que se decodifica igual desde bytes y desde texto."""
+    document = '{"mint": "m1", "amount": 1.5, "name": "ñandú"}'
+
+    assert fast_json.loads(document.encode("utf-8")) == json.loads(document)
+    assert fast_json.loads(document) == json.loads(document)
+
+def test_dumps_is_compact_utf8():
+    """Test para verificar que la serialización es compacta, en UTF-8 y reversible."""
+    obj = {"name": "ñandú", "values": [1, 2]}
+
+    encoded = fast_json.dumps(obj)
+
+    assert isinstance(encoded, bytes)
+    assert b" " not in encoded
+    assert json.loads(encoded) == obj
+
+def test_dumps_falls_back_for_unsupported_values():
+    """Test para verificar que los valores que orjson no admite se serializan igualmente."""
+    obj = {1: "clave entera", "big": 2 ** 70}
+
+    assert json.loads(fast_json.dumps(obj)) == {"1": "clave entera", "big": 2 ** 70}
+
+def test_as_json_line_keeps_escaped_newlines():
+    """Test para verificar que solo se sustituyen los saltos de línea entre tokens."""
+    raw = b'{\n  "text": "a\\nb"\r\n}\n'
+
+    line = fast_json.as_json_line(raw)
+
+    assert b"\n" not in line and b"\r" not in line
+    assert json.loads(line) == {"text": "a\nb"}
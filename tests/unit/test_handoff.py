@@ -0,0 +1,40 @@
+"""
+Tests unitarios para el traspaso de trabajo pendiente entre procesos (HandoffStore).
+"""
+
+import pytest
+from src.utils.handoff import HandoffStore
+
+@pytest.fixture
+def handoff_path(tmp_path):
+    """Fixture que proporciona la ruta de un fichero de traspaso temporal."""
+    return str(tmp_path / "handoff.json")
+
+def test_save_and_claim(handoff_path):
+    """Test para verificar que los elementos guardados se reclaman una sola vez."""
+    HandoffStore(handoff_path).save([{"signature": "sig1"}, {"signature": "sig2"}])
+
+    store = HandoffStore(handoff_path)
+    assert store.claim() == [{"signature": "sig1"}, {"signature": "sig2"}]
+    assert store.claim() == []
+
+def test_save_keeps_unclaimed_items(handoff_path):
+    """Test para verificar que un segundo traspaso no pisa uno aún no reclamado."""
+    store = HandoffStore(handoff_path)
+    store.save([{"signature": "sig1"}])
+    store.save([{"signature": "sig2"}])
+
+    assert store.claim() == [{"signature": "sig1"}, {"signature": "sig2"}]
+
+def test_empty_save_writes_nothing(handoff_path, tmp_path):
+    """Test para verificar que un drenado completo no deja fichero de traspaso."""
+    HandoffStore(handoff_path).save([])
+
+    assert list(tmp_path.iterdir()) == []
+
+def test_corrupt_file_is_ignored(handoff_path):
+    """Test para verificar que un fichero dañado no impide arrancar."""
+    with open(handoff_path, 'w') as f:
+        f.write("{no es json")
+
+    assert HandoffStore(handoff_path).claim() == []
@@ -0,0 +1,89 @@
+"""
+Tests unitarios para el agrupador de consultas a Helius.
+"""
+
+import threading
+import pytest
+from src.utils.helius_batcher import HeliusBatcher
+
+class RecordingFetch:
+    """Consulta falsa que registra los lotes recibidos y resuelve cada mint a su URI."""
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+        self.lock = threading.Lock()
+
+    def __call__(self, mints):
+        with self.lock:
+            self.batches.append(list(mints))
+        if self.error:
+            raise self.error
+        return {mint: f"uri-{mint}" for mint in mints if mint != "unknown"}
+
+def lookup_concurrently(batcher, mints):
+    """Lanza una consulta por hilo y retorna el resultado de cada una."""
+    results = {}
+    barrier = threading.Barrier(len(mints))
+
+    def lookup(mint):
+        barrier.wait()
+        results[mint] = batcher.get(mint, timeout=5)
+
+    threads = [threading.Thread(target=lookup, args=(mint,)) for mint in mints]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_lookups_share_one_request():
+    """Test para verificar que las consultas de una misma ventana van en una sola petición."""
+    fetch = RecordingFetch()
+    batcher = HeliusBatcher(fetch, window=0.2, max_batch_size=100)
+    mints = [f"m{i}" for i in range(10)] + ["unknown"]
+
+    results = lookup_concurrently(batcher, mints)
+    batcher.close()
+
+    assert len(fetch.batches) == 1
+    assert sorted(fetch.batches[0]) == sorted(mints)
+    assert results["m3"] == "uri-m3"
+    assert results["unknown"] is None
+    assert batcher.metrics()['avg_batch_size'] == len(mints)
+
+def test_batches_are_capped_at_max_size():
+    """Test para verificar que un lote se envía al llenarse, sin esperar a la ventana."""
+    fetch = RecordingFetch()
+    batcher = HeliusBatcher(fetch, window=0.3, max_batch_size=3)
+
+    results = batcher.get_many([f"m{i}" for i in range(7)], timeout=2)
+    batcher.close()
+
+    assert len(results) == 7
+    assert [len(batch) for batch in fetch.batches] == [3, 3, 1]
+
+def test_duplicate_mints_are_coalesced():
+    """Test para verificar que un mint pedido dos veces en la ventana se consulta una vez."""
+    fetch = RecordingFetch()
+    batcher = HeliusBatcher(fetch, window=0.2)
+
+    first, second = batcher.submit("m1"), batcher.submit("m1")
+    assert first is second
+    assert first.result(timeout=2) == "uri-m1"
+    batcher.close()
+
+    assert fetch.batches == [["m1"]]
+    assert batcher.metrics()['coalesced'] == 1
+
+def test_request_error_reaches_every_waiter():
+    """Test para verificar que el error de la petición en bloque se entrega a cada consulta."""
+    batcher = HeliusBatcher(RecordingFetch(error=ValueError("HTTP 429")), window=0.05)
+
+    futures = [batcher.submit("m1"), batcher.submit("m2")]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=2)
+    batcher.close()
+
+    assert batcher.metrics()['errors'] == 1
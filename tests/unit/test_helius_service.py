@@ -3,6 +3,7 @@ Tests unitarios para el servicio HeliusService.
 """
 
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 from src.services.helius_service import HeliusService
 from src.models.token import TokenMetadata
@@ -42,7 +43,7 @@ def test_get_token_metadata_success(helius_service, mock_token_data, mock_ipfs_d
     mint_address = "BBY9Rwfa8jtJvxJgbK8vqbCRu8Y1QR9ADqXoEESESN3g"
     
     # Mock de las respuestas HTTP
-    with patch('requests.post') as mock_post, patch('requests.get') as mock_get:
+    with patch('src.utils.http_client.post') as mock_post, patch('src.utils.http_client.get') as mock_get:
         # Configurar mock para la llamada a Helius
         mock_post.return_value.json.return_value = [mock_token_data]
         mock_post.return_value.raise_for_status = MagicMock()
@@ -71,7 +72,7 @@ def test_get_token_metadata_no_ipfs_uri(helius_service, mock_token_data):
     mint_address = "BBY9Rwfa8jtJvxJgbK8vqbCRu8Y1QR9ADqXoEESESN3g"
     mock_token_data["onChainMetadata"]["metadata"]["data"] = {}
     
-    with patch('requests.post') as mock_post:
+    with patch('src.utils.http_client.post') as mock_post:
         mock_post.return_value.json.return_value = [mock_token_data]
         mock_post.return_value.raise_for_status = MagicMock()
         
@@ -82,7 +83,7 @@ def test_get_token_metadata_http_error(helius_service):
     """Test para verificar el manejo de errores HTTP."""
     mint_address = "BBY9Rwfa8jtJvxJgbK8vqbCRu8Y1QR9ADqXoEESESN3g"
     
-    with patch('requests.post') as mock_post:
+    with patch('src.utils.http_client.post') as mock_post:
         mock_post.side_effect = Exception("HTTP Error")
         
         result = helius_service.get_token_metadata(mint_address)
@@ -93,11 +94,58 @@ def test_get_token_metadata_missing_required_fields(helius_service, mock_token_d
     mint_address = "BBY9Rwfa8jtJvxJgbK8vqbCRu8Y1QR9ADqXoEESESN3g"
     mock_ipfs_data.pop("name")  # Eliminar campo requerido
     
-    with patch('requests.post') as mock_post, patch('requests.get') as mock_get:
+    with patch('src.utils.http_client.post') as mock_post, patch('src.utils.http_client.get') as mock_get:
         mock_post.return_value.json.return_value = [mock_token_data]
         mock_post.return_value.raise_for_status = MagicMock()
         mock_get.return_value.json.return_value = mock_ipfs_data
         mock_get.return_value.raise_for_status = MagicMock()
         
         result = helius_service.get_token_metadata(mint_address)
-        assert result is None 
\ No newline at end of file
+        assert result is None
+
+def test_get_tokens_metadata_single_bulk_request(helius_service, mock_ipfs_data):
+    """Test para verificar que varios mints se resuelven con una sola petición a Helius."""
+    mints = ["MintA111111111111111111111111111111111111111", "MintB111111111111111111111111111111111111111"]
+    helius_response = [
+        {"account": mints[0], "onChainMetadata": {"metadata": {"data": {"uri": "https://arweave.net/a"}}}},
+        {"account": mints[1], "onChainMetadata": {"metadata": {"data": {}}}}
+    ]
+    
+    with patch('src.utils.http_client.post') as mock_post, patch('src.utils.http_client.get') as mock_get:
+        mock_post.return_value.json.return_value = helius_response
+        mock_post.return_value.raise_for_status = MagicMock()
+        mock_get.return_value.json.return_value = mock_ipfs_data
+        mock_get.return_value.raise_for_status = MagicMock()
+        
+        results = helius_service.get_tokens_metadata(mints)
+        
+        mock_post.assert_called_once()
+        assert mock_post.call_args.kwargs['json'] == {"mintAccounts": mints}
+        assert results[mints[0]].address == mints[0]
+        assert results[mints[0]].twitter == "testuser"
+        assert results[mints[1]] is None
+
+def test_instances_share_one_batcher(helius_service, mock_ipfs_data, monkeypatch):
+    """Test para verificar que las consultas simultáneas desde instancias distintas van en una sola petición."""
+    other_service = HeliusService()
+    assert other_service.batcher is helius_service.batcher
+    monkeypatch.setattr(helius_service.batcher, 'window', 0.2)
+    mints = ["MintA111111111111111111111111111111111111111", "MintB111111111111111111111111111111111111111"]
+    
+    with patch('src.utils.http_client.post') as mock_post, patch('src.utils.http_client.get') as mock_get:
+        mock_post.return_value.json.return_value = [
+            {"account": mint, "onChainMetadata": {"metadata": {"data": {"uri": "https://arweave.net/a"}}}}
+            for mint in mints
+        ]
+        mock_post.return_value.raise_for_status = MagicMock()
+        mock_get.return_value.json.return_value = mock_ipfs_data
+        mock_get.return_value.raise_for_status = MagicMock()
+        
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(service.get_token_metadata, mint)
+                       for service, mint in zip([helius_service, other_service], mints)]
+            results = [future.result() for future in futures]
+        
+        mock_post.assert_called_once()
+        assert sorted(mock_post.call_args.kwargs['json']['mintAccounts']) == mints
+        assert [result.address for result in results] == mints
@@ -0,0 +1,88 @@
+"""
+Tests unitarios para el cliente HTTP compartido, contra un servidor local.
+"""
+
+import threading
+import pytest
+from flask import Flask, jsonify, make_response, request
+from werkzeug.serving import WSGIRequestHandler, make_server
+from src.utils.http_client import HttpClient
+
+class KeepAliveHandler(WSGIRequestHandler):
+    """Manejador HTTP/1.1 para que el servidor local mantenga las conexiones abiertas."""
+    protocol_version = "HTTP/1.1"
+
+def create_upstream():
+    """Crea un upstream mínimo que devuelve las cabeceras y cookies recibidas."""
+    app = Flask(__name__)
+
+    @app.route('/echo')
+    def echo():
+        response = make_response(jsonify({
+            'headers': {name: value for name, value in request.headers.items()},
+            'cookies': dict(request.cookies)
+        }))
+        response.set_cookie('tracker', 'from-server')
+        return response
+
+    return app
+
+@pytest.fixture
+def upstream():
+    """Fixture que sirve el upstream local en un puerto libre."""
+    server = make_server('127.0.0.1', 0, create_upstream(), threaded=True, request_handler=KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+def client_for(base_url, **kwargs):
+    """Crea un cliente con el upstream local declarado como 'local'."""
+    upstreams = {'local': {'prefixes': [base_url + '/'], 'headers': {'X-Upstream': 'local', 'Accept': 'text/plain'}}}
+    return HttpClient(upstreams=upstreams, pool_sizes={'local': 2}, **kwargs)
+
+def test_reuses_connection_across_requests(upstream):
+    """Test para verificar que varias peticiones al mismo host comparten una conexión keep-alive."""
+    client = client_for(upstream)
+    for _ in range(5):
+        assert client.get(f"{upstream}/echo", timeout=5).status_code == 200
+
+    local = client.metrics()['upstreams']['local']
+    host = local['hosts'][upstream]
+    assert local['requests'] == 5
+    assert host['connections_opened'] == 1
+    assert host['requests'] == 5
+    assert host['idle'] == 1
+    assert host['maxsize'] == 2
+    assert host['reuse_ratio'] == 0.8
+    client.close()
+
+def test_applies_upstream_default_headers(upstream):
+    """Test para verificar que se aplican las cabeceras del upstream y que las de la petición prevalecen."""
+    client = client_for(upstream)
+    headers = client.get(f"{upstream}/echo", headers={'Accept': 'application/json'}, timeout=5).json()['headers']
+
+    assert headers['X-Upstream'] == 'local'
+    assert headers['Accept'] == 'application/json'
+    assert client.upstream_for(f"{upstream}/echo") == 'local'
+    assert client.upstream_for("https://example.com/") is None
+    client.close()
+
+def test_does_not_persist_response_cookies(upstream):
+    """Test para verificar que las cookies de una respuesta no se envían en peticiones posteriores."""
+    client = client_for(upstream)
+    client.get(f"{upstream}/echo", timeout=5)
+    second = client.get(f"{upstream}/echo", cookies={'session': 'abc'}, timeout=5).json()
+
+    assert second['cookies'] == {'session': 'abc'}
+    assert len(client.session.cookies) == 0
+    client.close()
+
+def test_counts_errors_per_upstream():
+    """Test para verificar que los fallos de conexión se cuentan en el upstream correspondiente."""
+    client = HttpClient(upstreams={'down': {'prefixes': ['http://127.0.0.1:9/']}})
+    with pytest.raises(Exception):
+        client.get("http://127.0.0.1:9/", timeout=1)
+
+    assert client.metrics()['upstreams']['down']['errors'] == 1
+    client.close()
@@ -0,0 +1,88 @@
+"""
+Tests unitarios para el índice de idempotencia.
+"""
+
+import time
+import pytest
+from src.utils.idempotency import IdempotencyIndex, TimeBucketedBloomFilter
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Fixture que proporciona la ruta de una base de datos temporal."""
+    return str(tmp_path / "idempotency.db")
+
+def test_duplicate_mint_is_rejected(db_path):
+    """Test para verificar que una segunda entrega del mismo mint se rechaza."""
+    index = IdempotencyIndex(db_path)
+
+    assert index.check_and_add("sig1", "mint1") is True
+    assert index.check_and_add("sig1", "mint1") is False
+    assert index.check_and_add("sig2", "mint1") is False
+
+    metrics = index.metrics()
+    assert metrics['new'] == 1
+    assert metrics['duplicates'] == 2
+    index.close()
+
+def test_several_mints_in_one_transaction(db_path):
+    """Test para verificar que los mints de una misma transacción no se bloquean entre sí."""
+    index = IdempotencyIndex(db_path)
+
+    assert index.check_and_add("sig1", "mint1") is True
+    assert index.check_and_add("sig1", "mint2") is True
+    assert index.seen(signature="sig1") is True
+    assert index.seen(signature="sig3") is False
+    index.close()
+
+def test_survives_restart(db_path):
+    """Test para verificar que los duplicados se detectan tras reabrir el índice."""
+    index = IdempotencyIndex(db_path)
+    assert index.check_and_add("sig1", "mint1") is True
+    index.close()
+
+    reopened = IdempotencyIndex(db_path)
+    assert reopened.check_and_add("sig1", "mint1") is False
+    assert reopened.check_and_add(signature="sig9") is True
+    reopened.close()
+
+def test_shared_between_instances(db_path):
+    """Test para verificar que dos procesos con el mismo fichero no procesan el mismo mint."""
+    first = IdempotencyIndex(db_path)
+    second = IdempotencyIndex(db_path)
+
+    assert first.check_and_add("sig1", "mint1") is True
+    # El filtro de Bloom de la segunda instancia no lo conoce, pero el conjunto en disco sí
+    assert second.check_and_add("sig1", "mint1") is False
+    first.close()
+    second.close()
+
+def test_expired_keys_are_forgotten(db_path):
+    """Test para verificar que las claves más antiguas que max_age se eliminan al reabrir."""
+    index = IdempotencyIndex(db_path, max_age=0.05, bucket_seconds=0.01)
+    assert index.check_and_add("sig1", "mint1") is True
+    index.close()
+    time.sleep(0.1)
+
+    reopened = IdempotencyIndex(db_path, max_age=0.05, bucket_seconds=0.01)
+    assert reopened.check_and_add("sig1", "mint1") is True
+    reopened.close()
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test para verificar que el filtro de Bloom nunca olvida una clave dentro de la ventana."""
+    bloom = TimeBucketedBloomFilter(bucket_seconds=60, buckets=2, bits_per_bucket=4096)
+    keys = [f"mint:{i}" for i in range(200)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(bloom.might_contain(key) for key in keys)
+    assert sum(bloom.might_contain(f"other:{i}") for i in range(200)) < 20
+
+def test_discard_allows_reprocessing(db_path):
+    """Test para verificar que una entrega olvidada vuelve a considerarse nueva."""
+    index = IdempotencyIndex(db_path)
+    assert index.check_and_add("sig1", "mint1") is True
+
+    index.discard("sig1", "mint1")
+
+    assert index.seen("sig1", "mint1") is False
+    assert index.check_and_add("sig1", "mint1") is True
@@ -0,0 +1,132 @@
+"""
+Tests unitarios para la descarga de IPFS con coberturas entre gateways, contra gateways locales.
+"""
+
+import threading
+import time
+import pytest
+from flask import Flask, jsonify
+from werkzeug.serving import make_server
+from src.utils.ipfs_fetcher import MAX_ORIGIN_GATEWAYS, HedgedIPFSFetcher, split_ipfs_uri
+
+CID = "QmTestCid123"
+DOCUMENT = {"name": "Test Token", "symbol": "TEST"}
+
+def create_gateways():
+    """Crea gateways locales: uno rápido, uno lento, uno sin el contenido y uno con JSON inválido."""
+    app = Flask(__name__)
+    app.hits = []
+
+    @app.route('/<kind>/ipfs/<path:path>')
+    def gateway(kind, path):
+        app.hits.append(kind)
+        if kind == 'slow':
+            time.sleep(1.0)
+        if kind == 'missing':
+            return jsonify({"error": "not found"}), 404
+        if kind == 'broken':
+            return "<html>", 200
+        return jsonify(dict(DOCUMENT, path=path))
+
+    @app.route('/plain/metadata.json')
+    def plain():
+        return jsonify(DOCUMENT)
+
+    return app
+
+@pytest.fixture
+def gateways():
+    """Fixture que sirve los gateways locales en un puerto libre."""
+    app = create_gateways()
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    app.base = f"http://127.0.0.1:{server.server_port}"
+    yield app
+    server.shutdown()
+
+def fetcher_for(gateways, kinds, **kwargs):
+    """Crea un descargador con los gateways locales indicados, en ese orden."""
+    options = dict(hedge_delay=0.1, min_hedge_delay=0.05, max_hedge_delay=0.5, max_hedges=1, workers=4)
+    options.update(kwargs)
+    return HedgedIPFSFetcher(gateways=[f"{gateways.base}/{kind}/ipfs/" for kind in kinds], **options)
+
+def test_split_ipfs_uri():
+    """Test para verificar que se separan gateway y ruta de las distintas formas de URI."""
+    assert split_ipfs_uri(f"ipfs://{CID}") == (None, CID)
+    assert split_ipfs_uri(f"https://ipfs.io/ipfs/{CID}/meta.json") == ("https://ipfs.io/ipfs/", f"{CID}/meta.json")
+    assert split_ipfs_uri("https://arweave.net/abc") == (None, None)
+
+def test_hedges_slow_gateway(gateways):
+    """Test para verificar que un gateway lento se cubre con el siguiente y gana el más rápido."""
+    fetcher = fetcher_for(gateways, ['slow', 'fast'])
+    started = time.monotonic()
+    data = fetcher.fetch_json(f"ipfs://{CID}", timeout=5)
+
+    assert data["name"] == "Test Token"
+    assert time.monotonic() - started < 0.8
+    metrics = fetcher.metrics()
+    assert metrics['hedges'] == 1
+    stats = {entry['gateway'].split('/')[3]: entry for entry in metrics['gateways']}
+    assert stats['fast']['wins'] == 1
+    fetcher.close()
+
+def test_fails_over_immediately_on_error(gateways):
+    """Test para verificar que un 404 o un JSON inválido pasan al siguiente gateway sin esperar."""
+    fetcher = fetcher_for(gateways, ['missing', 'broken', 'fast'], hedge_delay=5, max_hedge_delay=5)
+    started = time.monotonic()
+    data = fetcher.fetch_json(f"ipfs://{CID}", timeout=5)
+
+    assert data["path"] == CID
+    assert time.monotonic() - started < 1
+    assert gateways.hits == ['missing', 'broken', 'fast']
+    fetcher.close()
+
+def test_ranking_follows_latency_and_errors(gateways):
+    """Test para verificar que los gateways con errores bajan en la clasificación."""
+    fetcher = fetcher_for(gateways, ['missing', 'fast'])
+    for _ in range(3):
+        assert fetcher.fetch_json(f"ipfs://{CID}", timeout=5) is not None
+
+    ranking = [gateway.split('/')[3] for gateway in fetcher.rank()]
+    assert ranking == ['fast', 'missing']
+    gateways.hits.clear()
+    fetcher.fetch_json(f"ipfs://{CID}", timeout=5)
+    assert gateways.hits == ['fast']
+    fetcher.close()
+
+def test_original_gateway_joins_ranking(gateways):
+    """Test para verificar que el gateway de la URI original entra en la clasificación."""
+    fetcher = fetcher_for(gateways, ['missing'])
+    data = fetcher.fetch_json(f"{gateways.base}/fast/ipfs/{CID}", timeout=5)
+
+    assert data["path"] == CID
+    assert f"{gateways.base}/fast/ipfs/" in fetcher.rank()
+    fetcher.close()
+
+def test_non_ipfs_uri_is_fetched_directly(gateways):
+    """Test para verificar que una URI que no es de IPFS se pide tal cual."""
+    fetcher = fetcher_for(gateways, ['fast'])
+    assert fetcher.fetch_json(f"{gateways.base}/plain/metadata.json", timeout=5) == DOCUMENT
+    assert gateways.hits == []
+    fetcher.close()
+
+def test_returns_none_when_every_gateway_fails(gateways):
+    """Test para verificar que se retorna None si ningún gateway sirve el contenido."""
+    fetcher = fetcher_for(gateways, ['missing', 'broken'])
+    assert fetcher.fetch_json(f"ipfs://{CID}", timeout=5) is None
+    assert fetcher.metrics()['failures'] == 1
+    fetcher.close()
+
+def test_original_gateways_are_bounded(gateways):
+    """Test para verificar que solo se recuerdan los últimos gateways originales no configurados."""
+    fetcher = fetcher_for(gateways, ['fast'])
+    for number in range(MAX_ORIGIN_GATEWAYS + 5):
+        fetcher.rank(f"https://gateway{number}.example/ipfs/")
+
+    ranking = fetcher.rank()
+    assert len(ranking) == MAX_ORIGIN_GATEWAYS + 1
+    assert f"{gateways.base}/fast/ipfs/" in ranking
+    assert "https://gateway0.example/ipfs/" not in ranking
+    assert f"https://gateway{MAX_ORIGIN_GATEWAYS + 4}.example/ipfs/" in ranking
+    fetcher.close()
@@ -0,0 +1,124 @@
+"""
+Tests unitarios para el journal de ingestión.
+"""
+
+import threading
+import time
+import pytest
+from src.utils import journal as journal_module
+from src.utils.journal import Journal, read_journal
+
+@pytest.fixture
+def journal(tmp_path):
+    """Fixture que proporciona un journal con segmentos pequeños en un directorio temporal."""
+    journal = Journal(str(tmp_path / "journal"), segment_max_bytes=200, max_segments=0, fsync_interval=0.005)
+    yield journal
+    journal.close()
+
+def test_append_and_read_from_offset(journal):
+    """Test para verificar que los registros se leen en orden a partir de un offset."""
+    offsets = [journal.append({"n": i}, sync=True) for i in range(5)]
+
+    records = list(journal.read())
+    assert [offset for offset, _ in records] == offsets
+    assert [record["n"] for _, record in records] == list(range(5))
+
+    assert [record["n"] for _, record in journal.read(offsets[3])] == [3, 4]
+
+def test_rotation_creates_segments_named_by_offset(journal):
+    """Test para verificar la rotación de segmentos al superar el tamaño máximo."""
+    offsets = [journal.append({"payload": "x" * 50, "n": i}, sync=True) for i in range(10)]
+
+    segments = journal.segments()
+    assert len(segments) > 1
+    assert segments[0] == 0
+    assert set(segments[1:]) <= set(offsets)
+    assert [record["n"] for _, record in journal.read(offsets[7])] == [7, 8, 9]
+
+def test_retention_removes_oldest_segments(tmp_path):
+    """Test para verificar que solo se conservan los últimos segmentos."""
+    journal = Journal(str(tmp_path / "journal"), segment_max_bytes=100, max_segments=2, fsync_interval=0.005)
+    for i in range(20):
+        journal.append({"payload": "x" * 40, "n": i})
+    journal.close()
+
+    assert len(journal.segments()) == 2
+    records = list(read_journal(str(tmp_path / "journal")))
+    assert records[-1][1]["n"] == 19
+
+def test_group_commit_from_concurrent_writers(journal):
+    """Test para verificar que las escrituras concurrentes se confirman con menos fsync que escrituras."""
+    def writer(start):
+        for i in range(start, start + 20):
+            journal.append({"n": i}, sync=True)
+
+    threads = [threading.Thread(target=writer, args=(i * 20,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    metrics = journal.metrics()
+    assert metrics['appended'] == 80
+    assert metrics['durable_offset'] == metrics['end_offset']
+    assert sorted(record["n"] for _, record in journal.read()) == list(range(80))
+
+def test_writes_do_not_wait_for_a_slow_fsync(journal, monkeypatch):
+    """Test para verificar que un fsync lento no bloquea las escrituras sin confirmación."""
+    started = threading.Event()
+    real_fsync = journal_module.os.fsync
+
+    def slow_fsync(fd):
+        started.set()
+        time.sleep(0.3)
+        real_fsync(fd)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(journal_module.os, "fsync", slow_fsync)
+        journal.append({"n": 0})
+        assert started.wait(1)
+
+        begin = time.monotonic()
+        journal.append({"n": 1})
+        assert time.monotonic() - begin < 0.1
+
+def test_sync_error_reaches_waiting_writer(journal, monkeypatch):
+    """Test para verificar que si el fsync falla quien espera su registro recibe el error en lugar de colgarse."""
+    def failing_fsync(fd):
+        raise OSError("disco lleno")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(journal_module.os, "fsync", failing_fsync)
+        with pytest.raises(OSError, match="disco lleno"):
+            journal.append({"n": 0}, sync=True)
+    assert journal.metrics()['sync_failures'] >= 1
+
+def test_reopen_discards_incomplete_tail(tmp_path):
+    """Test para verificar la recuperación tras una escritura interrumpida."""
+    directory = tmp_path / "journal"
+    journal = Journal(str(directory), fsync_interval=0.005)
+    journal.append({"n": 1}, sync=True)
+    journal.close()
+
+    segment = next(directory.glob("*.jsonl"))
+    with open(segment, "ab") as f:
+        f.write(b'{"n": 2')
+
+    reopened = Journal(str(directory), fsync_interval=0.005)
+    offset = reopened.append({"n": 3}, sync=True)
+    reopened.close()
+
+    assert [record["n"] for _, record in read_journal(str(directory))] == [1, 3]
+    assert offset == segment.stat().st_size - len(b'{"n":3}\n')
+
+def test_append_raw_stores_bytes_without_reserializing(journal):
+    """Test para verificar que un registro ya serializado se guarda en una sola línea y se lee igual."""
+    body = b'[\n  {"signature": "s1",\r\n   "description": "a\\nb"}\n]\n'
+
+    offset = journal.append_raw(b'{"payload":' + body + b'}', sync=True)
+    following = journal.append({"n": 1}, sync=True)
+
+    assert list(journal.read(offset)) == [
+        (offset, {"payload": [{"signature": "s1", "description": "a\nb"}]}),
+        (following, {"n": 1})
+    ]
@@ -0,0 +1,121 @@
+"""
+Tests unitarios para la fuente en streaming por websocket, contra un RPC local.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import pytest
+
+websockets = pytest.importorskip("websockets")
+
+from src.utils.log_stream import LogStreamSource, is_creation
+from src.utils.prefilter import PreFilter
+
+WALLETS = ["5qWya6UjwWnGVhdSBL3hyZ7B45jbk6Byt1hwd7ohEGXE", "5JzRjmLSy5YR4ReFRpCK9k3WuToUpc7vkBhWPyy89kQ4"]
+CREATION_LOGS = ["Program TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA invoke [2]",
+                 "Program log: Instruction: InitializeMint2"]
+SWAP_LOGS = ["Program log: Instruction: CreateIdempotent", "Program log: Instruction: Swap"]
+
+def notification(signature, logs, err=None):
+    """Mensaje logsNotification como lo envía el RPC."""
+    return json.dumps({"jsonrpc": "2.0", "method": "logsNotification", "params": {
+        "subscription": 1, "result": {"context": {"slot": 1}, "value": {"signature": signature, "err": err, "logs": logs}}
+    }})
+
+class StandInRpc:
+    """Websocket RPC local: confirma las suscripciones y envía los mensajes de cada conexión."""
+
+    def __init__(self, scripts):
+        self.scripts = list(scripts)
+        self.subscriptions = []
+        self.connections = 0
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self.thread.start()
+        ready.wait(5)
+
+    def _run(self, ready):
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(self._serve())
+        self.url = f"ws://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+        ready.set()
+        self.loop.run_forever()
+
+    async def _serve(self):
+        return await websockets.serve(self._handler, "127.0.0.1", 0)
+
+    async def _handler(self, websocket, *args):
+        script = self.scripts[self.connections] if self.connections < len(self.scripts) else []
+        self.connections += 1
+        for _ in WALLETS:
+            request = json.loads(await websocket.recv())
+            self.subscriptions.append(request["params"][0]["mentions"][0])
+            await websocket.send(json.dumps({"jsonrpc": "2.0", "result": request["id"], "id": request["id"]}))
+        for message in script:
+            await websocket.send(message)
+        if script:
+            # Cerrar tras el guion para forzar la reconexión
+            return
+        await asyncio.Future()
+
+    async def _close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._close(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+def wait_for(condition, timeout=5.0):
+    """Espera activa a que se cumpla una condición."""
+    expires = time.monotonic() + timeout
+    while time.monotonic() < expires:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_is_creation_matches_whole_instruction_names():
+    """Test para verificar que solo las instrucciones de creación cuentan como mint nuevo."""
+    assert is_creation(CREATION_LOGS)
+    assert not is_creation(SWAP_LOGS)
+    assert not is_creation(None)
+
+def test_detects_creations_reconnects_and_dedupes():
+    """Test para verificar la detección, la reconexión y el descarte de firmas ya vistas."""
+    rpc = StandInRpc([
+        [notification("sig1", CREATION_LOGS), notification("sig1", CREATION_LOGS),
+         notification("swap", SWAP_LOGS), notification("failed", CREATION_LOGS, err={"custom": 1})],
+        [notification("webhook-sig", CREATION_LOGS), notification("sig2", CREATION_LOGS)],
+    ])
+    prefilter = PreFilter(WALLETS, ["TOKEN_MINT"], compact=False)
+    # Una firma que ya llegó por webhook
+    prefilter.filter_transactions([{"feePayer": WALLETS[0], "type": "TOKEN_MINT", "signature": "webhook-sig"}])
+    fetched, ingested = [], []
+
+    def fetch(signatures):
+        fetched.extend(signatures)
+        return {s: {"signature": s, "feePayer": WALLETS[0], "type": "TOKEN_MINT", "tokenTransfers": []} for s in signatures}
+
+    def ingest(transactions, deadline):
+        ingested.extend(tx["signature"] for tx in prefilter.filter_parsed(transactions))
+
+    source = LogStreamSource(ingest, seen=prefilter.seen, url=rpc.url, accounts=WALLETS, fetch=fetch,
+                             reconnect_delay=0.05, max_reconnect_delay=0.1)
+    source.start()
+    try:
+        assert wait_for(lambda: ingested == ["sig1", "sig2"])
+    finally:
+        source.stop(timeout=2)
+        rpc.close()
+
+    assert sorted(fetched) == ["sig1", "sig2"]
+    assert rpc.connections >= 2
+    assert rpc.subscriptions[:2] == WALLETS
+    metrics = source.metrics()
+    assert metrics['connections'] >= 2
+    assert metrics['duplicates'] == 2
+    assert metrics['ingested'] == 2
@@ -0,0 +1,83 @@
+"""
+Tests unitarios para la decodificación local de instrucciones de creación de metadatos.
+"""
+
+import json
+import struct
+from pathlib import Path
+import pytest
+from src.utils.metaplex import (
+    BASE58_ALPHABET,
+    METADATA_PROGRAM_ID,
+    b58decode,
+    decode_create_metadata,
+    decode_transaction_metadata
+)
+
+NOTIFICATION_PATH = Path(__file__).resolve().parents[2] / "notifications" / "notificacion_real.json"
+
+def b58encode(data: bytes) -> str:
+    """Codifica bytes en base58 para construir instrucciones de prueba."""
+    number = int.from_bytes(data, "big")
+    encoded = ""
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = BASE58_ALPHABET[remainder] + encoded
+    return "1" * (len(data) - len(data.lstrip(b"\x00"))) + encoded
+
+def borsh_string(value: str, padded_length: int = 0) -> bytes:
+    """Serializa una cadena Borsh, opcionalmente rellena con nulos."""
+    raw = value.encode("utf-8").ljust(padded_length, b"\x00")
+    return struct.pack("<I", len(raw)) + raw
+
+@pytest.fixture
+def real_transaction():
+    """Fixture que proporciona la transacción real de creación de token."""
+    with open(NOTIFICATION_PATH) as f:
+        return json.load(f)[0]
+
+def test_b58decode_roundtrip():
+    """Test para verificar la decodificación base58, incluidos los ceros iniciales."""
+    data = b"\x00\x00\x01\x02hola"
+    assert b58decode(b58encode(data)) == data
+    with pytest.raises(ValueError):
+        b58decode("0OIl")
+
+def test_decode_real_transaction(real_transaction):
+    """Test para verificar que se extraen name, symbol y uri de la notificación real."""
+    metadata = decode_transaction_metadata(real_transaction)
+
+    assert metadata == {
+        "GV74pg6zi1Hy19woBW9msKUqxxvw63A7SQ15tGj5wWJ4": {
+            "name": "zdravei kaksi",
+            "symbol": "ZDRAVEI",
+            "uri": "https://ipfs.io/ipfs/bafkreic5oepawttkeiujz7lka35pr53onabtljpemminbqtti7gtfyofcq"
+        }
+    }
+
+def test_decode_launchpad_when_metaplex_missing(real_transaction):
+    """Test para verificar que la instrucción del launchpad sirve si no hay instrucción de Metaplex."""
+    for instruction in real_transaction["instructions"]:
+        instruction["innerInstructions"] = []
+
+    metadata = decode_transaction_metadata(real_transaction)
+
+    assert metadata["GV74pg6zi1Hy19woBW9msKUqxxvw63A7SQ15tGj5wWJ4"]["symbol"] == "ZDRAVEI"
+
+def test_decode_padded_v1_instruction():
+    """Test para verificar el formato antiguo con cadenas rellenas de nulos."""
+    data = bytes([0]) + borsh_string("Token", 32) + borsh_string("TKN", 10) + borsh_string("ipfs://abc", 200)
+
+    assert decode_create_metadata(data) == {"name": "Token", "symbol": "TKN", "uri": "ipfs://abc"}
+
+def test_invalid_instructions_are_ignored():
+    """Test para verificar que las instrucciones ajenas o truncadas no producen metadatos."""
+    valid = bytes([33]) + borsh_string("Token") + borsh_string("TKN") + borsh_string("ipfs://abc")
+
+    assert decode_create_metadata(valid[:-3]) is None
+    assert decode_create_metadata(bytes([1]) + valid[1:]) is None
+    transaction = {"instructions": [
+        {"programId": METADATA_PROGRAM_ID, "accounts": ["meta"], "data": b58encode(valid)},
+        {"programId": METADATA_PROGRAM_ID, "accounts": ["meta", "mint"], "data": "no-base58!"}
+    ]}
+    assert decode_transaction_metadata(transaction) == {}
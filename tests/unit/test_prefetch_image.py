@@ -0,0 +1,24 @@
+"""
+Tests unitarios para la comprobación previa de la imagen del token en token_monitor_with_notable_check.
+"""
+
+from unittest.mock import MagicMock
+import token_monitor_with_notable_check as token_monitor
+from src.utils.ipfs_fetcher import HedgedIPFSFetcher
+
+GATEWAY = "https://gateway.example/ipfs/"
+
+def test_ipfs_image_uses_ranked_gateway_without_reading_body(monkeypatch):
+    """Test para verificar que la imagen de IPFS se pide al gateway clasificado y solo se leen las cabeceras."""
+    response = MagicMock()
+    get = MagicMock(return_value=response)
+    monkeypatch.setattr(token_monitor, "ipfs_fetcher", HedgedIPFSFetcher(gateways=[GATEWAY]))
+    monkeypatch.setattr(token_monitor.http_client, "get", get)
+
+    image = token_monitor.prefetch_image({"image": "ipfs://QmImage"}, None)
+
+    assert image == GATEWAY + "QmImage"
+    assert get.call_args.args == (GATEWAY + "QmImage",)
+    assert get.call_args.kwargs["stream"] is True
+    response.raise_for_status.assert_called_once()
+    response.close.assert_called_once()
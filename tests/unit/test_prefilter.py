@@ -0,0 +1,91 @@
+"""
+Tests unitarios para el filtro previo de transacciones.
+"""
+
+import json
+from pathlib import Path
+import pytest
+from src.utils.metaplex import decode_transaction_metadata
+from src.utils.prefilter import PreFilter, compact_transaction
+
+NOTIFICATION_PATH = Path(__file__).resolve().parents[2] / "notifications" / "notificacion_real.json"
+
+BELIEVE_WALLET = "5qWya6UjwWnGVhdSBL3hyZ7B45jbk6Byt1hwd7ohEGXE"
+
+@pytest.fixture
+def prefilter():
+    """Fixture que proporciona un filtro con una única wallet conocida."""
+    return PreFilter([BELIEVE_WALLET], ["TOKEN_MINT"], seen_capacity=2)
+
+def make_body(*transactions):
+    """Serializa transacciones como lo haría Helius."""
+    return json.dumps(list(transactions)).encode("utf-8")
+
+def test_raw_body_without_known_wallet_is_rejected_unparsed(prefilter):
+    """Test para verificar que se descarta sin parsear un cuerpo sin wallets conocidas."""
+    body = b'[{"feePayer": "Other", "type": "TOKEN_MINT", "signature": "s1"'  # JSON inválido
+
+    assert prefilter.filter_body(body) == []
+    assert prefilter.metrics()['no_known_wallet'] == 1
+    assert prefilter.metrics()['invalid_json'] == 0
+
+def test_filter_by_fee_payer_type_and_signature(prefilter):
+    """Test para verificar cada motivo de rechazo por transacción."""
+    body = make_body(
+        {"feePayer": BELIEVE_WALLET, "type": "TOKEN_MINT", "signature": "s1"},
+        {"feePayer": "Other", "type": "TOKEN_MINT", "signature": "s2"},
+        {"feePayer": BELIEVE_WALLET, "type": "TRANSFER", "signature": "s3"},
+        {"feePayer": BELIEVE_WALLET, "type": "TOKEN_MINT", "signature": "s1"}
+    )
+
+    accepted = prefilter.filter_body(body)
+
+    assert [tx["signature"] for tx in accepted] == ["s1"]
+    metrics = prefilter.metrics()
+    assert metrics['accepted'] == 1
+    assert metrics['unknown_fee_payer'] == 1
+    assert metrics['not_mint'] == 1
+    assert metrics['duplicate_signature'] == 1
+
+def test_forget_allows_retry(prefilter):
+    """Test para verificar que una firma olvidada vuelve a aceptarse."""
+    body = make_body({"feePayer": BELIEVE_WALLET, "type": "TOKEN_MINT", "signature": "s1"})
+
+    assert len(prefilter.filter_body(body)) == 1
+    assert prefilter.filter_body(body) == []
+    prefilter.forget("s1")
+    assert len(prefilter.filter_body(body)) == 1
+
+def test_seen_signatures_are_bounded(prefilter):
+    """Test para verificar que solo se recuerdan las firmas más recientes."""
+    for signature in ["s1", "s2", "s3"]:
+        prefilter.filter_body(make_body({"feePayer": BELIEVE_WALLET, "type": "TOKEN_MINT", "signature": signature}))
+
+    body = make_body({"feePayer": BELIEVE_WALLET, "type": "TOKEN_MINT", "signature": "s1"})
+    assert len(prefilter.filter_body(body)) == 1
+
+def test_compact_transaction_keeps_what_the_pipeline_uses():
+    """Test para verificar que el registro compacto conserva mints y metadatos y es más pequeño."""
+    with open(NOTIFICATION_PATH) as f:
+        transaction = json.load(f)[0]
+
+    record = compact_transaction(transaction)
+
+    assert record["signature"] == transaction["signature"]
+    assert record["feePayer"] == transaction["feePayer"]
+    assert [t["mint"] for t in record["tokenTransfers"]] == [t["mint"] for t in transaction["tokenTransfers"]]
+    assert decode_transaction_metadata(record) == decode_transaction_metadata(transaction)
+    assert "accountData" not in record
+    assert len(json.dumps(record)) < len(json.dumps(transaction)) / 2
+
+def test_filter_body_returns_compact_records_when_enabled():
+    """Test para verificar que filter_body proyecta las transacciones aceptadas solo si se pide."""
+    transaction = {"feePayer": BELIEVE_WALLET, "type": "TOKEN_MINT", "signature": "s1",
+                   "accountData": [{"account": "a"}], "tokenTransfers": [{"mint": "m1", "fromUserAccount": "x"}]}
+
+    compact = PreFilter([BELIEVE_WALLET], ["TOKEN_MINT"], compact=True).filter_body(make_body(transaction))
+    full = PreFilter([BELIEVE_WALLET], ["TOKEN_MINT"], compact=False).filter_body(make_body(transaction))
+
+    assert compact == [{"feePayer": BELIEVE_WALLET, "type": "TOKEN_MINT", "signature": "s1",
+                        "tokenTransfers": [{"mint": "m1"}], "instructions": []}]
+    assert full == [transaction]
@@ -0,0 +1,116 @@
+"""
+Tests unitarios para la cola con prioridad por launchpad PriorityWorkQueue.
+"""
+
+import threading
+import time
+import pytest
+from src.utils.config import config
+from src.utils.priority_queue import PriorityWorkQueue
+from src.utils.sharding import create_ingestion_queue
+
+WEIGHTS = {"high": 3, "mid": 2, "other": 1}
+
+def classify(item):
+    """La clase es el prefijo del elemento ('high-1' -> 'high')."""
+    return item.split("-")[0]
+
+@pytest.fixture
+def gate():
+    """Fixture con un evento que retiene al worker hasta que el test lo libera."""
+    return threading.Event()
+
+def test_weighted_order(gate):
+    """Test para verificar que las clases se alternan según su peso."""
+    processed = []
+    started = threading.Event()
+    done = threading.Event()
+
+    def handler(item):
+        started.set()
+        gate.wait(timeout=5)
+        processed.append(item)
+        if len(processed) == 9:
+            done.set()
+
+    queue = PriorityWorkQueue(handler, classify, weights=WEIGHTS, shares={"other": 1.0}, watermark=1.0,
+                              workers=1, max_size=100, name="test")
+    queue.submit("other-0")
+    assert started.wait(timeout=5)
+    for i in range(4):
+        queue.submit(f"other-{i + 1}")
+        queue.submit(f"high-{i}")
+    gate.set()
+    assert done.wait(timeout=5)
+    queue.stop(timeout=5)
+
+    # El primero ya estaba en curso; después, de cada 4 elementos 3 son de la clase de peso 3
+    assert processed[0] == "other-0"
+    assert [classify(item) for item in processed[1:5]].count("high") == 3
+
+def test_concurrency_share_caps_busy_workers(gate):
+    """Test para verificar que una clase no ocupa más workers que su cuota."""
+    busy = []
+    lock = threading.Lock()
+    running = {"other": 0, "high": 0}
+
+    def handler(item):
+        name = classify(item)
+        with lock:
+            running[name] += 1
+            busy.append(dict(running))
+        gate.wait(timeout=5)
+        with lock:
+            running[name] -= 1
+
+    queue = PriorityWorkQueue(handler, classify, weights=WEIGHTS, shares={"high": 1.0, "other": 0.5},
+                              watermark=1.0, workers=4, max_size=100, name="test")
+    for i in range(6):
+        queue.submit(f"other-{i}")
+    time.sleep(0.2)
+    queue.submit("high-0")
+    time.sleep(0.2)
+
+    metrics = queue.metrics()
+    gate.set()
+    queue.stop(timeout=5)
+
+    assert max(state["other"] for state in busy) == 2
+    # La clase prioritaria no espera detrás de la avalancha: hay workers libres para ella
+    assert metrics['classes']['high']['processed'] + metrics['classes']['high']['busy_workers'] == 1
+    assert metrics['classes']['other']['max_workers'] == 2
+
+def test_load_shedding_by_priority(gate):
+    """Test para verificar que se descarta primero lo menos prioritario y la clase alta desaloja."""
+    shed = []
+    queue = PriorityWorkQueue(lambda item: gate.wait(timeout=5), classify, weights=WEIGHTS,
+                              watermark=0.5, workers=1, max_size=10, name="test", on_shed=shed.append)
+    queue.submit("other-busy")
+    time.sleep(0.1)
+
+    accepted = {name: sum(queue.submit(f"{name}-{i}") for i in range(10)) for name in ("other", "mid")}
+    assert accepted == {"other": 5, "mid": 2}
+
+    # Con la cola llena, la clase de mayor prioridad entra desalojando lo menos prioritario
+    assert sum(queue.submit(f"high-{i}") for i in range(6)) == 6
+    assert shed == ["other-4", "other-3", "other-2"]
+
+    metrics = queue.metrics()
+    gate.set()
+    queue.stop(timeout=5)
+
+    assert metrics['depth'] == 10
+    assert metrics['classes']['other']['shed'] == 8
+    assert metrics['classes']['mid']['shed'] == 8
+    assert metrics['classes']['high']['shed'] == 0
+
+def test_ingestion_queue_reports_shed_items(monkeypatch):
+    """Test para verificar que la cola de ingestión por prioridad entrega los desalojos al llamador."""
+    monkeypatch.setattr(config, "INGESTION_PROCESSES", 1)
+    monkeypatch.setattr(config, "PRIORITY_SCHEDULING", True)
+    shed = []
+    queue = create_ingestion_queue(lambda item: None, lambda item: item, name="test",
+                                   classify=classify, on_shed=shed.append)
+
+    assert isinstance(queue, PriorityWorkQueue)
+    assert queue.on_shed == shed.append
@@ -58,7 +58,7 @@ def test_load_cookies_invalid_json():
 def test_get_notables_success(mock_cookies, mock_protokols_response):
     """Test para verificar la obtención exitosa de notables."""
     with patch('builtins.open', mock_open(read_data=json.dumps(mock_cookies))), \
-         patch('requests.post') as mock_post:
+         patch('src.utils.http_client.post') as mock_post:
         
         # Configurar mock de la respuesta
         mock_post.return_value.json.return_value = mock_protokols_response
@@ -88,7 +88,7 @@ def test_get_notables_success(mock_cookies, mock_protokols_response):
 def test_get_notables_no_data(mock_cookies):
     """Test para verificar el manejo de respuesta sin datos."""
     with patch('builtins.open', mock_open(read_data=json.dumps(mock_cookies))), \
-         patch('requests.post') as mock_post:
+         patch('src.utils.http_client.post') as mock_post:
         
         # Configurar mock de la respuesta sin datos
         mock_post.return_value.json.return_value = {"data": {}}
@@ -101,7 +101,7 @@ def test_get_notables_no_data(mock_cookies):
 def test_get_notables_http_error(mock_cookies):
     """Test para verificar el manejo de errores HTTP."""
     with patch('builtins.open', mock_open(read_data=json.dumps(mock_cookies))), \
-         patch('requests.post') as mock_post:
+         patch('src.utils.http_client.post') as mock_post:
         
         mock_post.side_effect = Exception("API Error")
         
@@ -0,0 +1,39 @@
+"""
+Tests unitarios para la agrupación de consultas de notables de protokols_smart_followers_fast.
+"""
+
+import threading
+import time
+import protokols_smart_followers_fast as smart_followers
+from src.utils.rate_scheduler import BACKGROUND, LIVE
+from src.utils.single_flight import SingleFlight
+
+def test_flights_are_shared_only_within_a_priority(monkeypatch):
+    """Test para verificar que una alerta en vivo no se une a una consulta en segundo plano en curso."""
+    calls = []
+
+    def fake_fetch(username, cookies, top_n, timeout, priority):
+        calls.append(priority)
+        time.sleep(0.2)
+        return {"total": 8, "top": [], "priority": priority}
+
+    monkeypatch.setattr(smart_followers, "notables_flights", SingleFlight("test"))
+    monkeypatch.setattr(smart_followers, "fetch_smart_followers", fake_fetch)
+    results = {}
+
+    def lookup(name, priority):
+        results[name] = smart_followers.get_smart_followers_ultrafast("Creator", {}, priority=priority)
+
+    threads = [threading.Thread(target=lookup, args=(name, priority))
+               for name, priority in (("background", BACKGROUND), ("live", LIVE), ("live_again", LIVE))]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join(2)
+
+    assert sorted(calls) == sorted([BACKGROUND, LIVE])
+    assert results["live"]["priority"] == LIVE
+    assert results["live_again"]["priority"] == LIVE
+    assert results["background"]["priority"] == BACKGROUND
+    assert smart_followers.notables_flights.metrics()['coalesced'] == 1
@@ -0,0 +1,96 @@
+"""
+Tests unitarios para el planificador de tasa con prioridades de Protokols.
+"""
+
+import threading
+import time
+import pytest
+import requests
+from src.utils.rate_scheduler import RateLimitTimeout, RateScheduler, parse_retry_after
+
+def make_response(status_code, retry_after=None):
+    """Crea una respuesta con el código y la cabecera Retry-After indicados."""
+    response = requests.Response()
+    response.status_code = status_code
+    if retry_after is not None:
+        response.headers['Retry-After'] = retry_after
+    return response
+
+def make_scheduler(tmp_path, **kwargs):
+    """Crea un planificador sobre una base temporal."""
+    options = dict(rate=20, burst=2, reserves={}, path=str(tmp_path / "ratelimit.db"))
+    options.update(kwargs)
+    return RateScheduler("protokols", **options)
+
+def test_parse_retry_after():
+    """Test para verificar que se aceptan segundos y fechas HTTP."""
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:10 GMT", now=1445412480.0) == 10.0
+    assert parse_retry_after("pronto") is None
+    assert parse_retry_after(None) is None
+
+def test_burst_then_paced(tmp_path):
+    """Test para verificar que tras la ráfaga las fichas llegan al ritmo configurado."""
+    scheduler = make_scheduler(tmp_path)
+    assert scheduler.acquire() < 0.01
+    assert scheduler.acquire() < 0.01
+    waited = scheduler.acquire()
+    assert 0.02 < waited < 0.2
+    assert scheduler.metrics()['classes']['live']['acquired'] == 3
+    scheduler.close()
+
+def test_background_leaves_reserve_for_live(tmp_path):
+    """Test para verificar que el segundo plano no consume las fichas reservadas."""
+    scheduler = make_scheduler(tmp_path, rate=1, burst=4, reserves={'background': 2})
+    scheduler.acquire('background')
+    scheduler.acquire('background')
+    with pytest.raises(RateLimitTimeout):
+        scheduler.acquire('background', timeout=0.05)
+    assert scheduler.acquire('live', timeout=0.05) < 0.05
+    metrics = scheduler.metrics()['classes']
+    assert metrics['background']['timeouts'] == 1
+    assert metrics['live']['acquired'] == 1
+    scheduler.close()
+
+def test_higher_priority_goes_first(tmp_path):
+    """Test para verificar que dentro del proceso una alerta en vivo adelanta a una tarea en segundo plano."""
+    scheduler = make_scheduler(tmp_path, rate=5, burst=1)
+    scheduler.acquire()
+    order = []
+
+    def worker(priority):
+        scheduler.acquire(priority)
+        order.append(priority)
+
+    background = threading.Thread(target=worker, args=('background',))
+    background.start()
+    time.sleep(0.05)
+    live = threading.Thread(target=worker, args=('live',))
+    live.start()
+    background.join(2)
+    live.join(2)
+
+    assert order == ['live', 'background']
+    scheduler.close()
+
+def test_retry_after_pauses_every_process(tmp_path):
+    """Test para verificar que un Retry-After bloquea el cubo compartido para todas las clases."""
+    first = make_scheduler(tmp_path, burst=10)
+    second = make_scheduler(tmp_path, burst=10)
+    first.observe(make_response(200))
+    first.observe(make_response(429, retry_after="0.3"))
+
+    with pytest.raises(RateLimitTimeout):
+        second.acquire('live', timeout=0.1)
+    assert second.metrics()['blocked_for'] > 0
+    assert second.acquire('live', timeout=1) >= 0.1
+    assert first.metrics()['throttled'] == 1
+    first.close()
+    second.close()
+
+def test_rejects_unknown_priority(tmp_path):
+    """Test para verificar que una clase desconocida es un error del llamador."""
+    scheduler = make_scheduler(tmp_path)
+    with pytest.raises(ValueError):
+        scheduler.acquire('urgent')
+    scheduler.close()
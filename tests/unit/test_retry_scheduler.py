@@ -0,0 +1,79 @@
+"""
+Tests unitarios para el programador de reintentos con rueda de temporización.
+"""
+
+import threading
+import time
+import pytest
+from src.utils.retry_scheduler import RetryScheduler
+
+@pytest.fixture
+def scheduler():
+    """Fixture que proporciona un programador rápido con una etapa de tres niveles."""
+    scheduler = RetryScheduler({"metadata": [0.05, 0.1, 0.2]}, max_age=5, tick=0.01, wheel_size=8, workers=2)
+    yield scheduler
+    scheduler.stop()
+
+def test_recovers_on_later_tier_and_counts_per_tier(scheduler):
+    """Test para verificar que el reintento avanza de nivel hasta acertar y se cuenta por nivel."""
+    attempts = []
+    recovered = threading.Event()
+    results = []
+
+    def attempt():
+        attempts.append(time.monotonic())
+        return {"name": "Token"} if len(attempts) == 3 else None
+
+    started = time.monotonic()
+    assert scheduler.schedule("metadata", "mint1", attempt, lambda result: (results.append(result), recovered.set()))
+    assert recovered.wait(3)
+
+    assert results == [{"name": "Token"}]
+    # Las esperas de los niveles se acumulan: 0.05 + 0.1 + 0.2
+    assert attempts[-1] - started >= 0.34
+    stage = scheduler.metrics()['stages']['metadata']
+    assert [(tier['hits'], tier['misses']) for tier in stage['tiers']] == [(0, 1), (0, 1), (1, 0)]
+    assert stage['recovered'] == 1
+    assert scheduler.metrics()['pending'] == 0
+
+def test_gives_up_after_last_tier(scheduler):
+    """Test para verificar que se abandona al agotar los niveles."""
+    gave_up = threading.Event()
+
+    assert scheduler.schedule("metadata", "mint1", lambda: None, lambda result: None, gave_up.set)
+    assert gave_up.wait(3)
+
+    assert scheduler.metrics()['stages']['metadata']['gave_up'] == 1
+
+def test_max_age_stops_retrying():
+    """Test para verificar que la edad máxima corta los niveles restantes."""
+    scheduler = RetryScheduler({"metadata": [0.02, 0.02, 5]}, max_age=1, tick=0.01, workers=1)
+    gave_up = threading.Event()
+    calls = []
+
+    scheduler.schedule("metadata", "mint1", lambda: calls.append(1), lambda result: None, gave_up.set)
+    assert gave_up.wait(3)
+    scheduler.stop()
+
+    assert len(calls) == 2
+
+def test_rejects_duplicates_and_unknown_stages(scheduler):
+    """Test para verificar que no se programan duplicados ni etapas sin calendario."""
+    assert scheduler.schedule("metadata", "mint1", lambda: None, lambda result: None)
+    assert not scheduler.schedule("metadata", "mint1", lambda: None, lambda result: None)
+    assert not scheduler.schedule("unknown", "mint1", lambda: None, lambda result: None)
+
+    assert scheduler.stop() == ["mint1"]
+    assert scheduler.metrics()['stages']['metadata']['rejected'] == 1
+
+def test_long_delays_wrap_around_the_wheel():
+    """Test para verificar que una espera mayor que la vuelta de la rueda no se dispara antes."""
+    scheduler = RetryScheduler({"metadata": [0.25]}, tick=0.01, wheel_size=8, workers=1)
+    fired = threading.Event()
+    started = time.monotonic()
+
+    scheduler.schedule("metadata", "mint1", lambda: True, lambda result: fired.set())
+    assert fired.wait(3)
+    scheduler.stop()
+
+    assert time.monotonic() - started >= 0.24
@@ -0,0 +1,116 @@
+"""
+Tests unitarios para el reparto por mint entre procesos worker (ShardedProcessPool).
+"""
+
+import os
+import threading
+from src.utils.sharding import ShardedProcessPool, report_result, shard_for
+
+def record_pid(item):
+    """Handler de nivel de módulo (serializable) que retorna el mint y el proceso que lo atendió."""
+    if item == "boom":
+        raise ValueError("fallo")
+    return item, os.getpid()
+
+def item_key(item):
+    """El propio elemento es el mint."""
+    return item
+
+def test_shard_for_is_stable():
+    """Test para verificar que el shard depende solo de la clave."""
+    assert shard_for("mintA", 4) == shard_for("mintA", 4)
+    assert 0 <= shard_for("mintB", 4) < 4
+    assert shard_for(None, 4) == 0
+
+def test_pool_routes_same_mint_to_same_process():
+    """Test para verificar que cada mint se procesa siempre en el proceso de su shard."""
+    results = []
+    errors = []
+    done = threading.Event()
+    mints = [f"mint{i}" for i in range(8)] * 2
+
+    def on_result(result):
+        results.append(result)
+        if len(results) + len(errors) == len(mints) + 1:
+            done.set()
+
+    def on_error(error):
+        errors.append(error)
+        if len(results) + len(errors) == len(mints) + 1:
+            done.set()
+
+    pool = ShardedProcessPool(record_pid, item_key, processes=2, threads=2, max_size=100,
+                              name="test", on_result=on_result, on_error=on_error)
+    try:
+        for mint in mints + ["boom"]:
+            assert pool.submit(mint) is True
+        assert done.wait(timeout=30)
+        metrics = pool.metrics()
+    finally:
+        pool.stop(timeout=10)
+
+    pids_by_mint = {}
+    for mint, pid in results:
+        pids_by_mint.setdefault(mint, set()).add(pid)
+    assert all(len(pids) == 1 for pids in pids_by_mint.values())
+    assert len({pid for pids in pids_by_mint.values() for pid in pids}) == 2
+    assert errors == ["fallo"]
+    assert metrics['submitted'] == len(mints) + 1
+    assert metrics['processed'] == len(mints)
+    assert metrics['failed'] == 1
+    assert [shard['submitted'] for shard in metrics['shards']] == [
+        sum(1 for mint in mints + ["boom"] if shard_for(mint, 2) == shard) for shard in range(2)
+    ]
+
+def report_late(item):
+    """Handler de nivel de módulo que además reporta un resultado fuera de su retorno (como un reintento)."""
+    report_result(f"{item}-recovered")
+    return item
+
+def test_results_reported_outside_handler_reach_dispatcher():
+    """Test para verificar que un resultado reportado desde un proceso worker llega a on_result."""
+    results = []
+    done = threading.Event()
+
+    def on_result(result):
+        results.append(result)
+        if len(results) == 2:
+            done.set()
+
+    pool = ShardedProcessPool(report_late, item_key, processes=1, threads=1, name="test", on_result=on_result)
+    try:
+        assert pool.submit("mint") is True
+        assert done.wait(timeout=30)
+    finally:
+        pool.stop(timeout=10)
+
+    assert sorted(results) == ["mint", "mint-recovered"]
+    assert report_result("fuera del pool") is False
+
+def test_pool_rejects_after_stop():
+    """Test para verificar que el pool no acepta elementos una vez detenido."""
+    pool = ShardedProcessPool(record_pid, item_key, processes=2, threads=1, name="test")
+    pool.stop()
+
+    assert pool.accepting is False
+    assert pool.submit("mint") is False
+    assert pool.metrics()['rejected'] == 1
+
+def slow_item(item):
+    """Handler de nivel de módulo que tarda en procesar cada elemento."""
+    import time
+    time.sleep(0.5)
+    return item
+
+def test_drain_returns_queued_items():
+    """Test para verificar que el drenado retorna lo que quedó encolado al agotar la gracia."""
+    pool = ShardedProcessPool(slow_item, item_key, processes=1, threads=1, max_size=100, name="test")
+    items = [f"mint{i}" for i in range(20)]
+    for item in items:
+        assert pool.submit(item) is True
+
+    unfinished = pool.drain(timeout=1.5)
+
+    assert pool.accepting is False
+    assert 0 < len(unfinished) < len(items)
+    assert unfinished == items[-len(unfinished):]
@@ -0,0 +1,56 @@
+"""
+Tests unitarios para la caché compartida entre procesos SharedCache.
+"""
+
+import time
+import pytest
+from src.utils.shared_cache import SharedCache
+
+@pytest.fixture
+def cache_path(tmp_path):
+    """Fixture que proporciona la ruta de una base de datos temporal."""
+    return str(tmp_path / "cache.db")
+
+def test_set_and_get(cache_path):
+    """Test para verificar que los valores se guardan y recuperan serializados."""
+    cache = SharedCache("test", path=cache_path)
+    cache.set("mint", {"name": "Token", "tags": ["a", "b"]})
+
+    assert cache.get("mint") == {"name": "Token", "tags": ["a", "b"]}
+    assert cache.get("missing") is None
+    assert "mint" in cache
+    assert len(cache) == 1
+    assert cache.metrics() == {'hits': 2, 'misses': 1, 'writes': 1, 'pruned': 0}
+
+def test_shared_between_instances(cache_path):
+    """Test para verificar que dos conexiones (como dos procesos) comparten los valores."""
+    writer = SharedCache("test", path=cache_path)
+    reader = SharedCache("test", path=cache_path)
+    other = SharedCache("other", path=cache_path)
+
+    writer.set("mint", {"uri": "ipfs://x"})
+
+    assert reader.get("mint") == {"uri": "ipfs://x"}
+    assert other.get("mint") is None
+
+def test_entries_expire(cache_path):
+    """Test para verificar que las entradas caducan tras el TTL."""
+    cache = SharedCache("test", path=cache_path, ttl=0.05)
+    cache.set("mint", 1)
+    time.sleep(0.1)
+
+    assert cache.get("mint") is None
+    assert len(cache) == 0
+    assert cache.prune() == 1
+
+def test_expired_entries_are_pruned_on_write(cache_path):
+    """Test para verificar que las escrituras borran periódicamente las entradas caducadas."""
+    cache = SharedCache("test", path=cache_path, ttl=0.05, prune_every=3)
+    cache.set("old1", 1)
+    cache.set("old2", 2)
+    time.sleep(0.1)
+    cache.set("new", 3)
+
+    rows = cache._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+    assert rows == 1
+    assert cache.metrics()['pruned'] == 2
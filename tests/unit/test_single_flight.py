@@ -0,0 +1,76 @@
+"""
+Tests unitarios para la agrupación de llamadas idénticas concurrentes.
+"""
+
+import threading
+import time
+import pytest
+from src.utils.single_flight import SingleFlight
+
+def run_concurrently(count, target):
+    """Lanza count hilos con target y espera a que terminen."""
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(2)
+
+def test_concurrent_calls_share_one_execution():
+    """Test para verificar que las llamadas concurrentes con la misma clave ejecutan la función una vez."""
+    flights = SingleFlight("test")
+    executions = []
+    results = []
+
+    def lookup(key):
+        executions.append(key)
+        time.sleep(0.2)
+        return {"mint": key}
+
+    run_concurrently(5, lambda: results.append(flights.do("mint1", lookup, "mint1")))
+
+    assert executions == ["mint1"]
+    assert results == [{"mint": "mint1"}] * 5
+    metrics = flights.metrics()
+    assert metrics['executions'] == 1
+    assert metrics['coalesced'] == 4
+    assert metrics['in_flight'] == 0
+
+def test_errors_are_shared():
+    """Test para verificar que la excepción de la llamada en curso llega a todos los que esperan."""
+    flights = SingleFlight("test")
+    errors = []
+
+    def failing():
+        time.sleep(0.2)
+        raise ValueError("upstream caído")
+
+    def caller():
+        try:
+            flights.do("uri", failing)
+        except ValueError as e:
+            errors.append(str(e))
+
+    run_concurrently(3, caller)
+
+    assert errors == ["upstream caído"] * 3
+    assert flights.metrics()['errors'] == 1
+
+def test_sequential_calls_are_not_coalesced():
+    """Test para verificar que una llamada que empieza después de terminar la anterior se ejecuta de nuevo."""
+    flights = SingleFlight("test")
+    assert flights.do("user", lambda: 1) == 1
+    assert flights.do("user", lambda: 2) == 2
+    assert flights.do("other", lambda: 3) == 3
+    assert flights.metrics()['coalesced'] == 0
+
+def test_waiter_gives_up_after_wait_timeout():
+    """Test para verificar que quien espera una llamada ajena respeta su propio timeout."""
+    flights = SingleFlight("test")
+    leader = threading.Thread(target=lambda: flights.do("slow", time.sleep, 0.5))
+    leader.start()
+    time.sleep(0.05)
+
+    with pytest.raises(TimeoutError):
+        flights.do("slow", time.sleep, 0.5, wait_timeout=0.05)
+    leader.join(2)
+    assert flights.metrics()['wait_timeouts'] == 1
@@ -0,0 +1,107 @@
+"""
+Tests unitarios para el ejecutor por grafo de etapas.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.utils.stage_graph import StageGraph
+
+@pytest.fixture
+def executor():
+    """Fixture que proporciona un pool de hilos compartido."""
+    pool = ThreadPoolExecutor(max_workers=8)
+    yield pool
+    pool.shutdown(wait=True)
+
+def slow(value, seconds):
+    """Retorna un valor tras esperar el tiempo indicado."""
+    time.sleep(seconds)
+    return value
+
+def test_independent_stages_run_in_parallel(executor):
+    """Test para verificar que las etapas sin dependencias entre sí se solapan."""
+    graph = (
+        StageGraph("test")
+        .add("info", lambda token: slow(f"info-{token}", 0.05), ("token",))
+        .add("notables", lambda info: slow(7, 0.2), ("info",))
+        .add("image", lambda info: slow("img", 0.2), ("info",))
+        .add("result", lambda info, notables, image: (info, notables, image), ("info", "notables", "image"))
+    )
+
+    started = time.monotonic()
+    run = graph.run({"token": "T"}, executor=executor)
+    elapsed = time.monotonic() - started
+
+    assert run.values["result"] == ("info-T", 7, "img")
+    assert elapsed < 0.4
+    metrics = run.metrics()
+    assert metrics["critical_path"][0] == "info"
+    assert metrics["critical_path"][-1] == "result"
+    assert set(metrics["stage_ms"]) == {"info", "notables", "image", "result"}
+
+def test_race_skips_fallback_when_primary_wins(executor):
+    """Test para verificar que la alternativa con retardo no arranca si la primera responde antes."""
+    fallback_calls = []
+
+    def fallback(token):
+        fallback_calls.append(token)
+        return "helius"
+
+    graph = StageGraph("test").add_race("info", [
+        (lambda token: "local", ("token",), 0.0),
+        (fallback, ("token",), 0.5)
+    ])
+    run = graph.run({"token": "T"}, executor=executor)
+
+    assert run.values["info"] == "local"
+    assert run.winners["info"] == 0
+    assert fallback_calls == []
+
+def test_race_starts_fallback_when_primary_fails(executor):
+    """Test para verificar que la alternativa arranca en cuanto la primera no produce resultado."""
+    graph = StageGraph("test").add_race("info", [
+        (lambda token: None, ("token",), 0.0),
+        (lambda token: "helius", ("token",), 5.0)
+    ])
+
+    started = time.monotonic()
+    run = graph.run({"token": "T"}, executor=executor)
+
+    assert run.values["info"] == "helius"
+    assert run.winners["info"] == 1
+    assert time.monotonic() - started < 1
+
+def test_race_hedges_slow_primary(executor):
+    """Test para verificar que una primera alternativa lenta se cubre tras el retardo."""
+    release = threading.Event()
+    graph = StageGraph("test").add_race("info", [
+        (lambda token: release.wait(2) and "local", ("token",), 0.0),
+        (lambda token: "helius", ("token",), 0.05)
+    ])
+
+    run = graph.run({"token": "T"}, executor=executor)
+    release.set()
+
+    assert run.values["info"] == "helius"
+
+def test_missing_inputs_skip_dependent_stages(executor):
+    """Test para verificar que un fallo deja sin ejecutar las etapas que dependen de él."""
+    calls = []
+
+    def failing(token):
+        raise RuntimeError("fallo")
+
+    graph = (
+        StageGraph("test")
+        .add("info", failing, ("token",))
+        .add("notables", lambda info: calls.append(info), ("info",))
+        .add("result", lambda info, notables: {"info": info}, ("info", "notables"), allow_missing=True)
+    )
+    run = graph.run({"token": "T"}, executor=executor)
+
+    assert calls == []
+    assert run.values["notables"] is None
+    assert run.values["result"] == {"info": None}
+    assert "info" in run.errors
@@ -70,7 +70,7 @@ def test_send_message_success(telegram_service):
     """Test para verificar el envío exitoso de mensajes."""
     message = "Test message"
     
-    with patch('requests.post') as mock_post:
+    with patch('src.utils.http_client.post') as mock_post:
         mock_post.return_value.raise_for_status = MagicMock()
         
         result = telegram_service.send_message(message)
@@ -88,7 +88,7 @@ def test_send_message_with_image(telegram_service):
     message = "Test message"
     image_url = "https://example.com/image.png"
     
-    with patch('requests.post') as mock_post:
+    with patch('src.utils.http_client.post') as mock_post:
         mock_post.return_value.raise_for_status = MagicMock()
         
         result = telegram_service.send_message(message, image_url)
@@ -106,7 +106,7 @@ def test_send_message_error(telegram_service):
     """Test para verificar el manejo de errores al enviar mensajes."""
     message = "Test message"
     
-    with patch('requests.post') as mock_post:
+    with patch('src.utils.http_client.post') as mock_post:
         mock_post.side_effect = Exception("API Error")
         
         result = telegram_service.send_message(message)
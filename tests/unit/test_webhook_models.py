@@ -0,0 +1,57 @@
+"""
+Tests unitarios para los modelos de webhook.
+"""
+
+import pytest
+from src.models.webhook import WebhookData, WRAPPED_SOL_MINT
+
+@pytest.fixture
+def batch_webhook_data():
+    """Fixture que proporciona un webhook de Helius con varias transacciones."""
+    return [
+        {
+            "signature": "sig1",
+            "feePayer": "5qWya6UjwWnGVhdSBL3hyZ7B45jbk6Byt1hwd7ohEGXE",
+            "tokenTransfers": [
+                {"mint": WRAPPED_SOL_MINT},
+                {"mint": "MintA111111111111111111111111111111111111111"}
+            ]
+        },
+        {
+            "signature": "sig2",
+            "feePayer": "5JzRjmLSy5YR4ReFRpCK9k3WuToUpc7vkBhWPyy89kQ4",
+            "tokenTransfers": [
+                {"mint": "MintB111111111111111111111111111111111111111"},
+                {"mint": "MintB111111111111111111111111111111111111111"}
+            ]
+        },
+        {
+            "signature": "sig3",
+            "feePayer": "5qWya6UjwWnGVhdSBL3hyZ7B45jbk6Byt1hwd7ohEGXE",
+            "tokenTransfers": []
+        }
+    ]
+
+def test_from_dict_keeps_signature_and_fee_payer(batch_webhook_data):
+    """Test para verificar que se conservan la firma y el feePayer de cada transacción."""
+    webhook = WebhookData.from_dict(batch_webhook_data)
+
+    assert [tx.signature for tx in webhook.transactions] == ["sig1", "sig2", "sig3"]
+    assert webhook.transactions[1].fee_payer == "5JzRjmLSy5YR4ReFRpCK9k3WuToUpc7vkBhWPyy89kQ4"
+
+def test_get_mints_returns_every_mint_in_batch(batch_webhook_data):
+    """Test para verificar que se obtienen los mints de todas las transacciones."""
+    webhook = WebhookData.from_dict(batch_webhook_data)
+
+    assert webhook.get_mints() == [
+        "MintA111111111111111111111111111111111111111",
+        "MintB111111111111111111111111111111111111111"
+    ]
+    assert webhook.transactions[0].get_mints() == ["MintA111111111111111111111111111111111111111"]
+    assert webhook.transactions[2].get_mints() == []
+
+def test_get_first_mint_unchanged(batch_webhook_data):
+    """Test para verificar que get_first_mint sigue devolviendo la primera transferencia."""
+    webhook = WebhookData.from_dict(batch_webhook_data)
+
+    assert webhook.get_first_mint() == WRAPPED_SOL_MINT
@@ -0,0 +1,93 @@
+"""
+Tests unitarios para el gestor de la suscripción del webhook de Helius, contra una API local.
+"""
+
+import threading
+import pytest
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+from src.services.webhook_subscription import WebhookSubscriptionManager
+
+WEBHOOK_URL = "https://bot.example.com/webhook"
+WALLETS = ["5qWya6UjwWnGVhdSBL3hyZ7B45jbk6Byt1hwd7ohEGXE", "5JzRjmLSy5YR4ReFRpCK9k3WuToUpc7vkBhWPyy89kQ4"]
+
+def create_stub():
+    """Crea una API de webhooks de Helius mínima en memoria."""
+    app = Flask(__name__)
+    app.webhooks = {}
+    app.calls = []
+
+    @app.route('/v0/webhooks', methods=['GET', 'POST'])
+    def webhooks():
+        assert request.args.get('api-key') == 'test-key'
+        app.calls.append(request.method)
+        if request.method == 'GET':
+            return jsonify(list(app.webhooks.values()))
+        webhook_id = f"wh{len(app.webhooks) + 1}"
+        app.webhooks[webhook_id] = dict(request.get_json(), webhookID=webhook_id)
+        return jsonify(app.webhooks[webhook_id])
+
+    @app.route('/v0/webhooks/<webhook_id>', methods=['PUT', 'DELETE'])
+    def webhook(webhook_id):
+        app.calls.append(request.method)
+        if request.method == 'DELETE':
+            app.webhooks.pop(webhook_id)
+            return '', 200
+        app.webhooks[webhook_id] = dict(request.get_json(), webhookID=webhook_id)
+        return jsonify(app.webhooks[webhook_id])
+
+    return app
+
+@pytest.fixture
+def stub():
+    """Fixture que sirve la API local en un puerto libre."""
+    app = create_stub()
+    server = make_server('127.0.0.1', 0, app)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    app.base_url = f"http://127.0.0.1:{server.server_port}/v0"
+    yield app
+    server.shutdown()
+
+def manager(stub, accounts=WALLETS, types=("TOKEN_MINT", "CREATE")):
+    """Crea un gestor apuntando a la API local."""
+    return WebhookSubscriptionManager(WEBHOOK_URL, accounts=list(accounts), transaction_types=list(types),
+                                      auth_header="", base_url=stub.base_url, api_key="test-key")
+
+def test_creates_webhook_then_is_idempotent(stub):
+    """Test para verificar que se crea el webhook filtrado y una segunda sincronización no cambia nada."""
+    plan = manager(stub).sync()
+
+    assert plan.action == 'create'
+    created = stub.webhooks[plan.webhook_id]
+    assert created["accountAddresses"] == sorted(WALLETS)
+    assert created["transactionTypes"] == ["CREATE", "TOKEN_MINT"]
+    assert created["webhookType"] == "enhanced"
+
+    assert not manager(stub).sync().changed
+    assert stub.calls == ['GET', 'POST', 'GET']
+
+def test_updates_diff_and_removes_duplicates(stub):
+    """Test para verificar el diff de cuentas y tipos, y la eliminación de webhooks duplicados."""
+    stub.webhooks["wh1"] = {"webhookID": "wh1", "webhookURL": WEBHOOK_URL, "webhookType": "enhanced",
+                            "accountAddresses": [WALLETS[0], "OldWallet"], "transactionTypes": ["TOKEN_MINT", "TOKEN_TRANSFER"]}
+    stub.webhooks["wh2"] = dict(stub.webhooks["wh1"], webhookID="wh2")
+    stub.webhooks["wh3"] = {"webhookID": "wh3", "webhookURL": "https://other.example.com", "accountAddresses": []}
+
+    plan = manager(stub).sync()
+
+    assert plan.action == 'update'
+    assert plan.added_accounts == [WALLETS[1]]
+    assert plan.removed_accounts == ["OldWallet"]
+    assert plan.added_types == ["CREATE"]
+    assert plan.removed_types == ["TOKEN_TRANSFER"]
+    assert sorted(stub.webhooks) == ["wh1", "wh3"]
+    assert stub.webhooks["wh1"]["accountAddresses"] == sorted(WALLETS)
+
+def test_dry_run_does_not_write(stub):
+    """Test para verificar que sin apply solo se calcula el plan."""
+    plan = manager(stub).sync(apply=False)
+
+    assert plan.action == 'create'
+    assert stub.webhooks == {}
+    assert stub.calls == ['GET']
@@ -0,0 +1,121 @@
+"""
+Tests unitarios para la cola de ingestión WorkQueue.
+"""
+
+import threading
+import pytest
+from src.utils.work_queue import WorkQueue
+
+@pytest.fixture
+def processed():
+    """Fixture que proporciona una lista donde se registran los elementos procesados."""
+    return []
+
+def test_submit_processes_items(processed):
+    """Test para verificar que los workers procesan todos los elementos encolados."""
+    done = threading.Event()
+
+    def handler(item):
+        processed.append(item)
+        if len(processed) == 10:
+            done.set()
+
+    queue = WorkQueue(handler, workers=3, max_size=100, name="test")
+    for i in range(10):
+        assert queue.submit(i) is True
+
+    assert done.wait(timeout=5)
+    queue.stop(timeout=5)
+
+    assert sorted(processed) == list(range(10))
+    metrics = queue.metrics()
+    assert metrics['submitted'] == 10
+    assert metrics['processed'] == 10
+    assert metrics['depth'] == 0
+
+def test_submit_rejects_when_full():
+    """Test para verificar el backpressure cuando la cola está llena."""
+    release = threading.Event()
+    started = threading.Event()
+
+    def handler(item):
+        started.set()
+        release.wait(timeout=5)
+
+    queue = WorkQueue(handler, workers=1, max_size=2, name="test")
+    assert queue.submit("a") is True
+    assert started.wait(timeout=5)
+
+    # El worker está ocupado: caben dos elementos más en la cola
+    assert queue.submit("b") is True
+    assert queue.submit("c") is True
+    assert queue.submit("d") is False
+
+    metrics = queue.metrics()
+    assert metrics['depth'] == 2
+    assert metrics['rejected'] == 1
+    assert metrics['busy_workers'] == 1
+
+    release.set()
+    queue.stop(timeout=5)
+
+def test_handler_errors_are_counted():
+    """Test para verificar que los errores del handler no detienen los workers."""
+    done = threading.Event()
+    calls = []
+
+    def handler(item):
+        calls.append(item)
+        if len(calls) == 2:
+            done.set()
+        if item == "boom":
+            raise RuntimeError("fallo")
+
+    queue = WorkQueue(handler, workers=1, max_size=10, name="test")
+    queue.submit("boom")
+    queue.submit("ok")
+
+    assert done.wait(timeout=5)
+    queue.stop(timeout=5)
+
+    metrics = queue.metrics()
+    assert metrics['failed'] == 1
+    assert metrics['processed'] == 1
+
+def test_stop_rejects_new_items():
+    """Test para verificar que una cola detenida no acepta elementos."""
+    queue = WorkQueue(lambda item: None, workers=1, max_size=10, name="test")
+    queue.start()
+    queue.stop(timeout=5)
+
+    assert queue.accepting is False
+    assert queue.submit("late") is False
+
+def test_drain_finishes_pending_items(processed):
+    """Test para verificar que el drenado espera a que se procese lo encolado."""
+    queue = WorkQueue(processed.append, workers=2, max_size=10, name="test")
+    for i in range(5):
+        queue.submit(i)
+
+    assert queue.drain(timeout=5) == []
+    assert sorted(processed) == list(range(5))
+    assert queue.submit("late") is False
+
+def test_drain_returns_unfinished_items():
+    """Test para verificar que el drenado retorna solo los elementos encolados sin empezar al agotar la gracia."""
+    release = threading.Event()
+    started = threading.Event()
+
+    def handler(item):
+        started.set()
+        release.wait(timeout=5)
+
+    queue = WorkQueue(handler, workers=1, max_size=10, name="test")
+    queue.submit("a")
+    assert started.wait(timeout=5)
+    queue.submit("b")
+    queue.submit("c")
+
+    assert queue.drain(timeout=0.1) == ["b", "c"]
+    assert queue.metrics()['depth'] == 0
+    release.set()
@@ -18,16 +18,30 @@ import base64
 import re
 from pathlib import Path
 from flask import Flask, request, jsonify
-import threading
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import threading
 import urllib.parse
 import os
 from protokols_session_manager import ProtokolsSessionManager
 import traceback
 from dotenv import load_dotenv
 from datetime import datetime
-from archive.extract_token_creator import try_decode_metaplex_data
-from protokols_smart_followers_fast import get_notables
+from protokols_smart_followers_fast import get_notables, get_user_metrics, notables_flights
+from src.utils import http_client
+from src.utils.config import config
+from src.utils.cookie_store import get_cookie_store
+from src.utils.deadline import Deadline, DeadlineMetrics, remaining_timeout
+from src.utils.idempotency import IdempotencyIndex
+from src.utils.ipfs_fetcher import HedgedIPFSFetcher, split_ipfs_uri
+from src.utils.metaplex import b58decode, decode_create_metadata, decode_transaction_metadata
+from src.utils.prefilter import PreFilter
+from src.utils.rate_scheduler import INTERACTIVE, get_rate_scheduler
+from src.utils.retry_scheduler import RetryScheduler
+from src.utils.shared_cache import SharedCache
+from src.utils.sharding import create_ingestion_queue, report_result
+from src.utils.single_flight import SingleFlight
+from src.utils.stage_graph import StageGraph
 
 # Cargar variables de entorno desde .env si existe
 load_dotenv()
@@ -39,7 +53,11 @@ PROTOKOLS_API_URL = "https://api.protokols.io/api/trpc/influencers.getFullTwitte
 REQUIRED_NOTABLE_COUNT = 5  # Número mínimo de notable followers requeridos
 OUTPUT_FILE = "approved_tokens.json"
 LOG_FILE = "token_monitor.log"
-COOKIES_FILE = "protokols_cookies.json"  # Archivo con las cookies para autenticación
+COOKIES_FILE = config.PROTOKOLS_COOKIES_FILE  # Archivo con las cookies para autenticación
+IMAGE_TIMEOUT = 10  # Timeout en segundos para la descarga anticipada de la imagen
+HELIUS_TIMEOUT = 10  # Timeout en segundos para la API de Helius
+IPFS_TIMEOUT = 30  # Timeout en segundos para el contenido de IPFS
+PROTOKOLS_TIMEOUT = 10  # Timeout en segundos para la API de Protokols
 
 # Configurar logging
 logging.basicConfig(
@@ -58,10 +76,18 @@ if sys.platform == 'win32':
         if isinstance(handler, logging.StreamHandler):
             handler.setStream(sys.stdout)
 
-# Caché para reducir consultas a APIs externas
-token_metadata_cache = {}
-ipfs_content_cache = {}
-notable_followers_cache = {}
+# Caché para reducir consultas a APIs externas, compartida entre procesos worker
+token_metadata_cache = SharedCache("token_metadata")
+ipfs_content_cache = SharedCache("ipfs_content")
+notable_followers_cache = SharedCache("notable_followers")
+# Descargas de IPFS con coberturas entre gateways clasificados por latencia y errores
+ipfs_fetcher = HedgedIPFSFetcher(name="monitor_ipfs")
+# Consultas en curso: las concurrentes para el mismo mint o URI comparten una petición
+metadata_flights = SingleFlight("token_metadata")
+ipfs_flights = SingleFlight("ipfs_content")
+
+# Pool compartido donde se ejecutan las etapas de enriquecimiento de todos los tokens
+enrichment_executor = ThreadPoolExecutor(max_workers=config.ENRICHMENT_WORKERS, thread_name_prefix="enrichment")
 
 def get_approved_tokens():
     """
@@ -81,22 +107,18 @@ def get_approved_tokens():
         logger.error(f"Error loading approved tokens: {e}")
         return []
 
-def get_token_metadata(token_address):
+def get_token_metadata(token_address, timeout=HELIUS_TIMEOUT):
     """Obtiene los metadatos de un token usando la API de Helius."""
-    # Verificar si está en caché
-    if token_address in token_metadata_cache:
-        logger.debug(f"Usando metadatos en caché para el token {token_address}")
-        return token_metadata_cache[token_address]
-    
     url = f"https://api.helius.xyz/v0/tokens/metadata?api-key={HELIUS_API_KEY}&mint={token_address}"
     
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        result = response.json()
-        
-        # Guardar en caché
-        token_metadata_cache[token_address] = result
+        # Verificar si está en caché (se guarda la respuesta cruda de Helius)
+        result = token_metadata_cache.get(token_address)
+        if result is not None:
+            logger.debug(f"Usando metadatos en caché para el token {token_address}")
+        else:
+            result = metadata_flights.do(token_address, fetch_token_metadata_raw, url, token_address, timeout,
+                                         wait_timeout=timeout)
         
         # Extraer información relevante
         name = result.get("onChainData", {}).get("name", "Unknown")
@@ -129,10 +151,18 @@ def get_token_metadata(token_address):
             "image": image,
             "twitter_username": twitter_username
         }
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, TimeoutError) as e:
         logger.error(f"Error al obtener metadatos del token: {e}")
         return None
 
+def fetch_token_metadata_raw(url, token_address, timeout):
+    """Pide a Helius la respuesta cruda de metadatos de un token y la guarda en caché."""
+    response = http_client.get(url, timeout=timeout)
+    response.raise_for_status()
+    result = response.json()
+    token_metadata_cache.set(token_address, result)
+    return result
+
 def extract_ipfs_uri(metadata):
     """Extrae la URI de IPFS de los metadatos del token."""
     if not metadata:
@@ -149,36 +179,36 @@ def extract_ipfs_uri(metadata):
     logger.warning("No se pudo encontrar la URI en los metadatos")
     return None
 
-def get_ipfs_content(ipfs_uri):
+def get_ipfs_content(ipfs_uri, timeout=IPFS_TIMEOUT):
     """Obtiene el contenido de una URI de IPFS."""
     # Verificar si está en caché
-    if ipfs_uri in ipfs_content_cache:
+    cached = ipfs_content_cache.get(ipfs_uri)
+    if cached is not None:
         logger.debug(f"Usando contenido IPFS en caché para {ipfs_uri}")
-        return ipfs_content_cache[ipfs_uri]
-    
-    # Convertir ipfs:// a https://ipfs.io/ipfs/
-    if ipfs_uri.startswith("ipfs://"):
-        ipfs_uri = "https://ipfs.io/ipfs/" + ipfs_uri[7:]
-    
-    # Convertir ar:// a https://arweave.net/
-    elif ipfs_uri.startswith("ar://"):
-        ipfs_uri = "https://arweave.net/" + ipfs_uri[5:]
+        return cached
     
     try:
-        response = requests.get(ipfs_uri, timeout=30)
-        response.raise_for_status()
-        content = response.json()
-        
-        # Guardar en caché
-        ipfs_content_cache[ipfs_uri] = content
-        
-        return content
-    except requests.exceptions.RequestException as e:
+        return ipfs_flights.do(ipfs_uri, fetch_ipfs_content, ipfs_uri, timeout, wait_timeout=timeout)
+    except TimeoutError as e:
         logger.error(f"Error al obtener contenido de IPFS: {e}")
         return None
-    except json.JSONDecodeError:
-        logger.error(f"Error al decodificar JSON de IPFS: {ipfs_uri}")
+
+def fetch_ipfs_content(ipfs_uri, timeout):
+    """Descarga el contenido de una URI de IPFS y lo guarda en caché."""
+    # Convertir ar:// a https://arweave.net/ (ipfs:// lo resuelve el descargador con sus gateways)
+    url = ipfs_uri
+    if url.startswith("ar://"):
+        url = "https://arweave.net/" + url[5:]
+    
+    content = ipfs_fetcher.fetch_json(url, timeout)
+    if content is None:
+        logger.error(f"Error al obtener contenido de IPFS: {ipfs_uri}")
         return None
+    
+    # Guardar en caché
+    ipfs_content_cache.set(ipfs_uri, content)
+    
+    return content
 
 def extract_twitter_username(ipfs_content):
     """Extrae el nombre de usuario de Twitter del contenido de IPFS."""
@@ -227,74 +257,201 @@ def extract_twitter_username(ipfs_content):
     logger.warning("No se pudo encontrar el nombre de usuario de Twitter en el contenido")
     return None
 
-def process_token(token_address):
-    """Procesa un token para verificar si cumple con los criterios usando el script rápido de notables."""
-    logger.info(f"Procesando token: {token_address}")
-    
-    # Obtener metadatos del token
-    metadata = get_token_metadata(token_address)
-    if not metadata:
-        logger.error(f"No se pudieron obtener metadatos para el token: {token_address}")
+def ipfs_token_info(uri, name=None, symbol=None, deadline=None):
+    """Construye la información del token a partir del contenido de su URI de metadatos."""
+    ipfs_content = get_ipfs_content(uri, remaining_timeout(deadline, IPFS_TIMEOUT))
+    if not ipfs_content:
         return None
-    
-    # Extraer URI de IPFS
-    ipfs_uri = extract_ipfs_uri(metadata)
-    if not ipfs_uri:
-        logger.error(f"No se pudo encontrar la URI de IPFS para el token: {token_address}")
+    image = ipfs_content.get("image")
+    if not image and isinstance(ipfs_content.get("properties"), dict):
+        image = ipfs_content["properties"].get("image")
+    return {
+        "name": name or ipfs_content.get("name", "Unknown"),
+        "symbol": symbol or ipfs_content.get("symbol", "UNKNOWN"),
+        "description": ipfs_content.get("description", ""),
+        "image": image,
+        "twitter_username": extract_twitter_username(ipfs_content)
+    }
+
+def local_token_info(notification, token_address, deadline):
+    """Obtiene la información del token decodificando la instrucción de creación del webhook."""
+    if not notification:
         return None
-    
-    logger.info(f"URI de IPFS encontrada: {ipfs_uri}")
-    
-    # Obtener contenido de IPFS
-    ipfs_content = get_ipfs_content(ipfs_uri)
-    if not ipfs_content:
-        logger.error(f"No se pudo obtener el contenido de IPFS para el token: {token_address}")
+    onchain_metadata = decode_transaction_metadata(notification).get(token_address)
+    if not onchain_metadata:
+        logger.info(f"Sin instrucción de creación decodificable para {token_address}, usando Helius")
         return None
-    
-    # Extraer nombre de usuario de Twitter
-    twitter_username = extract_twitter_username(ipfs_content)
-    if not twitter_username:
-        logger.error(f"No se pudo encontrar el nombre de usuario de Twitter para el token: {token_address}")
+    return ipfs_token_info(onchain_metadata["uri"], onchain_metadata["name"], onchain_metadata["symbol"], deadline)
+
+def helius_token_info(token_address, deadline):
+    """Obtiene la información del token de Helius, completando con IPFS lo que falte."""
+    token_info = get_token_metadata(token_address, remaining_timeout(deadline, HELIUS_TIMEOUT))
+    if not token_info:
         return None
-    
-    logger.info(f"Nombre de usuario de Twitter encontrado: {twitter_username}")
-    
-    # Obtener notables usando el script rápido
+    if not token_info["twitter_username"]:
+        ipfs_uri = extract_ipfs_uri(token_metadata_cache.get(token_address))
+        ipfs_info = ipfs_token_info(ipfs_uri, token_info["name"], token_info["symbol"], deadline) if ipfs_uri else None
+        if ipfs_info:
+            return ipfs_info
+    return token_info
+
+def fetch_token_notables(token_info, deadline):
+    """Obtiene el total y el top 5 de notables del creador del token."""
+    username = token_info["twitter_username"]
+    if not username:
+        return None
+    cached = notable_followers_cache.get(username.lower())
+    if cached is not None:
+        return cached
+    notables = get_notables(username, top_n=5, timeout=remaining_timeout(deadline, PROTOKOLS_TIMEOUT))
+    if notables is not None:
+        notable_followers_cache.set(username.lower(), notables)
+    return notables
+
+def load_cookies_from_file():
+    """Retorna las cookies de Protokols del almacén compartido (se recargan si el fichero cambia)."""
+    return get_cookie_store(COOKIES_FILE).get()
+
+def fetch_kol_metrics(token_info, deadline):
+    """Obtiene followersCount y kolScore del creador del token."""
+    if not token_info["twitter_username"]:
+        return None
+    cookies = load_cookies_from_file()
+    if not cookies:
+        return None
+    return get_user_metrics(token_info["twitter_username"], cookies, remaining_timeout(deadline, PROTOKOLS_TIMEOUT))
+
+def prefetch_image(token_info, deadline):
+    """
+    Comprueba que la imagen del token es accesible y retorna su URL. Las de IPFS se piden
+    al gateway mejor clasificado por ipfs_fetcher; solo se leen las cabeceras, no el cuerpo.
+    """
+    image = token_info["image"]
+    if not image:
+        return None
+    origin, path = split_ipfs_uri(image)
+    if path is not None:
+        image = ipfs_fetcher.rank(origin)[0] + path
+    response = http_client.get(image, timeout=remaining_timeout(deadline, IMAGE_TIMEOUT), stream=True)
     try:
-        notables_data = get_notables(twitter_username, top_n=5)
-        notable_count = notables_data.get('total', 0)
-        top_notables = notables_data.get('top', [])
-    except Exception as e:
-        logger.error(f"Error obteniendo notables: {str(e)}")
-        notable_count = 0
-        top_notables = []
-    logger.info(f"Número de notable followers para {twitter_username}: {notable_count}")
-    
-    # Extraer información adicional del token
-    name = ipfs_content.get('name', 'Unknown')
-    symbol = ipfs_content.get('symbol', 'UNKNOWN')
-    description = ipfs_content.get('description', '')
-    
-    # Extraer imagen del token
-    image = None
-    if 'image' in ipfs_content:
-        image = ipfs_content['image']
-    elif 'properties' in ipfs_content and 'image' in ipfs_content['properties']:
-        image = ipfs_content['properties']['image']
-    
-    # Crear resultado completo
-    result = {
+        response.raise_for_status()
+    finally:
+        response.close()
+    return image
+
+def build_token_result(token_address, token_info, notables, kol_metrics, image):
+    """Combina las etapas de enriquecimiento en el resultado final del token."""
+    if not token_info:
+        return None
+    notables = notables or {}
+    notable_count = notables.get('total') or 0
+    return {
         "token_address": token_address,
-        "name": name,
-        "symbol": symbol,
-        "description": description,
-        "image": image,
-        "twitter_username": twitter_username,
+        "name": token_info["name"],
+        "symbol": token_info["symbol"],
+        "description": token_info["description"],
+        "image": image or token_info["image"],
+        "twitter_username": token_info["twitter_username"],
+        "kol_score": (kol_metrics or {}).get("kolScore"),
         "notable_followers_count": notable_count,
-        "top_notables": top_notables,
+        "top_notables": notables.get('top', []),
         "approved": notable_count >= REQUIRED_NOTABLE_COUNT,
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
+
+def build_enrichment_graph():
+    """
+    Grafo de enriquecimiento de un token. La decodificación local compite con Helius
+    (que solo arranca si la local falla o tarda más de ENRICHMENT_HEDGE_DELAY), y la
+    descarga de la imagen, los notables y el kolScore avanzan en paralelo.
+    """
+    return (
+        StageGraph("token_enrichment")
+        .add_race("token_info", [
+            (local_token_info, ("notification", "token_address", "deadline"), 0.0),
+            (helius_token_info, ("token_address", "deadline"), config.ENRICHMENT_HEDGE_DELAY)
+        ], allow_missing=True)
+        .add("notables", fetch_token_notables, ("token_info", "deadline"))
+        .add("kol_metrics", fetch_kol_metrics, ("token_info", "deadline"))
+        .add("image", prefetch_image, ("token_info", "deadline"))
+        .add("result", build_token_result,
+             ("token_address", "token_info", "notables", "kol_metrics", "image"), allow_missing=True)
+    )
+
+enrichment_graph = build_enrichment_graph()
+
+# Tokens terminados a tiempo, degradados o descartados por agotar su presupuesto
+deadline_metrics = DeadlineMetrics()
+
+# Reintentos diferidos de tokens cuyos metadatos aún no se han propagado
+retry_scheduler = RetryScheduler(name="token_monitor_retry")
+
+# Destino de los tokens recuperados por un reintento, que ya no vuelven por la cola:
+# quien la crea con on_result lo registra aquí (ver deploy_webhook_server). En los
+# procesos worker no está registrado y el resultado vuelve por la cola del pool
+retry_result_handler = None
+
+def enrich_token(token_address, notification=None, deadline=None, token_info=None):
+    """
+    Ejecuta el grafo de enriquecimiento para un token dentro de su presupuesto de tiempo
+    y registra su camino crítico. Si el presupuesto vence sin notables el token se descarta;
+    si solo faltan la imagen o el kolScore se marca como degradado.
+
+    Args:
+        token_address: Dirección del token
+        notification: Transacción del webhook, si la hay, para decodificar sus metadatos
+        deadline: Deadline del token desde la recepción del webhook (por defecto, desde ahora)
+        token_info: Información del token ya obtenida (se omite la etapa token_info)
+
+    Returns:
+        dict: Resultado del token (con sus tiempos en "timings"), o None si no hay metadatos
+    """
+    deadline = deadline or Deadline()
+    initial = {"token_address": token_address, "notification": notification, "deadline": deadline}
+    if token_info:
+        initial["token_info"] = token_info
+    run = enrichment_graph.run(
+        initial,
+        executor=enrichment_executor,
+        timeout=max(deadline.remaining(), 0.0)
+    )
+    timings = run.metrics()
+    logger.info(f"Enriquecimiento de {token_address} en {timings['total_ms']} ms, "
+                f"camino crítico: {' -> '.join(timings['critical_path'])}")
+    values = run.values
+    result = values["result"] or build_token_result(
+        token_address, values["token_info"], values["notables"], values["kol_metrics"], values["image"]
+    )
+    if not deadline.expired:
+        if result:
+            deadline_metrics.record('on_time', deadline)
+    elif not result or (result["twitter_username"] and values["notables"] is None):
+        logger.warning(f"Token {token_address} descartado: presupuesto de {deadline.budget}s agotado")
+        deadline_metrics.record('dropped', deadline)
+        return None
+    else:
+        missing = [name for name in ("kol_metrics", "image") if values[name] is None]
+        result["degraded"] = missing
+        logger.warning(f"Token {token_address} degradado por deadline, sin: {', '.join(missing) or 'nada'}")
+        deadline_metrics.record('degraded', deadline)
+    if result:
+        result["timings"] = timings
+    return result
+
+def process_token(token_address):
+    """Procesa un token para verificar si cumple con los criterios usando el script rápido de notables."""
+    logger.info(f"Procesando token: {token_address}")
+    
+    result = enrich_token(token_address)
+    if not result:
+        logger.error(f"No se pudieron obtener metadatos para el token: {token_address}")
+        return None
+    
+    if not result["twitter_username"]:
+        logger.error(f"No se pudo encontrar el nombre de usuario de Twitter para el token: {token_address}")
+        return None
+    
+    logger.info(f"Número de notable followers para {result['twitter_username']}: {result['notable_followers_count']}")
     
     # Guardar en tokens aprobados si cumple los criterios
     if result["approved"]:
@@ -342,11 +499,12 @@ def notify_new_approved_token(token_data):
     # En el futuro, aquí se podría implementar un sistema de notificaciones
     # para enviar alertas a diferentes canales (Telegram, Discord, etc.)
 
-def process_webhook_notification(notification_data):
+def process_webhook_notification(notification_data, deadline=None):
     """Procesa una notificación de webhook para extraer la información del token."""
+    token_address = None
+    claimed = False
     try:
         # Extraer dirección del token
-        token_address = None
         if "tokenTransfers" in notification_data and notification_data["tokenTransfers"]:
             token_address = notification_data["tokenTransfers"][0].get("mint")
             logger.debug(f"Dirección del token encontrada: {token_address}")
@@ -355,58 +513,84 @@ def process_webhook_notification(notification_data):
             logger.error("No se pudo encontrar la dirección del token")
             return None
         
-        # Extraer información del token directamente del webhook
-        name = notification_data.get("tokenTransfers", [{}])[0].get("tokenName", "Unknown")
-        symbol = notification_data.get("tokenTransfers", [{}])[0].get("tokenSymbol", "UNKNOWN")
+        # Descartar entregas duplicadas antes de gastar llamadas a Helius o Protokols
+        if not get_idempotency_index().check_and_add(notification_data.get("signature"), token_address):
+            logger.info(f"Entrega duplicada ignorada para el token {token_address}")
+            return None
+        claimed = True
         
         # Si es un Wrapped SOL, usar valores específicos
         if "Wrapped SOL" in notification_data.get("description", ""):
-            name = "Wrapped SOL"
-            symbol = "WSOL"
-            description = "Wrapped SOL token"
-            twitter_username = None
-            image = None
+            result = build_token_result(token_address, {
+                "name": "Wrapped SOL",
+                "symbol": "WSOL",
+                "description": "Wrapped SOL token",
+                "image": None,
+                "twitter_username": None
+            }, None, None, None)
         else:
-            # Intentar obtener metadatos del token
-            description = ""
-            twitter_username = None
-            image = None
-            
-            # Buscar en las instrucciones de Metaplex
-            if "instructions" in notification_data:
-                for instruction in notification_data["instructions"]:
-                    if "innerInstructions" in instruction:
-                        for inner_instruction in instruction["innerInstructions"]:
-                            if inner_instruction.get("programId") == "metaqbxxUerdq28cj1RbAWkYQm3ybzjb6a8bt518x1s":
-                                if "data" in inner_instruction:
-                                    metadata = try_decode_metaplex_data(inner_instruction['data'])
-                                    if metadata and "uri" in metadata:
-                                        ipfs_content = get_ipfs_content(metadata["uri"])
-                                        if ipfs_content:
-                                            description = ipfs_content.get("description", "")
-                                            twitter_username = extract_twitter_username(ipfs_content)
-                                            image = ipfs_content.get("image")
-        
-        # Crear resultado inicial sin datos de notables
-        result = {
-            "token_address": token_address,
-            "name": name,
-            "symbol": symbol,
-            "description": description,
-            "image": image,
-            "twitter_username": twitter_username,
-            "notable_followers_count": 0,  # Se actualizará con Protokols
-            "top_notables": []  # Se actualizará con Protokols
-        }
-        
-        # Si tenemos Twitter username, obtener notables de Protokols
-        if twitter_username:
-            try:
-                notables_data = get_notables(twitter_username, top_n=5)
-                result["notable_followers_count"] = notables_data.get('total', 0)
-                result["top_notables"] = notables_data.get('top', [])
-            except Exception as e:
-                logger.error(f"Error obteniendo notables de Protokols: {str(e)}")
+            result = enrich_token(token_address, notification_data, deadline)
+            if not result:
+                # Sin metadatos pero con presupuesto: lo normal en un token recién creado
+                if config.RETRY_ENABLED and not (deadline and deadline.expired) and \
+                        schedule_metadata_retry(token_address, notification_data):
+                    logger.warning(f"Metadatos no disponibles todavía para el token {token_address}, se reintentará")
+                else:
+                    logger.error(f"No se pudieron obtener metadatos para el token: {token_address}")
+                return None
+        report_token(result)
+        return result
+    except Exception as e:
+        logger.error(f"Error procesando notificación: {str(e)}")
+        # Sin desmarcar, una nueva entrega de la misma transacción se descartaría como duplicada
+        if claimed:
+            get_idempotency_index().discard(notification_data.get("signature"), token_address)
+        return None
+
+def schedule_metadata_retry(token_address, notification_data):
+    """
+    Programa los reintentos de un token cuyos metadatos aún no se han propagado. Cada
+    reintento consulta solo la información del token; al recuperarla, resume_token
+    completa el enriquecimiento con un presupuesto nuevo.
+    """
+    signature = notification_data.get("signature")
+    return retry_scheduler.schedule(
+        "metadata", token_address,
+        attempt=lambda: lookup_token_info(token_address, notification_data, Deadline()),
+        on_success=lambda token_info: resume_token(token_address, token_info),
+        on_give_up=lambda: get_idempotency_index().discard(signature, token_address)
+    )
+
+def lookup_token_info(token_address, notification_data, deadline):
+    """Obtiene la información del token decodificando la transacción o, si no, de Helius."""
+    return local_token_info(notification_data, token_address, deadline) or \
+        helius_token_info(token_address, deadline)
+
+def resume_token(token_address, token_info):
+    """
+    Completa un token cuyos metadatos llegaron en un reintento: notables, kolScore e
+    imagen con un presupuesto nuevo, y lo entrega como cualquier otro resultado.
+    """
+    result = enrich_token(token_address, deadline=Deadline(), token_info=token_info)
+    if not result:
+        logger.error(f"No se pudo completar el token recuperado: {token_address}")
+        return
+    report_token(result)
+    if result["approved"]:
+        save_approved_token(result)
+    if retry_result_handler:
+        retry_result_handler(result)
+    else:
+        report_result(result)
+
+def report_token(result):
+    """Muestra por consola la información de un token procesado."""
+    try:
+        token_address = result["token_address"]
+        name = result["name"]
+        symbol = result["symbol"]
+        image = result["image"]
+        twitter_username = result["twitter_username"]
         
         # Imprimir información del token
         print("\n==================================================")
@@ -430,24 +614,107 @@ def process_webhook_notification(notification_data):
                     followers_str = str(followers)
                 print(f"- @{notable['username']} ({followers_str} followers)")
         print("==================================================\n")
-        
-        return result
     except Exception as e:
-        logger.error(f"Error procesando notificación: {str(e)}")
-        return None
+        logger.error(f"Error al mostrar el token: {str(e)}")
+
+# Índice persistente de firmas y mints ya procesados (sobrevive a reinicios); se abre
+# con la primera notificación para que importar el módulo no cree la base de datos
+idempotency_index = None
+_idempotency_lock = threading.Lock()
+
+def get_idempotency_index():
+    """Retorna el índice de idempotencia del proceso, abriéndolo la primera vez."""
+    global idempotency_index
+    with _idempotency_lock:
+        if idempotency_index is None:
+            idempotency_index = IdempotencyIndex()
+    return idempotency_index
 
 # Crear la aplicación Flask para el servidor webhook
 app = Flask(__name__)
 
+def process_queued_notification(item):
+    """Procesa una notificación encolada junto con el deadline fijado al recibirla."""
+    notification_data, deadline = item
+    return process_webhook_notification(notification_data, deadline)
+
+def notification_shard_key(item):
+    """Clave de reparto de una notificación encolada: el mint del token (o la firma)."""
+    notification_data, _ = item
+    transfers = notification_data.get("tokenTransfers") or []
+    return (transfers[0].get("mint") if transfers else None) or notification_data.get("signature")
+
+def notification_launchpad(item):
+    """Clase de prioridad de una notificación encolada: el launchpad de su feePayer."""
+    notification_data, _ = item
+    return config.KNOWN_WALLETS.get(notification_data.get("feePayer"))
+
+def checkpoint_items(items):
+    """
+    Prepara para el traspaso las notificaciones encoladas que no llegaron a procesarse.
+    Se olvidan en el índice de idempotencia para que el siguiente proceso no las descarte.
+    """
+    notifications = []
+    for notification_data, _ in items:
+        transfers = notification_data.get("tokenTransfers") or []
+        token_address = transfers[0].get("mint") if transfers else None
+        get_idempotency_index().discard(notification_data.get("signature"), token_address)
+        notifications.append(notification_data)
+    return notifications
+
+def resume_items(notifications):
+    """
+    Convierte las notificaciones traspasadas en elementos de la cola. Cada una recibe un
+    deadline nuevo: el presupuesto original se habría agotado durante el redespliegue.
+    """
+    return [(notification_data, Deadline()) for notification_data in notifications]
+
+def shed_notification(item):
+    """
+    Registra una notificación ya confirmada a Helius que la cola desalojó para dejar
+    sitio a una de mayor prioridad, y la olvida en el filtro previo para que otra
+    entrega (o la fuente en streaming) pueda volver a ingerirla.
+    """
+    notification_data, _ = item
+    signature = notification_data.get("signature")
+    prefilter.forget(signature)
+    logger.warning(f"Notificación desalojada sin procesar: firma {signature}, token {notification_shard_key(item)}")
+
+# Cola compartida para procesar las notificaciones: pool de hilos con prioridad por
+# launchpad o, con INGESTION_PROCESSES > 1, procesos worker repartidos por mint
+ingestion_queue = create_ingestion_queue(
+    process_queued_notification,
+    notification_shard_key,
+    name="token_monitor",
+    classify=notification_launchpad,
+    on_shed=shed_notification
+)
+
+# Filtro previo: descarta transacciones irrelevantes antes de parsear y registrar
+prefilter = PreFilter()
+
 @app.route('/webhook', methods=['POST'])
 def webhook_handler():
     """Manejador de webhook para recibir notificaciones de Helius."""
     try:
-        notification = request.json
-        logger.info(f"Notificación recibida: {json.dumps(notification)[:100]}...")
+        # El presupuesto de tiempo de cada token empieza al recibir el webhook
+        deadline = Deadline()
+        if not ingestion_queue.accepting:
+            return jsonify({"status": "error", "message": "Servidor no acepta notificaciones"}), 503
+        body = request.get_data()
+        transactions = prefilter.filter_body(body)
+        if not transactions:
+            return jsonify({"status": "success", "message": "Notificación descartada por el filtro previo"}), 200
+        logger.info(f"Notificación recibida: {body[:100].decode('utf-8', errors='replace')}...")
         
-        # Procesar la notificación en un hilo separado para no bloquear la respuesta
-        threading.Thread(target=process_webhook_notification, args=(notification,)).start()
+        # Encolar la notificación; si la cola está llena, aplicar backpressure
+        rejected = [tx for tx in transactions if not ingestion_queue.submit((tx, deadline))]
+        if rejected:
+            # Permitir que el reintento de Helius vuelva a pasar el filtro de duplicados
+            for tx in rejected:
+                prefilter.forget(tx.get('signature'))
+            logger.warning(f"Cola de ingestión llena, {len(rejected)} transacción(es) rechazada(s)")
+            return jsonify({"status": "error", "message": "Cola llena, reintentar más tarde"}), 429, {"Retry-After": str(config.INGESTION_RETRY_AFTER)}
         
         return jsonify({"status": "success", "message": "Notificación recibida y en procesamiento"}), 200
     except Exception as e:
@@ -493,6 +760,15 @@ def status():
             "status": "running",
             "approved_tokens_count": len(approved_tokens),
             "cache_sizes": cache_sizes,
+            "ingestion_queue": ingestion_queue.metrics(),
+            "idempotency": get_idempotency_index().metrics(),
+            "deadline": deadline_metrics.metrics(),
+            "prefilter": prefilter.metrics(),
+            "http": http_client.metrics(),
+            "ipfs": ipfs_fetcher.metrics(),
+            "protokols_rate": get_rate_scheduler().metrics(),
+            "single_flight": {flights.name: flights.metrics()
+                              for flights in (metadata_flights, ipfs_flights, notables_flights)},
             "last_updated": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
         })
     except Exception as e:
@@ -635,7 +911,7 @@ def test_cookies():
         headers = session_manager.get_session_headers()
         headers["Referer"] = f"https://www.protokols.io/twitter/{test_username}"
         logger.info(f"Enviando solicitud a {url}")
-        response = requests.get(url, headers=headers, cookies=cookies)
+        response = http_client.get(url, headers=headers, cookies=cookies)
         logger.info(f"Código de respuesta: {response.status_code}")
         logger.info(f"Contenido de la respuesta (texto): {response.text[:1000]}")
         try:
@@ -657,11 +933,21 @@ def test_cookies():
 def try_decode_metaplex_data(data_str):
     """
     Intenta decodificar los datos de la instrucción de Metaplex.
-    Primero intenta decodificar base64 con padding, luego busca URIs directamente.
+    Primero decodifica la instrucción de creación (base58 + Borsh); si no lo es,
+    busca URIs directamente y después en los datos decodificados como base64.
     """
     try:
         logger.debug(f"Intentando decodificar datos de Metaplex: {data_str[:50]}... (len={len(data_str)})")
         
+        # 0. Decodificar la instrucción CreateMetadataAccount (Helius entrega los datos en base58)
+        try:
+            metadata = decode_create_metadata(b58decode(data_str))
+        except ValueError:
+            metadata = None
+        if metadata and metadata["uri"]:
+            logger.info(f"URI decodificada de la instrucción de Metaplex: {metadata['uri']}")
+            return metadata
+        
         # 1. Intentar extraer URI directamente del string de datos
         ipfs_pattern = r'ipfs://[a-zA-Z0-9]+'
         arweave_pattern = r'https://arweave.net/[a-zA-Z0-9]+'
@@ -730,7 +1016,7 @@ def extract_token_metadata(webhook_data):
         }
         
         logger.info(f"Llamando a Helius API: {url}")
-        response = requests.post(url, json=data)
+        response = http_client.post(url, json=data)
         
         if response.status_code != 200:
             logger.error(f"Error al obtener metadatos de Helius: {response.status_code} - {response.text}")
@@ -764,7 +1050,7 @@ def main():
     # Si tenemos Twitter username, obtener notables
     if token_info["twitter_username"]:
         try:
-            notables_data = get_notables(token_info["twitter_username"], top_n=5)
+            notables_data = get_notables(token_info["twitter_username"], top_n=5, priority=INTERACTIVE)
             notable_count = notables_data.get('total', 0)
             top_notables = notables_data.get('top', [])
             
@@ -9,10 +9,23 @@ from flask import Flask, request, jsonify
 import logging
 import json
 import os
-import requests
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, Optional, List, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dotenv import load_dotenv
-from protokols_smart_followers_fast import get_smart_followers_ultrafast as get_notables
+from protokols_smart_followers_fast import get_smart_followers_ultrafast as get_notables, notables_flights
+from src.models.webhook import WebhookData
+from src.utils import http_client
+from src.utils.config import config
+from src.utils.cookie_store import get_cookie_store
+from src.utils.deadline import Deadline, DeadlineExceeded, DeadlineMetrics, remaining_timeout
+from src.utils.helius_batcher import HeliusBatcher
+from src.utils.idempotency import IdempotencyIndex
+from src.utils.ipfs_fetcher import HedgedIPFSFetcher
+from src.utils.metaplex import decode_transaction_metadata
+from src.utils.retry_scheduler import RetryScheduler
+from src.utils.prefilter import PreFilter
+from src.utils.rate_scheduler import get_rate_scheduler
 from datetime import datetime
 import re
 
@@ -33,40 +46,72 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Diccionario de wallets conocidas y sus identificadores
-KNOWN_WALLETS = {
-    "5qWya6UjwWnGVhdSBL3hyZ7B45jbk6Byt1hwd7ohEGXE": "Believe",
-    "5JzRjmLSy5YR4ReFRpCK9k3WuToUpc7vkBhWPyy89kQ4": "Launch On Pump"
-}
+KNOWN_WALLETS = config.KNOWN_WALLETS
+
+# Filtro previo: descarta transacciones irrelevantes antes de parsear y registrar
+prefilter = PreFilter(KNOWN_WALLETS)
+
+# Índice persistente de firmas y mints ya procesados (sobrevive a reinicios); se abre
+# con el primer webhook para que importar el módulo no cree la base de datos
+idempotency_index: Optional[IdempotencyIndex] = None
+_idempotency_lock = threading.Lock()
+
+def get_idempotency_index() -> IdempotencyIndex:
+    """
+    Retorna el índice de idempotencia del proceso, abriéndolo la primera vez.
+    """
+    global idempotency_index
+    with _idempotency_lock:
+        if idempotency_index is None:
+            idempotency_index = IdempotencyIndex()
+    return idempotency_index
 
 app = Flask(__name__)
 
 TIMEOUT = 5  # segundos
+IPFS_TIMEOUT = 10  # segundos
+HELIUS_TIMEOUT = 10  # segundos
+PROTOKOLS_TIMEOUT = 10  # segundos
+
+# Tokens terminados a tiempo, degradados (alerta sin imagen) o descartados por deadline
+deadline_metrics = DeadlineMetrics()
+# Reintentos diferidos de tokens cuyos metadatos aún no se han propagado
+retry_scheduler = RetryScheduler(name="webhook_retry")
+HELIUS_BATCH_SIZE = 100  # máximo de mints por petición a token-metadata
+HELIUS_DAS_BATCH_SIZE = 1000  # máximo de ids por petición a getAssetBatch
+BATCH_WORKERS = 8  # descargas y consultas simultáneas por lote
+# Descargas de IPFS con coberturas entre gateways clasificados por latencia y errores
+ipfs_fetcher = HedgedIPFSFetcher(name="webhook_ipfs")
 
 # --- Funciones de procesamiento y Telegram ---
-def extract_token_metadata_from_ipfs(ipfs_url: str, mint_address: str) -> Optional[Dict[str, Any]]:
+def get_ipfs_fallback_url(ipfs_url: str) -> Optional[str]:
+    """
+    Construye la URL equivalente en ipfs.io para una URL de IPFS de otro gateway.
+    """
+    match = re.search(r"/ipfs/([A-Za-z0-9]+)", ipfs_url)
+    if not match:
+        return None
+    return f"https://ipfs.io/ipfs/{match.group(1)}"
+
+def extract_token_metadata_from_ipfs(ipfs_url: str, mint_address: str,
+                                     deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
     try:
         logger.info(f"Descargando metadatos desde IPFS: {ipfs_url}")
-        try:
-            response = requests.get(ipfs_url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-        except Exception as e:
-            # Si la URL es de cloudflare-ipfs.com, intentar con ipfs.io
-            if "cloudflare-ipfs.com" in ipfs_url:
-                match = re.search(r"/ipfs/([A-Za-z0-9]+)", ipfs_url)
-                if match:
-                    ipfs_hash = match.group(1)
-                    fallback_url = f"https://ipfs.io/ipfs/{ipfs_hash}"
-                    logger.warning(f"Fallo en cloudflare-ipfs.com, intentando con ipfs.io: {fallback_url}")
-                    response = requests.get(fallback_url, timeout=10)
-                    response.raise_for_status()
-                    data = response.json()
-                else:
-                    logger.error(f"No se pudo extraer el hash de IPFS de la URL: {ipfs_url}")
-                    return None
-            else:
-                logger.error(f"Error al extraer metadatos de IPFS: {str(e)}")
-                return None
+        # El gateway mejor clasificado responde primero; si tarda, se cubre con el siguiente
+        data = ipfs_fetcher.fetch_json(ipfs_url, remaining_timeout(deadline, IPFS_TIMEOUT))
+        if data is None:
+            logger.error(f"Ningún gateway de IPFS devolvió los metadatos de {mint_address}")
+            return None
+        return parse_ipfs_metadata(data, mint_address)
+    except Exception as e:
+        logger.error(f"Error al extraer metadatos de IPFS: {str(e)}")
+        return None
+
+def parse_ipfs_metadata(data: Dict[str, Any], mint_address: str) -> Optional[Dict[str, Any]]:
+    """
+    Extrae nombre, símbolo, imagen y creador de Twitter del JSON de metadatos de IPFS.
+    """
+    try:
         name = data.get('name')
         symbol = data.get('symbol')
         image = data.get('image')
@@ -99,51 +144,210 @@ def extract_token_metadata_from_ipfs(ipfs_url: str, mint_address: str) -> Option
             'twitter': twitter
         }
     except Exception as e:
-        logger.error(f"Error al extraer metadatos de IPFS: {str(e)}")
+        logger.error(f"Error al interpretar metadatos de IPFS: {str(e)}")
+        return None
+
+def extract_batch_items(webhook_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Expande un webhook de Helius en un elemento por cada transacción y mint.
+    Helius puede agrupar varias transacciones en un mismo POST.
+    """
+    items = []
+    transactions = WebhookData.from_dict(webhook_data).transactions
+    for raw_tx, tx in zip(webhook_data, transactions):
+        # Creación donde el mint coincide con la cuenta destino (nuestra wallet como Payer)
+        token_transfers = raw_tx.get('tokenTransfers', [])
+        self_minted = bool(token_transfers) and token_transfers[0].get('mint') == token_transfers[0].get('toTokenAccount')
+        # name, symbol y uri decodificados de las instrucciones de creación, sin llamar a Helius
+        onchain_metadata = decode_transaction_metadata(raw_tx)
+        for mint in tx.get_mints() or [None]:
+            items.append({
+                'signature': tx.signature,
+                'fee_payer': tx.fee_payer,
+                'wallet_identifier': KNOWN_WALLETS.get(tx.fee_payer),
+                'mint': mint,
+                'self_minted': self_minted,
+                'onchain_metadata': onchain_metadata.get(mint)
+            })
+    return items
+
+def extract_helius_uri(token_data: Dict[str, Any]) -> Optional[str]:
+    """
+    Extrae la URI de metadatos de un elemento de la respuesta de token-metadata de Helius.
+    """
+    metadata = (token_data.get('onChainMetadata') or {}).get('metadata') or {}
+    return (metadata.get('data') or {}).get('uri') or None
+
+def request_helius_token_uris(mint_addresses: List[str]) -> Dict[str, Optional[str]]:
+    """
+    Pide a Helius, en una sola petición, las URIs de metadatos de un lote de tokens.
+    """
+    helius_api_key = os.getenv('HELIUS_API_KEY')
+    if not helius_api_key:
+        raise ValueError("HELIUS_API_KEY no está definida en el entorno")
+    url = f"https://api.helius.xyz/v0/token-metadata?api-key={helius_api_key}"
+    headers = {"Content-Type": "application/json"}
+    logger.info(f"Llamando a la API de Helius para obtener metadatos de {len(mint_addresses)} token(s)")
+    response = http_client.post(url, headers=headers, json={"mintAccounts": mint_addresses}, timeout=HELIUS_TIMEOUT)
+    response.raise_for_status()
+    uris = {}
+    # Helius responde en el mismo orden que mintAccounts
+    for position, token_data in enumerate(response.json()):
+        mint_address = token_data.get('account') or mint_addresses[position]
+        uris[mint_address] = extract_helius_uri(token_data)
+    return uris
+
+# Las consultas concurrentes de distintos webhooks se agrupan en una petición por ventana
+helius_batcher = HeliusBatcher(request_helius_token_uris, max_batch_size=HELIUS_BATCH_SIZE, name="helius_token_metadata")
+
+def known_uris(items: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Retorna las URIs de metadatos ya decodificadas del propio webhook, por mint.
+    """
+    return {item['mint']: item['onchain_metadata']['uri'] for item in items if item.get('onchain_metadata')}
+
+def parse_das_asset(asset: Dict[str, Any], mint_address: str) -> Optional[Dict[str, Any]]:
+    """
+    Convierte un asset de la API DAS de Helius (contenido off-chain ya cacheado por Helius)
+    en los metadatos del token. Solo se da por bueno si trae el creador de Twitter; si no,
+    se espera al JSON de IPFS, que puede traerlo en campos que DAS no expone.
+    """
+    content = asset.get('content') or {}
+    metadata = content.get('metadata') or {}
+    links = content.get('links') or {}
+    data = {
+        'name': metadata.get('name'),
+        'symbol': metadata.get('symbol'),
+        'image': links.get('image'),
+        'twitter': links.get('twitter') or metadata.get('twitter'),
+        'metadata': metadata.get('metadata')
+    }
+    token_metadata = parse_ipfs_metadata(data, mint_address)
+    if not token_metadata or not token_metadata['twitter']:
         return None
+    return token_metadata
 
-def extract_token_metadata(webhook_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def request_das_assets(mint_addresses: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Pide a la API DAS de Helius los assets de un lote de tokens con getAssetBatch.
+    """
+    helius_api_key = os.getenv('HELIUS_API_KEY')
+    if not helius_api_key:
+        raise ValueError("HELIUS_API_KEY no está definida en el entorno")
+    payload = {"jsonrpc": "2.0", "id": "token-metadata", "method": "getAssetBatch", "params": {"ids": mint_addresses}}
+    logger.info(f"Llamando a getAssetBatch de Helius para {len(mint_addresses)} token(s)")
+    response = http_client.post(config.HELIUS_RPC_URL, params={"api-key": helius_api_key}, json=payload,
+                                timeout=HELIUS_TIMEOUT)
+    response.raise_for_status()
+    body = response.json()
+    if body.get('error'):
+        raise ValueError(f"Error de getAssetBatch: {body['error']}")
+    # DAS responde en el mismo orden que ids, con null para los assets que no conoce
+    return {
+        (asset or {}).get('id') or mint_addresses[position]: parse_das_asset(asset, mint_addresses[position]) if asset else None
+        for position, asset in enumerate(body.get('result') or [])
+    }
+
+das_batcher = HeliusBatcher(request_das_assets, max_batch_size=HELIUS_DAS_BATCH_SIZE, name="helius_das")
+
+def fetch_metadata_via_das(mint_address: str, asset_future: Future,
+                           deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+    """
+    Espera los metadatos de un token pedidos a la API DAS de Helius (asset_future,
+    resuelta por el agrupador de getAssetBatch).
+    """
+    try:
+        return asset_future.result(remaining_timeout(deadline, HELIUS_TIMEOUT))
+    except Exception as e:
+        logger.warning(f"No se pudieron obtener los metadatos de {mint_address} desde DAS: {str(e)}")
+        return None
+
+def fetch_metadata_via_uri(mint_address: str, uri: Optional[str], uri_future: Optional[Future],
+                           deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+    """
+    Obtiene los metadatos de un token descargando de IPFS su URI, ya decodificada del
+    webhook o pedida a Helius (uri_future, resuelta por el agrupador de token-metadata).
+    """
+    if not uri and uri_future is not None:
+        try:
+            uri = uri_future.result(remaining_timeout(deadline, HELIUS_TIMEOUT))
+        except Exception as e:
+            logger.error(f"Error al obtener metadatos de Helius para {mint_address}: {str(e)}")
+            return None
+        if uri:
+            logger.info(f"URI de IPFS encontrada para {mint_address}: {uri}")
+        else:
+            logger.error(f"No se encontró la URI en los metadatos del token {mint_address}")
+    if not uri:
+        return None
+    return extract_token_metadata_from_ipfs(uri, mint_address, deadline)
+
+def first_result(futures: Dict[str, Future]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Espera a las alternativas de un token y retorna la primera que produce resultado, con su nombre.
+    """
+    pending = {future: source for source, future in futures.items()}
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            source = pending.pop(future)
+            if future.result():
+                return source, future.result()
+    return None, None
+
+def extract_tokens_metadata(mint_addresses: List[str], uris: Optional[Dict[str, str]] = None,
+                            deadline: Optional[Deadline] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Obtiene los metadatos de varios tokens: las URIs que no vengan ya decodificadas
+    del webhook se piden a Helius en una llamada por lote, y las descargas de IPFS
+    se hacen en paralelo. Con HELIUS_DAS_ENABLED cada token compite además con la
+    API DAS de Helius (getAssetBatch) y gana el primer camino que devuelve metadatos.
+    """
+    results: Dict[str, Optional[Dict[str, Any]]] = {mint: None for mint in mint_addresses}
+    if not results:
+        return results
+    uris = {mint: uri for mint, uri in (uris or {}).items() if mint in results}
+    # Las consultas a Helius se lanzan todas antes de esperar, para que vayan en un mismo lote
+    uri_futures = {mint: helius_batcher.submit(mint) for mint in results if mint not in uris}
+    das_futures = {mint: das_batcher.submit(mint) for mint in results} if config.HELIUS_DAS_ENABLED else {}
+    paths = 2 if das_futures else 1
+    executor = ThreadPoolExecutor(max_workers=min(len(results), BATCH_WORKERS) * paths)
+    try:
+        alternatives: Dict[str, Dict[str, Future]] = {}
+        for mint in results:
+            alternatives[mint] = {
+                'ipfs': executor.submit(fetch_metadata_via_uri, mint, uris.get(mint), uri_futures.get(mint), deadline)
+            }
+            if mint in das_futures:
+                alternatives[mint]['das'] = executor.submit(fetch_metadata_via_das, mint, das_futures[mint], deadline)
+        for mint, futures in alternatives.items():
+            source, metadata = first_result(futures)
+            if metadata:
+                logger.info(f"Metadatos del token extraídos exitosamente para {mint} (vía {source})")
+            else:
+                logger.error(f"No se pudieron extraer los metadatos del token {mint}")
+            results[mint] = metadata
+    finally:
+        # El camino perdedor termina en segundo plano
+        executor.shutdown(wait=False)
+    return results
+
+def extract_token_metadata(webhook_data: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Obtiene los metadatos del primer token del webhook.
+    Para procesar todos los tokens de un lote usar extract_tokens_metadata.
+    """
     try:
         if not webhook_data or not isinstance(webhook_data, list) or len(webhook_data) == 0:
             logger.error("Webhook vacío o formato inválido")
             return None
-        tx = webhook_data[0]
-        token_transfers = tx.get('tokenTransfers', [])
-        if not token_transfers:
-            logger.error("No se encontraron transferencias de token")
-            return None
-        mint_address = token_transfers[0].get('mint')
+        mint_address = WebhookData.from_dict(webhook_data).get_first_mint()
         if not mint_address:
             logger.error("No se encontró el mint del token")
             return None
-        helius_api_key = os.getenv('HELIUS_API_KEY')
-        if not helius_api_key:
-            logger.error("HELIUS_API_KEY no está definida en el entorno")
-            return None
-        url = f"https://api.helius.xyz/v0/token-metadata?api-key={helius_api_key}"
-        payload = {"mintAccounts": [mint_address]}
-        headers = {"Content-Type": "application/json"}
-        logger.info(f"Llamando a la API de Helius para obtener metadatos del token {mint_address}")
-        response = requests.post(url, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()
-        token_data = response.json()[0]
-        if 'onChainMetadata' in token_data and 'metadata' in token_data['onChainMetadata']:
-            metadata = token_data['onChainMetadata']['metadata']
-            if 'data' in metadata and 'uri' in metadata['data']:
-                ipfs_url = metadata['data']['uri']
-                logger.info(f"URI de IPFS encontrada: {ipfs_url}")
-                metadata = extract_token_metadata_from_ipfs(ipfs_url, mint_address)
-                if not metadata:
-                    logger.error(f"No se pudieron extraer los metadatos de IPFS para el token {mint_address}")
-                    return None
-                logger.info(f"Metadatos del token extraídos exitosamente para {mint_address}")
-                return metadata
-            else:
-                logger.error(f"No se encontró la URI en los metadatos del token {mint_address}")
-                return None
-        else:
-            logger.error(f"No se encontraron metadatos en la respuesta de Helius para el token {mint_address}")
-            return None
+        onchain_metadata = decode_transaction_metadata(webhook_data[0])
+        uris = {mint: metadata['uri'] for mint, metadata in onchain_metadata.items()}
+        return extract_tokens_metadata([mint_address], uris)[mint_address]
     except Exception as e:
         logger.error(f"Error al extraer metadatos del token: {str(e)}")
         return None
@@ -199,75 +403,286 @@ def format_telegram_message(token_metadata: Dict[str, Any], notable_data: Dict[s
     return message
 
 def load_protokols_cookies() -> Dict:
-    try:
-        with open('protokols_cookies.json', 'r') as f:
-            cookies_data = json.load(f)
-        cookies_dict = {}
-        for cookie in cookies_data:
-            if isinstance(cookie, dict) and 'name' in cookie and 'value' in cookie:
-                cookies_dict[cookie['name']] = cookie['value']
-        return cookies_dict
-    except Exception as e:
-        logger.error(f"Error al cargar las cookies de Protokols: {str(e)}")
-        return {}
+    """
+    Retorna las cookies de Protokols del almacén compartido (se recargan si el fichero cambia).
+    """
+    return get_cookie_store(config.PROTOKOLS_COOKIES_FILE).get()
+
+def fetch_notables_batch(usernames: List[str], deadline: Optional[Deadline] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Obtiene los notables de varios creadores en paralelo, una sola vez por username.
+    """
+    results: Dict[str, Optional[Dict[str, Any]]] = {username: None for username in usernames}
+    if not results:
+        return results
+    cookies = load_protokols_cookies()
+    if not cookies:
+        logger.error("No se pudieron cargar las cookies de Protokols")
+        return results
+    with ThreadPoolExecutor(max_workers=min(len(results), BATCH_WORKERS)) as executor:
+        futures = {}
+        for username in results:
+            try:
+                timeout = remaining_timeout(deadline, PROTOKOLS_TIMEOUT)
+            except DeadlineExceeded as e:
+                logger.error(f"Sin tiempo para consultar notables de @{username}: {str(e)}")
+                continue
+            futures[username] = executor.submit(get_notables, username, cookies, 5, timeout)
+        for username, future in futures.items():
+            try:
+                notable_data = future.result()
+            except Exception as e:
+                logger.error(f"Error al obtener notables para @{username}: {str(e)}")
+                continue
+            # Un error de Protokols (p. ej. circuito abierto) no equivale a cero notables
+            if notable_data.get('error'):
+                logger.error(f"Protokols no devolvió notables para @{username}: {notable_data['error']}")
+                continue
+            results[username] = notable_data
+            logger.info(f"Datos de notables obtenidos para @{username}: {json.dumps(notable_data)}")
+    return results
+
+def select_candidates(items: List[Dict[str, Any]], dedupe: bool = True) -> List[Dict[str, Any]]:
+    """
+    Inicializa el resultado de cada elemento del lote y retorna los que deben enriquecerse.
+    Con dedupe=False (reprocesado de notificaciones guardadas) no se consulta el índice de idempotencia.
+    """
+    candidates = []
+    for item in items:
+        item.update({'status': 'ignored', 'reason': None, 'token_metadata': None,
+                     'notable_data': None, 'telegram_message': None})
+        # Verificar si el feePayer está en nuestra lista de wallets conocidas
+        if not item['wallet_identifier']:
+            logger.info(f"Token ignorado: feePayer {item['fee_payer']} no está en la lista de wallets conocidas")
+            item['reason'] = 'unknown_fee_payer'
+        elif item['self_minted']:
+            logger.info(f"Token ignorado: creación fraudulenta detectada (nuestra wallet es el Payer)")
+            item['reason'] = 'fraudulent_creation'
+        elif not item['mint']:
+            logger.error("No se encontraron transferencias de token")
+            item['reason'] = 'no_mint'
+        elif dedupe and not get_idempotency_index().check_and_add(item['signature'], item['mint']):
+            logger.info(f"Token ignorado: entrega duplicada de {item['mint']} ({item['signature']})")
+            item['reason'] = 'duplicate'
+        else:
+            # Solo los elementos marcados aquí se desmarcan si su procesamiento falla
+            item['claimed'] = dedupe
+            candidates.append(item)
+    return candidates
+
+def release_item(item: Dict[str, Any]) -> None:
+    """
+    Desmarca en el índice de idempotencia un elemento cuyo procesamiento falló, para
+    que una nueva entrega de Helius (o un reprocesado) no se descarte como duplicada.
+    """
+    if item.pop('claimed', False):
+        get_idempotency_index().discard(item['signature'], item['mint'])
+        logger.info(f"Token {item['mint']} desmarcado en el índice de idempotencia ({item['reason']})")
+
+def release_failed(items: List[Dict[str, Any]]) -> None:
+    """
+    Desmarca los elementos que terminaron con error (ver release_item).
+    """
+    for item in items:
+        if item['status'] == 'error':
+            release_item(item)
+
+def finalize_item(item: Dict[str, Any], notable_data: Optional[Dict[str, Any]]) -> None:
+    """
+    Aplica el umbral de notables a un elemento con metadatos y genera su mensaje de Telegram.
+    """
+    token_metadata = item['token_metadata']
+    # Un elemento reanudado desde un reintento arrastra el motivo del fallo anterior
+    item['reason'] = None
+    if token_metadata['twitter']:
+        if notable_data is None:
+            item['status'] = 'error'
+            item['reason'] = 'notables_unavailable'
+            return
+        total_notables = notable_data.get('total', 0)
+        logger.info(f"Total de notables encontrados para @{token_metadata['twitter']}: {total_notables}")
+        if total_notables < config.MIN_NOTABLES:
+            logger.info(f"Token ignorado: el creador tiene menos de {config.MIN_NOTABLES} notables.")
+            item['reason'] = 'not_enough_notables'
+            return
+        if not notable_data.get('top', []):
+            logger.warning("La lista de top notables está vacía")
+    else:
+        notable_data = None
+    logger.info(f"Procesamiento completado para token {token_metadata['address']}")
+    item['notable_data'] = notable_data
+    item['telegram_message'] = format_telegram_message(token_metadata, notable_data, item['wallet_identifier'])
+    item['status'] = 'ready'
+
+def drop_expired(items: List[Dict[str, Any]], deadline: Deadline) -> List[Dict[str, Any]]:
+    """
+    Descarta los elementos pendientes si el deadline del webhook ha vencido.
+    Retorna los que pueden seguir procesándose.
+    """
+    if not deadline.expired:
+        return items
+    for item in items:
+        logger.warning(f"Token {item['mint']} descartado: presupuesto de {deadline.budget}s agotado")
+        item['status'] = 'dropped'
+        item['reason'] = 'deadline_exceeded'
+        deadline_metrics.record('dropped', deadline)
+    return []
 
-def process_webhook(webhook_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def process_webhook(webhook_data: List[Dict[str, Any]], deadline: Optional[Deadline] = None,
+                    dedupe: bool = True, retry: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """
+    Procesa todas las transacciones y mints de un webhook de Helius.
+    Retorna un resultado por elemento con su estado ('ready', 'ignored', 'dropped',
+    'retrying' o 'error') y, cuando está listo, el mensaje para Telegram. Cada etapa
+    usa como timeout el tiempo que le queda al deadline del webhook.
+    """
+    deadline = deadline or Deadline()
+    items: List[Dict[str, Any]] = []
     try:
-        # Verificar si es una creación de token y si nuestra wallet es el Payer
         if not webhook_data or not isinstance(webhook_data, list) or len(webhook_data) == 0:
             logger.error("Webhook vacío o formato inválido")
-            return None
-            
-        tx = webhook_data[0]
-        fee_payer = tx.get('feePayer')
-        
-        # Verificar si el feePayer está en nuestra lista de wallets conocidas
-        wallet_identifier = KNOWN_WALLETS.get(fee_payer)
-        if not wallet_identifier:
-            logger.info(f"Token ignorado: feePayer {fee_payer} no está en la lista de wallets conocidas")
-            return None
+            return []
         
-        # Verificar si es una creación de token (mint)
-        token_transfers = tx.get('tokenTransfers', [])
-        if token_transfers and token_transfers[0].get('mint') == token_transfers[0].get('toTokenAccount'):
-            # Si es una creación, verificar si nuestra wallet es el Payer
-            if fee_payer in KNOWN_WALLETS:
-                logger.info(f"Token ignorado: creación fraudulenta detectada (nuestra wallet es el Payer)")
-                return None
-        
-        token_metadata = extract_token_metadata(webhook_data)
-        if not token_metadata:
-            return None
-            
-        notable_data = None
-        if token_metadata['twitter']:
-            logger.info(f"Obteniendo notables para @{token_metadata['twitter']}")
-            cookies = load_protokols_cookies()
-            if not cookies:
-                logger.error("No se pudieron cargar las cookies de Protokols")
-                return None
-            notable_data = get_notables(token_metadata['twitter'], cookies)
-            logger.info(f"Datos de notables obtenidos: {json.dumps(notable_data, indent=2)}")
-            if notable_data:
-                total_notables = notable_data.get('total', 0)
-                logger.info(f"Total de notables encontrados: {total_notables}")
-                if total_notables < 5:
-                    logger.info("Token ignorado: el creador tiene menos de 5 notables.")
-                    return None
-                if not notable_data.get('top', []):
-                    logger.warning("La lista de top notables está vacía")
-        logger.info(f"Procesamiento completado para token {token_metadata['address']}")
-        telegram_message = format_telegram_message(token_metadata, notable_data, wallet_identifier)
-        return {
-            "token_metadata": token_metadata,
-            "notable_data": notable_data,
-            "telegram_message": telegram_message
-        }
+        items = extract_batch_items(webhook_data)
+        return process_items(items, deadline, dedupe, retry)
     except Exception as e:
         logger.error(f"Error inesperado: {str(e)}")
-        return None
+        # Lo ya marcado no llegó a procesarse: una nueva entrega debe poder reintentarlo
+        for item in items:
+            if item.get('status') not in ('sent', 'retrying'):
+                release_item(item)
+        return []
+
+def process_items(items: List[Dict[str, Any]], deadline: Deadline, dedupe: bool = True,
+                  retry: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """
+    Enriquece y evalúa elementos ya expandidos (ver extract_batch_items): selección,
+    metadatos, notables y umbral. Retorna los mismos elementos con su estado. Con retry
+    (por defecto RETRY_ENABLED) los tokens sin metadatos todavía se reintentan más tarde
+    y, si se recuperan, se completan y se envían fuera de esta llamada.
+    """
+    retry = config.RETRY_ENABLED if retry is None else retry
+    candidates = select_candidates(items, dedupe)
+    
+    # Una llamada a Helius por lote solo para los mints sin URI decodificada localmente
+    metadata_by_mint = extract_tokens_metadata([item['mint'] for item in candidates], known_uris(candidates), deadline)
+    candidates = drop_expired(candidates, deadline)
+    ready = []
+    for item in candidates:
+        token_metadata = metadata_by_mint.get(item['mint'])
+        if not token_metadata:
+            item['status'] = 'retrying' if retry and schedule_metadata_retry(item) else 'error'
+            item['reason'] = 'metadata_unavailable'
+            continue
+        item['token_metadata'] = token_metadata
+        ready.append(item)
+    
+    # Una consulta a Protokols por creador distinto
+    usernames = sorted({item['token_metadata']['twitter'] for item in ready if item['token_metadata']['twitter']})
+    notables_by_username = fetch_notables_batch(usernames, deadline)
+    for item in drop_expired(ready, deadline):
+        finalize_item(item, notables_by_username.get(item['token_metadata']['twitter']))
+        if item['reason'] == 'notables_unavailable' and retry and schedule_notables_retry(item):
+            item['status'] = 'retrying'
+    return items
+
+def schedule_metadata_retry(item: Dict[str, Any]) -> bool:
+    """
+    Programa los reintentos de metadatos de un token que aún no los tiene publicados.
+    Retorna False si no se pudo programar (sin mint, o ya pendiente).
+    """
+    mint = item['mint']
+    if not mint:
+        return False
+    uri = (item.get('onchain_metadata') or {}).get('uri')
+    return retry_scheduler.schedule(
+        'metadata', mint,
+        attempt=lambda: extract_tokens_metadata([mint], {mint: uri} if uri else None, Deadline())[mint],
+        on_success=lambda token_metadata: resume_item(item, token_metadata),
+        on_give_up=lambda: release_item(item)
+    )
+
+def schedule_notables_retry(item: Dict[str, Any]) -> bool:
+    """
+    Programa los reintentos de notables de un token cuyo creador no se pudo consultar
+    (Protokols caído o con el circuito abierto). Retorna False si no se pudo programar.
+    """
+    twitter = item['token_metadata']['twitter']
+    return retry_scheduler.schedule(
+        'notables', item['mint'],
+        attempt=lambda: fetch_notables_batch([twitter], Deadline()).get(twitter),
+        on_success=lambda notable_data: complete_item(item, notable_data, Deadline()),
+        on_give_up=lambda: release_item(item)
+    )
+
+def resume_item(item: Dict[str, Any], token_metadata: Dict[str, Any]) -> None:
+    """
+    Completa un elemento cuyos metadatos llegaron en un reintento: notables, umbral y
+    alerta, con un presupuesto de tiempo nuevo.
+    """
+    deadline = Deadline()
+    item['token_metadata'] = token_metadata
+    twitter = token_metadata['twitter']
+    notable_data = fetch_notables_batch([twitter], deadline).get(twitter) if twitter else None
+    complete_item(item, notable_data, deadline)
+
+def complete_item(item: Dict[str, Any], notable_data: Optional[Dict[str, Any]], deadline: Deadline) -> None:
+    """
+    Aplica el umbral a un elemento fuera del webhook original y envía la alerta si está
+    listo; si los notables siguen sin estar disponibles se reintentan más tarde.
+    """
+    finalize_item(item, notable_data)
+    if item['reason'] == 'notables_unavailable' and schedule_notables_retry(item):
+        item['status'] = 'retrying'
+    elif item.get('telegram_message') and item['status'] == 'ready':
+        send_ready_item(item, deadline)
+    release_failed([item])
 
-def send_telegram_message(message: str, image_url: str = None) -> bool:
+def send_ready_item(item: Dict[str, Any], deadline: Deadline) -> None:
+    """
+    Envía la alerta de un elemento listo respetando su deadline: si vence se descarta
+    y, si queda poco margen, se degrada a mensaje de texto sin imagen.
+    """
+    if not drop_expired([item], deadline):
+        return
+    image_url = item['token_metadata'].get('image')
+    degraded = bool(image_url) and deadline.remaining() < config.TELEGRAM_PHOTO_MIN_BUDGET
+    if degraded:
+        logger.warning(f"Poco margen para {item['mint']}: alerta enviada sin imagen")
+        image_url = None
+    if send_telegram_message(item['telegram_message'], image_url, deadline):
+        logger.info(f"Notificación enviada exitosamente a Telegram para {item['mint']}")
+        item['status'] = 'sent'
+        if degraded:
+            item['reason'] = 'degraded_no_image'
+        deadline_metrics.record('degraded' if degraded else 'on_time', deadline)
+    else:
+        logger.error(f"Error al enviar la notificación a Telegram para {item['mint']}")
+        item['status'] = 'error'
+        item['reason'] = 'telegram_failed'
+
+def build_telegram_request(token: str, channel_id: str, message: str, image_url: str = None):
+    """
+    Construye la URL y el payload para sendPhoto o sendMessage según haya imagen.
+    """
+    if image_url:
+        url = f"https://api.telegram.org/bot{token}/sendPhoto"
+        payload = {
+            'chat_id': channel_id,
+            'photo': image_url,
+            'caption': message,
+            'parse_mode': 'HTML'
+        }
+    else:
+        url = f"https://api.telegram.org/bot{token}/sendMessage"
+        payload = {
+            'chat_id': channel_id,
+            'text': message,
+            'parse_mode': 'HTML'
+        }
+    return url, payload
+
+def send_telegram_message(message: str, image_url: str = None, deadline: Optional[Deadline] = None) -> bool:
     token = os.getenv('TELEGRAM_BOT_TOKEN')
     channel_id = os.getenv('TELEGRAM_CHANNEL_ID')
     if not token or not channel_id:
@@ -277,22 +692,8 @@ def send_telegram_message(message: str, image_url: str = None) -> bool:
         channel_id = f"-100{str(channel_id).lstrip('-')}"
         logger.info(f"Channel ID ajustado: {channel_id}")
     try:
-        if image_url:
-            url = f"https://api.telegram.org/bot{token}/sendPhoto"
-            payload = {
-                'chat_id': channel_id,
-                'photo': image_url,
-                'caption': message,
-                'parse_mode': 'HTML'
-            }
-        else:
-            url = f"https://api.telegram.org/bot{token}/sendMessage"
-            payload = {
-                'chat_id': channel_id,
-                'text': message,
-                'parse_mode': 'HTML'
-            }
-        response = requests.post(url, data=payload, timeout=TIMEOUT)
+        url, payload = build_telegram_request(token, channel_id, message, image_url)
+        response = http_client.post(url, data=payload, timeout=remaining_timeout(deadline, TIMEOUT))
         response.raise_for_status()
         logger.info(f"Respuesta Telegram: {response.status_code} {response.text}")
         logger.info("Mensaje enviado a Telegram correctamente.")
@@ -303,23 +704,38 @@ def send_telegram_message(message: str, image_url: str = None) -> bool:
 
 @app.route('/status', methods=['GET'])
 def status():
-    return jsonify({"status": "healthy"}), 200
+    return jsonify({"status": "healthy", "prefilter": prefilter.metrics(),
+                    "idempotency": get_idempotency_index().metrics(), "deadline": deadline_metrics.metrics(),
+                    "helius_batcher": helius_batcher.metrics(), "das_batcher": das_batcher.metrics(),
+                    "retry": retry_scheduler.metrics(), "http": http_client.metrics(),
+                    "cookies": get_cookie_store(config.PROTOKOLS_COOKIES_FILE).metrics(),
+                    "ipfs": ipfs_fetcher.metrics(), "protokols_rate": get_rate_scheduler().metrics(),
+                    "single_flight": {notables_flights.name: notables_flights.metrics()}}), 200
 
 @app.route('/webhook', methods=['POST'])
 def webhook():
     try:
-        data = request.get_json(force=True)
-        logger.info(f"Webhook recibido: {json.dumps(data)[:500]}...")
-        result = process_webhook(data)
-        if result and result.get('telegram_message'):
-            success = send_telegram_message(result['telegram_message'], result['token_metadata'].get('image'))
-            if success:
-                logger.info("Notificación enviada exitosamente a Telegram")
-            else:
-                logger.error("Error al enviar la notificación a Telegram")
-        else:
+        # El presupuesto de tiempo de cada token empieza al recibir el webhook
+        deadline = Deadline()
+        body = request.get_data()
+        data = prefilter.filter_body(body)
+        if not data:
+            return jsonify({"status": "success", "results": []}), 200
+        logger.info(f"Webhook recibido: {body[:500].decode('utf-8', errors='replace')}...")
+        results = process_webhook(data, deadline)
+        for result in results:
+            if result.get('telegram_message') and result['status'] == 'ready':
+                send_ready_item(result, deadline)
+        release_failed(results)
+        if not any(result['status'] == 'sent' for result in results):
             logger.error("No se pudo generar el mensaje para Telegram")
-        return jsonify({"status": "success"}), 200
+        return jsonify({
+            "status": "success",
+            "results": [
+                {"mint": r['mint'], "signature": r['signature'], "status": r['status'], "reason": r['reason']}
+                for r in results
+            ]
+        }), 200
     except Exception as e:
         logger.error(f"Error procesando webhook: {str(e)}")
         return jsonify({"status": "error", "message": str(e)}), 500
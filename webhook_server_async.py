@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Variante asíncrona (ASGI) del webhook server.
+
+Mantiene el mismo contrato de /webhook y /status que webhook_server.py, pero
+responde a Helius inmediatamente y ejecuta el enriquecimiento (Helius → IPFS →
+Protokols → Telegram) como tareas asyncio sobre clientes HTTP compartidos con
+keep-alive, de modo que un solo proceso atiende cientos de tokens en vuelo.
+
+Uso:
+    hypercorn webhook_server_async:app --bind 0.0.0.0:$PORT
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Set
+
+import httpx
+from quart import Quart, request, jsonify
+
+from protokols_smart_followers_fast import build_headers, build_smart_followers_url, parse_smart_followers
+from src.utils.config import config
+from src.utils.deadline import Deadline, remaining_timeout
+from src.utils.rate_scheduler import LIVE, get_rate_scheduler
+from webhook_server import (
+    HELIUS_BATCH_SIZE,
+    HELIUS_TIMEOUT,
+    IPFS_TIMEOUT,
+    PROTOKOLS_TIMEOUT,
+    TIMEOUT,
+    build_telegram_request,
+    deadline_metrics,
+    drop_expired,
+    extract_batch_items,
+    extract_helius_uri,
+    finalize_item,
+    get_ipfs_fallback_url,
+    known_uris,
+    load_protokols_cookies,
+    parse_ipfs_metadata,
+    prefilter,
+    release_failed,
+    release_item,
+    select_candidates,
+)
+
+logger = logging.getLogger(__name__)
+
+# Máximo de tokens enriqueciéndose a la vez y tamaño del pool de conexiones
+MAX_IN_FLIGHT = int(os.getenv('ASYNC_MAX_IN_FLIGHT', '200'))
+MAX_CONNECTIONS = int(os.getenv('ASYNC_MAX_CONNECTIONS', '100'))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('ASYNC_MAX_KEEPALIVE_CONNECTIONS', '20'))
+UPSTREAM_TIMEOUT = 10  # segundos
+
+app = Quart(__name__)
+
+# Cliente HTTP compartido y tareas de enriquecimiento en curso
+http_client: Optional[httpx.AsyncClient] = None
+in_flight: Set[asyncio.Task] = set()
+enrichment_slots: Optional[asyncio.Semaphore] = None
+stats = {
+    'webhooks_received': 0,
+    'items_received': 0,
+    'items_sent': 0,
+    'items_ignored': 0,
+    'items_dropped': 0,
+    'items_failed': 0,
+    'tasks_failed': 0
+}
+
+@app.before_serving
+async def startup() -> None:
+    """Crea el cliente HTTP compartido con keep-alive."""
+    global http_client, enrichment_slots
+    http_client = httpx.AsyncClient(
+        timeout=UPSTREAM_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS
+        )
+    )
+    enrichment_slots = asyncio.Semaphore(MAX_IN_FLIGHT)
+    logger.info(f"Cliente HTTP asíncrono iniciado (max_connections={MAX_CONNECTIONS})")
+
+@app.after_serving
+async def shutdown() -> None:
+    """Espera las tareas en curso y cierra el cliente HTTP."""
+    if in_flight:
+        logger.info(f"Esperando {len(in_flight)} tareas de enriquecimiento en curso")
+        await asyncio.gather(*in_flight, return_exceptions=True)
+    if http_client is not None:
+        await http_client.aclose()
+
+async def fetch_helius_token_uris(mint_addresses: List[str], deadline: Optional[Deadline] = None) -> Dict[str, str]:
+    """
+    Obtiene las URIs de metadatos de varios tokens con una petición a Helius por lote.
+    """
+    uris = {}
+    helius_api_key = os.getenv('HELIUS_API_KEY')
+    if not helius_api_key:
+        logger.error("HELIUS_API_KEY no está definida en el entorno")
+        return uris
+    url = f"https://api.helius.xyz/v0/token-metadata?api-key={helius_api_key}"
+    for i in range(0, len(mint_addresses), HELIUS_BATCH_SIZE):
+        chunk = mint_addresses[i:i + HELIUS_BATCH_SIZE]
+        try:
+            response = await http_client.post(url, json={"mintAccounts": chunk},
+                                              timeout=remaining_timeout(deadline, HELIUS_TIMEOUT))
+            response.raise_for_status()
+            for position, token_data in enumerate(response.json()):
+                mint_address = token_data.get('account') or chunk[position]
+                uri = extract_helius_uri(token_data)
+                if uri:
+                    uris[mint_address] = uri
+                else:
+                    logger.error(f"No se encontró la URI en los metadatos del token {mint_address}")
+        except Exception as e:
+            logger.error(f"Error al obtener metadatos de Helius para {chunk}: {str(e)}")
+    return uris
+
+async def extract_token_metadata_from_ipfs(ipfs_url: str, mint_address: str,
+                                           deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+    """
+    Descarga el JSON de metadatos de IPFS, con fallback a ipfs.io para cloudflare-ipfs.com.
+    """
+    urls = [ipfs_url]
+    if "cloudflare-ipfs.com" in ipfs_url:
+        fallback_url = get_ipfs_fallback_url(ipfs_url)
+        if fallback_url:
+            urls.append(fallback_url)
+    for url in urls:
+        try:
+            response = await http_client.get(url, timeout=remaining_timeout(deadline, IPFS_TIMEOUT))
+            response.raise_for_status()
+            return parse_ipfs_metadata(response.json(), mint_address)
+        except Exception as e:
+            logger.warning(f"Error al descargar metadatos de IPFS desde {url}: {str(e)}")
+    logger.error(f"No se pudieron extraer los metadatos de IPFS para el token {mint_address}")
+    return None
+
+async def get_notables(username: str, cookies: Dict, top_n: int = 5,
+                      deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+    """
+    Obtiene el total y el top N de notables de un creador desde Protokols.
+    """
+    # Las cookies van en la cabecera para no mezclarlas en el cliente compartido
+    headers = build_headers(username)
+    headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in cookies.items())
+    scheduler = get_rate_scheduler()
+    try:
+        # La espera por ficha bloquea, así que se hace fuera del bucle de eventos
+        timeout = remaining_timeout(deadline, PROTOKOLS_TIMEOUT)
+        waited = await asyncio.get_running_loop().run_in_executor(None, scheduler.acquire, LIVE, timeout)
+        response = await http_client.get(build_smart_followers_url(username, top_n), headers=headers,
+                                         timeout=max(0.1, timeout - waited))
+        scheduler.observe(response)
+        if response.status_code != 200:
+            logger.error(f"Error en la solicitud a Protokols para @{username}: {response.status_code}")
+            return None
+        return parse_smart_followers(response.json(), top_n)
+    except Exception as e:
+        logger.error(f"Error al obtener notables para @{username}: {str(e)}")
+        return None
+
+async def send_telegram_message(message: str, image_url: str = None, deadline: Optional[Deadline] = None) -> bool:
+    """
+    Envía el mensaje al canal de Telegram.
+    """
+    token = os.getenv('TELEGRAM_BOT_TOKEN')
+    channel_id = os.getenv('TELEGRAM_CHANNEL_ID')
+    if not token or not channel_id:
+        logger.error("TELEGRAM_BOT_TOKEN o TELEGRAM_CHANNEL_ID no están definidos en el entorno.")
+        return False
+    if not str(channel_id).startswith('-100'):
+        channel_id = f"-100{str(channel_id).lstrip('-')}"
+    try:
+        url, payload = build_telegram_request(token, channel_id, message, image_url)
+        response = await http_client.post(url, data=payload, timeout=remaining_timeout(deadline, TIMEOUT))
+        response.raise_for_status()
+        return True
+    except Exception as e:
+        logger.error(f"Error al enviar mensaje a Telegram: {str(e)}")
+        return False
+
+async def send_ready_item(item: Dict[str, Any], deadline: Deadline) -> None:
+    """
+    Envía la alerta de un elemento listo respetando su deadline, igual que webhook_server.send_ready_item.
+    """
+    if not drop_expired([item], deadline):
+        return
+    image_url = item['token_metadata'].get('image')
+    degraded = bool(image_url) and deadline.remaining() < config.TELEGRAM_PHOTO_MIN_BUDGET
+    if degraded:
+        logger.warning(f"Poco margen para {item['mint']}: alerta enviada sin imagen")
+        image_url = None
+    if await send_telegram_message(item['telegram_message'], image_url, deadline):
+        logger.info(f"Notificación enviada exitosamente a Telegram para {item['mint']}")
+        item['status'] = 'sent'
+        if degraded:
+            item['reason'] = 'degraded_no_image'
+        deadline_metrics.record('degraded' if degraded else 'on_time', deadline)
+    else:
+        item['status'] = 'error'
+        item['reason'] = 'telegram_failed'
+
+def release_unsent(items: List[Dict[str, Any]]) -> None:
+    """Desmarca en el índice de idempotencia los elementos que no llegaron a enviarse."""
+    for item in items:
+        if item['status'] != 'sent':
+            release_item(item)
+
+async def process_webhook(webhook_data: List[Dict[str, Any]], deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+    """
+    Procesa todas las transacciones y mints de un webhook y envía las alertas a Telegram.
+    Retorna un resultado por elemento, igual que webhook_server.process_webhook.
+    """
+    deadline = deadline or Deadline()
+    loop = asyncio.get_running_loop()
+    items = extract_batch_items(webhook_data)
+    # El índice de idempotencia escribe en SQLite (compartido entre procesos): fuera del bucle de eventos
+    candidates = await loop.run_in_executor(None, select_candidates, items)
+    stats['items_received'] += len(items)
+
+    try:
+        async with enrichment_slots:
+            # Helius solo para los mints cuya URI no se pudo decodificar del propio webhook
+            uris = known_uris(candidates)
+            missing = [item['mint'] for item in candidates if item['mint'] not in uris]
+            if missing:
+                uris.update(await fetch_helius_token_uris(missing, deadline))
+            metadata_list = await asyncio.gather(*[
+                extract_token_metadata_from_ipfs(uris[item['mint']], item['mint'], deadline) if item['mint'] in uris
+                else asyncio.sleep(0, result=None)
+                for item in candidates
+            ])
+            ready = []
+            for item, token_metadata in zip(drop_expired(candidates, deadline), metadata_list):
+                if not token_metadata:
+                    item['status'] = 'error'
+                    item['reason'] = 'metadata_unavailable'
+                    continue
+                item['token_metadata'] = token_metadata
+                ready.append(item)
+
+            # Una consulta a Protokols por creador distinto
+            usernames = sorted({item['token_metadata']['twitter'] for item in ready if item['token_metadata']['twitter']})
+            notables_by_username = {}
+            if usernames:
+                # El almacén de cookies puede leer el fichero: se consulta fuera del bucle de eventos
+                cookies = await loop.run_in_executor(None, load_protokols_cookies)
+                if cookies:
+                    notables = await asyncio.gather(*[get_notables(username, cookies, deadline=deadline) for username in usernames])
+                    notables_by_username = dict(zip(usernames, notables))
+                else:
+                    logger.error("No se pudieron cargar las cookies de Protokols")
+            for item in drop_expired(ready, deadline):
+                finalize_item(item, notables_by_username.get(item['token_metadata']['twitter']))
+
+            for item in items:
+                if item.get('telegram_message') and item['status'] == 'ready':
+                    await send_ready_item(item, deadline)
+    except Exception:
+        # Lo ya marcado no llegó a procesarse: una nueva entrega debe poder reintentarlo
+        await loop.run_in_executor(None, release_unsent, items)
+        raise
+    await loop.run_in_executor(None, release_failed, items)
+
+    for item in items:
+        if item['status'] == 'sent':
+            stats['items_sent'] += 1
+        elif item['status'] == 'ignored':
+            stats['items_ignored'] += 1
+        elif item['status'] == 'dropped':
+            stats['items_dropped'] += 1
+        else:
+            stats['items_failed'] += 1
+    return items
+
+def schedule_processing(webhook_data: List[Dict[str, Any]], deadline: Optional[Deadline] = None) -> asyncio.Task:
+    """Lanza el procesamiento del webhook como tarea y la registra como en vuelo."""
+    task = asyncio.create_task(process_webhook(webhook_data, deadline))
+    in_flight.add(task)
+    task.add_done_callback(finish_processing)
+    return task
+
+def finish_processing(task: asyncio.Task) -> None:
+    """Retira la tarea de las que están en vuelo y registra su excepción si falló."""
+    in_flight.discard(task)
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        stats['tasks_failed'] += 1
+        logger.error(f"Error en el procesamiento del webhook: {str(error)}", exc_info=error)
+
+@app.route('/status', methods=['GET'])
+async def status():
+    return jsonify({"status": "healthy", "in_flight": len(in_flight), "stats": stats,
+                    "prefilter": prefilter.metrics(), "deadline": deadline_metrics.metrics(),
+                    "protokols_rate": get_rate_scheduler().metrics()}), 200
+
+@app.route('/webhook', methods=['POST'])
+async def webhook():
+    try:
+        # El presupuesto de tiempo de cada token empieza al recibir el webhook
+        deadline = Deadline()
+        data = prefilter.filter_body(await request.get_data())
+        if not data:
+            return jsonify({"status": "success", "accepted": 0}), 200
+        stats['webhooks_received'] += 1
+        schedule_processing(data, deadline)
+        return jsonify({"status": "success", "accepted": len(data)}), 200
+    except Exception as e:
+        logger.error(f"Error procesando webhook: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+if __name__ == "__main__":
+    app.run(host='0.0.0.0', port=int(os.getenv('PORT', '3003')))